@@ -16,7 +16,27 @@ def route_lambda(name):
 	return lambda args: f"{name}({', '.join(args)});"
 
 
-def bind_std_vector(gen, T_conv, bound_name=None):
+def release_gil(gen, name, features=None, is_method=False):
+	"""Return the features to bind a function or method releasing the GIL while its native code runs (CPython only).
+
+	Other Python threads run meanwhile so the call must not touch any Python object, this routes the call through _CallWithoutGIL
+	and cannot be combined with another route."""
+	features = dict(features or {})
+
+	if gen.get_language() == 'CPython':
+		assert 'route' not in features
+
+		if is_method:
+			call = lambda args: f"{args[0]}->{name}({', '.join(args[1:])})"
+		else:
+			call = lambda args: f"{name}({', '.join(args)})"
+
+		features['route'] = lambda args: f"_CallWithoutGIL([&]() {{ return {call(args)}; }});"
+
+	return features
+
+
+def bind_std_vector(gen, T_conv, bound_name=None, bulk_bytes=False):
 	if gen.get_language() == 'CPython':
 		PySequence_T_type = f'PySequenceOf{T_conv.bound_name}'
 		gen.bind_type(lib.cpython.stl.PySequenceToStdVectorConverter(PySequence_T_type, T_conv))
@@ -54,6 +74,14 @@ def bind_std_vector(gen, T_conv, bound_name=None):
 	gen.bind_method(conv, 'size', 'size_t', [])
 	gen.bind_method(conv, 'at', repr(T_conv.ctype), ['size_t idx'], features={'validate_arg_in': [validate_std_vector_at_idx]})
 
+	# bulk transfer of the list content in a single call, the list storage is exchanged as raw native bytes
+	if bulk_bytes and gen.get_language() == 'CPython':
+		gen.bind_method(conv, 'tobytes', 'PyObject *', [], {'route': route_lambda(f'_StdVectorToBytes<{T_conv.ctype}>')})
+		gen.bind_method(conv, 'frombytes', 'bool', ['PyObject *buffer'], {
+			'route': route_lambda(f'_StdVectorFromBytes<{T_conv.ctype}>'),
+			'check_rval': check_bool_rval_lambda(gen, 'Buffer is not a bytes-like object or its size is not a multiple of the list element size')
+		})
+
 	gen.end_class(conv)
 	return conv
 
@@ -190,6 +218,13 @@ def bind_clock(gen):
 	gen.bind_function('hg::skip_clock', 'void', [], bound_name='SkipClock')
 
 
+def bind_worker_pool(gen):
+	gen.add_include('foundation/worker_pool.h')
+
+	gen.bind_function('hg::set_worker_count', 'void', ['int count'], release_gil(gen, 'hg::set_worker_count'), bound_name='SetWorkerCount')
+	gen.bind_function('hg::get_worker_count', 'int', [], bound_name='GetWorkerCount')
+
+
 def bind_input(gen):
 	gen.add_include('platform/input_system.h')
 
@@ -597,12 +632,35 @@ def bind_recast_detour(gen):
 	nav_mesh_query = gen.bind_ptr('dtNavMeshQuery *', bound_name='NavMeshQuery')
 	gen.bind_function('hg::CreateNavMeshQuery', 'dtNavMeshQuery *', ['const dtNavMesh *mesh'])
 	
-	gen.bind_function('hg::LoadNavMeshFromFile', 'dtNavMesh *', ['const char *path'])
-	gen.bind_function('hg::LoadNavMeshFromAssets', 'dtNavMesh *', ['const char *name'])
+	gen.bind_function('hg::LoadNavMeshFromFile', 'dtNavMesh *', ['const char *path'], release_gil(gen, 'hg::LoadNavMeshFromFile'))
+	gen.bind_function('hg::LoadNavMeshFromAssets', 'dtNavMesh *', ['const char *name'], release_gil(gen, 'hg::LoadNavMeshFromAssets'))
 	gen.bind_function('hg::DestroyNavMesh', 'void', ['dtNavMesh *mesh'])
 	gen.bind_function('hg::DestroyNavMeshQuery', 'void', ['dtNavMeshQuery *mesh'])
 	gen.bind_function('hg::DrawNavMesh', 'void', ['const dtNavMesh *mesh', 'bgfx::ViewId view_id', 'const bgfx::VertexLayout &vtx_decl', 'bgfx::ProgramHandle prg', 'const std::vector<hg::UniformSetValue> &values', 'const std::vector<hg::UniformSetTexture> &textures', 'hg::RenderState state'])
-	gen.bind_function('hg::FindNavigationPathTo', 'std::vector<hg::Vec3>', ['const dtNavMeshQuery *query', 'const hg::Vec3 &from', 'const hg::Vec3 &to'])
+	gen.bind_function('hg::FindNavigationPathTo', 'std::vector<hg::Vec3>', ['const dtNavMeshQuery *query', 'const hg::Vec3 &from', 'const hg::Vec3 &to'], release_gil(gen, 'hg::FindNavigationPathTo'))
+
+	# NavMeshInput
+	nav_mesh_input = gen.begin_class('hg::NavMeshInput')
+	gen.bind_members(nav_mesh_input, ['std::vector<hg::Vec3> vtx', 'std::vector<int> idx'])
+	gen.end_class(nav_mesh_input)
+
+	gen.bind_function('hg::AddGeometryToNavMeshInput', 'void', ['hg::NavMeshInput &input', 'const hg::Geometry &geo', 'const hg::Mat4 &world'])
+	gen.bind_function('hg::CreateNavMesh', 'dtNavMesh *', ['const hg::NavMeshInput &input', 'float radius', 'float height', 'float slope', 'float climb'], release_gil(gen, 'hg::CreateNavMesh'))
+
+	# NavMeshTileCache
+	nav_mesh_tile_cache = gen.bind_ptr('hg::NavMeshTileCache *', bound_name='NavMeshTileCache')
+
+	gen.bind_function('hg::CreateNavMeshTileCache', 'hg::NavMeshTileCache *', ['const hg::NavMeshInput &input', 'float radius', 'float height', 'float slope', 'float climb', '?int tile_size', '?int max_obstacles'], release_gil(gen, 'hg::CreateNavMeshTileCache'))
+	gen.bind_function('hg::DestroyNavMeshTileCache', 'void', ['hg::NavMeshTileCache *cache'])
+	gen.bind_function('hg::GetNavMeshTileCacheNavMesh', 'dtNavMesh *', ['hg::NavMeshTileCache *cache'])
+
+	gen.bind_function('hg::RebuildNavMeshTileCacheArea', 'void', ['hg::NavMeshTileCache *cache', 'const hg::NavMeshInput &input', 'const hg::MinMax &area'])
+
+	gen.bind_function('hg::AddNavMeshCylinderObstacle', 'uint32_t', ['hg::NavMeshTileCache *cache', 'const hg::Vec3 &pos', 'float radius', 'float height'])
+	gen.bind_function('hg::AddNavMeshBoxObstacle', 'uint32_t', ['hg::NavMeshTileCache *cache', 'const hg::MinMax &box'])
+	gen.bind_function('hg::RemoveNavMeshObstacle', 'bool', ['hg::NavMeshTileCache *cache', 'uint32_t obstacle'])
+
+	gen.bind_function('hg::UpdateNavMeshTileCache', 'bool', ['hg::NavMeshTileCache *cache', '?hg::time_ns t_budget'], release_gil(gen, 'hg::UpdateNavMeshTileCache'))
 
 	# DetourCrowd	
 	gen.add_include('DetourCrowd.h')
@@ -1094,6 +1152,25 @@ def bind_scene(gen):
 
 	bind_std_vector(gen, contact)
 
+	gen.bind_named_enum('hg::CollisionEventType', ['CET_Begin', 'CET_Persist', 'CET_End'], storage_type='uint8_t')
+
+	collision_event = gen.begin_class('hg::CollisionEvent')
+	gen.bind_members(collision_event, ['int node_a_idx', 'int node_b_idx', 'uint32_t contact_first', 'uint32_t contact_count', 'hg::CollisionEventType type'])
+	gen.end_class(collision_event)
+
+	bind_std_vector(gen, collision_event, bulk_bytes=True)
+
+	collision_contact = gen.begin_class('hg::CollisionContact')
+	gen.bind_members(collision_contact, ['int node_a_idx', 'int node_b_idx', 'hg::Vec3 P', 'hg::Vec3 N', 'float d'])
+	gen.end_class(collision_contact)
+
+	bind_std_vector(gen, collision_contact, bulk_bytes=True)
+
+	collision_events = gen.begin_class('hg::CollisionEvents')
+	gen.bind_constructor(collision_events, [])
+	gen.bind_members(collision_events, ['std::vector<hg::CollisionEvent> events', 'std::vector<hg::CollisionContact> contacts'])
+	gen.end_class(collision_events)
+
 	rigid_body = gen.begin_class('hg::RigidBody')
 
 	gen.bind_method(rigid_body, 'IsValid', 'bool', [])
@@ -1282,6 +1359,7 @@ def bind_scene(gen):
 	gen.bind_constructor(scene, [])
 
 	gen.bind_method(scene, 'GetNode', 'hg::Node', ['const std::string &name'])
+	gen.bind_method(scene, 'GetNodeFromIndex', 'hg::Node', ['uint32_t idx'])
 	gen.bind_method(scene, 'GetNodeEx', 'hg::Node', ['const std::string &path'])
 
 	gen.bind_method(scene, 'GetNodes', 'std::vector<hg::Node>', [])
@@ -1301,8 +1379,25 @@ def bind_scene(gen):
 	gen.bind_method(scene, 'ReadyWorldMatrices', 'void', [])
 	gen.bind_method(scene, 'ComputeWorldMatrices', 'void', [])
 
+	gen.bind_method(scene, 'SetParallelWorldMatrices', 'void', ['bool enable'])
+	gen.bind_method(scene, 'GetParallelWorldMatrices', 'bool', [])
+	gen.bind_method(scene, 'SetParallelDisplayLists', 'void', ['bool enable'])
+	gen.bind_method(scene, 'GetParallelDisplayLists', 'bool', [])
+	gen.bind_method(scene, 'GetComputedWorldMatrixCount', 'size_t', [])
+
 	gen.bind_method(scene, 'Update', 'void', ['hg::time_ns dt'])
 
+	# batched transform access, a single native loop over a node list
+	gen.bind_method_overloads(scene, 'SetTransformsTRS', expand_std_vector_proto(gen, [
+		('void', ['const std::vector<hg::Node> &nodes', 'const std::vector<hg::Vec3> &pos', 'const std::vector<hg::Vec3> &rot', 'const std::vector<hg::Vec3> &scl'], [])
+	]))
+	gen.bind_method_overloads(scene, 'GetTransformsTRS', expand_std_vector_proto(gen, [
+		('void', ['const std::vector<hg::Node> &nodes', 'std::vector<hg::Vec3> &pos', 'std::vector<hg::Vec3> &rot', 'std::vector<hg::Vec3> &scl'], {'arg_out': ['pos', 'rot', 'scl']})
+	]))
+	gen.bind_method_overloads(scene, 'GetNodesWorldMatrices', expand_std_vector_proto(gen, [
+		('std::vector<hg::Mat4>', ['const std::vector<hg::Node> &nodes'], [])
+	]), bound_name='GetWorldMatrices')
+
 	#
 	gen.bind_method(scene, 'GetSceneAnims', 'std::vector<hg::SceneAnimRef>', [])
 	gen.bind_method(scene, 'GetSceneAnim', 'hg::SceneAnimRef', ['const char *name'])
@@ -1328,6 +1423,7 @@ def bind_scene(gen):
 
 	#
 	gen.bind_method(scene, 'GarbageCollect', 'size_t', [])
+	gen.bind_method(scene, 'CollectResourceReferences', 'void', ['hg::PipelineResourceReferences &references'])
 	gen.bind_method(scene, 'Clear', 'void', [])
 
 	#
@@ -1455,6 +1551,8 @@ def bind_scene(gen):
 
 	gen.bind_function('hg::CreateScript', 'hg::Node', ['hg::Scene &scene', '?const std::string &path'])
 
+	gen.bind_function('hg::EvictResourcesOverBudget', 'size_t', ['hg::PipelineResources &resources', 'const hg::Scene &scene'])
+
 	protos = [
 		('hg::Node', ['hg::Scene &scene', 'float radius', 'const hg::Mat4 &mtx', 'const hg::ModelRef &model_ref', 'std::vector<hg::Material> &materials'], {}),
 		('hg::Node', ['hg::Scene &scene', 'float radius', 'const hg::Mat4 &mtx', 'const hg::ModelRef &model_ref', 'std::vector<hg::Material> &materials', 'float mass'], {}),
@@ -1482,9 +1580,9 @@ def bind_scene(gen):
 		("LSSF_DoNotChangeCurrentCameraIfValid", "hg::LSSF_DoNotChangeCurrentCameraIfValid"),
 	], 'LoadSaveSceneFlags')
 
-	gen.bind_function('hg::SaveSceneJsonToFile', 'bool', ['const char *path', 'const hg::Scene &scene', 'const hg::PipelineResources &resources', '?uint32_t flags'], {'constants_group': {'flags': 'LoadSaveSceneFlags'}})
-	gen.bind_function('hg::SaveSceneBinaryToFile', 'bool', ['const char *path', 'const hg::Scene &scene', 'const hg::PipelineResources &resources', '?uint32_t flags'], {'constants_group': {'flags': 'LoadSaveSceneFlags'}})
-	gen.bind_function('hg::SaveSceneBinaryToData', 'bool', ['hg::Data &data', 'const hg::Scene &scene', 'const hg::PipelineResources &resources', '?uint32_t flags'], {'constants_group': {'flags': 'LoadSaveSceneFlags'}})
+	gen.bind_function('hg::SaveSceneJsonToFile', 'bool', ['const char *path', 'const hg::Scene &scene', 'const hg::PipelineResources &resources', '?uint32_t flags'], release_gil(gen, 'hg::SaveSceneJsonToFile', {'constants_group': {'flags': 'LoadSaveSceneFlags'}}))
+	gen.bind_function('hg::SaveSceneBinaryToFile', 'bool', ['const char *path', 'const hg::Scene &scene', 'const hg::PipelineResources &resources', '?uint32_t flags'], release_gil(gen, 'hg::SaveSceneBinaryToFile', {'constants_group': {'flags': 'LoadSaveSceneFlags'}}))
+	gen.bind_function('hg::SaveSceneBinaryToData', 'bool', ['hg::Data &data', 'const hg::Scene &scene', 'const hg::PipelineResources &resources', '?uint32_t flags'], release_gil(gen, 'hg::SaveSceneBinaryToData', {'constants_group': {'flags': 'LoadSaveSceneFlags'}}))
 
 	gen.insert_binding_code('''
 static bool _LoadSceneBinaryFromFile(const char *path, hg::Scene &scene, hg::PipelineResources &resources, const hg::PipelineInfo &pipeline, uint32_t flags = LSSF_All) {
@@ -1535,16 +1633,16 @@ static bool _LoadSceneFromAssets(const char *name, hg::Scene &scene, hg::Pipelin
 }
 ''')
 
-	gen.bind_function('_LoadSceneBinaryFromFile', 'bool', ['const char *path', 'hg::Scene &scene', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline', '?uint32_t flags'], {'constants_group': {'flags': 'LoadSaveSceneFlags'}}, bound_name = 'LoadSceneBinaryFromFile')
-	gen.bind_function('_LoadSceneBinaryFromAssets', 'bool', ['const char *name', 'hg::Scene &scene', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline', '?uint32_t flags'], {'constants_group': {'flags': 'LoadSaveSceneFlags'}}, bound_name = 'LoadSceneBinaryFromAssets')
-	gen.bind_function('_LoadSceneJsonFromFile', 'bool', ['const char *path', 'hg::Scene &scene', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline', '?uint32_t flags'], {'constants_group': {'flags': 'LoadSaveSceneFlags'}}, bound_name = 'LoadSceneJsonFromFile')
-	gen.bind_function('_LoadSceneJsonFromAssets', 'bool', ['const char *name', 'hg::Scene &scene', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline', '?uint32_t flags'], {'constants_group': {'flags': 'LoadSaveSceneFlags'}}, bound_name = 'LoadSceneJsonFromAssets')
+	gen.bind_function('_LoadSceneBinaryFromFile', 'bool', ['const char *path', 'hg::Scene &scene', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline', '?uint32_t flags'], release_gil(gen, '_LoadSceneBinaryFromFile', {'constants_group': {'flags': 'LoadSaveSceneFlags'}}), bound_name = 'LoadSceneBinaryFromFile')
+	gen.bind_function('_LoadSceneBinaryFromAssets', 'bool', ['const char *name', 'hg::Scene &scene', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline', '?uint32_t flags'], release_gil(gen, '_LoadSceneBinaryFromAssets', {'constants_group': {'flags': 'LoadSaveSceneFlags'}}), bound_name = 'LoadSceneBinaryFromAssets')
+	gen.bind_function('_LoadSceneJsonFromFile', 'bool', ['const char *path', 'hg::Scene &scene', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline', '?uint32_t flags'], release_gil(gen, '_LoadSceneJsonFromFile', {'constants_group': {'flags': 'LoadSaveSceneFlags'}}), bound_name = 'LoadSceneJsonFromFile')
+	gen.bind_function('_LoadSceneJsonFromAssets', 'bool', ['const char *name', 'hg::Scene &scene', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline', '?uint32_t flags'], release_gil(gen, '_LoadSceneJsonFromAssets', {'constants_group': {'flags': 'LoadSaveSceneFlags'}}), bound_name = 'LoadSceneJsonFromAssets')
 
-	gen.bind_function('_LoadSceneBinaryFromDataAndFile', 'bool', ['const hg::Data &data', 'const char *name', 'hg::Scene &scene', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline', '?uint32_t flags'], {'constants_group': {'flags': 'LoadSaveSceneFlags'}}, bound_name = 'LoadSceneBinaryFromDataAndFile')
-	gen.bind_function('_LoadSceneBinaryFromDataAndAssets', 'bool', ['const hg::Data &data', 'const char *name', 'hg::Scene &scene', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline', '?uint32_t flags'], {'constants_group': {'flags': 'LoadSaveSceneFlags'}}, bound_name = 'LoadSceneBinaryFromDataAndAssets')
+	gen.bind_function('_LoadSceneBinaryFromDataAndFile', 'bool', ['const hg::Data &data', 'const char *name', 'hg::Scene &scene', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline', '?uint32_t flags'], release_gil(gen, '_LoadSceneBinaryFromDataAndFile', {'constants_group': {'flags': 'LoadSaveSceneFlags'}}), bound_name = 'LoadSceneBinaryFromDataAndFile')
+	gen.bind_function('_LoadSceneBinaryFromDataAndAssets', 'bool', ['const hg::Data &data', 'const char *name', 'hg::Scene &scene', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline', '?uint32_t flags'], release_gil(gen, '_LoadSceneBinaryFromDataAndAssets', {'constants_group': {'flags': 'LoadSaveSceneFlags'}}), bound_name = 'LoadSceneBinaryFromDataAndAssets')
 
-	gen.bind_function('_LoadSceneFromFile', 'bool', ['const char *path', 'hg::Scene &scene', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline', '?uint32_t flags'], {'constants_group': {'flags': 'LoadSaveSceneFlags'}}, bound_name = 'LoadSceneFromFile')
-	gen.bind_function('_LoadSceneFromAssets', 'bool', ['const char *name', 'hg::Scene &scene', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline', '?uint32_t flags'], {'constants_group': {'flags': 'LoadSaveSceneFlags'}}, bound_name = 'LoadSceneFromAssets')
+	gen.bind_function('_LoadSceneFromFile', 'bool', ['const char *path', 'hg::Scene &scene', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline', '?uint32_t flags'], release_gil(gen, '_LoadSceneFromFile', {'constants_group': {'flags': 'LoadSaveSceneFlags'}}), bound_name = 'LoadSceneFromFile')
+	gen.bind_function('_LoadSceneFromAssets', 'bool', ['const char *name', 'hg::Scene &scene', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline', '?uint32_t flags'], release_gil(gen, '_LoadSceneFromAssets', {'constants_group': {'flags': 'LoadSaveSceneFlags'}}), bound_name = 'LoadSceneFromAssets')
 
 	# duplicate
 	gen.bind_function('hg::DuplicateNodesFromFile', 'std::vector<hg::Node>', ['hg::Scene &scene', 'const std::vector<hg::Node> &nodes', 'hg::PipelineResources &resources', 'const hg::PipelineInfo &pipeline'])
@@ -1584,10 +1682,16 @@ static std::vector<hg::ForwardPipelineLight> _GetSceneForwardPipelineLights(cons
 	gen.bind_function('hg::GetSceneForwardPipelinePassViewId', 'bgfx::ViewId', ['const hg::SceneForwardPipelinePassViewId &views', 'hg::SceneForwardPipelinePass pass'])
 
 	#
+	culling_stats = gen.begin_class('hg::ModelDisplayListCullingStats')
+	gen.bind_members(culling_stats, ['size_t node_count', 'size_t item_count', 'size_t updated_count', 'size_t build_count', 'size_t query_count', 'size_t node_tested', 'size_t item_tested', 'size_t visible_count'])
+	gen.end_class(culling_stats)
+
 	render_data = gen.begin_class('hg::SceneForwardPipelineRenderData')
 	gen.bind_constructor(render_data, [])
 	gen.end_class(render_data)
 
+	gen.bind_function('hg::GetSceneForwardPipelineCullingStats', 'hg::ModelDisplayListCullingStats', ['const hg::SceneForwardPipelineRenderData &render_data'])
+
 	gen.bind_function('hg::PrepareSceneForwardPipelineCommonRenderData', 'void', ['bgfx::ViewId &view_id', 'const hg::Scene &scene', 'hg::SceneForwardPipelineRenderData &render_data',
 	'const hg::ForwardPipeline &pipeline', 'const hg::PipelineResources &resources', 'hg::SceneForwardPipelinePassViewId &views', '?const char *debug_name'], {'arg_in_out': ['view_id','views']})
 
@@ -1676,6 +1780,10 @@ def bind_bullet3_physics(gen):
 	constraint_6_dof = gen.begin_class('btGeneric6DofConstraint', noncopyable=True)
 	gen.end_class(constraint_6_dof)
 
+	raycast_batch_out = gen.begin_class('hg::RaycastBatchOut')
+	gen.bind_members(raycast_batch_out, ['std::vector<hg::Vec3> P', 'std::vector<hg::Vec3> N', 'std::vector<float> t', 'std::vector<int> node_idx'])
+	gen.end_class(raycast_batch_out)
+
 	bullet = gen.begin_class('hg::SceneBullet3Physics', noncopyable=True)
 
 	gen.bind_constructor(bullet, ['?int thread_count'])
@@ -1693,9 +1801,12 @@ def bind_bullet3_physics(gen):
 
 	gen.bind_method(bullet, 'NodeHasBody', 'bool', ['const hg::Node &node'])
 
-	gen.bind_method(bullet, 'StepSimulation', 'void', ['hg::time_ns display_dt', '?hg::time_ns step_dt', '?int max_step'])
+	gen.bind_method(bullet, 'StepSimulation', 'void', ['hg::time_ns display_dt', '?hg::time_ns step_dt', '?int max_step'], release_gil(gen, 'StepSimulation', is_method=True))
 
-	gen.bind_method(bullet, 'CollectCollisionEvents', 'void', ['const hg::Scene &scene', 'hg::NodePairContacts &node_pair_contacts'], {'arg_out': ['node_pair_contacts']})
+	gen.bind_method_overloads(bullet, 'CollectCollisionEvents', [
+		('void', ['const hg::Scene &scene', 'hg::NodePairContacts &node_pair_contacts'], {'arg_out': ['node_pair_contacts']}),
+		('void', ['const hg::Scene &scene', 'hg::CollisionEvents &events'], [])
+	])
 
 	gen.bind_method(bullet, 'SyncTransformsFromScene', 'void', ['const hg::Scene &scene'])
 	gen.bind_method(bullet, 'SyncTransformsToScene', 'void', ['hg::Scene &scene'])
@@ -1743,13 +1854,30 @@ def bind_bullet3_physics(gen):
 	#
 	gen.bind_method(bullet, 'RaycastFirstHit', 'hg::RaycastOut', ['const hg::Scene &scene', 'const hg::Vec3 &p0', 'const hg::Vec3 &p1'])
 	gen.bind_method(bullet, 'RaycastAllHits', 'std::vector<hg::RaycastOut>', ['const hg::Scene &scene', 'const hg::Vec3 &p0', 'const hg::Vec3 &p1'])
+	gen.bind_method(bullet, 'RaycastBatch', 'hg::RaycastBatchOut', ['const hg::Scene &scene', 'const std::vector<hg::Vec3> &p0', 'const std::vector<hg::Vec3> &p1'])
 
 	#
 	gen.bind_method(bullet, 'RenderCollision', 'void', ['bgfx::ViewId view_id', 'const bgfx::VertexLayout &vtx_layout', 'bgfx::ProgramHandle prg', 'hg::RenderState render_state', 'uint32_t depth'])
 
 	#
 	lib.stl.bind_function_T(gen, 'std::function<void(hg::SceneBullet3Physics&, hg::time_ns)>', 'SceneBullet3PhysicsPreTickCallback')
-	gen.bind_method(bullet, 'SetPreTickCallback', 'void', ['const std::function<void(hg::SceneBullet3Physics&, hg::time_ns)>& cbk'])
+
+	if gen.get_language() == 'CPython':
+		# the callback runs from StepSimulation which releases the GIL
+		gen.insert_binding_code('''
+static void _SceneBullet3Physics_SetPreTickCallback(hg::SceneBullet3Physics *physics, const std::function<void(hg::SceneBullet3Physics &, hg::time_ns)> &cbk) {
+	if (cbk)
+		physics->SetPreTickCallback([cbk](hg::SceneBullet3Physics &physics, hg::time_ns dt) {
+			_GILAcquire gil;
+			cbk(physics, dt);
+		});
+	else
+		physics->SetPreTickCallback(cbk);
+}
+''')
+		gen.bind_method(bullet, 'SetPreTickCallback', 'void', ['const std::function<void(hg::SceneBullet3Physics&, hg::time_ns)>& cbk'], {'route': route_lambda('_SceneBullet3Physics_SetPreTickCallback')})
+	else:
+		gen.bind_method(bullet, 'SetPreTickCallback', 'void', ['const std::function<void(hg::SceneBullet3Physics&, hg::time_ns)>& cbk'])
 	
 	gen.end_class(bullet)
 
@@ -2179,7 +2307,7 @@ static void _SetViewClear(bgfx::ViewId view_id, uint16_t clear_flags, const hg::
 	gen.bind_function('bgfx::setViewMode', 'void', ['bgfx::ViewId view_id', 'bgfx::ViewMode::Enum mode'], bound_name='SetViewMode')
 
 	gen.bind_function('bgfx::touch', 'void', ['bgfx::ViewId view_id'], bound_name='Touch')
-	gen.bind_function('bgfx::frame', 'uint32_t', [], bound_name='Frame')
+	gen.bind_function('bgfx::frame', 'uint32_t', [], release_gil(gen, 'bgfx::frame'), bound_name='Frame')
 
 	gen.insert_binding_code('''\
 static void _SetViewTransform(bgfx::ViewId view_id, const hg::Mat4 &view, const hg::Mat44 &proj) {
@@ -2284,16 +2412,26 @@ static void _SetViewTransform(bgfx::ViewId view_id, const hg::Mat4 &view, const
 
 	gen.bind_function('hg::UpdateTextureFromPicture', 'void', ['hg::Texture &tex', 'const hg::Picture &pic'])
 
-	gen.bind_function('hg::LoadTextureFromFile', 'hg::Texture', ['const char *path', 'uint64_t flags', 'bgfx::TextureInfo *info'], {'arg_out': ['info'], 'constants_group': {'flags': 'TextureFlags'}})
-	gen.bind_function('hg::LoadTextureFromAssets', 'hg::Texture', ['const char *path', 'uint64_t flags', 'bgfx::TextureInfo *info'], {'arg_out': ['info'], 'constants_group': {'flags': 'TextureFlags'}})
+	gen.bind_function('hg::LoadTextureFromFile', 'hg::Texture', ['const char *path', 'uint64_t flags', 'bgfx::TextureInfo *info'], release_gil(gen, 'hg::LoadTextureFromFile', {'arg_out': ['info'], 'constants_group': {'flags': 'TextureFlags'}}))
+	gen.bind_function('hg::LoadTextureFromAssets', 'hg::Texture', ['const char *path', 'uint64_t flags', 'bgfx::TextureInfo *info'], release_gil(gen, 'hg::LoadTextureFromAssets', {'arg_out': ['info'], 'constants_group': {'flags': 'TextureFlags'}}))
 
 	gen.insert_binding_code('static void _DestroyTexture(const hg::Texture &tex) { bgfx::destroy(tex.handle); }')
 	gen.bind_function('DestroyTexture', 'void', ['const hg::Texture &tex'], {'route': route_lambda('_DestroyTexture')})
 
-	gen.bind_function('hg::ProcessTextureLoadQueue', 'size_t', ['hg::PipelineResources &res', '?hg::time_ns t_budget'])
+	gen.bind_function('hg::ProcessTextureLoadQueue', 'size_t', ['hg::PipelineResources &res', '?hg::time_ns t_budget'], release_gil(gen, 'hg::ProcessTextureLoadQueue'))
+
+	gen.bind_function('hg::ProcessModelLoadQueue', 'size_t', ['hg::PipelineResources &res', '?hg::time_ns t_budget'], release_gil(gen, 'hg::ProcessModelLoadQueue'))
+	gen.bind_function('hg::ProcessLoadQueues', 'size_t', ['hg::PipelineResources &res', '?hg::time_ns t_budget'], release_gil(gen, 'hg::ProcessLoadQueues'))
+
+	gen.bind_function('hg::SetBackgroundResourceDecode', 'void', ['hg::PipelineResources &resources', 'bool enable'])
+	gen.bind_function('hg::GetBackgroundResourceDecode', 'bool', ['const hg::PipelineResources &resources'])
 
-	gen.bind_function('hg::ProcessModelLoadQueue', 'size_t', ['hg::PipelineResources &res', '?hg::time_ns t_budget'])
-	gen.bind_function('hg::ProcessLoadQueues', 'size_t', ['hg::PipelineResources &res', '?hg::time_ns t_budget'])
+	resource_load_progress = gen.begin_class('hg::ResourceLoadProgress')
+	gen.bind_members(resource_load_progress, ['size_t queued', 'size_t decoding', 'size_t ready'])
+	gen.end_class(resource_load_progress)
+
+	gen.bind_function('hg::GetTextureLoadProgress', 'hg::ResourceLoadProgress', ['const hg::PipelineResources &resources'])
+	gen.bind_function('hg::GetModelLoadProgress', 'hg::ResourceLoadProgress', ['const hg::PipelineResources &resources'])
 
 	# ModelRef/TextureRef/MaterialRef/PipelineProgramRef
 	model_ref = gen.begin_class('hg::ModelRef')
@@ -2559,8 +2697,24 @@ static bgfx::TextureInfo _PipelineResources_GetTextureInfo(hg::PipelineResources
 	gen.bind_method(pipe_res, 'HasTextureInfo', 'bool', ['hg::TextureRef ref'], {'route': route_lambda('_PipelineResources_HasTextureInfo')})
 	gen.bind_method(pipe_res, 'GetTextureInfo', 'bgfx::TextureInfo', ['hg::TextureRef ref'], {'route': route_lambda('_PipelineResources_GetTextureInfo')})
 
+	gen.bind_method(pipe_res, 'SetTextureBudget', 'void', ['size_t budget'])
+	gen.bind_method(pipe_res, 'SetModelBudget', 'void', ['size_t budget'])
+	gen.bind_method(pipe_res, 'GetMemoryUsage', 'size_t', [])
+
 	gen.end_class(pipe_res)
 
+	pipe_res_refs = gen.begin_class('hg::PipelineResourceReferences')
+	gen.bind_constructor(pipe_res_refs, [])
+	gen.bind_method_overloads(pipe_res_refs, 'Add', [
+		('void', ['hg::TextureRef ref'], []),
+		('void', ['hg::ModelRef ref'], []),
+		('void', ['const hg::Material &mat'], [])
+	])
+	gen.end_class(pipe_res_refs)
+
+	# the overload without references would evict the resources used by scenes, see the Scene overload
+	gen.bind_function('hg::EvictResourcesOverBudget', 'size_t', ['hg::PipelineResources &resources', 'const hg::PipelineResourceReferences &references'])
+
 	#
 	gen.bind_function('hg::UpdateMaterialPipelineProgramVariant', 'void', ['hg::Material &mat', 'const hg::PipelineResources &resources'])
 
@@ -2918,6 +3072,9 @@ def bind_assets(gen):
 	gen.bind_function('hg::AddAssetsPackage', 'bool', ['const char *path'])
 	gen.bind_function('hg::RemoveAssetsPackage', 'void', ['const char *path'])
 
+	gen.bind_function('hg::PackAssets', 'bool', ['const char *folder', 'const std::vector<std::string> &names', 'const char *path', '?bool deflate'])
+	gen.bind_function('hg::PackAssetsFolder', 'bool', ['const char *folder', 'const char *path', '?bool deflate'])
+
 	gen.bind_function('hg::IsAssetFile', 'bool', ['const char *name'])
 
 
@@ -2979,7 +3136,7 @@ def bind_color(gen):
 
 	gen.bind_function('hg::SetSaturation', 'hg::Color', ['const hg::Color &color', 'float saturation'])
 
-	bind_std_vector(gen, color)
+	bind_std_vector(gen, color, bulk_bytes=True)
 
 
 def bind_picture(gen):
@@ -3022,18 +3179,18 @@ static void _Picture_SetPixelRGBA(hg::Picture *picture, uint16_t x, uint16_t y,
 	gen.end_class(picture)
 	
 	# I/O
-	gen.bind_function('LoadJPG', 'bool', ['hg::Picture &pict', 'const char *path'])
-	gen.bind_function('LoadPNG', 'bool', ['hg::Picture &pict', 'const char *path'])
-	gen.bind_function('LoadGIF', 'bool', ['hg::Picture &pict', 'const char *path'])
-	gen.bind_function('LoadPSD', 'bool', ['hg::Picture &pict', 'const char *path'])
-	gen.bind_function('LoadTGA', 'bool', ['hg::Picture &pict', 'const char *path'])
-	gen.bind_function('LoadBMP', 'bool', ['hg::Picture &pict', 'const char *path'])
+	gen.bind_function('LoadJPG', 'bool', ['hg::Picture &pict', 'const char *path'], release_gil(gen, 'LoadJPG'))
+	gen.bind_function('LoadPNG', 'bool', ['hg::Picture &pict', 'const char *path'], release_gil(gen, 'LoadPNG'))
+	gen.bind_function('LoadGIF', 'bool', ['hg::Picture &pict', 'const char *path'], release_gil(gen, 'LoadGIF'))
+	gen.bind_function('LoadPSD', 'bool', ['hg::Picture &pict', 'const char *path'], release_gil(gen, 'LoadPSD'))
+	gen.bind_function('LoadTGA', 'bool', ['hg::Picture &pict', 'const char *path'], release_gil(gen, 'LoadTGA'))
+	gen.bind_function('LoadBMP', 'bool', ['hg::Picture &pict', 'const char *path'], release_gil(gen, 'LoadBMP'))
 
-	gen.bind_function('LoadPicture', 'bool', ['hg::Picture &pict', 'const char *path'])
+	gen.bind_function('LoadPicture', 'bool', ['hg::Picture &pict', 'const char *path'], release_gil(gen, 'LoadPicture'))
 
-	gen.bind_function('SavePNG', 'bool', ['hg::Picture &pict', 'const char *path'])
-	gen.bind_function('SaveTGA', 'bool', ['hg::Picture &pict', 'const char *path'])
-	gen.bind_function('SaveBMP', 'bool', ['hg::Picture &pict', 'const char *path'])
+	gen.bind_function('SavePNG', 'bool', ['hg::Picture &pict', 'const char *path'], release_gil(gen, 'SavePNG'))
+	gen.bind_function('SaveTGA', 'bool', ['hg::Picture &pict', 'const char *path'], release_gil(gen, 'SaveTGA'))
+	gen.bind_function('SaveBMP', 'bool', ['hg::Picture &pict', 'const char *path'], release_gil(gen, 'SaveBMP'))
 
 
 def bind_math(gen):
@@ -3206,7 +3363,7 @@ static const hg::Vec3 _CubicInterpolateImpl(const hg::Vec3& v0, const hg::Vec3&
 		('hg::Vec4', ['const hg::Vec4 &min', 'const hg::Vec4 &max'], [])
 	])
 
-	bind_std_vector(gen, vector4)
+	bind_std_vector(gen, vector4, bulk_bytes=True)
 
 	# hg::Quaternion
 	gen.add_include('foundation/quaternion.h')
@@ -3437,7 +3594,7 @@ static const hg::Vec3 _CubicInterpolateImpl(const hg::Vec3& v0, const hg::Vec3&
 		('hg::Mat4', ['const hg::Vec3 &pos', 'const hg::Mat3 &rot', '?const hg::Vec3 &scale'], [])
 	])
 
-	bind_std_vector(gen, matrix4)
+	bind_std_vector(gen, matrix4, bulk_bytes=True)
 	
 	# hg::Mat44
 	gen.add_include('foundation/matrix44.h')
@@ -3552,7 +3709,7 @@ static const hg::Vec3 _CubicInterpolateImpl(const hg::Vec3& v0, const hg::Vec3&
 	gen.bind_function('hg::Vec3I', 'hg::Vec3', ['int x', 'int y', 'int z'])
 	gen.bind_function('hg::Vec4I', 'hg::Vec4', ['int x', 'int y', 'int z', '?int w'])
 
-	bind_std_vector(gen, vector3)
+	bind_std_vector(gen, vector3, bulk_bytes=True)
 
 	# hg::Rect<T>
 	def bind_rect_T(T, bound_name):
@@ -4305,11 +4462,11 @@ def bind_audio(gen):
 	gen.typedef('hg::SourceRef', 'int')
 	gen.bind_constants('int', [("SRC_Invalid", "hg::InvalidSourceRef")], 'SourceRef')
 
-	gen.bind_function('hg::LoadWAVSoundFile', 'hg::SoundRef', ['const char *path'], {'rval_constants_group': 'SoundRef'})
-	gen.bind_function('hg::LoadWAVSoundAsset', 'hg::SoundRef', ['const char *name'], {'rval_constants_group': 'SoundRef'})
+	gen.bind_function('hg::LoadWAVSoundFile', 'hg::SoundRef', ['const char *path'], release_gil(gen, 'hg::LoadWAVSoundFile', {'rval_constants_group': 'SoundRef'}))
+	gen.bind_function('hg::LoadWAVSoundAsset', 'hg::SoundRef', ['const char *name'], release_gil(gen, 'hg::LoadWAVSoundAsset', {'rval_constants_group': 'SoundRef'}))
 
-	gen.bind_function('hg::LoadOGGSoundFile', 'hg::SoundRef', ['const char *path'], {'rval_constants_group': 'SoundRef'})
-	gen.bind_function('hg::LoadOGGSoundAsset', 'hg::SoundRef', ['const char *name'], {'rval_constants_group': 'SoundRef'})
+	gen.bind_function('hg::LoadOGGSoundFile', 'hg::SoundRef', ['const char *path'], release_gil(gen, 'hg::LoadOGGSoundFile', {'rval_constants_group': 'SoundRef'}))
+	gen.bind_function('hg::LoadOGGSoundAsset', 'hg::SoundRef', ['const char *name'], release_gil(gen, 'hg::LoadOGGSoundAsset', {'rval_constants_group': 'SoundRef'}))
 
 	gen.bind_function('hg::UnloadSound', 'void', ['hg::SoundRef snd'], {'constants_group': {'snd': 'SoundRef'}})
 
@@ -4450,34 +4607,130 @@ def bind_profiler(gen):
 
 	gen.typedef('hg::ProfilerSectionIndex', 'size_t')
 
+	profiler_section = gen.begin_class('hg::ProfilerFrame::Section', bound_name='ProfilerSection')
+	gen.bind_members(profiler_section, ['uint32_t thread_index', 'hg::time_ns start', 'hg::time_ns end', 'std::string details'])
+	gen.end_class(profiler_section)
+
+	bind_std_vector(gen, profiler_section)
+
+	bind_std_vector(gen, gen.get_conv('size_t'), 'SizeTList')
+
+	profiler_task = gen.begin_class('hg::ProfilerFrame::Task', bound_name='ProfilerTask')
+	gen.bind_members(profiler_task, ['std::string name', 'hg::time_ns duration', 'std::vector<size_t> section_indexes'])
+	gen.end_class(profiler_task)
+
+	bind_std_vector(gen, profiler_task)
+
 	profiler_frame = gen.begin_class('hg::ProfilerFrame')
+	gen.bind_members(profiler_frame, ['uint32_t frame', 'std::vector<hg::ProfilerFrame::Section> sections', 'std::vector<hg::ProfilerFrame::Task> tasks', 'hg::time_ns start', 'hg::time_ns end'])
 	gen.end_class(profiler_frame)
 
-	gen.bind_function('hg::BeginProfilerSection', 'hg::ProfilerSectionIndex', ['const std::string &name', '?const std::string &section_details'])
+	gen.typedef('hg::ProfilerTaskId', 'uint32_t')
+
+	gen.bind_function('hg::GetProfilerTaskId', 'hg::ProfilerTaskId', ['const std::string &name'])
+
+	gen.bind_function_overloads('hg::BeginProfilerSection', [
+		('hg::ProfilerSectionIndex', ['const std::string &name', '?const std::string &section_details'], []),
+		('hg::ProfilerSectionIndex', ['hg::ProfilerTaskId task', '?const std::string &section_details'], [])
+	])
 	gen.bind_function('hg::EndProfilerSection', 'void', ['hg::ProfilerSectionIndex section_idx'])
 
+	gen.bind_named_enum('hg::ProfilerCategory', ['PC_None', 'PC_Scene', 'PC_Physics', 'PC_Render', 'PC_All'])
+
+	gen.bind_function('hg::SetProfilerCategories', 'void', ['uint32_t categories'])
+	gen.bind_function('hg::GetProfilerCategories', 'uint32_t', [])
+	gen.bind_function('hg::IsProfilerCategoryEnabled', 'bool', ['hg::ProfilerCategory category'])
+
 	gen.bind_function('hg::EndProfilerFrame', 'hg::ProfilerFrame', [])
 	gen.bind_function('hg::CaptureProfilerFrame', 'hg::ProfilerFrame', [])
 
 	gen.bind_function('hg::PrintProfilerFrame', 'void', ['const hg::ProfilerFrame &profiler_frame'])
+	gen.bind_function('hg::SaveProfilerFrameToTrace', 'bool', ['const hg::ProfilerFrame &profiler_frame', 'const std::string &path'])
+
+	profiler_task_stats = gen.begin_class('hg::ProfilerTaskStats')
+	gen.bind_constructor(profiler_task_stats, [])
+	gen.bind_members(profiler_task_stats, ['std::string name', 'size_t frame_count', 'size_t section_count', 'hg::time_ns min', 'hg::time_ns max', 'hg::time_ns avg', 'hg::time_ns p50', 'hg::time_ns p90', 'hg::time_ns p99'])
+	gen.end_class(profiler_task_stats)
+
+	bind_std_vector(gen, profiler_task_stats)
+
+	profiler_frame_history = gen.begin_class('hg::ProfilerFrameHistory')
+	gen.bind_constructor(profiler_frame_history, ['?size_t max_frame_count'])
+	gen.bind_method(profiler_frame_history, 'PushFrame', 'void', ['const hg::ProfilerFrame &frame'])
+	gen.bind_method(profiler_frame_history, 'Clear', 'void', [])
+	gen.bind_method(profiler_frame_history, 'GetFrameCount', 'size_t', [])
+	gen.bind_method(profiler_frame_history, 'GetMaxFrameCount', 'size_t', [])
+	gen.bind_method_overloads(profiler_frame_history, 'GetTaskStats', [
+		('std::vector<hg::ProfilerTaskStats>', [], []),
+		('bool', ['const std::string &name', 'hg::ProfilerTaskStats &stats'], {'arg_out': ['stats']})
+	])
+	gen.bind_method(profiler_frame_history, 'GetFrameStats', 'hg::ProfilerTaskStats', [])
+	gen.end_class(profiler_frame_history)
 
 
 def insert_non_embedded_setup_free_code(gen):
 	if gen.get_language() == 'CPython':
 		gen.insert_binding_code('''
 #include "foundation/log.h"
+#include <atomic>
+#include <chrono>
 #include <iostream>
+#include <thread>
+
+// once the interpreter starts finalizing PyGILState_Ensure never returns on a thread it does not know, log messages then bypass Python
+static std::atomic<bool> _python_exiting{false};
+static std::atomic<int> _log_hook_python_calls{0};
 
 static void OnHarfangLog(const char *msg, int mask, const char *details, void *user) {
+	++_log_hook_python_calls;
+
+	if (_python_exiting) {
+		--_log_hook_python_calls;
+		std::cout << msg << std::endl;
+		return;
+	}
+
+	const PyGILState_STATE gil = PyGILState_Ensure(); // logging may happen from a call releasing the GIL or from a worker thread
+
 	if (mask & hg::LL_Error)
 		PyErr_SetString(PyExc_RuntimeError, msg);
 	else if (mask & hg::LL_Warning)
 		PyErr_WarnEx(PyExc_Warning, msg, 1);
 	else
 		std::cout << msg << std::endl;
+
+	PyGILState_Release(gil);
+
+	--_log_hook_python_calls;
+}
+
+// atexit callback, let log calls in flight complete then route all further messages around Python
+static PyObject *_OnPythonExit(PyObject *, PyObject *) {
+	_python_exiting = true;
+
+	Py_BEGIN_ALLOW_THREADS
+	while (_log_hook_python_calls != 0)
+		std::this_thread::sleep_for(std::chrono::milliseconds(1));
+	Py_END_ALLOW_THREADS
+
+	Py_RETURN_NONE;
 }
 
-static void InstallLogHook() { hg::set_log_hook(OnHarfangLog, nullptr); }
+static PyMethodDef _on_python_exit_def = {"_OnPythonExit", _OnPythonExit, METH_NOARGS, nullptr};
+
+static void InstallLogHook() {
+	hg::set_log_hook(OnHarfangLog, nullptr);
+
+	if (PyObject *atexit = PyImport_ImportModule("atexit")) {
+		if (PyObject *on_exit = PyCFunction_New(&_on_python_exit_def, nullptr)) {
+			Py_XDECREF(PyObject_CallMethod(atexit, "register", "O", on_exit));
+			Py_DECREF(on_exit);
+		}
+		Py_DECREF(atexit);
+	}
+
+	PyErr_Clear();
+}
 ''')
 	elif gen.get_language() == 'Lua':
 		gen.insert_binding_code('''
@@ -4527,8 +4780,56 @@ def bind(gen):
 		
 	gen.typedef('bgfx::ViewId', 'uint16_t')
 
+	if gen.get_language() == 'CPython':
+		gen.insert_binding_code('''
+// run fn with the GIL released so that other Python threads keep running, fn must not touch any Python object (see release_gil)
+struct _GILRelease {
+	_GILRelease() : state(PyEval_SaveThread()) {}
+	~_GILRelease() { PyEval_RestoreThread(state); }
+	PyThreadState *state;
+};
+
+template <typename F> static auto _CallWithoutGIL(F fn) -> decltype(fn()) {
+	_GILRelease release;
+	return fn();
+}
+
+// hold the GIL while native code calls back into Python, whether or not the calling thread released it
+struct _GILAcquire {
+	_GILAcquire() : state(PyGILState_Ensure()) {}
+	~_GILAcquire() { PyGILState_Release(state); }
+	PyGILState_STATE state;
+};
+
+// bulk std::vector transfer, the limited API does not expose the buffer protocol so the content goes through a bytes object
+template <typename T> static PyObject *_StdVectorToBytes(std::vector<T> *v) {
+	return PyBytes_FromStringAndSize(reinterpret_cast<const char *>(v->data()), Py_ssize_t(v->size() * sizeof(T)));
+}
+
+template <typename T> static bool _StdVectorFromBytes(std::vector<T> *v, PyObject *buffer) {
+	PyObject *bytes = PyObject_Bytes(buffer); // anything bytes() accepts: buffer protocol objects (bytes, bytearray, memoryview, array, numpy array) but also sequences of ints taken as single bytes
+	if (!bytes) {
+		PyErr_Clear();
+		return false;
+	}
+
+	char *data;
+	Py_ssize_t size;
+	const bool valid = PyBytes_AsStringAndSize(bytes, &data, &size) == 0 && (size % sizeof(T)) == 0;
+
+	if (valid) {
+		const size_t offset = v->size();
+		v->resize(offset + size / sizeof(T));
+		memcpy(v->data() + offset, data, size);
+	}
+
+	Py_DECREF(bytes);
+	return valid;
+}
+''')
+
 	#bind_std_vector(gen, gen.get_conv('char'))
-	bind_std_vector(gen, gen.get_conv('int'))
+	bind_std_vector(gen, gen.get_conv('int'), bulk_bytes=True)
 	#bind_std_vector(gen, gen.get_conv('int8_t'))
 	#bind_std_vector(gen, gen.get_conv('int16_t'))
 	#bind_std_vector(gen, gen.get_conv('int32_t'))
@@ -4537,7 +4838,7 @@ def bind(gen):
 	bind_std_vector(gen, gen.get_conv('uint16_t'))
 	bind_std_vector(gen, gen.get_conv('uint32_t'))
 	#bind_std_vector(gen, gen.get_conv('uint64_t'))
-	#bind_std_vector(gen, gen.get_conv('float'))
+	bind_std_vector(gen, gen.get_conv('float'), bulk_bytes=True)
 	#bind_std_vector(gen, gen.get_conv('double'))
 
 	bind_std_vector(gen, gen.get_conv('std::string'), 'StringList')
@@ -4545,6 +4846,7 @@ def bind(gen):
 	bind_log(gen)
 	bind_time(gen)
 	bind_clock(gen)
+	bind_worker_pool(gen)
 	bind_file(gen)
 	bind_data(gen)
 	bind_dir(gen)
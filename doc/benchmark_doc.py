@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+import doc_utils.api_tools as api_tools
+import doc_utils.html_tools as html_tools
+
+
+def gather_uids_related_to_by_scan(uid):
+	"""Reference implementation scanning the whole API for each uid."""
+	classes, functions = [], {}
+
+	for related_uid, tags in api_tools.api.items():
+		if related_uid == uid:
+			continue
+
+		for tag in tags:
+			if tag.tag == "function":
+				if tag.get("global") == "1" and html_tools.is_function_using_uid(tag, uid):
+					functions[related_uid] = functions.get(related_uid, []) + [tag]
+			elif tag.tag == "class":
+				if html_tools.is_class_using_uid(tag, uid):
+					classes.append(related_uid)
+
+	return classes, functions
+
+
+def time_call(fn, runs):
+	timings = []
+	for _ in range(runs):
+		t = time.perf_counter()
+		fn()
+		timings.append(time.perf_counter() - t)
+	return min(timings), sum(timings) / len(timings)
+
+
+def report(name, timing):
+	print(f'  {name:<40} min {timing[0] * 1000:10.1f}ms   mean {timing[1] * 1000:10.1f}ms')
+
+
+def benchmark_related_uids(api_path, runs):
+	api_tools.load_api(api_path)
+	uids = list(api_tools.api.keys())
+
+	print(f'Related uids ({len(uids)} uids)')
+
+	reference = {uid: gather_uids_related_to_by_scan(uid) for uid in uids}
+
+	def gather_all_by_index():
+		html_tools.uid_usage_index_api = None  # force an index rebuild
+		return {uid: html_tools.gather_uids_related_to(uid) for uid in uids}
+
+	if gather_all_by_index() != reference:
+		print('  ERROR: the usage index does not match the reference scan')
+		return False
+
+	report('scan per uid', time_call(lambda: [gather_uids_related_to_by_scan(uid) for uid in uids], runs))
+	report('usage index', time_call(gather_all_by_index, runs))
+	return True
+
+
+def benchmark_hugo(generator, api_path, doc_path, runs):
+	def generate():
+		with tempfile.TemporaryDirectory() as out:
+			cmd = [sys.executable, generator, '--api', api_path, '--doc', doc_path, '--out', os.path.join(out, 'content'), '--version', 'bench']
+			subprocess.run(cmd, cwd=os.path.dirname(generator), stdout=subprocess.DEVNULL, check=True)
+
+	report(os.path.relpath(generator), time_call(generate, runs))
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="Time the documentation generation")
+	parser.add_argument('--api', type=str, help="API path", required=True)
+	parser.add_argument('--doc', type=str, help="Documentation path", default='doc')
+	parser.add_argument('--runs', type=int, help="Number of runs of each benchmark", default=3)
+	parser.add_argument('--generator', type=str, action='append',
+		help="Hugo generator script to time, repeat to compare against a previous version (default: doc_to_hugo.py)")
+	args = parser.parse_args()
+
+	api_path, doc_path = os.path.abspath(args.api), os.path.abspath(args.doc)
+
+	ok = benchmark_related_uids(api_path, args.runs)
+
+	print('Full Hugo generation')
+	for generator in args.generator or ['doc_to_hugo.py']:
+		benchmark_hugo(os.path.abspath(generator), api_path, doc_path, args.runs)
+
+	sys.exit(0 if ok else 1)
@@ -1,7 +1,11 @@
 import os
 import re
 import argparse
+import hashlib
+import io
+import pickle
 import shutil
+import multiprocessing
 
 import xml.etree.ElementTree as ETree
 import doc_utils.doc_tools as doc_tools
@@ -17,6 +21,12 @@ functions = None
 constants = None
 enums = None
 
+constants_names = None  # names of all constants groups
+
+link_targets = None  # raw link -> (name, page, anchor)
+class_users = None  # uid -> uids of the classes using it
+function_users = None  # uid -> uids of the functions using it
+
 
 #
 def now_as_iso_datetime():
@@ -28,13 +38,19 @@ def now_as_iso_datetime():
 man_pages_cache = {}
 man_pages_spacing = []
 
-def parse_man_page(path):
-	with open(os.path.join(args.doc, f'{path}.md')) as md:
-		md_lines = md.readlines()
+def parse_man_page(path, cache=None):
+	with open(os.path.join(args.doc, f'{path}.md'), 'rb') as md:
+		data = md.read()
+
+	data_hash = hashlib.sha1(data).hexdigest()
+
+	if cache is not None and path in cache and cache[path][0] == data_hash:
+		man_pages_cache[path] = cache[path][1]
+		return
 
 	man_page = {'lines': []}
 
-	for line in md_lines:
+	for line in io.StringIO(data.decode(), newline=None):  # universal newlines, as when reading in text mode
 		if line.startswith('.title '):
 			man_page['title'] = line[7:].strip()
 		elif line.strip() != '[TOC]':
@@ -45,6 +61,9 @@ def parse_man_page(path):
 
 	man_pages_cache[path] = man_page
 
+	if cache is not None:
+		cache[path] = (data_hash, man_page)
+
 
 #
 def format_natural_list(vals):
@@ -113,33 +132,9 @@ def link_formatter(lang, link):
 		man_page = man_pages_cache[raw]
 		return '[%s]({{< relref "/docs/%s/%s.md" >}})' % (man_page['title'], args.version, raw)
 
-	for fn in functions:
-		if fn.attrib['name'] == raw:
-			return '[%s]({{< relref "/api/%s/%s/functions.md#%s" >}})' % (fn.attrib['name'], args.version, lang, raw.lower())
-
-	for cl in classes:
-		if cl.attrib['name'] == raw:
-			return '[%s]({{< relref "/api/%s/%s/classes.md#%s" >}})' % (cl.attrib['name'], args.version, lang, raw.lower())
-
-		for cc in cl:
-			if cc.tag == 'function' and cc.attrib['uid'] == raw:
-				return '[%s.%s]({{< relref "/api/%s/%s/classes.md#%s" >}})' % (cl.attrib['name'], cc.attrib['name'], args.version, lang, cl.attrib['name'].lower())  # TODO redirect to the method (we have no anchor atm)
-
-	for e in enums:
-		if e.attrib['name'] == raw:
-			return '[%s]({{< relref "/api/%s/%s/constants.md#%s" >}})' % (raw, args.version, lang, e.attrib['name'].lower())
-
-		for v in e:
-			if v.attrib['name'] == raw:
-				return '[%s]({{< relref "/api/%s/%s/constants.md#%s" >}})' % (raw, args.version, lang, e.attrib['name'].lower())
-
-	for e in constants:
-		if e.attrib['name'] == raw:
-			return '[%s]({{< relref "/api/%s/%s/constants.md#%s" >}})' % (raw, args.version, lang, e.attrib['name'].lower())
-
-		for v in e:
-			if v.attrib['name'] == raw:
-				return '[%s]({{< relref "/api/%s/%s/constants.md#%s" >}})' % (raw, args.version, lang, e.attrib['name'].lower())
+	if raw in link_targets:
+		name, page, anchor = link_targets[raw]
+		return '[%s]({{< relref "/api/%s/%s/%s.md#%s" >}})' % (name, args.version, lang, page, anchor)
 
 	if raw not in unresolved_links:
 		unresolved_links.append(raw)
@@ -160,22 +155,61 @@ def remove_links(input):
 
 
 #
-def gather_uid_function_links(uid):
-	links = []
+def build_link_targets():
+	"""Map each symbol which can be linked to its API page anchor, the first declaration of a symbol wins."""
+	targets = {}
 
 	for fn in functions:
-		if fn.attrib['uid'] != uid:
-			if fn.attrib['returns'] == uid:
-				links.append(f"[{fn.attrib['uid']}]")
-			elif 'returns_constants_group' in fn.attrib and fn.attrib['returns_constants_group'] == uid:
-				links.append(f"[{fn.attrib['uid']}]")
-			else:
-				for parm in fn:
-					if (parm.attrib['type'] == uid) or ('constants_group' in parm.attrib and parm.attrib['constants_group'] == uid):
-						links.append(f"[{fn.attrib['uid']}]")
-						break
+		targets.setdefault(fn.attrib['name'], (fn.attrib['name'], 'functions', fn.attrib['name'].lower()))
+
+	for cl in classes:
+		name = cl.attrib['name']
+		targets.setdefault(name, (name, 'classes', name.lower()))
+
+		for cc in cl:
+			if cc.tag == 'function':
+				targets.setdefault(cc.attrib['uid'], (f"{name}.{cc.attrib['name']}", 'classes', name.lower()))  # TODO redirect to the method (we have no anchor atm)
+
+	for e in enums + constants:
+		name = e.attrib['name']
+		targets.setdefault(name, (name, 'constants', name.lower()))
+
+		for v in e:
+			targets.setdefault(v.attrib['name'], (v.attrib['name'], 'constants', name.lower()))
+
+	return targets
+
+
+def build_uid_users():
+	"""Map each uid to the classes and functions using it as a parameter, return value or member type."""
+	cl_users, fn_users = {}, {}
+
+	def add_user(users, uid, user):
+		if uid is not None and uid != user:
+			users.setdefault(uid, set()).add(user)
 
-	return sorted(list(set(links)))
+	def add_function_users(users, fn, user):
+		add_user(users, fn.get('returns'), user)
+		for parm in fn:
+			add_user(users, parm.get('type'), user)
+			add_user(users, parm.get('constants_group'), user)
+
+	for fn in functions:
+		add_function_users(fn_users, fn, fn.attrib['uid'])
+		add_user(fn_users, fn.get('returns_constants_group'), fn.attrib['uid'])
+
+	for cl in classes:
+		for c in cl:
+			if c.tag == 'function':
+				add_function_users(cl_users, c, cl.attrib['uid'])
+			elif c.tag == 'variable':
+				add_user(cl_users, c.get('type'), cl.attrib['uid'])
+
+	return cl_users, fn_users
+
+
+def gather_uid_function_links(uid):
+	return sorted(f'[{user}]' for user in function_users.get(uid, []))
 
 def get_uid_doc(uid):
 	if uid in doc_tools.man:
@@ -183,26 +217,7 @@ def get_uid_doc(uid):
 	return doc_tools.doc[uid] if uid in doc_tools.doc else ''
 
 def gather_uid_class_links(uid):
-	links = []
-
-	for cl in classes:
-		if cl.attrib['uid'] != uid:
-			for c in cl:
-				if (
-					c.tag == 'function'
-					and c.attrib['returns'] == uid
-					or c.tag != 'function'
-					and c.tag == 'variable'
-					and c.attrib['type'] == uid
-				):
-					links.append(f"[{cl.attrib['uid']}]")
-				elif c.tag == 'function':
-					for parm in c:
-						if (parm.attrib['type'] == uid) or ('constants_group' in parm.attrib and parm.attrib['constants_group'] == uid):
-							links.append(f"[{cl.attrib['uid']}]")
-							break
-
-	return sorted(list(set(links)))
+	return sorted(f'[{user}]' for user in class_users.get(uid, []))
 
 def format_related_links(uid):
 	cl_links = gather_uid_class_links(uid)
@@ -262,9 +277,8 @@ def prepare_proto(proto, lang):
 			if 'returns_constants_group' in parm.attrib:
 				cg = parm.attrib['returns_constants_group']
 
-				for e in constants:
-					if e.attrib['name'] == cg:
-						return f'[{cg}]'
+				if cg in constants_names:
+					return f'[{cg}]'
 
 			return f"[{parm.attrib['returns']}]"
 
@@ -275,9 +289,8 @@ def prepare_proto(proto, lang):
 		if 'constants_group' in parm.attrib:
 			cg = parm.attrib['constants_group']
 
-			for e in constants:
-				if e.attrib['name'] == cg:
-					return f'[{cg}]'
+			if cg in constants_names:
+				return f'[{cg}]'
 
 		return f"[{parm.attrib['type']}]"
 
@@ -447,7 +460,127 @@ weight: 40
 
 
 #
-def convert(api, doc, out):
+cache_version = 1
+
+
+def load_cache(path):
+	"""Load the cache of a previous run, the API and each man page are keyed by the hash of their source."""
+	try:
+		with open(path, 'rb') as file:
+			cache = pickle.load(file)
+		if cache.get('version') == cache_version:
+			return cache
+	except (OSError, EOFError, pickle.UnpicklingError):
+		pass
+	return {'version': cache_version, 'api': None, 'man': {}}
+
+
+def save_cache(path, cache):
+	with open(path, 'wb') as file:
+		pickle.dump(cache, file, pickle.HIGHEST_PROTOCOL)
+
+
+def setup_api(xml_root, api_cache=None):
+	"""Gather API symbols and build the link and usage lookup tables, restore them from a cache entry if provided."""
+	global api, classes, functions, constants, enums, constants_names
+	api = xml_root
+
+	classes = get_api_tags(['class'])
+	functions = get_api_tags(['function'])
+	constants = get_api_tags(['constants'])
+	enums = get_api_tags(['enum'])
+
+	constants_names = set(e.attrib['name'] for e in constants)
+
+	global link_targets, class_users, function_users
+	if api_cache is not None:
+		link_targets, class_users, function_users = api_cache
+	else:
+		link_targets = build_link_targets()
+		class_users, function_users = build_uid_users()
+
+	api_tools.load_api_tree(xml_root)
+
+
+#
+def write_man_page(docs_out_path, page, weight):
+	man_page = man_pages_cache[page]
+
+	out_md_path = os.path.join(docs_out_path, f'{page}.md')
+	with open(out_md_path, 'w', encoding='utf-8') as md:
+		# output front matter
+		md.write('''\
+---
+title: "%s"
+date: %s
+draft: false
+weight: %d
+toc: true
+''' % (man_page['title'], now_as_iso_datetime(), weight))
+
+		if page in man_pages_spacing:
+			md.write('spacing: true\n')
+
+		md.write('---\n')
+
+		# processed content
+		md_lines = process_lines_links('cpython', man_page['lines'])
+		md_lines = [line.replace('${HG_VERSION}', args.version) for line in md_lines]
+		md.writelines(md_lines)
+
+
+api_page_generators = {
+	'classes': generate_api_classes_page_content,
+	'functions': generate_api_functions_page_content,
+	'constants': generate_api_constants_page_content,
+}
+
+
+def write_api_page(api_out_path, lang, page):
+	with open(os.path.join(api_out_path, lang, page, 'index.md'), 'w', encoding='utf-8') as file:
+		file.write(api_page_generators[page](lang))
+
+
+def render_page(task):
+	"""Render a single output page, return the links which could not be resolved while rendering it."""
+	unresolved_count = len(unresolved_links)
+
+	if task[0] == 'man':
+		write_man_page(*task[1:])
+	else:
+		write_api_page(*task[1:])
+
+	return unresolved_links[unresolved_count:]
+
+
+def init_render_worker(state):
+	"""Restore the main process state in a render worker, required when workers are spawned rather than forked."""
+	global args
+	args = state['args']
+
+	man_pages_cache.update(state['man_pages'])
+	man_pages_spacing[:] = state['man_pages_spacing']
+
+	doc_tools.doc, doc_tools.man = state['doc'], state['man']
+
+	setup_api(ETree.fromstring(state['api_xml']), state['api_lookups'])
+
+
+def render_pages(tasks, state, job_count):
+	if job_count <= 1:
+		results = [render_page(task) for task in tasks]
+	else:
+		with multiprocessing.Pool(job_count, init_render_worker, (state,)) as pool:
+			results = pool.map(render_page, tasks, chunksize=1)
+
+	for links in results:
+		for link in links:
+			if link not in unresolved_links:
+				unresolved_links.append(link)
+
+
+#
+def convert(api_xml, doc, out, job_count, cache=None):
 	# prepare man pages
 	man_pages = []
 
@@ -460,7 +593,7 @@ def convert(api, doc, out):
 				man_pages.append(page)
 
 	for page in man_pages:
-		parse_man_page(page)
+		parse_man_page(page, cache['man'] if cache is not None else None)
 
 	# output docs/ pages
 	docs_out_path = os.path.join(out, 'docs', args.version)
@@ -476,50 +609,28 @@ draft: false
 ---\
 ''' % (args.version, now_as_iso_datetime(), now_as_iso_datetime()))
 
-	weight = 10
-
-	for page in man_pages:
-		man_page = man_pages_cache[page]
-
-		out_md_path = os.path.join(docs_out_path, f'{page}.md')
-		with open(out_md_path, 'w', encoding='utf-8') as md:
-			# output front matter
-			md.write('''\
----
-title: "%s"
-date: %s
-draft: false
-weight: %d
-toc: true
-''' % (man_page['title'], now_as_iso_datetime(), weight))
-
-			if page in man_pages_spacing:
-				md.write('spacing: true\n')
-
-			md.write('---\n')
-
-			# processed content
-			md_lines = process_lines_links('cpython', man_page['lines'])
-			md_lines = [line.replace('${HG_VERSION}', args.version) for line in md_lines]
-			md.writelines(md_lines)
-
-		weight = weight + 10
-
 	# output API
 	api_out_path = os.path.join(out, 'api', args.version)
 
 	for lang in ['cpython', 'lua']:
-		os.makedirs(os.path.join(api_out_path, lang, 'classes'))
-		with open(os.path.join(api_out_path, lang, 'classes', 'index.md'), 'w', encoding='utf-8') as file:
-			file.write(generate_api_classes_page_content(lang))
+		for page in api_page_generators:
+			os.makedirs(os.path.join(api_out_path, lang, page))
+
+	# render pages, the largest first
+	tasks = [('api', api_out_path, lang, page) for lang in ['cpython', 'lua'] for page in api_page_generators]
+	tasks += [('man', docs_out_path, page, 10 + i * 10) for i, page in enumerate(man_pages)]
 
-		os.makedirs(os.path.join(api_out_path, lang, 'functions'))
-		with open(os.path.join(api_out_path, lang, 'functions', 'index.md'), 'w', encoding='utf-8') as file:
-			file.write(generate_api_functions_page_content(lang))
+	state = {
+		'args': args,
+		'man_pages': man_pages_cache,
+		'man_pages_spacing': man_pages_spacing,
+		'doc': doc_tools.doc,
+		'man': doc_tools.man,
+		'api_xml': api_xml,
+		'api_lookups': (link_targets, class_users, function_users),
+	}
 
-		os.makedirs(os.path.join(api_out_path, lang, 'constants'))
-		with open(os.path.join(api_out_path, lang, 'constants', 'index.md'), 'w', encoding='utf-8') as file:
-			file.write(generate_api_constants_page_content(lang))
+	render_pages(tasks, state, job_count)
 
 	# output search database
 	with open(os.path.join(api_out_path, 'search.json'), 'w', encoding='utf-8') as file:
@@ -633,22 +744,30 @@ if __name__ == '__main__':
 	parser.add_argument('--doc', type=str, help="Documentation path", required=True)
 	parser.add_argument('--out', type=str, help="Output folder (hugo content/ folder)", required=True)
 	parser.add_argument('--version', type=str, help="Documentation version", required=True)
+	parser.add_argument('--cache', type=str, help="Cache file reused across runs to skip parsing unmodified inputs")
+	parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="Number of processes used to render pages (default: CPU count)")
 	args = parser.parse_args()
 
 	static_img = os.path.join(args.out, '..', 'static', 'images', 'docs', args.version)
 	shutil.copytree('img', static_img)
 
-	with open(args.api, "r") as file:
-		api = ETree.fromstring(file.read())
+	with open(args.api, "rb") as file:
+		api_xml = file.read()
 
-	api_tools.load_api(args.api)
+	cache = load_cache(args.cache) if args.cache else None
+
+	api_hash = hashlib.sha1(api_xml).hexdigest()
+	api_cache = cache['api'][1] if cache is not None and cache['api'] is not None and cache['api'][0] == api_hash else None
+
+	setup_api(ETree.fromstring(api_xml), api_cache)
 	doc_tools.load_doc_folder(args.doc)
 
-	classes = get_api_tags(['class'])
-	functions = get_api_tags(['function'])
-	constants = get_api_tags(['constants'])
-	enums = get_api_tags(['enum'])
+	if cache is not None:
+		cache['api'] = (api_hash, (link_targets, class_users, function_users))
+
+	convert(api_xml, args.doc, args.out, args.jobs, cache)
 
-	convert(args.api, args.doc, args.out)
+	if cache is not None:
+		save_cache(args.cache, cache)
 
 	report_unresolved_links()
@@ -70,6 +70,11 @@ def load_api(path):
 	with open(path, "r") as file:
 		xml_root = ETree.fromstring(file.read())
 
+	load_api_tree(xml_root)
+
+
+def load_api_tree(xml_root):
+	"""Load the API from an already parsed XML description."""
 	global api
 	api = OrderedDict()
 	load_tag(xml_root)
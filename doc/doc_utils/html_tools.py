@@ -416,29 +416,56 @@ def is_class_using_uid(class_tag, uid):
 	)
 
 
-related_to_cache = {}
+def get_function_used_uids(fn_tag):
+	uids = {fn_tag.get("returns")}
+	for parm in fn_tag:
+		if parm.tag == "parm":
+			uids.add(parm.get("type"))
+			uids.add(parm.get("constants_group"))
+	uids.discard(None)
+	return uids
 
 
-def gather_uids_related_to(uid):
-	if uid in related_to_cache:
-		return related_to_cache[uid]
+def build_uid_usage_index(api):
+	"""Map each uid to the classes and global functions using it, in a single pass over the API."""
+	index = {}
 
-	classes, functions = [], {}
-
-	for related_uid, tags in api_tools.api.items():
-		if related_uid == uid:
-			continue
+	def get_entry(uid):
+		if uid not in index:
+			index[uid] = ([], {})
+		return index[uid]
 
+	for related_uid, tags in api.items():
 		for tag in tags:
-			if tag.tag == "function":  # look if a global function is using this uid
-				if tag.get("global") == "1" and is_function_using_uid(tag, uid):
-					functions[related_uid] = functions.get(related_uid, []) + [tag]
-			elif tag.tag == "class":  # look if class has a function using this enum
-				if is_class_using_uid(tag, uid):
-					classes.append(related_uid)
+			if tag.tag == "function":  # global functions using a uid
+				if tag.get("global") == "1":
+					for uid in get_function_used_uids(tag):
+						if uid != related_uid:
+							functions = get_entry(uid)[1]
+							functions[related_uid] = functions.get(related_uid, []) + [tag]
+			elif tag.tag == "class":  # classes with a function using a uid
+				uids = set()
+				for fn_tag in tag:
+					if fn_tag.tag == "function":
+						uids |= get_function_used_uids(fn_tag)
+
+				for uid in uids:
+					if uid != related_uid:
+						get_entry(uid)[0].append(related_uid)
+
+	return index
+
+
+uid_usage_index, uid_usage_index_api = None, None
+
+
+def gather_uids_related_to(uid):
+	"""Return the classes and global functions using a uid."""
+	global uid_usage_index, uid_usage_index_api
+	if uid_usage_index_api is not api_tools.api:  # (re)build the index for the loaded API
+		uid_usage_index, uid_usage_index_api = build_uid_usage_index(api_tools.api), api_tools.api
 
-	related_to_cache[uid] = (classes, functions)
-	return classes, functions
+	return uid_usage_index.get(uid, ([], {}))
 
 
 def uids_to_link(uids):
@@ -463,7 +490,7 @@ def group_uids_per_category(tag_name, globals_only=False):
 				if not cat.isalpha():
 					cat = "_"
 
-				cat_uids[cat] = cat_uids.get(cat, []) + [uid_]
+				cat_uids.setdefault(cat, []).append(uid_)
 
 	return cat_uids
 
@@ -0,0 +1,72 @@
+// HARFANG(R) Copyright (C) 2022 NWNC. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
+
+#include "bench.h"
+
+#include <algorithm>
+#include <cstdio>
+
+using namespace hg;
+
+BenchResult MakeBenchResult(const std::string &name, std::vector<time_ns> samples) {
+	BenchResult res;
+	res.name = name;
+	res.run_count = samples.size();
+
+	if (samples.empty())
+		return res;
+
+	std::sort(std::begin(samples), std::end(samples));
+
+	for (auto sample : samples)
+		res.total += sample;
+
+	res.min = samples.front();
+	res.max = samples.back();
+	res.mean = res.total / time_ns(samples.size());
+	res.median = samples[samples.size() / 2];
+	return res;
+}
+
+BenchResult MeasureBench(const std::string &name, int run_count, const std::function<void()> &fn) {
+	std::vector<time_ns> samples;
+	samples.reserve(run_count);
+
+	for (int i = 0; i < run_count; ++i) {
+		const auto t = time_now();
+		fn();
+		samples.push_back(time_now() - t);
+	}
+
+	return MakeBenchResult(name, std::move(samples));
+}
+
+//
+void PrintBenchReport(const BenchReport &report) {
+	printf("%s %s\n", report.benchmark.c_str(), report.parameters.dump().c_str());
+	printf("%-48s %-8s %-12s %-12s %-12s %s\n", "operation", "runs", "mean", "median", "min", "max (ms)");
+
+	for (const auto &res : report.results)
+		printf("%-48s %-8d %-12.3f %-12.3f %-12.3f %.3f\n", res.name.c_str(), int(res.run_count), time_to_ms_f(res.mean), time_to_ms_f(res.median),
+			time_to_ms_f(res.min), time_to_ms_f(res.max));
+
+	printf("\n");
+}
+
+static double to_ms(time_ns t) { return double(t) / 1000000.0; } // keep the JSON output free of float rounding noise
+
+nlohmann::json BenchReportToJson(const BenchReport &report) {
+	auto results = nlohmann::json::array();
+
+	for (const auto &res : report.results)
+		results.push_back({
+			{"name", res.name},
+			{"runs", res.run_count},
+			{"mean_ms", to_ms(res.mean)},
+			{"median_ms", to_ms(res.median)},
+			{"min_ms", to_ms(res.min)},
+			{"max_ms", to_ms(res.max)},
+			{"total_ms", to_ms(res.total)},
+		});
+
+	return {{"benchmark", report.benchmark}, {"parameters", report.parameters}, {"results", results}};
+}
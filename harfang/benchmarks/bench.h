@@ -0,0 +1,45 @@
+// HARFANG(R) Copyright (C) 2022 NWNC. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
+
+#pragma once
+
+#include "foundation/time.h"
+
+#include <json/json.hpp>
+
+#include <functional>
+#include <string>
+#include <vector>
+
+/// Timings of a benchmarked operation.
+struct BenchResult {
+	std::string name;
+	size_t run_count{0};
+	hg::time_ns min{0}, max{0}, mean{0}, median{0}, total{0};
+};
+
+/// Compute the timings of an operation from the duration of each of its runs.
+BenchResult MakeBenchResult(const std::string &name, std::vector<hg::time_ns> samples);
+/// Call a function run_count times and return the timings of its calls.
+BenchResult MeasureBench(const std::string &name, int run_count, const std::function<void()> &fn);
+
+/// Results of a benchmark and the parameters it was run with.
+struct BenchReport {
+	std::string benchmark;
+	nlohmann::json parameters;
+	std::vector<BenchResult> results;
+};
+
+void PrintBenchReport(const BenchReport &report);
+nlohmann::json BenchReportToJson(const BenchReport &report);
+
+//
+BenchReport bench_scene(int node_count, int depth, int anim_count, int run_count);
+BenchReport bench_scene_binary(int node_count, int depth, int anim_count, int run_count);
+
+#if HG_ENABLE_BULLET3_SCENE_PHYSICS
+BenchReport bench_physics_stacked_cubes(int cube_count, int stack_height, int step_count, const std::vector<int> &worker_counts);
+#endif
+
+#if HG_ENABLE_RECAST_DETOUR_API
+BenchReport bench_navmesh(float size, int query_count, int run_count);
+#endif
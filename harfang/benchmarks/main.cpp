@@ -0,0 +1,103 @@
+// HARFANG(R) Copyright (C) 2022 NWNC. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
+
+#include "bench.h"
+
+#include "foundation/cmd_line.h"
+#include "foundation/file.h"
+#include "foundation/math.h"
+#include "foundation/string.h"
+#include "foundation/worker_pool.h"
+
+#include <cstdio>
+#include <string>
+#include <vector>
+
+using namespace hg;
+
+static std::vector<int> ParseWorkerCounts(const std::string &list) {
+	std::vector<int> counts;
+	for (const auto &count : split(list, ","))
+		if (!count.empty())
+			counts.push_back(std::stoi(count));
+	return counts;
+}
+
+int main(int narg, const char **args) {
+	CmdLineFormat cmd_format = {
+		{},
+		{
+			{"-nodes", "Number of nodes in the scene benchmarks", true},
+			{"-depth", "Depth of the node hierarchies in the scene benchmarks", true},
+			{"-anims", "Number of playing animations in the scene benchmarks", true},
+			{"-runs", "Number of runs of each measured operation, scene serialization and navigation mesh builds use fewer runs", true},
+			{"-cubes", "Number of cubes in the physics benchmarks", true},
+			{"-stack", "Height of the cube stacks in the physics benchmarks", true},
+			{"-steps", "Number of steps to measure", true},
+			{"-workers", "Comma separated list of worker counts to run the multithreaded benchmarks with", true},
+			{"-size", "Size of the floor in the navigation mesh benchmarks", true},
+			{"-queries", "Number of path queries in the navigation mesh benchmarks", true},
+			{"-json", "Save the results of all benchmarks to a JSON file", true},
+		},
+		{
+			{"benchmark", "Benchmark to run: scene, scene_binary, physics_stacked_cubes, navmesh or all"},
+		},
+	};
+
+	CmdLineContent cmd_content;
+	if (!ParseCmdLine({args + 1, args + narg}, cmd_format, cmd_content) || cmd_content.positionals.size() != 1) {
+		printf("Usage: benchmarks %s\n\n%s", FormatCmdLineArgs(cmd_format).c_str(), FormatCmdLineArgsDescription(cmd_format).c_str());
+		return -1;
+	}
+
+	const auto &benchmark = cmd_content.positionals[0];
+	const bool all = benchmark == "all";
+
+	const auto node_count = GetCmdLineSingleValue(cmd_content, "-nodes", 10000);
+	const auto depth = Max(GetCmdLineSingleValue(cmd_content, "-depth", 8), 1);
+	const auto anim_count = GetCmdLineSingleValue(cmd_content, "-anims", 100);
+	const auto run_count = Max(GetCmdLineSingleValue(cmd_content, "-runs", 100), 1);
+	const auto step_count = GetCmdLineSingleValue(cmd_content, "-steps", 300);
+	const auto worker_counts = ParseWorkerCounts(GetCmdLineSingleValue(cmd_content, "-workers", std::to_string(Max(get_worker_count(), 1))));
+
+	std::vector<BenchReport> reports;
+
+	if (all || benchmark == "scene")
+		reports.push_back(bench_scene(node_count, depth, anim_count, run_count));
+	if (all || benchmark == "scene_binary")
+		reports.push_back(bench_scene_binary(node_count, depth, anim_count, Max(run_count / 10, 1)));
+
+#if HG_ENABLE_BULLET3_SCENE_PHYSICS
+	if (all || benchmark == "physics_stacked_cubes")
+		reports.push_back(bench_physics_stacked_cubes(
+			GetCmdLineSingleValue(cmd_content, "-cubes", 4096), GetCmdLineSingleValue(cmd_content, "-stack", 8), step_count, worker_counts));
+#endif
+
+#if HG_ENABLE_RECAST_DETOUR_API
+	if (all || benchmark == "navmesh")
+		reports.push_back(bench_navmesh(GetCmdLineSingleValue(cmd_content, "-size", 200.f), GetCmdLineSingleValue(cmd_content, "-queries", 1000),
+			Max(run_count / 20, 1)));
+#endif
+
+	if (reports.empty()) {
+		printf("Unknown or disabled benchmark '%s'\n", benchmark.c_str());
+		return -1;
+	}
+
+	for (const auto &report : reports)
+		PrintBenchReport(report);
+
+	const auto json_path = GetCmdLineSingleValue(cmd_content, "-json", std::string());
+
+	if (!json_path.empty()) {
+		nlohmann::json js = {{"worker_count", get_worker_count()}, {"reports", nlohmann::json::array()}};
+		for (const auto &report : reports)
+			js["reports"].push_back(BenchReportToJson(report));
+
+		if (!StringToFile(json_path.c_str(), js.dump(1, '\t').c_str())) {
+			printf("Failed to save results to '%s'\n", json_path.c_str());
+			return -1;
+		}
+	}
+
+	return 0;
+}
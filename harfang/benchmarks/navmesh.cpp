@@ -0,0 +1,87 @@
+// HARFANG(R) Copyright (C) 2022 NWNC. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
+
+#include "bench.h"
+
+#include "engine/recast_detour.h"
+
+#include "foundation/log.h"
+#include "foundation/math.h"
+#include "foundation/rand.h"
+
+using namespace hg;
+
+/// Add an upward facing quad at height y.
+static void AddQuad(NavMeshInput &input, float x0, float z0, float x1, float z1, float y) {
+	const int base = int(input.vtx.size());
+
+	input.vtx.push_back({x0, y, z0});
+	input.vtx.push_back({x0, y, z1});
+	input.vtx.push_back({x1, y, z1});
+	input.vtx.push_back({x1, y, z0});
+
+	for (int i : {0, 1, 3, 1, 2, 3})
+		input.idx.push_back(base + i);
+}
+
+/// A square floor cut into 4x4 unit cells, every other cell along both axes is a 1.5 unit high pillar that agents have to walk around.
+static NavMeshInput CreateNavMeshBenchInput(float size) {
+	NavMeshInput input;
+
+	const int cell_count = Max(int(size / 4.f), 1);
+	for (int j = 0; j < cell_count; ++j)
+		for (int i = 0; i < cell_count; ++i) {
+			const float x = i * 4.f - size * 0.5f, z = j * 4.f - size * 0.5f;
+			const bool pillar = (i % 2) && (j % 2);
+			AddQuad(input, x, z, x + 4.f, z + 4.f, pillar ? 1.5f : 0.f);
+		}
+
+	return input;
+}
+
+/// Time navigation mesh builds and path queries between random points of a floor covered with pillars.
+BenchReport bench_navmesh(float size, int query_count, int run_count) {
+	BenchReport report;
+	report.benchmark = "navmesh";
+	report.parameters = {{"size", size}, {"queries", query_count}, {"runs", run_count}};
+
+	const auto input = CreateNavMeshBenchInput(size);
+
+	const float radius = 0.5f, height = 2.f, slope = 45.f, climb = 0.5f;
+
+	report.results.push_back(MeasureBench("CreateNavMesh", run_count, [&]() { DestroyNavMesh(CreateNavMesh(input, radius, height, slope, climb)); }));
+	report.results.push_back(MeasureBench(
+		"CreateNavMeshTileCache", run_count, [&]() { DestroyNavMeshTileCache(CreateNavMeshTileCache(input, radius, height, slope, climb)); }));
+
+	auto mesh = CreateNavMesh(input, radius, height, slope, climb);
+	if (!mesh) {
+		error("Failed to create the benchmark navigation mesh");
+		return report;
+	}
+
+	auto query = CreateNavMeshQuery(mesh);
+
+	Seed(0);
+
+	std::vector<time_ns> samples;
+	samples.reserve(query_count);
+
+	size_t waypoint_count = 0;
+
+	const float extent = size * 0.5f - 1.f;
+	for (int i = 0; i < query_count; ++i) {
+		const Vec3 from(FRRand(-extent, extent), 0.f, FRRand(-extent, extent)), to(FRRand(-extent, extent), 0.f, FRRand(-extent, extent));
+
+		const auto t = time_now();
+		const auto path = FindNavigationPathTo(query, from, to);
+		samples.push_back(time_now() - t);
+
+		waypoint_count += path.size();
+	}
+
+	report.results.push_back(MakeBenchResult("FindNavigationPathTo", std::move(samples)));
+	report.parameters["waypoints"] = waypoint_count;
+
+	DestroyNavMeshQuery(query);
+	DestroyNavMesh(mesh);
+	return report;
+}
@@ -0,0 +1,88 @@
+// HARFANG(R) Copyright (C) 2022 NWNC. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
+
+#include "bench.h"
+
+#include "engine/scene.h"
+#include "engine/scene_bullet3_physics.h"
+
+#include "foundation/math.h"
+#include "foundation/profiler.h"
+#include "foundation/time.h"
+#include "foundation/worker_pool.h"
+
+#include <cmath>
+
+using namespace hg;
+
+/// Step a world of cube_count unit cubes stacked in columns of stack_height cubes over a static ground.
+static void RunStackedCubes(BenchReport &report, const std::string &world, int thread_count, int cube_count, int stack_height, int step_count) {
+	Scene scene;
+
+	CreatePhysicCube(scene, {1000.f, 1.f, 1000.f}, TranslationMat4({0.f, -0.5f, 0.f}), {}, {}, 0.f);
+
+	const int column_count = (cube_count + stack_height - 1) / stack_height;
+	const int side = int(std::ceil(std::sqrt(float(column_count))));
+
+	for (int i = 0; i < cube_count; ++i) {
+		const int column = i / stack_height, level = i % stack_height;
+		const Vec3 pos((column % side - side / 2) * 2.f, 0.5f + level * 1.01f, (column / side - side / 2) * 2.f);
+		CreatePhysicCube(scene, {1.f, 1.f, 1.f}, TranslationMat4(pos), {}, {}, 1.f);
+	}
+
+	scene.Update(0);
+
+	SceneBullet3Physics physics(thread_count);
+	physics.SceneCreatePhysicsFromAssets(scene);
+
+	const auto step = time_from_ms(16);
+
+	for (int i = 0; i < 10; ++i) // settle contacts before measuring
+		physics.StepSimulation(step, step, 1);
+
+	EndProfilerFrame(); // drop warm-up sections
+
+	std::vector<time_ns> step_samples;
+	step_samples.reserve(step_count);
+
+	for (int i = 0; i < step_count; ++i) {
+		const auto t = time_now();
+		physics.StepSimulation(step, step, 1);
+		step_samples.push_back(time_now() - t);
+
+		physics.SyncTransformsToScene(scene);
+	}
+
+	// substep durations as reported by the profiler
+	std::vector<time_ns> substep_samples;
+
+	const auto frame = EndProfilerFrame();
+	for (const auto &task : frame.tasks)
+		if (task.name == "SceneBullet3Physics::Substep")
+			for (auto section_index : task.section_indexes)
+				substep_samples.push_back(frame.sections[section_index].end - frame.sections[section_index].start);
+
+	report.results.push_back(MakeBenchResult("SceneBullet3Physics::StepSimulation [" + world + "]", std::move(step_samples)));
+	report.results.push_back(MakeBenchResult("SceneBullet3Physics::Substep [" + world + "]", std::move(substep_samples)));
+}
+
+/// Compare the single-threaded world against the multithreaded world for each worker count, worker counts below 1 are skipped since the multithreaded world would run on the calling thread only.
+BenchReport bench_physics_stacked_cubes(int cube_count, int stack_height, int step_count, const std::vector<int> &worker_counts) {
+	BenchReport report;
+	report.benchmark = "physics_stacked_cubes";
+	report.parameters = {{"cubes", cube_count}, {"stack", stack_height}, {"steps", step_count}, {"workers", worker_counts}};
+
+	RunStackedCubes(report, "single", 1, cube_count, stack_height, step_count);
+
+	const auto default_worker_count = get_worker_count();
+
+	for (auto worker_count : worker_counts) {
+		if (worker_count < 1)
+			continue; // same as the single-threaded run
+
+		set_worker_count(worker_count);
+		RunStackedCubes(report, std::to_string(worker_count) + " workers", worker_count + 1, cube_count, stack_height, step_count);
+	}
+
+	set_worker_count(default_worker_count);
+	return report;
+}
@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+
+
+def run_benchmarks(exe, benchmark, options):
+	"""Run the benchmark executable and return its JSON output."""
+	with tempfile.TemporaryDirectory() as tmp:
+		path = os.path.join(tmp, 'results.json')
+
+		cmd = [exe, benchmark, '-json', path]
+		for name, value in options.items():
+			if value is not None:
+				cmd += [f'-{name}', str(value)]
+
+		subprocess.run(cmd, check=True)
+
+		with open(path) as file:
+			return json.load(file)
+
+
+def get_git_commit():
+	try:
+		return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def flatten(results):
+	"""Map '<benchmark>/<operation>' to the timings of each operation."""
+	return {f"{report['benchmark']}/{res['name']}": res for report in results['reports'] for res in report['results']}
+
+
+def compare(results, baseline, metric, threshold):
+	"""Print the change of each operation against a baseline, return the operations slower than the baseline by more than threshold percent."""
+	current, previous = flatten(results), flatten(baseline)
+
+	if results.get('parameters') != baseline.get('parameters'):
+		print('WARNING: the baseline was run with different parameters')
+
+	regressions = []
+
+	print(f'{"operation":<72} {"baseline":>12} {"current":>12} {"change":>9}')
+	for name, res in current.items():
+		if name not in previous:
+			print(f'{name:<72} {"-":>12} {res[metric]:>10.3f}ms {"new":>9}')
+			continue
+
+		old, new = previous[name][metric], res[metric]
+		change = (new - old) / old * 100 if old > 0 else 0
+
+		flag = ''
+		if change > threshold:
+			regressions.append(name)
+			flag = ' REGRESSION'
+
+		print(f'{name:<72} {old:>10.3f}ms {new:>10.3f}ms {change:>+8.1f}%{flag}')
+
+	for name, res in previous.items():
+		if name not in current:
+			print(f'{name:<72} {res[metric]:>10.3f}ms {"-":>12} {"missing":>9}')
+
+	return regressions
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="Run the engine benchmarks and compare their results against a baseline")
+	parser.add_argument('--exe', type=str, help="Path to the benchmarks executable", required=True)
+	parser.add_argument('--benchmark', type=str, help="Benchmark to run: scene, scene_binary, physics_stacked_cubes, navmesh or all", default='all')
+	parser.add_argument('--out', type=str, help="Save the results to this JSON file")
+	parser.add_argument('--baseline', type=str, help="JSON results of a previous run to compare against")
+	parser.add_argument('--metric', type=str, help="Timing to compare", choices=['mean_ms', 'median_ms', 'min_ms'], default='median_ms')
+	parser.add_argument('--threshold', type=float, help="Slowdown in percent above which an operation is reported as a regression", default=10)
+
+	parser.add_argument('--nodes', type=int, help="Number of nodes in the scene benchmarks")
+	parser.add_argument('--depth', type=int, help="Depth of the node hierarchies in the scene benchmarks")
+	parser.add_argument('--anims', type=int, help="Number of playing animations in the scene benchmarks")
+	parser.add_argument('--runs', type=int, help="Number of runs of each measured operation")
+	parser.add_argument('--cubes', type=int, help="Number of rigid bodies in the physics benchmarks")
+	parser.add_argument('--stack', type=int, help="Height of the cube stacks in the physics benchmarks")
+	parser.add_argument('--steps', type=int, help="Number of physics steps to measure")
+	parser.add_argument('--workers', type=str, help="Comma separated list of worker counts for the multithreaded benchmarks")
+	parser.add_argument('--size', type=float, help="Size of the floor in the navigation mesh benchmarks")
+	parser.add_argument('--queries', type=int, help="Number of path queries in the navigation mesh benchmarks")
+	args = parser.parse_args()
+
+	options = {name: getattr(args, name) for name in ['nodes', 'depth', 'anims', 'runs', 'cubes', 'stack', 'steps', 'workers', 'size', 'queries']}
+
+	results = run_benchmarks(os.path.abspath(args.exe), args.benchmark, options)
+	results['parameters'] = {'benchmark': args.benchmark, **{name: value for name, value in options.items() if value is not None}}
+	results['commit'] = get_git_commit()
+	results['date'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+	results['machine'] = {'system': platform.system(), 'machine': platform.machine(), 'processor': platform.processor(), 'cpu_count': os.cpu_count()}
+
+	if args.out:
+		with open(args.out, 'w') as file:
+			json.dump(results, file, indent='\t')
+
+	if args.baseline:
+		with open(args.baseline) as file:
+			baseline = json.load(file)
+
+		print(f"\nComparing {args.metric} against {baseline.get('commit') or args.baseline}")
+		regressions = compare(results, baseline, args.metric, args.threshold)
+
+		if regressions:
+			print(f'\n{len(regressions)} operation(s) slower than the baseline by more than {args.threshold}%')
+			sys.exit(1)
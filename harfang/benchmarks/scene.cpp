@@ -0,0 +1,225 @@
+// HARFANG(R) Copyright (C) 2022 NWNC. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
+
+#include "bench.h"
+
+#include "engine/assets_rw_interface.h"
+#include "engine/create_geometry.h"
+#include "engine/forward_pipeline.h"
+#include "engine/render_pipeline.h"
+#include "engine/scene.h"
+
+#include "foundation/data.h"
+#include "foundation/frustum.h"
+#include "foundation/log.h"
+#include "foundation/math.h"
+#include "foundation/projection.h"
+
+#include <bgfx/bgfx.h>
+
+#include <cmath>
+
+using namespace hg;
+
+/// Initialize bgfx with the Noop renderer so that models can be created without a window or a GPU.
+static bool InitNoopRenderer() {
+	bgfx::renderFrame(); // run bgfx on the calling thread
+
+	bgfx::Init init;
+	init.type = bgfx::RendererType::Noop;
+	init.resolution.width = 16;
+	init.resolution.height = 16;
+
+	if (!bgfx::init(init)) {
+		error("Failed to initialize the Noop renderer");
+		return false;
+	}
+	return true;
+}
+
+/**
+	Create node_count cube objects in chains of depth nodes, the first child of anim_count chains is animated by a looping scene animation.
+	Chains are laid out on a square grid centered on the origin.
+*/
+static void CreateSyntheticScene(Scene &scene, const ModelRef &model, int node_count, int depth, int anim_count) {
+	const int chain_count = (node_count + depth - 1) / depth;
+	const int side = int(std::ceil(std::sqrt(float(chain_count))));
+
+	std::vector<NodeRef> animated_nodes;
+
+	Node parent;
+	for (int i = 0; i < node_count; ++i) {
+		const int chain = i / depth, level = i % depth;
+
+		const auto mtx = level == 0 ? TranslationMat4({(chain % side - side / 2) * 4.f, 0.f, (chain / side - side / 2) * 4.f})
+									: TransformationMat4({0.f, 1.f, 0.f}, {0.f, Deg(10.f), 0.f});
+
+		auto node = CreateObject(scene, mtx, model, {Material{}});
+		if (level > 0)
+			node.GetTransform().SetParentNode(parent);
+
+		if (level == Min(1, depth - 1) && int(animated_nodes.size()) < anim_count)
+			animated_nodes.push_back(node.ref);
+
+		parent = node;
+	}
+
+	// a single low-level animation is shared by all scene animations
+	Anim anim;
+	anim.t_end = time_from_sec(2);
+
+	AnimTrackHermiteT<Vec3> position, rotation;
+	position.target = "Position";
+	rotation.target = "Rotation";
+
+	SetKey(position, 0, Vec3(0.f, 1.f, 0.f));
+	SetKey(position, time_from_sec(1), Vec3(0.f, 2.f, 0.f));
+	SetKey(position, time_from_sec(2), Vec3(0.f, 1.f, 0.f));
+
+	SetKey(rotation, 0, Vec3(0.f, 0.f, 0.f));
+	SetKey(rotation, time_from_sec(2), Vec3(0.f, Deg(360.f), 0.f));
+
+	anim.vec3_tracks = {position, rotation};
+
+	const auto anim_ref = scene.AddAnim(anim);
+
+	Anim empty_anim; // scene animations require a scene level animation even if it has no track
+	empty_anim.t_end = anim.t_end;
+
+	const auto empty_anim_ref = scene.AddAnim(empty_anim);
+
+	for (size_t i = 0; i < animated_nodes.size(); ++i) {
+		SceneAnim scene_anim;
+		scene_anim.name = "anim_" + std::to_string(i);
+		scene_anim.t_end = anim.t_end;
+		scene_anim.scene_anim = empty_anim_ref;
+		scene_anim.node_anims = {{animated_nodes[i], anim_ref}};
+
+		scene.PlayAnim(scene.AddSceneAnim(scene_anim), ALM_Loop);
+	}
+
+	scene.Update(0);
+}
+
+static nlohmann::json SceneParameters(int node_count, int depth, int anim_count, int run_count) {
+	return {{"nodes", node_count}, {"depth", depth}, {"anims", anim_count}, {"runs", run_count}};
+}
+
+/// Time the per-frame scene hot paths: update, world matrices, animations, display lists and culling.
+BenchReport bench_scene(int node_count, int depth, int anim_count, int run_count) {
+	BenchReport report;
+	report.benchmark = "scene";
+	report.parameters = SceneParameters(node_count, depth, anim_count, run_count);
+
+	if (!InitNoopRenderer())
+		return report;
+
+	{
+		PipelineResources resources;
+		const auto model = resources.models.Add("cube", CreateCubeModel(VertexLayoutPosFloatNormUInt8(), 1.f, 1.f, 1.f));
+
+		Scene scene;
+		CreateSyntheticScene(scene, model, node_count, depth, anim_count);
+
+		const auto dt = time_from_ms(16);
+
+		report.results.push_back(MeasureBench("Scene::Update", run_count, [&]() { scene.Update(dt); }));
+		report.results.push_back(MeasureBench("Scene::UpdatePlayingAnims", run_count, [&]() { scene.UpdatePlayingAnims(dt); }));
+
+		// nothing is dirty after an update, advance the animations outside of the timer so that each run computes the matrices of the animated chains
+		std::vector<time_ns> compute_samples;
+
+		for (int i = 0; i < run_count; ++i) {
+			scene.ReadyWorldMatrices();
+			scene.UpdatePlayingAnims(dt);
+
+			const auto t = time_now();
+			scene.ComputeWorldMatrices();
+			compute_samples.push_back(time_now() - t);
+		}
+
+		report.results.push_back(MakeBenchResult("Scene::ComputeWorldMatrices", std::move(compute_samples)));
+		report.parameters["computed_world_matrices"] = scene.GetComputedWorldMatrixCount();
+
+		std::vector<ModelDisplayList> opaque, transparent;
+		std::vector<SkinnedModelDisplayList> opaque_skinned, transparent_skinned;
+
+		report.results.push_back(MeasureBench("Scene::GetModelDisplayLists", run_count,
+			[&]() { scene.GetModelDisplayLists(opaque, transparent, opaque_skinned, transparent_skinned, resources); }));
+
+		// culling, matrices of the animated chains change on each frame
+		ModelDisplayListCulling culling;
+		UpdateModelDisplayListCulling(culling, opaque, scene.GetTransformWorldMatrices(), scene.GetTransformWorldRevisions(), resources); // build the tree
+
+		std::vector<time_ns> update_samples;
+
+		for (int i = 0; i < run_count; ++i) {
+			scene.Update(dt);
+			scene.GetModelDisplayLists(opaque, transparent, opaque_skinned, transparent_skinned, resources);
+
+			const auto t = time_now();
+			UpdateModelDisplayListCulling(culling, opaque, scene.GetTransformWorldMatrices(), scene.GetTransformWorldRevisions(), resources);
+			update_samples.push_back(time_now() - t);
+		}
+
+		report.results.push_back(MakeBenchResult("UpdateModelDisplayListCulling", std::move(update_samples)));
+
+		const auto side = Max(std::ceil(std::sqrt(float((node_count + depth - 1) / depth))) * 4.f, 8.f); // grid size
+		const auto frustum = MakeFrustum(ComputePerspectiveProjectionMatrix(0.1f, side, FovToZoomFactor(Deg(60.f)), {1.f, 1.f}),
+			TransformationMat4({0.f, 4.f, -side * 0.5f}, {Deg(10.f), 0.f, 0.f}));
+
+		std::vector<ModelDisplayList> visible;
+		report.results.push_back(MeasureBench("CullModelDisplayLists", run_count, [&]() { CullModelDisplayLists(frustum, culling, opaque, visible); }));
+
+		report.parameters["visible"] = visible.size();
+	}
+
+	bgfx::shutdown();
+	return report;
+}
+
+/// Time the binary serialization of the synthetic scene.
+BenchReport bench_scene_binary(int node_count, int depth, int anim_count, int run_count) {
+	BenchReport report;
+	report.benchmark = "scene_binary";
+	report.parameters = SceneParameters(node_count, depth, anim_count, run_count);
+
+	if (!InitNoopRenderer())
+		return report;
+
+	{
+		PipelineResources resources;
+		const auto model = resources.models.Add("cube", CreateCubeModel(VertexLayoutPosFloatNormUInt8(), 1.f, 1.f, 1.f));
+
+		Scene scene;
+		CreateSyntheticScene(scene, model, node_count, depth, anim_count);
+
+		Data data;
+		report.results.push_back(MeasureBench("SaveSceneBinaryToData", run_count, [&]() {
+			data.Reset();
+			SaveSceneBinaryToData(data, scene, resources);
+		}));
+
+		report.parameters["size"] = data.GetSize();
+
+		// resources are not loaded so that only the scene deserialization is measured
+		std::vector<time_ns> load_samples;
+
+		for (int i = 0; i < run_count; ++i) {
+			PipelineResources load_resources;
+			Scene load_scene;
+			LoadSceneContext ctx;
+
+			data.Rewind();
+
+			const auto t = time_now();
+			LoadSceneBinaryFromData(
+				data, "bench", load_scene, g_assets_reader, g_assets_read_provider, load_resources, GetForwardPipelineInfo(), ctx, LSSF_All | LSSF_DoNotLoadResources);
+			load_samples.push_back(time_now() - t);
+		}
+
+		report.results.push_back(MakeBenchResult("LoadSceneBinaryFromData", std::move(load_samples)));
+	}
+
+	bgfx::shutdown();
+	return report;
+}
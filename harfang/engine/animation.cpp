@@ -7,6 +7,9 @@
 namespace hg {
 
 template <> bool Evaluate<bool>(const AnimTrackT<bool> &track, time_ns t, bool &v) { return EvaluateStep<AnimTrackT<bool>, bool>(track, t, v); }
+template <> bool Evaluate<bool>(const AnimTrackT<bool> &track, time_ns t, bool &v, int &cursor) {
+	return EvaluateStep<AnimTrackT<bool>, bool>(track, t, v, &cursor);
+}
 
 template <> bool Evaluate<std::string>(const AnimTrackT<std::string> &track, time_ns t, std::string &v) {
 	return EvaluateStep<AnimTrackT<std::string>, std::string>(track, t, v);
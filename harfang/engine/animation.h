@@ -106,13 +106,38 @@ template <typename AnimTrack> void DeleteKey(AnimTrack &track, time_ns t) {
 }
 
 //
-template <typename AnimTrack, typename T> bool GetIntervalKeys(const AnimTrack &track, time_ns t, int &kf0, int &kf1) {
+template <typename AnimTrack> int GetUpperBoundKey(const AnimTrack &track, time_ns t) {
+	const auto i = std::upper_bound(std::begin(track.keys), std::end(track.keys), t, [](time_ns t, const typename AnimTrack::Key &k) { return t < k.t; });
+	return numeric_cast<int>(std::distance(std::begin(track.keys), i));
+}
+
+/// Maximum number of keys a cursor is advanced by before falling back to a binary search.
+static const int AnimKeyCursorMaxStep = 8;
+
+/**
+	@short Return the keys surrounding t.
+
+	When a cursor is provided it holds the key interval found by the previous call. As long as time moves forward the cursor is advanced
+	incrementally, a binary search is only done when seeking backward or far ahead. Initialize a cursor to 0.
+*/
+template <typename AnimTrack, typename T> bool GetIntervalKeys(const AnimTrack &track, time_ns t, int &kf0, int &kf1, int *cursor = nullptr) {
 	const auto key_count = numeric_cast<int>(track.keys.size());
 
-	int i = 0;
-	for (; i < key_count; ++i)
-		if (track.keys[i].t > t)
-			break;
+	int i;
+
+	if (cursor && *cursor >= 0 && *cursor <= key_count && (*cursor == 0 || track.keys[*cursor - 1].t <= t)) {
+		i = *cursor;
+		for (int step = 0; i < key_count && track.keys[i].t <= t; ++i, ++step)
+			if (step == AnimKeyCursorMaxStep) {
+				i = GetUpperBoundKey(track, t);
+				break;
+			}
+	} else {
+		i = GetUpperBoundKey(track, t);
+	}
+
+	if (cursor)
+		*cursor = i;
 
 	if (i == 0) {
 		kf0 = 0;
@@ -127,23 +152,23 @@ template <typename AnimTrack, typename T> bool GetIntervalKeys(const AnimTrack &
 	return true;
 }
 
-template <typename AnimTrack, typename T> bool EvaluateStep(const AnimTrack &track, time_ns t, T &v) {
+template <typename AnimTrack, typename T> bool EvaluateStep(const AnimTrack &track, time_ns t, T &v, int *cursor = nullptr) {
 	if (track.keys.empty())
 		return false;
 
 	int kf0, kf1;
-	GetIntervalKeys<AnimTrack, T>(track, t, kf0, kf1);
+	GetIntervalKeys<AnimTrack, T>(track, t, kf0, kf1, cursor);
 	v = track.keys[kf0].v;
 
 	return true;
 }
 
-template <typename AnimTrack, typename T> bool EvaluateLinear(const AnimTrack &track, time_ns t, T &v) {
+template <typename AnimTrack, typename T> bool EvaluateLinear(const AnimTrack &track, time_ns t, T &v, int *cursor = nullptr) {
 	if (track.keys.empty())
 		return false;
 
 	int kf0, kf1;
-	if (GetIntervalKeys<AnimTrack, T>(track, t, kf0, kf1)) {
+	if (GetIntervalKeys<AnimTrack, T>(track, t, kf0, kf1, cursor)) {
 		const auto k = time_to_sec_f(t - track.keys[kf0].t) / time_to_sec_f(track.keys[kf1].t - track.keys[kf0].t);
 		v = LinearInterpolate(track.keys[kf0].v, track.keys[kf1].v, k);
 	} else {
@@ -152,13 +177,13 @@ template <typename AnimTrack, typename T> bool EvaluateLinear(const AnimTrack &t
 	return true;
 }
 
-template <typename T> bool EvaluateHermite(const AnimTrackHermiteT<T> &track, time_ns t, T &v) {
+template <typename T> bool EvaluateHermite(const AnimTrackHermiteT<T> &track, time_ns t, T &v, int *cursor = nullptr) {
 	if (track.keys.empty())
 		return false;
 
 	int kf1, kf2;
 
-	if (GetIntervalKeys<AnimTrackHermiteT<T>, T>(track, t, kf1, kf2)) {
+	if (GetIntervalKeys<AnimTrackHermiteT<T>, T>(track, t, kf1, kf2, cursor)) {
 		const auto u = time_to_sec_f(t - track.keys[kf1].t) / time_to_sec_f(track.keys[kf2].t - track.keys[kf1].t);
 		const int kf0 = Max<int>(kf1 - 1, 0), kf3 = Min<int>(kf2 + 1, numeric_cast<int>(track.keys.size()) - 1);
 		v = HermiteInterpolate(track.keys[kf0].v, track.keys[kf1].v, track.keys[kf2].v, track.keys[kf3].v, u, track.keys[kf1].tension, track.keys[kf1].bias);
@@ -187,6 +212,12 @@ template <typename T> bool Evaluate(const AnimTrackHermiteT<T> &track, time_ns t
 template <> bool Evaluate(const AnimTrackT<bool> &track, time_ns t, bool &v);
 template <> bool Evaluate(const AnimTrackT<std::string> &track, time_ns t, std::string &v);
 
+/// Evaluate a track using a key cursor, see GetIntervalKeys.
+template <typename T> bool Evaluate(const AnimTrackT<T> &track, time_ns t, T &v, int &cursor) { return EvaluateLinear<AnimTrackT<T>, T>(track, t, v, &cursor); }
+template <typename T> bool Evaluate(const AnimTrackHermiteT<T> &track, time_ns t, T &v, int &cursor) { return EvaluateHermite<T>(track, t, v, &cursor); }
+
+template <> bool Evaluate(const AnimTrackT<bool> &track, time_ns t, bool &v, int &cursor);
+
 //
 struct InstanceAnimKey {
 	std::string anim_name;
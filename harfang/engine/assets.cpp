@@ -1,11 +1,13 @@
 // HARFANG(R) Copyright (C) 2021 Emmanuel Julien, NWNC HARFANG. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
 
 #include "engine/assets.h"
+#include "foundation/cext.h"
 #include "foundation/dir.h"
 #include "foundation/file.h"
 #include "foundation/format.h"
 #include "foundation/log.h"
 #include "foundation/path_tools.h"
+#include "foundation/xxhash.h"
 
 #include <algorithm>
 #include <cstdio>
@@ -16,6 +18,7 @@
 #include <mutex>
 #include <set>
 #include <string>
+#include <vector>
 
 #include <miniz/miniz.h>
 
@@ -29,23 +32,52 @@ struct AssetsSource {
 };
 
 //
-static std::mutex assets_mutex;
+static std::mutex assets_mutex; // serializes sources modification and zip package access
 
-static std::deque<std::string> assets_folders;
+/*
+	Folders and mapped packages are published as immutable snapshots, lookups read the current snapshot without taking assets_mutex.
+	Modifications are done on a copy of the current snapshot under assets_mutex.
+*/
+using AssetsFolders = std::deque<std::string>;
+
+static std::shared_ptr<const AssetsFolders> assets_folders;
+
+static std::shared_ptr<const AssetsFolders> GetAssetsFolders() { return std::atomic_load(&assets_folders); }
 
 bool AddAssetsFolder(const char *path) {
 	std::lock_guard<std::mutex> lock(assets_mutex);
-	if (std::find(std::begin(assets_folders), std::end(assets_folders), path) == std::end(assets_folders)) {
-		assets_folders.push_front(path);
-		return true;
-	}
-	return false;
+
+	const auto folders = GetAssetsFolders();
+	if (folders && std::find(std::begin(*folders), std::end(*folders), path) != std::end(*folders))
+		return false;
+
+	auto new_folders = folders ? std::make_shared<AssetsFolders>(*folders) : std::make_shared<AssetsFolders>();
+	new_folders->push_front(path);
+	std::atomic_store(&assets_folders, std::shared_ptr<const AssetsFolders>(std::move(new_folders)));
+	return true;
 }
 
 void RemoveAssetsFolder(const char *path) {
 	std::lock_guard<std::mutex> lock(assets_mutex);
-	assets_folders.erase(
-		std::remove_if(std::begin(assets_folders), std::end(assets_folders), [&](const std::string &i) { return i == path; }), std::end(assets_folders));
+
+	const auto folders = GetAssetsFolders();
+	if (!folders)
+		return;
+
+	auto new_folders = std::make_shared<AssetsFolders>(*folders);
+	new_folders->erase(
+		std::remove_if(std::begin(*new_folders), std::end(*new_folders), [&](const std::string &i) { return i == path; }), std::end(*new_folders));
+	std::atomic_store(&assets_folders, std::shared_ptr<const AssetsFolders>(std::move(new_folders)));
+}
+
+static File OpenFolderAsset(const char *name) {
+	if (const auto folders = GetAssetsFolders())
+		for (const auto &p : *folders) {
+			const auto file = Open(PathJoin({p, name}).c_str(), true);
+			if (IsValid(file))
+				return file;
+		}
+	return {invalid_gen_ref};
 }
 
 //
@@ -59,8 +91,171 @@ struct ZipPackage {
 
 static std::deque<ZipPackage> assets_packages;
 
+/*
+	Memory-mapped package layout (little endian):
+
+	PakHeader | entry data (16 bytes aligned) | bucket table | PakEntry table | names
+
+	Entries are sorted by bucket, the bucket table stores bucket_count + 1 offsets in the entry table.
+	The entries of bucket b are in the range [buckets[b]; buckets[b + 1][ with b = XXH64(name) & (bucket_count - 1).
+*/
+static const uint32_t pak_magic = 0x4b504748; // HGPK
+static const uint32_t pak_version = 1;
+
+enum PakCompression : uint32_t { PC_Stored, PC_Deflate };
+
+struct PakHeader {
+	uint32_t magic, version;
+	uint32_t entry_count, bucket_count; // bucket count is a power of 2
+	uint64_t buckets_offset, entries_offset, names_offset;
+};
+
+struct PakEntry {
+	uint64_t name_hash;
+	uint64_t offset, size, packed_size;
+	uint32_t name_offset, name_size;
+	uint32_t compression, reserved;
+};
+
+static uint64_t HashPakName(const char *name, size_t len) { return XXH64(name, len, 0); }
+
+struct PakPackage {
+	std::string filename;
+	MappedFile map;
+
+	const PakHeader *header{};
+	const uint32_t *buckets{};
+	const PakEntry *entries{};
+	const char *names{};
+
+	~PakPackage() { Unmap(map); }
+};
+
+static bool ValidatePakPackage(const MappedFile &map) {
+	if (map.size < sizeof(PakHeader))
+		return false;
+
+	const auto &hdr = *reinterpret_cast<const PakHeader *>(map.data);
+
+	if (hdr.magic != pak_magic || hdr.version != pak_version || hdr.bucket_count == 0 || (hdr.bucket_count & (hdr.bucket_count - 1)) != 0)
+		return false;
+
+	if (hdr.buckets_offset + (uint64_t(hdr.bucket_count) + 1) * sizeof(uint32_t) > hdr.entries_offset || (hdr.buckets_offset & 3) != 0 || (hdr.entries_offset & 7) != 0 ||
+		hdr.entries_offset + uint64_t(hdr.entry_count) * sizeof(PakEntry) > hdr.names_offset || hdr.names_offset > map.size)
+		return false;
+
+	const auto buckets = reinterpret_cast<const uint32_t *>(map.data + hdr.buckets_offset);
+	for (uint32_t i = 0; i < hdr.bucket_count; ++i)
+		if (buckets[i] > buckets[i + 1])
+			return false;
+	if (buckets[0] != 0 || buckets[hdr.bucket_count] != hdr.entry_count)
+		return false;
+
+	const auto names_size = map.size - hdr.names_offset;
+	const auto entries = reinterpret_cast<const PakEntry *>(map.data + hdr.entries_offset);
+
+	for (uint32_t i = 0; i < hdr.entry_count; ++i) {
+		const auto &e = entries[i];
+		if (e.offset + e.packed_size > hdr.buckets_offset || uint64_t(e.name_offset) + e.name_size > names_size || e.compression > PC_Deflate)
+			return false;
+		if (e.compression == PC_Stored && e.size != e.packed_size)
+			return false;
+	}
+
+	return true;
+}
+
+static const PakEntry *FindPakEntry(const PakPackage &pak, const char *name) {
+	const auto len = strlen(name);
+	const auto hash = HashPakName(name, len);
+	const auto bucket = hash & (pak.header->bucket_count - 1);
+
+	for (auto i = pak.buckets[bucket]; i < pak.buckets[bucket + 1]; ++i) {
+		const auto &e = pak.entries[i];
+		if (e.name_hash == hash && e.name_size == len && memcmp(pak.names + e.name_offset, name, len) == 0)
+			return &e;
+	}
+	return nullptr;
+}
+
+using PakPackages = std::vector<std::shared_ptr<const PakPackage>>;
+
+static std::shared_ptr<const PakPackages> pak_packages;
+
+static std::shared_ptr<const PakPackages> GetPakPackages() { return std::atomic_load(&pak_packages); }
+
+static bool AddPakPackage(const char *path, MappedFile map) {
+	const auto paks = GetPakPackages();
+	if (paks && std::find_if(std::begin(*paks), std::end(*paks), [path](const std::shared_ptr<const PakPackage> &p) { return p->filename == path; }) !=
+					std::end(*paks)) {
+		Unmap(map);
+		return false;
+	}
+
+	auto pak = std::make_shared<PakPackage>();
+	pak->filename = path;
+	pak->map = map;
+	pak->header = reinterpret_cast<const PakHeader *>(map.data);
+	pak->buckets = reinterpret_cast<const uint32_t *>(map.data + pak->header->buckets_offset);
+	pak->entries = reinterpret_cast<const PakEntry *>(map.data + pak->header->entries_offset);
+	pak->names = reinterpret_cast<const char *>(map.data + pak->header->names_offset);
+
+	auto new_paks = paks ? std::make_shared<PakPackages>(*paks) : std::make_shared<PakPackages>();
+	new_paks->insert(std::begin(*new_paks), std::move(pak));
+	std::atomic_store(&pak_packages, std::shared_ptr<const PakPackages>(std::move(new_paks)));
+	return true;
+}
+
+static void RemovePakPackage(const char *path) {
+	const auto paks = GetPakPackages();
+	if (!paks)
+		return;
+
+	auto new_paks = std::make_shared<PakPackages>(*paks);
+	new_paks->erase(std::remove_if(std::begin(*new_paks), std::end(*new_paks), [path](const std::shared_ptr<const PakPackage> &p) { return p->filename == path; }),
+		std::end(*new_paks));
+	std::atomic_store(&pak_packages, std::shared_ptr<const PakPackages>(std::move(new_paks))); // mapping is released once the last reader is done with it
+}
+
+struct PakAsset {
+	std::shared_ptr<const PakPackage> pak;
+	const PakEntry *entry{};
+
+	explicit operator bool() const { return entry != nullptr; }
+};
+
+static PakAsset FindPakAsset(const char *name) {
+	if (const auto paks = GetPakPackages())
+		for (const auto &pak : *paks)
+			if (const auto entry = FindPakEntry(*pak, name))
+				return {pak, entry};
+	return {};
+}
+
+static bool UnpackPakAsset(const PakAsset &asset, void *data) {
+	const auto src = asset.pak->map.data + asset.entry->offset;
+
+	if (asset.entry->compression == PC_Stored) {
+		memcpy(data, src, asset.entry->size);
+		return true;
+	}
+
+	return tinfl_decompress_mem_to_mem(data, asset.entry->size, src, asset.entry->packed_size, TINFL_FLAG_USING_NON_WRAPPING_OUTPUT_BUF) == asset.entry->size;
+}
+
+//
 bool AddAssetsPackage(const char *path) {
 	std::lock_guard<std::mutex> lock(assets_mutex);
+
+	{
+		auto map = MapFile(path, true);
+		if (IsValid(map)) {
+			if (ValidatePakPackage(map))
+				return AddPakPackage(path, map);
+			Unmap(map); // not a mapped package, try as a zip archive
+		}
+	}
+
 	auto it = std::find_if(std::begin(assets_packages), std::end(assets_packages), [path](const ZipPackage &h) { return h.filename == path; });
 	if (it != std::end(assets_packages)) {
 		return false;
@@ -79,6 +274,7 @@ bool AddAssetsPackage(const char *path) {
 
 void RemoveAssetsPackage(const char *path) {
 	std::lock_guard<std::mutex> lock(assets_mutex);
+	RemovePakPackage(path);
 	assets_packages.erase(std::begin(assets_packages),
 		std::remove_if(std::begin(assets_packages), std::end(assets_packages), [path](const ZipPackage &h) { return h.filename == path; }));
 }
@@ -86,8 +282,16 @@ void RemoveAssetsPackage(const char *path) {
 struct PackageFile {
 	std::string data;
 	ptrdiff_t cursor;
+
+	PakAsset pak; // stored entry of a mapped package, read in place
 };
 
+static const char *GetPackageFileData(const PackageFile &file) {
+	return file.pak.entry ? reinterpret_cast<const char *>(file.pak.pak->map.data + file.pak.entry->offset) : file.data.data();
+}
+
+static size_t GetPackageFileSize(const PackageFile &file) { return file.pak.entry ? size_t(file.pak.entry->size) : file.data.size(); }
+
 //
 struct Asset_ {
 	File file;
@@ -110,71 +314,94 @@ static void Asset_file_Close(Asset_ &asset) { Close(asset.file); }
 static bool Asset_file_is_EOF(Asset_ &asset) { return IsEOF(asset.file); }
 
 //
-static size_t Package_file_GetSize(Asset_ &asset) { return asset.pkg_file.data.size(); }
+static size_t Package_file_GetSize(Asset_ &asset) { return GetPackageFileSize(asset.pkg_file); }
 static size_t Package_file_Read(Asset_ &asset, void *data, size_t size) {
-	if (asset.pkg_file.cursor + size <= asset.pkg_file.data.size()) {
-		memcpy(data, asset.pkg_file.data.data() + sizeof(char) * asset.pkg_file.cursor, size);
+	if (asset.pkg_file.cursor + size <= GetPackageFileSize(asset.pkg_file)) {
+		memcpy(data, GetPackageFileData(asset.pkg_file) + sizeof(char) * asset.pkg_file.cursor, size);
 		asset.pkg_file.cursor += size;
 		return size;
 	}
 	return 0;
 }
 static bool Package_file_Seek(Asset_ &asset, ptrdiff_t offset, SeekMode mode) {
-	if (offset <= asset.pkg_file.data.size()) {
+	if (offset <= GetPackageFileSize(asset.pkg_file)) {
 		asset.pkg_file.cursor = offset;
 		return true;
 	}
 	return false;
 }
 static size_t Package_file_Tell(Asset_ &asset) { return asset.pkg_file.cursor; }
-static void Package_file_Close(Asset_ &asset) {}
-static bool Package_file_is_EOF(Asset_ &asset) { return asset.pkg_file.cursor >= asset.pkg_file.data.size(); }
+static void Package_file_Close(Asset_ &asset) { asset.pkg_file.pak = {}; }
+static bool Package_file_is_EOF(Asset_ &asset) { return asset.pkg_file.cursor >= GetPackageFileSize(asset.pkg_file); }
 
 //
 static generational_vector_list<Asset_> assets;
+static std::mutex open_assets_mutex;
 
-std::string FindAssetPath(const char *name) {
-	std::lock_guard<std::mutex> lock(assets_mutex);
+static Asset AddAsset(Asset_ &&asset) {
+	std::lock_guard<std::mutex> lock(open_assets_mutex);
+	return {assets.add_ref(std::move(asset))};
+}
 
-	for (auto &p : assets_folders) {
-		const auto asset_path = hg::PathJoin({p, name});
-		if (IsFile(asset_path.c_str()))
-			return asset_path;
-	}
+std::string FindAssetPath(const char *name) {
+	if (const auto folders = GetAssetsFolders())
+		for (auto &p : *folders) {
+			const auto asset_path = hg::PathJoin({p, name});
+			if (IsFile(asset_path.c_str()))
+				return asset_path;
+		}
 	return "";
 }
 
 Asset OpenAsset(const char *name, bool silent) {
-	std::lock_guard<std::mutex> lock(assets_mutex);
+	const auto file = OpenFolderAsset(name);
+	if (IsValid(file))
+		return AddAsset({file, {}, Asset_file_GetSize, Asset_file_Read, Asset_file_Seek, Asset_file_Tell, Asset_file_Close, Asset_file_is_EOF});
+
+	// look in mapped packages
+	if (auto pak = FindPakAsset(name)) {
+		PackageFile pkg_file{{}, 0};
 
-	for (auto &p : assets_folders) {
-		const auto asset_path = PathJoin({p, name});
+		if (pak.entry->compression == PC_Stored) {
+			pkg_file.pak = std::move(pak); // read in place
+		} else {
+			pkg_file.data.resize(size_t(pak.entry->size));
+			if (!UnpackPakAsset(pak, &pkg_file.data[0])) {
+				if (!silent)
+					warn(format("Failed to open asset '%1' from file '%2' (asset was found but failed to decompress)").arg(name).arg(pak.pak->filename));
+				return {};
+			}
+		}
 
-		const auto file = Open(asset_path.c_str(), true);
-		if (IsValid(file))
-			return {assets.add_ref({file, {}, Asset_file_GetSize, Asset_file_Read, Asset_file_Seek, Asset_file_Tell, Asset_file_Close, Asset_file_is_EOF})};
+		return AddAsset({{}, std::move(pkg_file), Package_file_GetSize, Package_file_Read, Package_file_Seek, Package_file_Tell, Package_file_Close,
+			Package_file_is_EOF});
 	}
 
 	// look in archive
-	for (auto &p : assets_packages) {
-		const int index = mz_zip_reader_locate_file(&p.archive, name, NULL, MZ_ZIP_FLAG_CASE_SENSITIVE);
-		if (index == -1)
-			continue; // missing file
-
-		size_t size;
-		const char *buffer = (char *)mz_zip_reader_extract_to_heap(&p.archive, index, &size, 0);
-		if (buffer) {
-			std::string data(buffer, size);
-			return {assets.add_ref({{}, {std::move(data), 0}, Package_file_GetSize, Package_file_Read, Package_file_Seek, Package_file_Tell, Package_file_Close,
-				Package_file_is_EOF})};
-		} else {
-			const mz_zip_error err = mz_zip_get_last_error(&p.archive);
-			if (!silent)
-				warn(format("Failed to open asset '%1' from file '%2' (asset was found but failed to open) : %3")
-						  .arg(name)
-						  .arg(p.filename)
-						  .arg(mz_zip_get_error_string(err)));
-			break;
+	{
+		std::lock_guard<std::mutex> lock(assets_mutex);
+
+		for (auto &p : assets_packages) {
+			const int index = mz_zip_reader_locate_file(&p.archive, name, NULL, MZ_ZIP_FLAG_CASE_SENSITIVE);
+			if (index == -1)
+				continue; // missing file
+
+			size_t size;
+			const char *buffer = (char *)mz_zip_reader_extract_to_heap(&p.archive, index, &size, 0);
+			if (buffer) {
+				std::string data(buffer, size);
+				mz_free((void *)buffer);
+				return AddAsset({{}, {std::move(data), 0}, Package_file_GetSize, Package_file_Read, Package_file_Seek, Package_file_Tell, Package_file_Close,
+					Package_file_is_EOF});
+			} else {
+				const mz_zip_error err = mz_zip_get_last_error(&p.archive);
+				if (!silent)
+					warn(format("Failed to open asset '%1' from file '%2' (asset was found but failed to open) : %3")
+							  .arg(name)
+							  .arg(p.filename)
+							  .arg(mz_zip_get_error_string(err)));
+				break;
+			}
 		}
 	}
 
@@ -185,7 +412,7 @@ Asset OpenAsset(const char *name, bool silent) {
 }
 
 void Close(Asset asset) {
-	std::lock_guard<std::mutex> lock(assets_mutex);
+	std::lock_guard<std::mutex> lock(open_assets_mutex);
 
 	if (assets.is_valid(asset.ref)) {
 		auto &asset_ = assets[asset.ref.idx];
@@ -195,13 +422,17 @@ void Close(Asset asset) {
 }
 
 bool IsAssetFile(const char *name) {
-	std::lock_guard<std::mutex> lock(assets_mutex);
+	if (const auto folders = GetAssetsFolders())
+		for (auto &p : *folders)
+			if (IsFile(PathJoin({p, name}).c_str()))
+				return true;
 
-	for (auto &p : assets_folders)
-		if (IsFile(PathJoin({p, name}).c_str()))
-			return true;
+	if (FindPakAsset(name))
+		return true;
 
 	// look in archive
+	std::lock_guard<std::mutex> lock(assets_mutex);
+
 	for (auto &p : assets_packages) {
 		if (mz_zip_reader_locate_file(&p.archive, name, NULL, MZ_ZIP_FLAG_CASE_SENSITIVE) != -1)
 			return true;
@@ -211,7 +442,7 @@ bool IsAssetFile(const char *name) {
 }
 
 size_t GetSize(Asset asset) {
-	std::lock_guard<std::mutex> lock(assets_mutex);
+	std::lock_guard<std::mutex> lock(open_assets_mutex);
 	if (assets.is_valid(asset.ref)) {
 		auto &asset_ = assets[asset.ref.idx];
 		return asset_.get_size(asset_);
@@ -220,7 +451,7 @@ size_t GetSize(Asset asset) {
 }
 
 size_t Read(Asset asset, void *data, size_t size) {
-	std::lock_guard<std::mutex> lock(assets_mutex);
+	std::lock_guard<std::mutex> lock(open_assets_mutex);
 	if (assets.is_valid(asset.ref)) {
 		auto &asset_ = assets[asset.ref.idx];
 		return asset_.read(asset_, data, size);
@@ -229,7 +460,7 @@ size_t Read(Asset asset, void *data, size_t size) {
 }
 
 bool Seek(Asset asset, ptrdiff_t offset, SeekMode mode) {
-	std::lock_guard<std::mutex> lock(assets_mutex);
+	std::lock_guard<std::mutex> lock(open_assets_mutex);
 	if (assets.is_valid(asset.ref)) {
 		auto &asset_ = assets[asset.ref.idx];
 		return asset_.seek(asset_, offset, mode);
@@ -238,7 +469,7 @@ bool Seek(Asset asset, ptrdiff_t offset, SeekMode mode) {
 }
 
 size_t Tell(Asset asset) {
-	std::lock_guard<std::mutex> lock(assets_mutex);
+	std::lock_guard<std::mutex> lock(open_assets_mutex);
 	if (assets.is_valid(asset.ref)) {
 		auto &asset_ = assets[asset.ref.idx];
 		return asset_.tell(asset_);
@@ -247,7 +478,7 @@ size_t Tell(Asset asset) {
 }
 
 bool IsEOF(Asset asset) {
-	std::lock_guard<std::mutex> lock(assets_mutex);
+	std::lock_guard<std::mutex> lock(open_assets_mutex);
 	if (assets.is_valid(asset.ref)) {
 		auto &asset_ = assets[asset.ref.idx];
 		return asset_.is_eof(asset_);
@@ -255,6 +486,107 @@ bool IsEOF(Asset asset) {
 	return false;
 }
 
+//
+static bool WritePadding(File file, size_t alignment) {
+	static const uint8_t zeros[16] = {};
+	const auto pad = (alignment - Tell(file) % alignment) % alignment;
+	return Write(file, zeros, pad) == pad;
+}
+
+bool PackAssets(const char *folder, const std::vector<std::string> &names, const char *path, bool deflate) {
+	ScopedFile file(OpenWrite(path));
+	if (!file) {
+		warn(format("Failed to create assets package '%1'").arg(path));
+		return false;
+	}
+
+	PakHeader hdr{pak_magic, pak_version};
+	Write(file.f, hdr); // placeholder, written again once complete
+
+	std::vector<PakEntry> entries;
+	entries.reserve(names.size());
+
+	std::string names_blob;
+
+	for (const auto &name : names) {
+		Data data;
+		if (!FileToData(PathJoin({folder, name}).c_str(), data, true)) {
+			warn(format("Failed to read '%1' from '%2', asset skipped").arg(name).arg(folder));
+			continue;
+		}
+
+		PakEntry e{};
+		e.name_hash = HashPakName(name.data(), name.size());
+		e.name_offset = numeric_cast<uint32_t>(names_blob.size());
+		e.name_size = numeric_cast<uint32_t>(name.size());
+		e.size = e.packed_size = data.GetSize();
+		e.compression = PC_Stored;
+
+		names_blob += name;
+
+		WritePadding(file.f, 16);
+		e.offset = Tell(file.f);
+
+		void *packed = nullptr;
+		size_t packed_size = 0;
+
+		if (deflate && data.GetSize())
+			packed = tdefl_compress_mem_to_heap(data.GetData(), data.GetSize(), &packed_size, TDEFL_DEFAULT_MAX_PROBES);
+
+		if (packed && packed_size < data.GetSize() - data.GetSize() / 8) { // keep assets which do not compress well in place
+			e.packed_size = packed_size;
+			e.compression = PC_Deflate;
+			Write(file.f, packed, packed_size);
+		} else {
+			Write(file.f, data.GetData(), data.GetSize());
+		}
+
+		mz_free(packed);
+		entries.push_back(e);
+	}
+
+	// index
+	hdr.entry_count = numeric_cast<uint32_t>(entries.size());
+	hdr.bucket_count = 1;
+	while (hdr.bucket_count < hdr.entry_count)
+		hdr.bucket_count *= 2;
+
+	const auto bucket_mask = hdr.bucket_count - 1;
+	std::stable_sort(
+		std::begin(entries), std::end(entries), [bucket_mask](const PakEntry &a, const PakEntry &b) { return (a.name_hash & bucket_mask) < (b.name_hash & bucket_mask); });
+
+	std::vector<uint32_t> buckets(hdr.bucket_count + 1, 0);
+	for (const auto &e : entries)
+		++buckets[(e.name_hash & bucket_mask) + 1];
+	for (uint32_t i = 0; i < hdr.bucket_count; ++i)
+		buckets[i + 1] += buckets[i];
+
+	WritePadding(file.f, 8);
+	hdr.buckets_offset = Tell(file.f);
+	Write(file.f, buckets.data(), buckets.size() * sizeof(uint32_t));
+
+	WritePadding(file.f, 8);
+	hdr.entries_offset = Tell(file.f);
+	Write(file.f, entries.data(), entries.size() * sizeof(PakEntry));
+
+	hdr.names_offset = Tell(file.f);
+	Write(file.f, names_blob.data(), names_blob.size());
+
+	Seek(file.f, 0, SM_Start);
+	return Write(file.f, hdr);
+}
+
+bool PackAssetsFolder(const char *folder, const char *path, bool deflate) {
+	std::vector<std::string> names;
+	for (const auto &e : ListDirRecursive(folder, DE_File)) {
+		auto name = e.name;
+		std::replace(std::begin(name), std::end(name), '\\', '/');
+		names.push_back(std::move(name));
+	}
+	std::sort(std::begin(names), std::end(names));
+	return PackAssets(folder, names, path, deflate);
+}
+
 //
 std::string AssetToString(const char *name) {
 	const auto h = OpenAsset(name);
@@ -270,6 +602,28 @@ std::string AssetToString(const char *name) {
 
 Data AssetToData(const char *name) {
 	Data data;
+
+	const auto file = OpenFolderAsset(name);
+
+	if (IsValid(file)) {
+		data.Resize(GetSize(file));
+		Read(file, data.GetData(), data.GetSize());
+		Close(file);
+		return data;
+	}
+
+	if (const auto pak = FindPakAsset(name)) {
+		if (pak.entry->compression == PC_Stored)
+			return Data(const_cast<uint8_t *>(pak.pak->map.data + pak.entry->offset), size_t(pak.entry->size), pak.pak); // view keeping the package mapped
+
+		data.Resize(size_t(pak.entry->size));
+		if (!UnpackPakAsset(pak, data.GetData())) {
+			warn(format("Failed to open asset '%1' from file '%2' (asset was found but failed to decompress)").arg(name).arg(pak.pak->filename));
+			data.Reset();
+		}
+		return data;
+	}
+
 	Asset asset = OpenAsset(name);
 
 	if (IsValid(asset)) {
@@ -9,6 +9,7 @@
 #include <cstddef>
 #include <map>
 #include <string>
+#include <vector>
 
 namespace hg {
 
@@ -16,10 +17,16 @@ namespace hg {
 bool AddAssetsFolder(const char *path);
 void RemoveAssetsFolder(const char *path);
 
-/// Mount an archive stored on the local filesystem as an assets source.
+/// Mount an archive stored on the local filesystem as an assets source, either a zip archive or a package created by PackAssets.
+/// Packages created by PackAssets are memory-mapped and searched before zip archives.
 bool AddAssetsPackage(const char *path);
 void RemoveAssetsPackage(const char *path);
 
+/// Pack assets from a local filesystem folder to a memory-mapped package, assets are stored uncompressed unless deflate is set.
+bool PackAssets(const char *folder, const std::vector<std::string> &names, const char *path, bool deflate = false);
+/// Pack all files in a local filesystem folder and its subfolders to a memory-mapped package.
+bool PackAssetsFolder(const char *folder, const char *path, bool deflate = false);
+
 //
 struct Asset {
 	gen_ref ref;
@@ -38,6 +45,7 @@ size_t Tell(Asset asset);
 bool IsEOF(Asset asset);
 
 std::string AssetToString(const char *name);
+/// Return the content of an asset, uncompressed assets from a memory-mapped package are returned as a view keeping the package mapped until it is freed.
 Data AssetToData(const char *name);
 
 bool IsAssetFile(const char *name);
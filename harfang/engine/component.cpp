@@ -34,12 +34,17 @@ static bool IsChildOf(Scene &scene, NodeRef node, ComponentRef transform) {
 //
 Transform Scene::CreateTransform() {
 	const auto ref = transforms.add_ref({});
+	MarkTransformDirty_(ref.idx);
+	transform_order_dirty = true;
 	if (ref.idx >= transform_worlds.size())
 		transform_worlds.resize(ref.idx + 64, Mat4::Identity); // so that GetWorld works straight away
 	return {scene_ref, ref};
 }
 
-void Scene::DestroyTransform(ComponentRef ref) { transforms.remove_ref(ref); }
+void Scene::DestroyTransform(ComponentRef ref) {
+	transforms.remove_ref(ref);
+	transform_order_dirty = true;
+}
 
 Vec3 Scene::GetTransformPos(ComponentRef ref) const {
 	if (const auto *c = GetComponent_(transforms, ref))
@@ -50,10 +55,12 @@ Vec3 Scene::GetTransformPos(ComponentRef ref) const {
 }
 
 void Scene::SetTransformPos(ComponentRef ref, const Vec3 &v) {
-	if (auto *c = GetComponent_(transforms, ref))
+	if (auto *c = GetComponent_(transforms, ref)) {
 		c->TRS.pos = v;
-	else
+		MarkTransformDirty_(ref.idx);
+	} else {
 		warn("Invalid transform component");
+	}
 }
 
 bool Transform::IsValid() const { return scene_ref && scene_ref->scene ? scene_ref->scene->IsValidTransformRef(ref) : false; }
@@ -92,10 +99,12 @@ Vec3 Scene::GetTransformRot(ComponentRef ref) const {
 }
 
 void Scene::SetTransformRot(ComponentRef ref, const Vec3 &v) {
-	if (auto *c = GetComponent_(transforms, ref))
+	if (auto *c = GetComponent_(transforms, ref)) {
 		c->TRS.rot = v;
-	else
+		MarkTransformDirty_(ref.idx);
+	} else {
 		warn("Invalid transform component");
+	}
 }
 
 Vec3 Transform::GetRot() const {
@@ -122,10 +131,12 @@ Vec3 Scene::GetTransformScale(ComponentRef ref) const {
 }
 
 void Scene::SetTransformScale(ComponentRef ref, const Vec3 &v) {
-	if (auto *c = GetComponent_(transforms, ref))
+	if (auto *c = GetComponent_(transforms, ref)) {
 		c->TRS.scl = v;
-	else
+		MarkTransformDirty_(ref.idx);
+	} else {
 		warn("Invalid transform component");
+	}
 }
 
 Vec3 Transform::GetScale() const {
@@ -152,10 +163,12 @@ TransformTRS Scene::GetTransformTRS(ComponentRef ref) const {
 }
 
 void Scene::SetTransformTRS(ComponentRef ref, const TransformTRS &v) {
-	if (auto *c = GetComponent_(transforms, ref))
+	if (auto *c = GetComponent_(transforms, ref)) {
 		c->TRS = v;
-	else
+		MarkTransformDirty_(ref.idx);
+	} else {
 		warn("Invalid transform component");
+	}
 }
 
 TransformTRS Transform::GetTRS() const {
@@ -183,9 +196,11 @@ NodeRef Scene::GetTransformParent(ComponentRef ref) const {
 
 void Scene::SetTransformParent(ComponentRef ref, const NodeRef &v) {
 	if (auto *c = GetComponent_(transforms, ref)) {
-		if (!hg::IsChildOf(*scene_ref->scene, v, ref))
+		if (!hg::IsChildOf(*scene_ref->scene, v, ref)) {
 			c->parent = v;
-		else
+			MarkTransformDirty_(ref.idx);
+			transform_order_dirty = true;
+		} else
 			warn("Cyclical reference detected");
 	} else {
 		warn("Invalid transform component");
@@ -223,7 +238,10 @@ void Transform::SetParentNode(const Node &n) {
 }
 
 Transform Scene::CreateTransform(const Vec3 &pos, const Vec3 &rot, const Vec3 &scl, NodeRef parent) {
-	return {scene_ref, transforms.add_ref({{pos, rot, scl}, parent})};
+	const auto ref = transforms.add_ref({{pos, rot, scl}, parent});
+	MarkTransformDirty_(ref.idx);
+	transform_order_dirty = true;
+	return {scene_ref, ref};
 }
 
 Transform Scene::CreateTransform(const Mat4 &mtx, NodeRef parent) {
@@ -232,15 +250,73 @@ Transform Scene::CreateTransform(const Mat4 &mtx, NodeRef parent) {
 	return CreateTransform(pos, rot, scl);
 }
 
+//
+void Scene::SetTransformsTRS(const std::vector<NodeRef> &refs, const std::vector<Vec3> &pos, const std::vector<Vec3> &rot, const std::vector<Vec3> &scl) {
+	const auto count = refs.size();
+
+	if (pos.size() != count || rot.size() != count || scl.size() != count) {
+		warn("Node list and transform arrays size mismatch");
+		return;
+	}
+
+	for (size_t i = 0; i < count; ++i) {
+		const auto trs_ref = GetNodeComponentRef_<NCI_Transform>(refs[i]);
+		if (auto *c = GetComponent_(transforms, trs_ref)) {
+			c->TRS = {pos[i], rot[i], scl[i]};
+			MarkTransformDirty_(trs_ref.idx);
+		}
+	}
+}
+
+void Scene::SetTransformsTRS(const std::vector<Node> &nodes, const std::vector<Vec3> &pos, const std::vector<Vec3> &rot, const std::vector<Vec3> &scl) {
+	SetTransformsTRS(NodesToNodeRefs(nodes), pos, rot, scl);
+}
+
+void Scene::GetTransformsTRS(const std::vector<NodeRef> &refs, std::vector<Vec3> &pos, std::vector<Vec3> &rot, std::vector<Vec3> &scl) const {
+	const auto count = refs.size();
+
+	pos.resize(count);
+	rot.resize(count);
+	scl.resize(count);
+
+	for (size_t i = 0; i < count; ++i)
+		if (const auto *c = GetComponent_(transforms, GetNodeComponentRef_<NCI_Transform>(refs[i]))) {
+			pos[i] = c->TRS.pos;
+			rot[i] = c->TRS.rot;
+			scl[i] = c->TRS.scl;
+		} else {
+			pos[i] = rot[i] = {};
+			scl[i] = {1, 1, 1};
+		}
+}
+
+void Scene::GetTransformsTRS(const std::vector<Node> &nodes, std::vector<Vec3> &pos, std::vector<Vec3> &rot, std::vector<Vec3> &scl) const {
+	GetTransformsTRS(NodesToNodeRefs(nodes), pos, rot, scl);
+}
+
+std::vector<Mat4> Scene::GetNodesWorldMatrices(const std::vector<NodeRef> &refs) const {
+	std::vector<Mat4> worlds(refs.size(), Mat4::Identity);
+
+	for (size_t i = 0; i < refs.size(); ++i) {
+		const auto trs_ref = GetNodeComponentRef_<NCI_Transform>(refs[i]);
+		if (transforms.is_valid(trs_ref) && trs_ref.idx < transform_worlds.size())
+			worlds[i] = transform_worlds[trs_ref.idx];
+	}
+
+	return worlds;
+}
+
+std::vector<Mat4> Scene::GetNodesWorldMatrices(const std::vector<Node> &nodes) const { return GetNodesWorldMatrices(NodesToNodeRefs(nodes)); }
+
 //
 void Scene::SetTransformLocalMatrix(ComponentRef ref, const Mat4 &local) {
 	if (auto trs = GetComponent_(transforms, ref)) {
 		Decompose(local, &trs->TRS.pos, &trs->TRS.rot, &trs->TRS.scl);
-
 		const auto parent_trs_ref = GetNodeComponentRef_<NCI_Transform>(trs->parent);
 		const auto world = IsValidTransformRef(parent_trs_ref) ? transform_worlds[parent_trs_ref.idx] * local : local;
 
 		transform_worlds[ref.idx] = world;
+		MarkTransformWorldWritten_(ref.idx);
 	} else {
 		warn("Invalid transform component");
 	}
@@ -271,6 +347,7 @@ void Scene::SetTransformWorldMatrix(ComponentRef ref, const Mat4 &world) {
 			const auto local = IsValidTransformRef(parent_trs_ref) ? InverseFast(transform_worlds[parent_trs_ref.idx]) * world : world;
 
 			Decompose(local, &trs->TRS.pos, &trs->TRS.rot, &trs->TRS.scl);
+			MarkTransformWorldWritten_(ref.idx);
 		} else {
 			warn("Invalid transform index");
 		}
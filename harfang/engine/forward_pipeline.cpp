@@ -211,13 +211,24 @@ static Mat4 ComputeCropMatrix() {
 	return TranslationMat4({0.5, 0.5, tz}) * ScaleMat4({0.5, sy, sz});
 }
 
+// shadow casters are culled using the view culling tree when available
+static void CullShadowCasterDisplayLists(const Frustum &frustum, const std::vector<ModelDisplayList> &display_lists, const std::vector<Mat4> &mtxs,
+	const PipelineResources &res, ModelDisplayListCulling *culling, std::vector<ModelDisplayList> &out_display_lists) {
+	if (culling) {
+		CullModelDisplayLists(frustum, *culling, display_lists, out_display_lists);
+	} else {
+		out_display_lists = display_lists;
+		CullModelDisplayLists(frustum, out_display_lists, mtxs, res);
+	}
+}
+
 static const Vec4 frustum_corners[8] = {{-1.f, 1.f, 0.f, 1.f}, {1.f, 1.f, 0.f, 1.f}, {1.f, -1.f, 0.f, 1.f}, {-1.f, -1.f, 0.f, 1.f}, {-1.f, 1.f, 1.f, 1.f},
 	{1.f, 1.f, 1.f, 1.f}, {1.f, -1.f, 1.f, 1.f}, {-1.f, -1.f, 1.f, 1.f}};
 
 void GenerateLinearShadowMapForForwardPipeline(bgfx::ViewId &view_id, const ViewState &view_state, const std::vector<ModelDisplayList> &display_lists,
 	const std::vector<SkinnedModelDisplayList> &skinned_display_lists, const std::vector<Mat4> &mtxs, const ForwardPipelineLights &lights,
 	const ForwardPipeline &pipeline, const PipelineResources &res, ForwardPipelineShadowPassViewId &views, ForwardPipelineShadowData &shadow_data,
-	const char *debug_name) {
+	const char *debug_name, ModelDisplayListCulling *culling) {
 	const bgfx::Caps *caps = bgfx::getCaps();
 
 	std::fill(std::begin(views), std::end(views), 65535);
@@ -328,8 +339,8 @@ void GenerateLinearShadowMapForForwardPipeline(bgfx::ViewId &view_id, const View
 				bgfx::setViewTransform(view_id, to_bgfx(inv_light).data(), to_bgfx(light_projection).data());
 				bgfx::setViewFrameBuffer(view_id, linear_buffer->second);
 
-				std::vector<ModelDisplayList> culled_display_lists = display_lists;
-				CullModelDisplayLists(frustum, culled_display_lists, mtxs, res);
+				std::vector<ModelDisplayList> culled_display_lists;
+				CullShadowCasterDisplayLists(frustum, display_lists, mtxs, res, culling, culled_display_lists);
 
 				DrawModelDisplayLists(
 					view_id, culled_display_lists, 9, pipeline.uniform_values, pipeline.uniform_textures, mtxs, res); // config idx is 9 for FPS_DepthOnly
@@ -348,7 +359,7 @@ void GenerateLinearShadowMapForForwardPipeline(bgfx::ViewId &view_id, const View
 void GenerateSpotShadowMapForForwardPipeline(bgfx::ViewId &view_id, const std::vector<ModelDisplayList> &display_lists,
 	const std::vector<SkinnedModelDisplayList> &skinned_display_lists, const std::vector<Mat4> &mtxs, const ForwardPipelineLights &lights,
 	const ForwardPipeline &pipeline, const PipelineResources &res, ForwardPipelineShadowPassViewId &views, ForwardPipelineShadowData &shadow_data,
-	const char *debug_name) {
+	const char *debug_name, ModelDisplayListCulling *culling) {
 	const bgfx::Caps *caps = bgfx::getCaps();
 
 	std::fill(std::begin(views), std::end(views), 65535);
@@ -377,8 +388,8 @@ void GenerateSpotShadowMapForForwardPipeline(bgfx::ViewId &view_id, const std::v
 		bgfx::setViewTransform(view_id, to_bgfx(view).data(), to_bgfx(proj).data());
 		bgfx::setViewFrameBuffer(view_id, spot_buffer->second);
 
-		std::vector<ModelDisplayList> culled_display_lists = display_lists;
-		CullModelDisplayLists(frustum, culled_display_lists, mtxs, res);
+		std::vector<ModelDisplayList> culled_display_lists;
+		CullShadowCasterDisplayLists(frustum, display_lists, mtxs, res, culling, culled_display_lists);
 
 		DrawModelDisplayLists(
 			view_id, culled_display_lists, 9, pipeline.uniform_values, pipeline.uniform_textures, mtxs, res); // config idx is 9 for FPS_DepthOnly
@@ -104,11 +104,11 @@ using ForwardPipelineShadowPassViewId = std::array<bgfx::ViewId, FPSP_Count>;
 void GenerateLinearShadowMapForForwardPipeline(bgfx::ViewId &view_id, const ViewState &view_state, const std::vector<ModelDisplayList> &display_lists,
 	const std::vector<SkinnedModelDisplayList> &skinned_display_lists, const std::vector<Mat4> &mtxs, const ForwardPipelineLights &lights,
 	const ForwardPipeline &pipeline, const PipelineResources &resources, ForwardPipelineShadowPassViewId &views, ForwardPipelineShadowData &shadow_data,
-	const char *debug_name = nullptr);
+	const char *debug_name = nullptr, ModelDisplayListCulling *culling = nullptr);
 
 void GenerateSpotShadowMapForForwardPipeline(bgfx::ViewId &view_id, const std::vector<ModelDisplayList> &display_lists,
 	const std::vector<SkinnedModelDisplayList> &skinned_display_lists, const std::vector<Mat4> &mtxs, const ForwardPipelineLights &lights,
 	const ForwardPipeline &pipeline, const PipelineResources &resources, ForwardPipelineShadowPassViewId &view, ForwardPipelineShadowData &shadow_data,
-	const char *debug_name = nullptr);
+	const char *debug_name = nullptr, ModelDisplayListCulling *culling = nullptr);
 
 } // namespace hg
@@ -29,10 +29,39 @@ class Scene;
 std::vector<Node> GetNodesInContact(const Scene &scene, const Node with, const NodePairContacts &contacts);
 std::vector<Contact> GetNodePairContacts(const Node first, const Node second, const NodePairContacts &contacts);
 
+enum CollisionEventType : uint8_t { CET_Begin, CET_Persist, CET_End };
+
+/// Collision event between a tracked node and another node, its contacts are found in the [contact_first, contact_first + contact_count) range of CollisionEvents::contacts.
+struct CollisionEvent {
+	int node_a_idx, node_b_idx; // index of the tracked node and of the node it collides with in the scene, see Scene::GetNodeFromIndex
+	uint32_t contact_first, contact_count;
+	CollisionEventType type;
+};
+
+/// Contact between two nodes in world space, the position lies on node b and the normal points toward node a.
+struct CollisionContact {
+	int node_a_idx, node_b_idx;
+	Vec3 P, N;
+	float d;
+};
+
+/// Flat collision event and contact buffers, reuse the same object from one step to the next to avoid allocations.
+struct CollisionEvents {
+	std::vector<CollisionEvent> events;
+	std::vector<CollisionContact> contacts;
+};
+
 struct RaycastOut {
 	Vec3 P{}, N{};
 	Node node;
 	float t{std::numeric_limits<float>::max()};
 };
 
+/// Closest hit of each ray of a batch, the hit of ray i is found at index i of each array.
+struct RaycastBatchOut {
+	std::vector<Vec3> P, N;
+	std::vector<float> t; // distance to the ray origin, max float if the ray hit nothing
+	std::vector<int> node_idx; // index of the hit node in the scene, see Scene::GetNodeFromIndex, -1 if the ray hit nothing
+};
+
 } // namespace hg
@@ -9,15 +9,25 @@
 #include "foundation/color.h"
 #include "foundation/data.h"
 #include "foundation/file_rw_interface.h"
+#include "foundation/format.h"
 #include "foundation/log.h"
+#include "foundation/time.h"
+#include "foundation/worker_pool.h"
 
 #if HG_ENABLE_RECAST_DETOUR_API
 
+#include <DetourCommon.h>
 #include <DetourNavMeshBuilder.h>
 #include <DetourNavMeshQuery.h>
+#include <DetourTileCache.h>
+#include <DetourTileCacheBuilder.h>
 #include <Recast.h>
 
+#include <atomic>
+#include <map>
 #include <math.h>
+#include <memory>
+#include <mutex>
 
 namespace hg {
 
@@ -542,6 +552,583 @@ dtNavMesh *CreateNavMesh(const NavMeshInput &input, float radius, float height,
 	return navMesh;
 }
 
+//
+static const int NAVMESH_TILE_CACHE_MAX_LAYERS = 32; // max layers per tile
+static const int NAVMESH_TILE_CACHE_EXPECTED_LAYERS = 4; // average layers per tile used to size the tile cache
+
+// layers are kept uncompressed, trading memory for faster tile rebuilds
+struct NavMeshTileCacheCompressor : dtTileCacheCompressor {
+	int maxCompressedSize(const int bufferSize) override { return bufferSize; }
+
+	dtStatus compress(const unsigned char *buffer, const int bufferSize, unsigned char *compressed, const int maxCompressedSize, int *compressedSize) override {
+		if (bufferSize > maxCompressedSize)
+			return DT_FAILURE | DT_BUFFER_TOO_SMALL;
+		memcpy(compressed, buffer, bufferSize);
+		*compressedSize = bufferSize;
+		return DT_SUCCESS;
+	}
+
+	dtStatus decompress(const unsigned char *compressed, const int compressedSize, unsigned char *buffer, const int maxBufferSize, int *bufferSize) override {
+		if (compressedSize > maxBufferSize)
+			return DT_FAILURE | DT_BUFFER_TOO_SMALL;
+		memcpy(buffer, compressed, compressedSize);
+		*bufferSize = compressedSize;
+		return DT_SUCCESS;
+	}
+};
+
+struct NavMeshTileCacheMeshProcess : dtTileCacheMeshProcess {
+	void process(dtNavMeshCreateParams *params, unsigned char *polyAreas, unsigned short *polyFlags) override {
+		for (int i = 0; i < params->polyCount; ++i)
+			if (polyAreas[i] == DT_TILECACHE_WALKABLE_AREA)
+				polyFlags[i] = 1;
+	}
+};
+
+// compressed layers of a tile, owned until handed to the tile cache
+struct NavMeshTileLayers {
+	int tx, ty;
+	uint32_t generation; // of the tile when its rebuild was requested
+	std::vector<unsigned char *> data;
+	std::vector<int> size;
+};
+
+static void FreeNavMeshTileLayers(NavMeshTileLayers &layers) {
+	for (auto data : layers.data)
+		dtFree(data);
+	layers.data.clear();
+	layers.size.clear();
+}
+
+// state shared with the rebuilds running on the worker pool
+struct NavMeshTileBuildState {
+	rcConfig cfg; // tile configuration, bmin/bmax hold the bounds of the whole navigation mesh
+	int tile_w, tile_h;
+
+	mutable NavMeshTileCacheCompressor compressor; // stateless, shared by all threads
+
+	std::mutex lock;
+	std::vector<NavMeshTileLayers> built; // protected by lock
+	std::atomic<int> pending_rebuild_count{0};
+
+	~NavMeshTileBuildState() {
+		for (auto &tile : built)
+			FreeNavMeshTileLayers(tile);
+	}
+};
+
+// requests to the tile cache fail while its request queue is full, obstacle changes are kept pending and retried on the next update
+struct NavMeshObstacle {
+	dtObstacleRef ref; // 0 while pending addition
+	MinMax bounds;
+	bool cylinder;
+	bool readd; // remove and add again once the request queue and obstacle pool have room
+	bool removed; // pending removal
+};
+
+// decrement the pending rebuild count once the rebuild job is destroyed, whether it ran or not
+struct NavMeshPendingRebuild {
+	explicit NavMeshPendingRebuild(std::shared_ptr<NavMeshTileBuildState> build_) : build(std::move(build_)) { ++build->pending_rebuild_count; }
+	~NavMeshPendingRebuild() { --build->pending_rebuild_count; }
+
+	std::shared_ptr<NavMeshTileBuildState> build;
+};
+
+struct NavMeshTileCache {
+	std::shared_ptr<NavMeshTileBuildState> build;
+
+	dtTileCacheAlloc alloc;
+	NavMeshTileCacheMeshProcess mesh_process;
+
+	dtTileCache *tile_cache{};
+	dtNavMesh *nav_mesh{};
+
+	std::vector<uint32_t> tile_generation; // indexed by tx + ty * tile_w, bumped each time a rebuild is requested
+
+	std::map<uint32_t, NavMeshObstacle> obstacles;
+	uint32_t next_obstacle{1};
+};
+
+/// Bucket the input triangles overlapping each tile of the [tx0;tx1]x[ty0;ty1] range, border included.
+static void BucketNavMeshInputTriangles(const NavMeshTileBuildState &state, const NavMeshInput &input, int tx0, int ty0, int tx1, int ty1,
+	std::vector<int> &tile_tri_first, std::vector<int> &tile_tris) {
+	const auto &cfg = state.cfg;
+	const float tcs = cfg.tileSize * cfg.cs, border = cfg.borderSize * cfg.cs;
+	const int range_w = tx1 - tx0 + 1, range_h = ty1 - ty0 + 1;
+
+	const int ntris = numeric_cast<int>(input.idx.size()) / 3;
+
+	std::vector<int> tri_range(ntris * 4); // tile range of each triangle, empty if outside of the requested range
+
+	tile_tri_first.assign(range_w * range_h + 1, 0);
+
+	for (int i = 0; i < ntris; ++i) {
+		const auto &a = input.vtx[input.idx[i * 3]], &b = input.vtx[input.idx[i * 3 + 1]], &c = input.vtx[input.idx[i * 3 + 2]];
+
+		int *range = &tri_range[i * 4];
+		range[0] = Max(int(floorf((Min(a.x, b.x, c.x) - border - cfg.bmin[0]) / tcs)), tx0);
+		range[1] = Max(int(floorf((Min(a.z, b.z, c.z) - border - cfg.bmin[2]) / tcs)), ty0);
+		range[2] = Min(int(floorf((Max(a.x, b.x, c.x) + border - cfg.bmin[0]) / tcs)), tx1);
+		range[3] = Min(int(floorf((Max(a.z, b.z, c.z) + border - cfg.bmin[2]) / tcs)), ty1);
+
+		for (int ty = range[1]; ty <= range[3]; ++ty)
+			for (int tx = range[0]; tx <= range[2]; ++tx)
+				++tile_tri_first[(tx - tx0) + (ty - ty0) * range_w + 1];
+	}
+
+	for (size_t i = 1; i < tile_tri_first.size(); ++i)
+		tile_tri_first[i] += tile_tri_first[i - 1];
+
+	tile_tris.resize(tile_tri_first.back());
+
+	std::vector<int> tile_tri_next(std::begin(tile_tri_first), std::end(tile_tri_first) - 1);
+
+	for (int i = 0; i < ntris; ++i) {
+		const int *range = &tri_range[i * 4];
+		for (int ty = range[1]; ty <= range[3]; ++ty)
+			for (int tx = range[0]; tx <= range[2]; ++tx)
+				tile_tris[tile_tri_next[(tx - tx0) + (ty - ty0) * range_w]++] = i;
+	}
+}
+
+/// Rasterize the input triangles of a tile and build its compressed heightfield layers. This function is safe to call from any thread.
+static bool BuildNavMeshTileLayers(
+	const NavMeshTileBuildState &state, const NavMeshInput &input, const int *tris, int tri_count, NavMeshTileLayers &layers) {
+	const float tcs = state.cfg.tileSize * state.cfg.cs;
+
+	rcConfig cfg = state.cfg;
+	cfg.bmin[0] = state.cfg.bmin[0] + layers.tx * tcs - cfg.borderSize * cfg.cs;
+	cfg.bmin[2] = state.cfg.bmin[2] + layers.ty * tcs - cfg.borderSize * cfg.cs;
+	cfg.bmax[0] = state.cfg.bmin[0] + (layers.tx + 1) * tcs + cfg.borderSize * cfg.cs;
+	cfg.bmax[2] = state.cfg.bmin[2] + (layers.ty + 1) * tcs + cfg.borderSize * cfg.cs;
+
+	rcContext ctx;
+
+	std::unique_ptr<rcHeightfield, void (*)(rcHeightfield *)> solid(rcAllocHeightfield(), rcFreeHeightField);
+	if (!solid || !rcCreateHeightfield(&ctx, *solid, cfg.width, cfg.height, cfg.bmin, cfg.bmax, cfg.cs, cfg.ch))
+		return false;
+
+	if (tri_count) {
+		const float *verts = reinterpret_cast<const float *>(input.vtx.data());
+		const int nverts = numeric_cast<int>(input.vtx.size());
+
+		std::vector<int> tile_idx(tri_count * 3);
+		for (int i = 0; i < tri_count; ++i)
+			for (int j = 0; j < 3; ++j)
+				tile_idx[i * 3 + j] = input.idx[tris[i] * 3 + j];
+
+		std::vector<unsigned char> triareas(tri_count, 0);
+		rcMarkWalkableTriangles(&ctx, cfg.walkableSlopeAngle, verts, nverts, tile_idx.data(), tri_count, triareas.data());
+		if (!rcRasterizeTriangles(&ctx, verts, nverts, tile_idx.data(), triareas.data(), tri_count, *solid, cfg.walkableClimb))
+			return false;
+	}
+
+	rcFilterLowHangingWalkableObstacles(&ctx, cfg.walkableClimb, *solid);
+	rcFilterLedgeSpans(&ctx, cfg.walkableHeight, cfg.walkableClimb, *solid);
+	rcFilterWalkableLowHeightSpans(&ctx, cfg.walkableHeight, *solid);
+
+	std::unique_ptr<rcCompactHeightfield, void (*)(rcCompactHeightfield *)> chf(rcAllocCompactHeightfield(), rcFreeCompactHeightfield);
+	if (!chf || !rcBuildCompactHeightfield(&ctx, cfg.walkableHeight, cfg.walkableClimb, *solid, *chf))
+		return false;
+
+	solid = nullptr;
+
+	if (!rcErodeWalkableArea(&ctx, cfg.walkableRadius, *chf))
+		return false;
+
+	std::unique_ptr<rcHeightfieldLayerSet, void (*)(rcHeightfieldLayerSet *)> lset(rcAllocHeightfieldLayerSet(), rcFreeHeightfieldLayerSet);
+	if (!lset || !rcBuildHeightfieldLayers(&ctx, *chf, cfg.borderSize, cfg.walkableHeight, *lset))
+		return false;
+
+	for (int i = 0; i < Min(lset->nlayers, NAVMESH_TILE_CACHE_MAX_LAYERS); ++i) {
+		const auto &layer = lset->layers[i];
+
+		dtTileCacheLayerHeader header;
+		header.magic = DT_TILECACHE_MAGIC;
+		header.version = DT_TILECACHE_VERSION;
+
+		header.tx = layers.tx;
+		header.ty = layers.ty;
+		header.tlayer = i;
+		dtVcopy(header.bmin, layer.bmin);
+		dtVcopy(header.bmax, layer.bmax);
+
+		header.width = (unsigned char)layer.width;
+		header.height = (unsigned char)layer.height;
+		header.minx = (unsigned char)layer.minx;
+		header.maxx = (unsigned char)layer.maxx;
+		header.miny = (unsigned char)layer.miny;
+		header.maxy = (unsigned char)layer.maxy;
+		header.hmin = (unsigned short)layer.hmin;
+		header.hmax = (unsigned short)layer.hmax;
+
+		unsigned char *data = nullptr;
+		int size = 0;
+
+		if (dtStatusFailed(dtBuildTileCacheLayer(&state.compressor, &header, layer.heights, layer.areas, layer.cons, &data, &size)))
+			return false;
+
+		layers.data.push_back(data);
+		layers.size.push_back(size);
+	}
+
+	return true;
+}
+
+/// Build the layers of all tiles in the [tx0;tx1]x[ty0;ty1] range using the worker pool.
+static std::vector<NavMeshTileLayers> BuildNavMeshTileRangeLayers(
+	const NavMeshTileBuildState &state, const NavMeshInput &input, int tx0, int ty0, int tx1, int ty1, const std::vector<uint32_t> &generation) {
+	std::vector<int> tile_tri_first, tile_tris;
+	BucketNavMeshInputTriangles(state, input, tx0, ty0, tx1, ty1, tile_tri_first, tile_tris);
+
+	const int range_w = tx1 - tx0 + 1, range_h = ty1 - ty0 + 1;
+
+	std::vector<NavMeshTileLayers> tiles(range_w * range_h);
+
+	parallel_for(tiles.size(), 1, [&](size_t begin, size_t end) {
+		for (auto i = begin; i < end; ++i) {
+			auto &tile = tiles[i];
+			tile.tx = tx0 + int(i) % range_w;
+			tile.ty = ty0 + int(i) / range_w;
+			tile.generation = generation[i];
+
+			const int first = tile_tri_first[i], count = tile_tri_first[i + 1] - first;
+			if (!BuildNavMeshTileLayers(state, input, tile_tris.data() + first, count, tile)) {
+				warn(format("Navigation: Failed to build tile %1,%2 layers").arg(tile.tx).arg(tile.ty));
+				FreeNavMeshTileLayers(tile);
+			}
+		}
+	});
+
+	return tiles;
+}
+
+//
+NavMeshTileCache *CreateNavMeshTileCache(const NavMeshInput &input, float radius, float height, float slope, float climb, int tile_size, int max_obstacles) {
+	MinMax minmax = {Vec3::Max, Vec3::Min};
+
+	for (const auto &vtx : input.vtx) {
+		minmax.mn = Min(minmax.mn, vtx);
+		minmax.mx = Max(minmax.mx, vtx);
+	}
+
+	if (input.vtx.empty()) {
+		warn("Navigation: Cannot create a tile cache from an empty input geometry");
+		return nullptr;
+	}
+
+	auto build = std::make_shared<NavMeshTileBuildState>();
+
+	auto &cfg = build->cfg;
+	memset(&cfg, 0, sizeof(cfg));
+	cfg.cs = 0.3f;
+	cfg.ch = 0.2f;
+	cfg.walkableSlopeAngle = slope;
+	cfg.walkableHeight = (int)ceilf(height / cfg.ch);
+	cfg.walkableClimb = (int)floorf(climb / cfg.ch);
+	cfg.walkableRadius = (int)ceilf(radius / cfg.cs);
+	cfg.maxEdgeLen = (int)(12.f / cfg.cs);
+	cfg.maxSimplificationError = 1.3f;
+	cfg.minRegionArea = (int)rcSqr(8);
+	cfg.mergeRegionArea = (int)rcSqr(20);
+	cfg.maxVertsPerPoly = DT_VERTS_PER_POLYGON;
+	cfg.tileSize = tile_size;
+	cfg.borderSize = cfg.walkableRadius + 3; // reserve enough padding
+	cfg.width = cfg.tileSize + cfg.borderSize * 2;
+	cfg.height = cfg.tileSize + cfg.borderSize * 2;
+	cfg.detailSampleDist = cfg.cs * 6.f;
+	cfg.detailSampleMaxError = cfg.ch * 1.f;
+
+	if (tile_size < 8 || cfg.width > 255) { // layer dimensions are stored on 8 bit
+		warn(format("Navigation: Invalid tile size %1, must be in [8;%2]").arg(tile_size).arg(255 - cfg.borderSize * 2));
+		return nullptr;
+	}
+
+	rcVcopy(cfg.bmin, &minmax.mn.x);
+	rcVcopy(cfg.bmax, &minmax.mx.x);
+
+	int grid_w, grid_h;
+	rcCalcGridSize(cfg.bmin, cfg.bmax, cfg.cs, &grid_w, &grid_h);
+	build->tile_w = (grid_w + tile_size - 1) / tile_size;
+	build->tile_h = (grid_h + tile_size - 1) / tile_size;
+
+	const int tile_bits = Min((int)dtIlog2(dtNextPow2(build->tile_w * build->tile_h * NAVMESH_TILE_CACHE_EXPECTED_LAYERS)), 14);
+
+	//
+	auto cache = new NavMeshTileCache;
+	cache->build = build;
+	cache->tile_generation.resize(build->tile_w * build->tile_h, 0);
+
+	dtTileCacheParams tc_params;
+	memset(&tc_params, 0, sizeof(tc_params));
+	rcVcopy(tc_params.orig, cfg.bmin);
+	tc_params.cs = cfg.cs;
+	tc_params.ch = cfg.ch;
+	tc_params.width = tile_size;
+	tc_params.height = tile_size;
+	tc_params.walkableHeight = height;
+	tc_params.walkableRadius = radius;
+	tc_params.walkableClimb = climb;
+	tc_params.maxSimplificationError = cfg.maxSimplificationError;
+	tc_params.maxTiles = build->tile_w * build->tile_h * NAVMESH_TILE_CACHE_EXPECTED_LAYERS;
+	tc_params.maxObstacles = max_obstacles;
+
+	cache->tile_cache = dtAllocTileCache();
+	if (!cache->tile_cache || dtStatusFailed(cache->tile_cache->init(&tc_params, &cache->alloc, &build->compressor, &cache->mesh_process))) {
+		warn("Navigation: Could not init tile cache");
+		DestroyNavMeshTileCache(cache);
+		return nullptr;
+	}
+
+	dtNavMeshParams nm_params;
+	memset(&nm_params, 0, sizeof(nm_params));
+	rcVcopy(nm_params.orig, cfg.bmin);
+	nm_params.tileWidth = tile_size * cfg.cs;
+	nm_params.tileHeight = tile_size * cfg.cs;
+	nm_params.maxTiles = 1 << tile_bits;
+	nm_params.maxPolys = 1 << (22 - tile_bits);
+
+	cache->nav_mesh = dtAllocNavMesh();
+	if (!cache->nav_mesh || dtStatusFailed(cache->nav_mesh->init(&nm_params))) {
+		warn("Navigation: Could not init Detour navmesh");
+		DestroyNavMeshTileCache(cache);
+		return nullptr;
+	}
+
+	// rasterize all tiles in parallel then hand them to the tile cache
+	auto tiles = BuildNavMeshTileRangeLayers(*build, input, 0, 0, build->tile_w - 1, build->tile_h - 1, cache->tile_generation);
+
+	for (auto &tile : tiles) {
+		for (size_t i = 0; i < tile.data.size(); ++i)
+			if (dtStatusFailed(cache->tile_cache->addTile(tile.data[i], tile.size[i], DT_COMPRESSEDTILE_FREE_DATA, nullptr)))
+				dtFree(tile.data[i]);
+
+		cache->tile_cache->buildNavMeshTilesAt(tile.tx, tile.ty, cache->nav_mesh);
+	}
+
+	return cache;
+}
+
+void DestroyNavMeshTileCache(NavMeshTileCache *cache) {
+	if (!cache)
+		return;
+
+	dtFreeTileCache(cache->tile_cache);
+	dtFreeNavMesh(cache->nav_mesh);
+	delete cache; // rebuilds in flight hold the build state until they complete
+}
+
+dtNavMesh *GetNavMeshTileCacheNavMesh(NavMeshTileCache *cache) { return cache ? cache->nav_mesh : nullptr; }
+
+//
+void RebuildNavMeshTileCacheArea(NavMeshTileCache *cache, const NavMeshInput &input, const MinMax &area) {
+	const auto &cfg = cache->build->cfg;
+	const float tcs = cfg.tileSize * cfg.cs;
+
+	const int tx0 = Max(int(floorf((area.mn.x - cfg.bmin[0]) / tcs)), 0), ty0 = Max(int(floorf((area.mn.z - cfg.bmin[2]) / tcs)), 0);
+	const int tx1 = Min(int(floorf((area.mx.x - cfg.bmin[0]) / tcs)), cache->build->tile_w - 1),
+			  ty1 = Min(int(floorf((area.mx.z - cfg.bmin[2]) / tcs)), cache->build->tile_h - 1);
+
+	if (tx0 > tx1 || ty0 > ty1)
+		return; // outside of the navigation mesh
+
+	std::vector<uint32_t> generation;
+	generation.reserve((tx1 - tx0 + 1) * (ty1 - ty0 + 1));
+
+	for (int ty = ty0; ty <= ty1; ++ty)
+		for (int tx = tx0; tx <= tx1; ++tx)
+			generation.push_back(++cache->tile_generation[tx + ty * cache->build->tile_w]); // supersede rebuilds in flight
+
+	const auto pending = std::make_shared<NavMeshPendingRebuild>(cache->build);
+
+	run_async([pending, input = input, tx0, ty0, tx1, ty1, generation = std::move(generation)]() {
+		auto &build = *pending->build;
+		auto tiles = BuildNavMeshTileRangeLayers(build, input, tx0, ty0, tx1, ty1, generation);
+
+		std::lock_guard<std::mutex> lock(build.lock);
+		for (auto &tile : tiles)
+			build.built.push_back(std::move(tile));
+	});
+}
+
+//
+static dtStatus AddTileCacheObstacle(dtTileCache *tile_cache, const MinMax &bounds, bool cylinder, dtObstacleRef &ref) {
+	if (cylinder) {
+		const float pos[3] = {(bounds.mn.x + bounds.mx.x) * 0.5f, bounds.mn.y, (bounds.mn.z + bounds.mx.z) * 0.5f};
+		return tile_cache->addObstacle(pos, (bounds.mx.x - bounds.mn.x) * 0.5f, bounds.mx.y - bounds.mn.y, &ref);
+	}
+	return tile_cache->addBoxObstacle(&bounds.mn.x, &bounds.mx.x, &ref);
+}
+
+static bool IsRequestQueueFull(dtStatus status) { return dtStatusFailed(status) && dtStatusDetail(status, DT_BUFFER_TOO_SMALL); }
+
+/// Send the pending obstacle changes to the tile cache, stop at the first change not fitting in its request queue. Obstacles added again wait for
+/// their previous slot to be freed.
+static void CommitPendingNavMeshObstacles(NavMeshTileCache *cache) {
+	for (auto i = std::begin(cache->obstacles); i != std::end(cache->obstacles);) {
+		auto &obstacle = i->second;
+
+		if (obstacle.ref && (obstacle.removed || obstacle.readd)) {
+			const auto status = cache->tile_cache->removeObstacle(obstacle.ref);
+			if (IsRequestQueueFull(status))
+				return;
+			if (dtStatusFailed(status))
+				warn("Navigation: Failed to remove obstacle");
+
+			obstacle.ref = 0; // readd is cleared once added again
+		}
+
+		if (obstacle.removed) {
+			i = cache->obstacles.erase(i);
+			continue;
+		}
+
+		if (!obstacle.ref) {
+			const auto status = AddTileCacheObstacle(cache->tile_cache, obstacle.bounds, obstacle.cylinder, obstacle.ref);
+			if (IsRequestQueueFull(status))
+				return;
+
+			if (dtStatusFailed(status)) {
+				if (obstacle.readd && dtStatusDetail(status, DT_OUT_OF_MEMORY)) {
+					++i; // the slot of the removed obstacle is only freed by a later tile cache update, retry on the next update
+					continue;
+				}
+
+				warn("Navigation: Failed to add obstacle");
+				i = cache->obstacles.erase(i);
+				continue;
+			}
+
+			obstacle.readd = false;
+		}
+
+		++i;
+	}
+}
+
+static bool HasPendingNavMeshObstacles(const NavMeshTileCache *cache) {
+	for (const auto &i : cache->obstacles)
+		if (!i.second.ref || i.second.readd || i.second.removed)
+			return true;
+	return false;
+}
+
+static uint32_t AddNavMeshObstacle(NavMeshTileCache *cache, const MinMax &bounds, bool cylinder) {
+	dtObstacleRef ref = 0;
+	const auto status = AddTileCacheObstacle(cache->tile_cache, bounds, cylinder, ref);
+
+	if (dtStatusFailed(status) && !IsRequestQueueFull(status)) {
+		warn("Navigation: Failed to add obstacle");
+		return 0;
+	}
+
+	const auto obstacle = cache->next_obstacle++;
+	cache->obstacles[obstacle] = {ref, bounds, cylinder, false, false}; // added by the next update if the request queue is full
+	return obstacle;
+}
+
+uint32_t AddNavMeshCylinderObstacle(NavMeshTileCache *cache, const Vec3 &pos, float radius, float height) {
+	return AddNavMeshObstacle(cache, {{pos.x - radius, pos.y, pos.z - radius}, {pos.x + radius, pos.y + height, pos.z + radius}}, true);
+}
+
+uint32_t AddNavMeshBoxObstacle(NavMeshTileCache *cache, const MinMax &box) { return AddNavMeshObstacle(cache, box, false); }
+
+bool RemoveNavMeshObstacle(NavMeshTileCache *cache, uint32_t obstacle) {
+	const auto i = cache->obstacles.find(obstacle);
+	if (i == std::end(cache->obstacles) || i->second.removed)
+		return false;
+
+	if (i->second.ref) {
+		const auto status = cache->tile_cache->removeObstacle(i->second.ref);
+
+		if (IsRequestQueueFull(status)) {
+			i->second.removed = true; // removed by the next update
+			return true;
+		}
+
+		if (dtStatusFailed(status)) {
+			warn("Navigation: Failed to remove obstacle");
+			return false;
+		}
+	}
+
+	cache->obstacles.erase(i);
+	return true;
+}
+
+//
+static void ReplaceNavMeshTileLayers(NavMeshTileCache *cache, NavMeshTileLayers &tile) {
+	dtCompressedTileRef refs[NAVMESH_TILE_CACHE_MAX_LAYERS];
+	const int ref_count = cache->tile_cache->getTilesAt(tile.tx, tile.ty, refs, NAVMESH_TILE_CACHE_MAX_LAYERS);
+
+	for (int i = 0; i < ref_count; ++i) {
+		const auto *compressed = cache->tile_cache->getTileByRef(refs[i]);
+		if (compressed && compressed->header)
+			cache->nav_mesh->removeTile(cache->nav_mesh->getTileRefAt(tile.tx, tile.ty, compressed->header->tlayer), nullptr, nullptr);
+		cache->tile_cache->removeTile(refs[i], nullptr, nullptr);
+	}
+
+	for (size_t i = 0; i < tile.data.size(); ++i)
+		if (dtStatusFailed(cache->tile_cache->addTile(tile.data[i], tile.size[i], DT_COMPRESSEDTILE_FREE_DATA, nullptr)))
+			dtFree(tile.data[i]);
+
+	tile.data.clear(); // now owned by the tile cache
+	tile.size.clear();
+
+	cache->tile_cache->buildNavMeshTilesAt(tile.tx, tile.ty, cache->nav_mesh);
+}
+
+bool UpdateNavMeshTileCache(NavMeshTileCache *cache, time_ns t_budget) {
+	const bool rebuilds_done = cache->build->pending_rebuild_count == 0; // read before collecting so that no rebuild is missed
+
+	std::vector<NavMeshTileLayers> built;
+	{
+		std::lock_guard<std::mutex> lock(cache->build->lock);
+		std::swap(built, cache->build->built);
+	}
+
+	if (!built.empty()) {
+		const auto &cfg = cache->build->cfg;
+		const float tcs = cfg.tileSize * cfg.cs;
+
+		MinMax replaced; // xz bounds of the replaced tiles
+
+		for (auto &tile : built) {
+			if (tile.generation == cache->tile_generation[tile.tx + tile.ty * cache->build->tile_w]) {
+				ReplaceNavMeshTileLayers(cache, tile);
+
+				replaced.mn = Min(replaced.mn, Vec3(cfg.bmin[0] + tile.tx * tcs, 0.f, cfg.bmin[2] + tile.ty * tcs));
+				replaced.mx = Max(replaced.mx, Vec3(cfg.bmin[0] + (tile.tx + 1) * tcs, 0.f, cfg.bmin[2] + (tile.ty + 1) * tcs));
+			}
+
+			FreeNavMeshTileLayers(tile); // layers of a rebuild superseded by a more recent one
+		}
+
+		// the tile cache tracks the tiles touched by an obstacle by reference, re-add obstacles over replaced tiles so that they apply to the new tiles
+		for (auto &i : cache->obstacles) {
+			auto &obstacle = i.second;
+
+			if (obstacle.bounds.mx.x < replaced.mn.x || obstacle.bounds.mn.x > replaced.mx.x || obstacle.bounds.mx.z < replaced.mn.z ||
+				obstacle.bounds.mn.z > replaced.mx.z)
+				continue;
+
+			obstacle.readd = true;
+		}
+	}
+
+	CommitPendingNavMeshObstacles(cache);
+
+	// the tile cache processes queued requests once all pending tiles are rebuilt, then rebuilds a single tile per update
+	const auto t_start = time_now();
+
+	bool up_to_date = false;
+	do
+		cache->tile_cache->update(0.f, cache->nav_mesh, &up_to_date);
+	while (!up_to_date && time_now() - t_start < t_budget);
+
+	return rebuilds_done && up_to_date && !HasPendingNavMeshObstacles(cache);
+}
+
 } // namespace hg
 
 #else
@@ -568,6 +1155,22 @@ void DestroyNavMeshQuery(dtNavMeshQuery *query) {}
 //
 std::vector<Vec3> FindNavigationPathTo(const dtNavMeshQuery *query, const Vec3 &from, const Vec3 &to) { return {}; }
 
+//
+NavMeshTileCache *CreateNavMeshTileCache(const NavMeshInput &input, float radius, float height, float slope, float climb, int tile_size, int max_obstacles) {
+	return nullptr;
+}
+void DestroyNavMeshTileCache(NavMeshTileCache *cache) {}
+
+dtNavMesh *GetNavMeshTileCacheNavMesh(NavMeshTileCache *cache) { return nullptr; }
+
+void RebuildNavMeshTileCacheArea(NavMeshTileCache *cache, const NavMeshInput &input, const MinMax &area) {}
+
+uint32_t AddNavMeshCylinderObstacle(NavMeshTileCache *cache, const Vec3 &pos, float radius, float height) { return 0; }
+uint32_t AddNavMeshBoxObstacle(NavMeshTileCache *cache, const MinMax &box) { return 0; }
+bool RemoveNavMeshObstacle(NavMeshTileCache *cache, uint32_t obstacle) { return false; }
+
+bool UpdateNavMeshTileCache(NavMeshTileCache *cache, time_ns t_budget) { return true; }
+
 } // namespace hg
 
 #endif
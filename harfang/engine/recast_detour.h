@@ -2,7 +2,9 @@
 
 #pragma once
 
+#include "foundation/minmax.h"
 #include "foundation/rw_interface.h"
+#include "foundation/time.h"
 #include "foundation/vector3.h"
 
 #include "engine/render_pipeline.h"
@@ -45,6 +47,51 @@ struct NavMeshInput {
 void AddGeometryToNavMeshInput(NavMeshInput &input, const Geometry &geo, const Mat4 &world);
 dtNavMesh *CreateNavMesh(const NavMeshInput &input, float radius, float height, float slope, float climb);
 
+/**
+	@short Tiled navigation mesh backed by a tile cache.
+
+	Tiles are rebuilt when obstacles are added or removed and when part of the input geometry changes, see UpdateNavMeshTileCache.
+*/
+struct NavMeshTileCache;
+
+/**
+	@short Create a tiled navigation mesh from an input geometry.
+
+	The navigation mesh covers the bounds of the input geometry and is cut into tiles of `tile_size` cells, a cell measuring 0.3 units.
+	Tiles are rasterized in parallel using the worker pool.
+*/
+NavMeshTileCache *CreateNavMeshTileCache(
+	const NavMeshInput &input, float radius, float height, float slope, float climb, int tile_size = 48, int max_obstacles = 128);
+/// Destroy a tiled navigation mesh, rebuilds still in flight are discarded.
+void DestroyNavMeshTileCache(NavMeshTileCache *cache);
+
+/// Return the navigation mesh of a tile cache. The navigation mesh is owned by the tile cache and must not be destroyed using DestroyNavMesh.
+dtNavMesh *GetNavMeshTileCacheNavMesh(NavMeshTileCache *cache);
+
+/**
+	@short Rebuild the tiles overlapping an area from a new version of the input geometry.
+
+	Tiles are rasterized on the worker pool and swapped in by UpdateNavMeshTileCache once ready. Areas outside of the bounds the
+	tile cache was created with are ignored.
+*/
+void RebuildNavMeshTileCacheArea(NavMeshTileCache *cache, const NavMeshInput &input, const MinMax &area);
+
+/// Add a cylinder obstacle standing on `pos`, return the obstacle identifier or 0 on failure. Obstacle changes apply on the next UpdateNavMeshTileCache.
+uint32_t AddNavMeshCylinderObstacle(NavMeshTileCache *cache, const Vec3 &pos, float radius, float height);
+/// Add an axis-aligned box obstacle, return the obstacle identifier or 0 on failure.
+uint32_t AddNavMeshBoxObstacle(NavMeshTileCache *cache, const MinMax &box);
+/// Remove an obstacle added by AddNavMeshCylinderObstacle or AddNavMeshBoxObstacle.
+bool RemoveNavMeshObstacle(NavMeshTileCache *cache, uint32_t obstacle);
+
+/**
+	@short Commit pending changes to the navigation mesh of a tile cache.
+
+	Swap in the tiles rebuilt on the worker pool and rebuild the tiles affected by obstacle changes until the time budget is exhausted,
+	at least one tile is rebuilt per call. Call this function once per frame from the thread using the navigation mesh. Return `true`
+	if the navigation mesh is up to date.
+*/
+bool UpdateNavMeshTileCache(NavMeshTileCache *cache, time_ns t_budget = time_from_ms(2));
+
 //
 dtNavMeshQuery *CreateNavMeshQuery(const dtNavMesh *mesh);
 /// Destroy a navigation mesh query object.
@@ -17,6 +17,7 @@
 #include "foundation/profiler.h"
 #include "foundation/projection.h"
 #include "foundation/time.h"
+#include "foundation/worker_pool.h"
 
 #include "platform/window_system.h"
 
@@ -28,6 +29,7 @@
 
 #include <json.hpp>
 
+#include <atomic>
 #include <set>
 
 using json = nlohmann::json;
@@ -1154,19 +1156,27 @@ void UpdateTextureFromPicture(Texture &tex, const Picture &pic) {
 }
 
 //
-Texture LoadTexture(
-	const Reader &ir, const ReadProvider &ip, const char *name, uint64_t flags, bgfx::TextureInfo *info, bimg::Orientation::Enum *orientation, bool silent) {
-	ProfilerPerfSection section("LoadTexture", name);
+static bimg::ImageContainer *DecodeTexture(const Reader &ir, const ReadProvider &ip, const char *name, bool &has_data, bool silent) {
+	ProfilerPerfSection section("DecodeTexture", name);
 
-	if (!silent)
-		log(format("Loading texture '%1'").arg(name).c_str());
+	const auto data = LoadData(ir, ScopedReadHandle(ip, name, silent));
 
-	bgfx::TextureHandle handle = BGFX_INVALID_HANDLE;
+	has_data = data.GetSize() > 0;
+	if (!has_data)
+		return nullptr;
 
-	const auto data = LoadData(ir, ScopedReadHandle(ip, name, silent));
+	return bimg::imageParse(&g_allocator, data.GetData(), numeric_cast<uint32_t>(data.GetSize()), bimg::TextureFormat::Count);
+}
 
-	if (data.GetSize() > 0) {
-		if (auto container = bimg::imageParse(&g_allocator, data.GetData(), numeric_cast<uint32_t>(data.GetSize()), bimg::TextureFormat::Count)) {
+/// Create a texture from a decoded image container, the container is released by this call.
+static Texture CreateTextureFromContainer(
+	bimg::ImageContainer *container, bool has_data, const char *name, uint64_t flags, bgfx::TextureInfo *info, bool silent) {
+	ProfilerPerfSection section("CreateTextureFromContainer", name);
+
+	bgfx::TextureHandle handle = BGFX_INVALID_HANDLE;
+
+	if (has_data) {
+		if (container) {
 			const auto *mem = bgfx::makeRef(
 				container->m_data, container->m_size, [](void *ptr, void *user) { BX_ALIGNED_FREE(&g_allocator, user, 16); }, container);
 
@@ -1204,6 +1214,18 @@ Texture LoadTexture(
 	return MakeTexture(handle, flags);
 }
 
+Texture LoadTexture(
+	const Reader &ir, const ReadProvider &ip, const char *name, uint64_t flags, bgfx::TextureInfo *info, bimg::Orientation::Enum *orientation, bool silent) {
+	ProfilerPerfSection section("LoadTexture", name);
+
+	if (!silent)
+		log(format("Loading texture '%1'").arg(name).c_str());
+
+	bool has_data;
+	auto *container = DecodeTexture(ir, ip, name, has_data, silent);
+	return CreateTextureFromContainer(container, has_data, name, flags, info, silent);
+}
+
 Texture LoadTextureFromFile(const char *name, uint64_t flags, bgfx::TextureInfo *info, bimg::Orientation::Enum *orientation, bool silent) {
 	return LoadTexture(g_file_reader, g_file_read_provider, name, flags, info, orientation, silent);
 }
@@ -1616,29 +1638,254 @@ bgfx::VertexLayout VertexLayoutPosFloatNormUInt8TexCoord0UInt8() {
 }
 
 //
+struct ModelData {
+	struct List {
+		uint8_t idx_type_size;
+		std::vector<uint8_t> idx, vtx;
+		std::vector<uint16_t> bones_table;
+	};
+
+	bgfx::VertexLayout vs_decl;
+	uint32_t tri_count{};
+
+	std::vector<List> lists;
+	std::vector<MinMax> bounds; // minmax/list
+	std::vector<uint16_t> mats; // material/list
+	std::vector<Mat4> bind_pose;
+};
+
+/// Read model geometry to memory, does not call into bgfx so that it can run on any thread.
+static bool ReadModelData(const Reader &ir, const Handle &h, const char *name, ModelData &data, bool silent) {
+	ProfilerPerfSection section("ReadModelData", name);
+
+	if (!ir.is_valid(h)) {
+		if (!silent)
+			warn(format("Cannot load model '%1', invalid file handle").arg(name));
+		return false;
+	}
+
+	if (Read<uint32_t>(ir, h) != HarfangMagic) {
+		if (!silent)
+			warn(format("Cannot load model '%1', invalid magic marker").arg(name));
+		return false;
+	}
+
+	if (Read<uint8_t>(ir, h) != ModelMarker) {
+		if (!silent)
+			warn(format("Cannot load model '%1', invalid file marker").arg(name));
+		return false;
+	}
+
+	const auto version = Read<uint8_t>(ir, h);
+
+	if (version > 2) {
+		if (!silent)
+			warn(format("Cannot load model '%1', unsupported version %2").arg(name).arg(version));
+		return false;
+	}
+
+	ir.read(h, &data.vs_decl, sizeof(bgfx::VertexLayout)); // read vertex declaration
+
+	while (true) {
+		uint8_t idx_type_size = 2; // legacy is 16 bit indices
+		if (version > 1) {
+			Read(ir, h, idx_type_size); // idx type size in bytes
+
+			if (idx_type_size == 0)
+				break; // EOLists
+
+			__ASSERT_MSG__(idx_type_size == 2 || idx_type_size == 4, "BGFX only supports 16 or 32 bit index buffer");
+		}
+
+		// index buffer
+		auto size = Read<uint32_t>(ir, h);
+
+		if (version < 2)
+			if (size == 0)
+				break; // EOLists
+
+		ModelData::List list;
+		list.idx_type_size = idx_type_size;
+
+		list.idx.resize(size);
+		ir.read(h, list.idx.data(), list.idx.size());
+		data.tri_count += (size / idx_type_size) / 3;
+
+		// vertex buffer
+		size = Read<uint32_t>(ir, h);
+		list.vtx.resize(size);
+		ir.read(h, list.vtx.data(), list.vtx.size());
+
+		// bones table
+		size = Read<uint32_t>(ir, h);
+		list.bones_table.resize(size);
+		ir.read(h, list.bones_table.data(), list.bones_table.size() * sizeof(list.bones_table[0]));
+
+		//
+		data.lists.push_back(std::move(list));
+		data.bounds.push_back(Read<MinMax>(ir, h));
+		data.mats.push_back(Read<uint16_t>(ir, h));
+	}
+
+	if (version > 0) { // version 1: add bind poses
+		const auto bone_count = Read<uint32_t>(ir, h);
+
+		data.bind_pose.resize(bone_count);
+		for (uint32_t j = 0; j < bone_count; ++j)
+			Read(ir, h, data.bind_pose[j]);
+	}
+
+	return true;
+}
+
+// hand a buffer over to bgfx without copying it, it is released once bgfx is done with it
+static const bgfx::Memory *MakeRefFromVector(std::vector<uint8_t> &&v) {
+	auto *owned = new std::vector<uint8_t>(std::move(v));
+	return bgfx::makeRef(
+		owned->data(), numeric_cast<uint32_t>(owned->size()), [](void *ptr, void *user) { delete reinterpret_cast<std::vector<uint8_t> *>(user); }, owned);
+}
+
+/// Create model buffers from geometry read by ReadModelData, geometry buffers are moved out of data.
+static Model CreateModelFromData(ModelData &data, const char *name, ModelInfo *info) {
+	ProfilerPerfSection section("CreateModelFromData", name);
+
+	Model model;
+	size_t size = 0;
+
+	for (size_t i = 0; i < data.lists.size(); ++i) {
+		auto &list = data.lists[i];
+		size += list.idx.size() + list.vtx.size();
+
+		const auto idx_hnd = bgfx::createIndexBuffer(MakeRefFromVector(std::move(list.idx)), list.idx_type_size == 4 ? BGFX_BUFFER_INDEX32 : BGFX_BUFFER_NONE);
+		if (!bgfx::isValid(idx_hnd)) {
+			warn(format("%1: failed to create index buffer").arg(name));
+			break;
+		}
+
+		bgfx::setName(idx_hnd, name);
+
+		const auto vtx_hnd = bgfx::createVertexBuffer(MakeRefFromVector(std::move(list.vtx)), data.vs_decl);
+		if (!bgfx::isValid(vtx_hnd)) {
+			warn(format("%1: failed to create vertex buffer").arg(name));
+			bgfx::destroy(idx_hnd);
+			break;
+		}
+
+		bgfx::setName(vtx_hnd, name);
+
+		model.lists.push_back({idx_hnd, vtx_hnd, std::move(list.bones_table)});
+		model.bounds.push_back(data.bounds[i]);
+		model.mats.push_back(data.mats[i]);
+	}
+
+	model.bind_pose = std::move(data.bind_pose);
+
+	if (info) {
+		info->vs_decl = data.vs_decl;
+		info->tri_count = data.tri_count;
+		info->size = size;
+	}
+
+	return model;
+}
+
+//
+void SetBackgroundResourceDecode(PipelineResources &resources, bool enable) { resources.background_decode = enable; }
+bool GetBackgroundResourceDecode(const PipelineResources &resources) { return resources.background_decode; }
+
+// hand queued loads over to the worker pool, loads decoded but not yet processed are capped to bound memory usage
+template <typename T, typename F> static void DispatchBackgroundDecodes(std::deque<T> &loads, F start_decode) {
+	const auto max_in_flight = size_t(std::max(get_worker_count(), 1)) * 2;
+
+	size_t in_flight = 0;
+	for (const auto &load : loads)
+		if (load.decode)
+			++in_flight;
+
+	for (auto &load : loads) {
+		if (in_flight >= max_in_flight)
+			break;
+
+		if (!load.decode && start_decode(load))
+			++in_flight;
+	}
+}
+
+template <typename T> static ResourceLoadProgress GetLoadProgress(const std::deque<T> &loads) {
+	ResourceLoadProgress progress;
+
+	for (const auto &load : loads)
+		if (!load.decode)
+			++progress.queued;
+		else if (load.decode->done)
+			++progress.ready;
+		else
+			++progress.decoding;
+
+	return progress;
+}
+
+//
+struct ModelDecode {
+	std::atomic<bool> done{false};
+	bool ok{false};
+	ModelData data;
+};
+
+static bool StartModelDecode(ModelLoad &load, const PipelineResources &res, bool silent) {
+	if (!res.models.IsValidRef(load.ref))
+		return false; // dropped when processing the queue
+
+	auto decode = std::make_shared<ModelDecode>();
+	load.decode = decode;
+
+	run_async([decode, ir = load.ir, ip = load.ip, name = res.models.GetName(load.ref), silent]() {
+		ScopedReadHandle h(ip, name.c_str(), silent);
+		decode->ok = ReadModelData(ir, h, name.c_str(), decode->data, silent);
+		decode->done = true;
+	});
+	return true;
+}
+
+ResourceLoadProgress GetModelLoadProgress(const PipelineResources &resources) { return GetLoadProgress(resources.model_loads); }
+
 size_t ProcessModelLoadQueue(PipelineResources &res, time_ns t_budget, bool silent) {
 	ProfilerPerfSection section("ProcessModelLoadQueue");
 
+	if (res.background_decode)
+		DispatchBackgroundDecodes(res.model_loads, [&](ModelLoad &load) { return StartModelDecode(load, res, silent); });
+
 	size_t processed = 0;
 
 	const auto t_start = time_now();
 
-	while (!res.model_loads.empty()) {
-		const auto &m = res.model_loads.front();
+	for (auto i = std::begin(res.model_loads); i != std::end(res.model_loads);) {
+		auto &m = *i;
 
 		if (res.models.IsValidRef(m.ref)) {
+			if (m.decode ? !m.decode->done : res.background_decode) {
+				++i; // not decoded yet
+				continue;
+			}
+
 			auto &mdl = res.models.Get(m.ref);
 			const auto name = res.models.GetName(m.ref);
 			if (!silent)
 				debug(format("Queued model load '%1'").arg(name));
 
 			ModelInfo info;
-			ScopedReadHandle h(m.ip, name.c_str(), silent);
-			mdl = LoadModel(m.ir, h, name.c_str(), &info, silent);
+			if (m.decode) {
+				if (m.decode->ok)
+					mdl = CreateModelFromData(m.decode->data, name.c_str(), &info);
+			} else {
+				ScopedReadHandle h(m.ip, name.c_str(), silent);
+				mdl = LoadModel(m.ir, h, name.c_str(), &info, silent);
+			}
 			res.model_infos[m.ref.ref] = info;
+			res.models.SetSize(m.ref, info.size);
 		}
 
-		res.model_loads.pop_front();
+		i = res.model_loads.erase(i);
 
 		++processed;
 
@@ -1683,117 +1930,21 @@ ModelRef SkipLoadOrQueueModelLoad(
 	return ref;
 }
 
-//
 Model LoadModel(const Reader &ir, const Handle &h, const char *name, ModelInfo *info, bool silent) {
 	ProfilerPerfSection section("LoadModel", name);
 
 	const auto t = time_now();
 
-	if (!ir.is_valid(h)) {
-		if (!silent)
-			warn(format("Cannot load model '%1', invalid file handle").arg(name));
-		return {};
-	}
-
-	if (Read<uint32_t>(ir, h) != HarfangMagic) {
-		if (!silent)
-			warn(format("Cannot load model '%1', invalid magic marker").arg(name));
-		return {};
-	}
-
-	if (Read<uint8_t>(ir, h) != ModelMarker) {
-		if (!silent)
-			warn(format("Cannot load model '%1', invalid file marker").arg(name));
+	ModelData data;
+	if (!ReadModelData(ir, h, name, data, silent))
 		return {};
-	}
-
-	const auto version = Read<uint8_t>(ir, h);
-
-	if (version > 2) {
-		if (!silent)
-			warn(format("Cannot load model '%1', unsupported version %2").arg(name).arg(version));
-		return {};
-	}
-
-	Model model;
-
-	bgfx::VertexLayout vs_decl;
-	ir.read(h, &vs_decl, sizeof(bgfx::VertexLayout)); // read vertex declaration
-
-	uint32_t tri_count{};
-
-	while (true) {
-		uint8_t idx_type_size = 2; // legacy is 16 bit indices
-		if (version > 1) {
-			Read(ir, h, idx_type_size); // idx type size in bytes
-
-			if (idx_type_size == 0)
-				break; // EOLists
-
-			__ASSERT_MSG__(idx_type_size == 2 || idx_type_size == 4, "BGFX only supports 16 or 32 bit index buffer");
-		}
-
-		// index buffer
-		auto size = Read<uint32_t>(ir, h);
-
-		if (version < 2)
-			if (size == 0)
-				break; // EOLists
-
-		const auto idx_mem = bgfx::alloc(size);
-		ir.read(h, idx_mem->data, idx_mem->size);
-		tri_count += (size / idx_type_size) / 3;
-
-		const auto idx_hnd = bgfx::createIndexBuffer(idx_mem, idx_type_size == 4 ? BGFX_BUFFER_INDEX32 : BGFX_BUFFER_NONE);
-		if (!bgfx::isValid(idx_hnd)) {
-			warn(format("%1: failed to create index buffer").arg(name));
-			break;
-		}
-
-		bgfx::setName(idx_hnd, name);
-		
-		// vertex buffer
-		size = Read<uint32_t>(ir, h);
-		const auto vtx_mem = bgfx::alloc(size);
-		ir.read(h, vtx_mem->data, vtx_mem->size);
-
-		const auto vtx_hnd = bgfx::createVertexBuffer(vtx_mem, vs_decl);
-		if (!bgfx::isValid(vtx_hnd)) {
-			warn(format("%1: failed to create vertex buffer").arg(name));
-			bgfx::destroy(idx_hnd);
-			break;
-		}
-		bgfx::setName(vtx_hnd, name);
-
-		// bones table
-		size = Read<uint32_t>(ir, h);
-		std::vector<uint16_t> bones_table;
-		bones_table.resize(size);
-		ir.read(h, bones_table.data(), bones_table.size() * sizeof(bones_table[0]));
-
-		//
-		model.lists.push_back({idx_hnd, vtx_hnd, std::move(bones_table)});
-		model.bounds.push_back(Read<MinMax>(ir, h));
-		model.mats.push_back(Read<uint16_t>(ir, h));
-	}
-
-	if (info) {
-		info->vs_decl = vs_decl;
-		info->tri_count = tri_count;
-	}
-
-	if (version > 0) { // version 1: add bind poses
-		const auto bone_count = Read<uint32_t>(ir, h);
 
-		model.bind_pose.resize(bone_count);
-		for (uint32_t j = 0; j < bone_count; ++j)
-			Read(ir, h, model.bind_pose[j]);
-	}
+	auto model = CreateModelFromData(data, name, info);
 
 	if (!silent)
 		log(format("Load model '%1' (%2 triangles, %3 lists), took %4 ms")
 				.arg(name)
-				.arg(tri_count)
+				.arg(data.tri_count)
 				.arg(model.lists.size())
 				.arg(time_to_ms(time_now() - t))
 				.c_str());
@@ -2035,6 +2186,7 @@ static bgfx::ProgramHandle RequestPipelineProgramVariantConfigProgram(const Pipe
 static void _RenderPipelineStageDisplayList(bgfx::ViewId view_id, const DisplayList &display_list, const Material &mat, uint8_t pipeline_config_idx,
 	const PipelineResources &res, const std::vector<UniformSetValue> &values, const std::vector<UniformSetTexture> &textures, uint32_t depth) {
 	const auto &prg = res.programs.Get_unsafe_(mat.program.ref.idx);
+	res.programs.MarkUsed_unsafe_(mat.program.ref.idx);
 
 	const auto prg_h = RequestPipelineProgramVariantConfigProgram(prg, mat.variant_idx, pipeline_config_idx);
 	if (!bgfx::isValid(prg_h))
@@ -2058,6 +2210,7 @@ static void _RenderPipelineStageDisplayList(bgfx::ViewId view_id, const DisplayL
 
 	for (const auto &i : mat.textures) {
 		const auto &tex = res.textures.Get(i.second.texture);
+		res.textures.MarkUsed(i.second.texture);
 		if (bgfx::isValid(tex.handle))
 			bgfx::setTexture(i.second.channel, i.second.uniform, tex.handle, uint32_t(tex.flags)); // only retain the BGFX_SAMPLER_XXX bits of the texture flag
 		uniforms_set.push_back(i.second.uniform.idx);
@@ -2066,6 +2219,7 @@ static void _RenderPipelineStageDisplayList(bgfx::ViewId view_id, const DisplayL
 	for (const auto &u : prg.texture_uniforms)
 		if (std::find(std::begin(uniforms_set), std::end(uniforms_set), u.handle.idx) == std::end(uniforms_set)) {
 			const auto &tex = res.textures.Get(u.tex_ref);
+			res.textures.MarkUsed(u.tex_ref);
 			if (bgfx::isValid(tex.handle))
 				bgfx::setTexture(u.channel, u.handle, tex.handle, uint32_t(tex.flags)); // not set, set from shader default
 		}
@@ -2103,6 +2257,95 @@ void CullModelDisplayLists(const Frustum &frustum, std::vector<ModelDisplayList>
 	display_lists.resize(std::distance(std::begin(display_lists), i));
 }
 
+void UpdateModelDisplayListCulling(ModelDisplayListCulling &culling, const std::vector<ModelDisplayList> &display_lists, const std::vector<Mat4> &mtxs,
+	const std::vector<uint32_t> &mtx_revisions, const PipelineResources &res) {
+	ProfilerPerfSection section("UpdateModelDisplayListCulling");
+
+	const auto count = display_lists.size();
+
+	culling.bounds.resize(count);
+	culling.local_bounds.resize(count);
+	culling.keys.resize(count, ~uint64_t(0));
+	culling.revisions.resize(count, 0);
+
+	std::vector<uint32_t> modified;
+
+	for (size_t i = 0; i < count; ++i) {
+		const auto &display_list = display_lists[i];
+
+		const auto key = (uint64_t(display_list.mtx_idx) << 32) | (uint64_t(display_list.mdl_idx) << 16) | display_list.lst_idx;
+		const auto revision = display_list.mtx_idx < mtx_revisions.size() ? mtx_revisions[display_list.mtx_idx] : 0; // 0: unknown, always update
+		const auto &local_bounds = res.models.Get_unsafe_(display_list.mdl_idx).bounds[display_list.lst_idx];
+
+		if (key == culling.keys[i] && revision != 0 && revision == culling.revisions[i] && local_bounds == culling.local_bounds[i])
+			continue;
+
+		culling.bounds[i] = mtxs[display_list.mtx_idx] * local_bounds;
+		culling.local_bounds[i] = local_bounds;
+		culling.keys[i] = key;
+		culling.revisions[i] = revision;
+
+		modified.push_back(numeric_cast<uint32_t>(i));
+	}
+
+	++culling.update_count;
+
+	if (culling.update_count > 1) {
+		if (GetItemCount(culling.tree) != count) {
+			BuildMinMaxTree(culling.tree, culling.bounds.data(), count);
+			++culling.stats.build_count;
+		} else {
+			RefitMinMaxTree(culling.tree, culling.bounds.data(), modified);
+
+			if (NeedsRebuild(culling.tree)) {
+				BuildMinMaxTree(culling.tree, culling.bounds.data(), count);
+				++culling.stats.build_count;
+			}
+		}
+	}
+
+	auto &stats = culling.stats;
+	stats.node_count = GetNodeCount(culling.tree);
+	stats.item_count = GetItemCount(culling.tree);
+	stats.updated_count = modified.size();
+	stats.query_count = stats.node_tested = stats.item_tested = stats.visible_count = 0;
+}
+
+void CullModelDisplayLists(
+	const Frustum &frustum, ModelDisplayListCulling &culling, const std::vector<ModelDisplayList> &display_lists, std::vector<ModelDisplayList> &out_display_lists) {
+	__ASSERT__(display_lists.size() == culling.bounds.size());
+
+	out_display_lists.clear();
+
+	auto &stats = culling.stats;
+
+	if (GetItemCount(culling.tree) == display_lists.size()) {
+		std::vector<uint32_t> visible;
+		visible.reserve(display_lists.size());
+
+		MinMaxTreeQueryStats query_stats;
+		QueryMinMaxTree(culling.tree, culling.bounds.data(), frustum, visible, &query_stats);
+		std::sort(std::begin(visible), std::end(visible)); // preserve display list order
+
+		out_display_lists.reserve(visible.size());
+		for (const auto i : visible)
+			out_display_lists.push_back(display_lists[i]);
+
+		stats.node_tested += query_stats.node_tested;
+		stats.item_tested += query_stats.item_tested;
+	} else {
+		out_display_lists.reserve(display_lists.size());
+		for (size_t i = 0; i < display_lists.size(); ++i)
+			if (TestVisibility(frustum, culling.bounds[i]) != V_Outside)
+				out_display_lists.push_back(display_lists[i]);
+
+		stats.item_tested += display_lists.size();
+	}
+
+	++stats.query_count;
+	stats.visible_count += out_display_lists.size();
+}
+
 //
 static void _DrawModelDisplayLists(bgfx::ViewId view_id, const std::vector<ModelDisplayList> &display_lists, const std::vector<uint32_t> *depths,
 	uint8_t pipeline_config_idx, const std::vector<UniformSetValue> &values, const std::vector<UniformSetTexture> &textures, const std::vector<Mat4> &mtxs,
@@ -2130,6 +2373,7 @@ static void _DrawModelDisplayLists(bgfx::ViewId view_id, const std::vector<Model
 		}
 
 		const auto &mdl = res.models.Get_unsafe_(dl.mdl_idx);
+		res.models.MarkUsed_unsafe_(dl.mdl_idx);
 		__ASSERT__(dl.mat != nullptr);
 
 		_RenderPipelineStageDisplayList(view_id, mdl.lists[dl.lst_idx], *dl.mat, pipeline_config_idx, res, values, textures, depths ? (*depths)[i] : 0);
@@ -2168,6 +2412,7 @@ static void _DrawSkinnedModelDisplayLists(bgfx::ViewId view_id, const std::vecto
 		__ASSERT__(dl.bone_count <= max_skinned_model_matrix_count);
 
 		const auto &mdl = res.models.Get_unsafe_(dl.mdl_idx);
+		res.models.MarkUsed_unsafe_(dl.mdl_idx);
 
 		for (int j = 0; j < dl.bone_count; ++j)
 			_mtx[j] = to_bgfx(mtxs[dl.mtx_idxs[j]] * mdl.bind_pose[dl.bones_idxs[j]]);
@@ -2208,8 +2453,10 @@ void DrawSkinnedModelDisplayLists(bgfx::ViewId view_id, const std::vector<Skinne
 ModelRef LoadModel(const Reader &ir, const ReadProvider &ip, const char *path, PipelineResources &resources, bool silent) {
 	auto ref = resources.models.Has(path);
 	if (ref == InvalidModelRef) {
-		auto mdl = LoadModel(ir, ScopedReadHandle(ip, path), path, nullptr, silent);
+		ModelInfo info;
+		auto mdl = LoadModel(ir, ScopedReadHandle(ip, path), path, &info, silent);
 		ref = resources.models.Add(path, std::move(mdl));
+		resources.models.SetSize(ref, info.size);
 	}
 	return ref;
 }
@@ -2245,27 +2492,68 @@ MaterialRef LoadMaterialRefFromAssets(
 }
 
 //
+struct TextureDecode {
+	~TextureDecode() {
+		if (container)
+			bimg::imageFree(container); // never handed over to bgfx
+	}
+
+	std::atomic<bool> done{false};
+	bool has_data{false};
+	bimg::ImageContainer *container{};
+};
+
+static bool StartTextureDecode(TextureLoad &load, const PipelineResources &res, bool silent) {
+	if (!res.textures.IsValidRef(load.ref))
+		return false; // dropped when processing the queue
+
+	auto decode = std::make_shared<TextureDecode>();
+	load.decode = decode;
+
+	run_async([decode, ir = load.ir, ip = load.ip, name = res.textures.GetName(load.ref), silent]() {
+		decode->container = DecodeTexture(ir, ip, name.c_str(), decode->has_data, silent);
+		decode->done = true;
+	});
+	return true;
+}
+
+ResourceLoadProgress GetTextureLoadProgress(const PipelineResources &resources) { return GetLoadProgress(resources.texture_loads); }
+
 size_t ProcessTextureLoadQueue(PipelineResources &res, time_ns t_budget, bool silent) {
 	ProfilerPerfSection section("ProcessTextureLoadQueue");
 
+	if (res.background_decode)
+		DispatchBackgroundDecodes(res.texture_loads, [&](TextureLoad &load) { return StartTextureDecode(load, res, silent); });
+
 	size_t processed = 0;
 
 	const auto t_start = time_now();
 
-	while (!res.texture_loads.empty()) {
-		const auto &t = res.texture_loads.front();
+	for (auto i = std::begin(res.texture_loads); i != std::end(res.texture_loads);) {
+		auto &t = *i;
 
 		if (res.textures.IsValidRef(t.ref)) {
+			if (t.decode ? !t.decode->done : res.background_decode) {
+				++i; // not decoded yet
+				continue;
+			}
+
 			auto &tex = res.textures.Get(t.ref);
 			const auto name = res.textures.GetName(t.ref);
 			debug(format("Queued texture load '%1'").arg(name));
 
 			bgfx::TextureInfo info;
-			tex = LoadTexture(t.ir, t.ip, name.c_str(), tex.flags, &info, nullptr, silent);
+			if (t.decode) {
+				tex = CreateTextureFromContainer(t.decode->container, t.decode->has_data, name.c_str(), tex.flags, &info, silent);
+				t.decode->container = nullptr; // ownership transferred
+			} else {
+				tex = LoadTexture(t.ir, t.ip, name.c_str(), tex.flags, &info, nullptr, silent);
+			}
 			res.texture_infos[t.ref.ref] = info;
+			res.textures.SetSize(t.ref, info.storageSize);
 		}
 
-		res.texture_loads.pop_front();
+		i = res.texture_loads.erase(i);
 
 		++processed;
 
@@ -2303,6 +2591,7 @@ TextureRef LoadTexture(const Reader &ir, const ReadProvider &ip, const char *nam
 		const auto tex = LoadTexture(ir, ip, name, flags, &info, nullptr, silent);
 		ref = resources.textures.Add(name, tex);
 		resources.texture_infos[ref.ref] = info;
+		resources.textures.SetSize(ref, info.storageSize);
 	}
 	return ref;
 }
@@ -2335,6 +2624,65 @@ uint32_t CaptureTexture(bgfx::ViewId &view_id, const PipelineResources &resource
 //
 size_t GetQueuedResourceCount(const PipelineResources &res) { return res.model_loads.size() + res.texture_loads.size(); }
 
+//
+template <typename K, typename V, typename T, typename R> static void DropInvalidResourceInfos(std::map<K, V> &infos, const ResourceCache<T, R> &cache) {
+	for (auto i = std::begin(infos); i != std::end(infos);)
+		if (cache.IsValidRef(R{i->first}))
+			++i;
+		else
+			i = infos.erase(i);
+}
+
+void PipelineResourceReferences::Add(const Material &mat) {
+	for (const auto &i : mat.textures)
+		Add(i.second.texture);
+}
+
+size_t EvictResourcesOverBudget(PipelineResources &res, const PipelineResourceReferences &references) {
+	ProfilerPerfSection section("EvictResourcesOverBudget");
+
+	size_t evicted = 0;
+
+	{
+		std::set<uint32_t> referenced; // texture index referenced by a cached material or program, or by the caller
+
+		if (res.textures.GetBudget() && res.textures.GetMemoryUsage() > res.textures.GetBudget()) {
+			referenced = references.textures;
+
+			for (auto ref = res.materials.first_ref(); ref != invalid_gen_ref; ref = res.materials.next_ref(ref))
+				for (const auto &i : res.materials.Get(MaterialRef{ref}).textures)
+					referenced.insert(i.second.texture.ref.idx);
+
+			for (auto ref = res.programs.first_ref(); ref != invalid_gen_ref; ref = res.programs.next_ref(ref))
+				for (const auto &u : res.programs.Get(PipelineProgramRef{ref}).texture_uniforms)
+					referenced.insert(u.tex_ref.ref.idx);
+		}
+
+		const auto texture_evicted = res.textures.EvictOverBudget([&](TextureRef ref) { return referenced.find(ref.ref.idx) != std::end(referenced); });
+		if (texture_evicted)
+			DropInvalidResourceInfos(res.texture_infos, res.textures);
+
+		evicted += texture_evicted;
+	}
+
+	{
+		const auto &referenced = references.models;
+
+		const auto model_evicted = res.models.EvictOverBudget([&](ModelRef ref) { return referenced.find(ref.ref.idx) != std::end(referenced); });
+		if (model_evicted)
+			DropInvalidResourceInfos(res.model_infos, res.models);
+
+		evicted += model_evicted;
+	}
+
+	if (evicted)
+		debug(format("Evicted %1 resources over budget").arg(evicted));
+
+	return evicted;
+}
+
+size_t EvictResourcesOverBudget(PipelineResources &res) { return EvictResourcesOverBudget(res, {}); }
+
 size_t ProcessLoadQueues(PipelineResources &res, time_ns t_budget, bool silent) {
 	ProfilerPerfSection section("ProcessLoadQueues");
 
@@ -14,6 +14,7 @@
 #include "foundation/matrix4.h"
 #include "foundation/matrix44.h"
 #include "foundation/minmax.h"
+#include "foundation/minmax_tree.h"
 #include "foundation/rw_interface.h"
 #include "foundation/time.h"
 #include "foundation/vector2.h"
@@ -24,6 +25,8 @@
 #include <deque>
 #include <functional>
 #include <map>
+#include <memory>
+#include <set>
 #include <string>
 #include <vector>
 
@@ -426,6 +429,7 @@ struct Model { // 96B (+heap)
 struct ModelInfo {
 	bgfx::VertexLayout vs_decl{};
 	uint32_t tri_count{};
+	size_t size{}; // index and vertex buffers size in bytes
 };
 
 Model LoadModel(const Reader &ir, const Handle &h, const char *name, ModelInfo *info = nullptr, bool silent = false);
@@ -439,16 +443,21 @@ void Destroy(Model &model);
 void Destroy(Material &material);
 
 //
+struct TextureDecode;
+struct ModelDecode;
+
 struct TextureLoad {
 	Reader ir;
 	ReadProvider ip;
 	TextureRef ref;
+	std::shared_ptr<TextureDecode> decode; // set once handed to a background worker
 };
 
 struct ModelLoad {
 	Reader ir;
 	ReadProvider ip;
 	ModelRef ref;
+	std::shared_ptr<ModelDecode> decode; // set once handed to a background worker
 };
 
 struct PipelineResources {
@@ -466,9 +475,59 @@ struct PipelineResources {
 	std::deque<ModelLoad> model_loads;
 	std::map<gen_ref, ModelInfo> model_infos;
 
+	bool background_decode{false};
+
+	/// Set the memory budget of the texture cache in bytes, 0 means no budget. See EvictResourcesOverBudget().
+	void SetTextureBudget(size_t budget) { textures.SetBudget(budget); }
+	/// Set the memory budget of the model cache in bytes, 0 means no budget. See EvictResourcesOverBudget().
+	void SetModelBudget(size_t budget) { models.SetBudget(budget); }
+
+	/// Return the memory used by textures and models in bytes.
+	size_t GetMemoryUsage() const { return textures.GetMemoryUsage() + models.GetMemoryUsage(); }
+
 	void DestroyAll();
 };
 
+/// Textures and models in use outside of the pipeline resources caches, see EvictResourcesOverBudget().
+struct PipelineResourceReferences {
+	std::set<uint32_t> textures; // resource index
+	std::set<uint32_t> models;
+
+	void Add(TextureRef ref) { textures.insert(ref.ref.idx); }
+	void Add(ModelRef ref) { models.insert(ref.ref.idx); }
+	void Add(const Material &mat);
+};
+
+/**
+	@short Destroy the least recently drawn textures and models until their caches fit within budget, call once per frame after submitting all views.
+
+	Resources drawn during the current frame, referenced by a cached material or program, listed in references or queued for loading are never evicted.
+	References to an evicted resource become invalid, loading it again by name creates a new resource.
+
+	@note Materials and models held by a scene are not known to the pipeline resources, use the Scene overload or Scene::CollectResourceReferences to protect them.
+*/
+size_t EvictResourcesOverBudget(PipelineResources &resources, const PipelineResourceReferences &references);
+size_t EvictResourcesOverBudget(PipelineResources &resources);
+
+/**
+	@short Read and decode queued textures and models on the worker pool.
+
+	When enabled ProcessTextureLoadQueue and ProcessModelLoadQueue hand queued loads to background workers and only create GPU resources from decoded data
+	within their time budget. Resource readers must be safe to use from any thread, which is the case for the file and assets readers.
+*/
+void SetBackgroundResourceDecode(PipelineResources &resources, bool enable);
+bool GetBackgroundResourceDecode(const PipelineResources &resources);
+
+/// State of the queued loads of a resource type.
+struct ResourceLoadProgress {
+	size_t queued{}; // waiting to be processed
+	size_t decoding{}; // being read and decoded in the background
+	size_t ready{}; // decoded, waiting for their GPU resource to be created
+};
+
+ResourceLoadProgress GetTextureLoadProgress(const PipelineResources &resources);
+ResourceLoadProgress GetModelLoadProgress(const PipelineResources &resources);
+
 //
 size_t ProcessTextureLoadQueue(PipelineResources &resources, time_ns t_budget = time_from_ms(4), bool silent = false);
 
@@ -583,6 +642,39 @@ struct ModelDisplayList { // 16B
 
 void CullModelDisplayLists(const Frustum &frustum, std::vector<ModelDisplayList> &display_lists, const std::vector<Mat4> &mtxs, const PipelineResources &res);
 
+struct ModelDisplayListCullingStats {
+	size_t node_count{0}, item_count{0}; // culling tree size
+	size_t updated_count{0}; // display lists whose world bounds were computed by the last update
+	size_t build_count{0}; // number of times the culling tree was built
+	size_t query_count{0}, node_tested{0}, item_tested{0}, visible_count{0}; // accumulated by queries since the last update
+};
+
+/// Culling state of a display list set maintained across frames, see UpdateModelDisplayListCulling.
+struct ModelDisplayListCulling {
+	std::vector<MinMax> bounds; // world bounds of each display list
+	std::vector<MinMax> local_bounds; // model bounds of each display list
+	std::vector<uint64_t> keys; // transform, model and list index of each display list
+	std::vector<uint32_t> revisions; // revision of the display list world matrix when its world bounds were computed
+
+	MinMaxTree tree;
+	uint32_t update_count{0};
+
+	ModelDisplayListCullingStats stats;
+};
+
+/**
+	@short Update the world bounds of a display list set and the tree used to cull them.
+
+	When world matrix revisions are provided only the bounds of display lists whose world matrix, model or list changed are computed, see Scene::GetTransformWorldRevisions.
+	The tree is refit to the modified bounds and built again when the number of display lists changes or when refitting degraded it too much.
+	No tree is built on the first update so that culling state discarded after a single frame costs no more than testing each display list.
+*/
+void UpdateModelDisplayListCulling(ModelDisplayListCulling &culling, const std::vector<ModelDisplayList> &display_lists, const std::vector<Mat4> &mtxs,
+	const std::vector<uint32_t> &mtx_revisions, const PipelineResources &res);
+/// Cull the display list set of the last call to UpdateModelDisplayListCulling, visible display lists are output in their original order.
+void CullModelDisplayLists(
+	const Frustum &frustum, ModelDisplayListCulling &culling, const std::vector<ModelDisplayList> &display_lists, std::vector<ModelDisplayList> &out_display_lists);
+
 void DrawModelDisplayLists(bgfx::ViewId view_id, const std::vector<ModelDisplayList> &display_lists, uint8_t pipeline_config_idx,
 	const std::vector<UniformSetValue> &values, const std::vector<UniformSetTexture> &textures, const std::vector<Mat4> &mtxs, const PipelineResources &res);
 void DrawModelDisplayLists(bgfx::ViewId view_id, const std::vector<ModelDisplayList> &display_lists, const std::vector<uint32_t> &depths,
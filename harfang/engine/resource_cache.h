@@ -5,7 +5,10 @@
 #include "foundation/cext.h"
 #include "foundation/generational_vector_list.h"
 
+#include <algorithm>
 #include <map>
+#include <utility>
+#include <vector>
 
 namespace hg {
 
@@ -20,6 +23,8 @@ private:
 	struct name_T {
 		std::string name;
 		T T_;
+		size_t size{0}; // in bytes, 0 if unknown
+		mutable uint32_t last_used{0}; // frame stamp
 	};
 
 public:
@@ -30,7 +35,7 @@ public:
 		if (i != std::end(name_to_ref))
 			return i->second;
 
-		R ref = {resources.add_ref({name, res})};
+		R ref = {resources.add_ref({name, res, 0, frame})};
 		name_to_ref[name] = ref;
 		return ref;
 	}
@@ -40,7 +45,7 @@ public:
 		if (i != std::end(name_to_ref))
 			return i->second;
 
-		R ref = {resources.add_ref({name, std::move(res)})};
+		R ref = {resources.add_ref({name, std::move(res), 0, frame})};
 		name_to_ref[name] = ref;
 		return ref;
 	}
@@ -49,6 +54,7 @@ public:
 		if (resources.is_valid(ref.ref)) {
 			_destroy(resources[ref.ref.idx].T_);
 			resources[ref.ref.idx].T_ = res;
+			SetSize(ref, 0);
 		}
 	}
 
@@ -56,12 +62,14 @@ public:
 		if (resources.is_valid(ref.ref)) {
 			_destroy(resources[ref.ref.idx].T_);
 			resources[ref.ref.idx].T_ = std::move(res);
+			SetSize(ref, 0);
 		}
 	}
 
 	void Destroy(R ref) {
 		if (resources.is_valid(ref.ref)) {
 			_destroy(resources[ref.ref.idx].T_);
+			memory_usage -= resources[ref.ref.idx].size;
 			name_to_ref.erase(resources[ref.ref.idx].name); // drop from cache
 			resources.remove_ref(ref.ref);
 		}
@@ -72,6 +80,75 @@ public:
 			_destroy(i.T_);
 		resources.clear();
 		name_to_ref.clear();
+		memory_usage = 0;
+	}
+
+	/// Set the memory used by a resource, resources of unknown size are never evicted.
+	void SetSize(R ref, size_t size) {
+		if (resources.is_valid(ref.ref)) {
+			auto &r = resources[ref.ref.idx];
+			memory_usage = memory_usage - r.size + size;
+			r.size = size;
+		}
+	}
+
+	size_t GetSize(R ref) const { return resources.is_valid(ref.ref) ? resources[ref.ref.idx].size : 0; }
+
+	/// Total memory used by the resources of known size in the cache.
+	size_t GetMemoryUsage() const { return memory_usage; }
+
+	/// Set the cache memory budget in bytes, 0 means no budget.
+	void SetBudget(size_t budget_) { budget = budget_; }
+	size_t GetBudget() const { return budget; }
+
+	/// Stamp a resource as used during the current frame.
+	void MarkUsed(R ref) const {
+		if (resources.is_valid(ref.ref))
+			resources[ref.ref.idx].last_used = frame;
+	}
+
+	void MarkUsed_unsafe_(uint16_t idx) const {
+		if (idx != 0xffff) {
+			__ASSERT__(resources.is_used(idx));
+			resources[idx].last_used = frame;
+		}
+	}
+
+	/**
+		@short Destroy least recently used resources until the cache fits within its budget then start a new frame.
+
+		Resources used during the current frame, of unknown size or for which is_referenced returns true are never evicted.
+		References to an evicted resource become invalid, loading it again by name creates a new resource.
+	*/
+	template <typename F> size_t EvictOverBudget(F is_referenced) {
+		size_t evicted = 0;
+
+		if (budget && memory_usage > budget) {
+			std::vector<std::pair<uint32_t, R>> candidates; // age/ref
+
+			for (auto ref = resources.first_ref(); ref != invalid_gen_ref; ref = resources.next_ref(ref)) {
+				const auto &r = resources[ref.idx];
+				if (r.size && r.last_used != frame && !is_referenced(R{ref}))
+					candidates.push_back({frame - r.last_used, R{ref}}); // unsigned difference is wrap-around safe
+			}
+
+			std::sort(std::begin(candidates), std::end(candidates), [](const std::pair<uint32_t, R> &a, const std::pair<uint32_t, R> &b) { return a.first > b.first; });
+
+			for (const auto &c : candidates) {
+				if (memory_usage <= budget)
+					break;
+
+				Destroy(c.second);
+				++evicted;
+			}
+		}
+
+		++frame;
+		return evicted;
+	}
+
+	size_t EvictOverBudget() {
+		return EvictOverBudget([](R) { return false; });
 	}
 
 	bool IsValidRef(R ref) const { return resources.is_valid(ref.ref); }
@@ -137,6 +214,9 @@ private:
 	generational_vector_list<name_T> resources;
 	std::map<const std::string, R> name_to_ref;
 
+	size_t memory_usage{0}, budget{0};
+	uint32_t frame{0};
+
 	void (*_destroy)(T &) = nullptr;
 };
 
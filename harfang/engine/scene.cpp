@@ -13,10 +13,13 @@
 #include "foundation/format.h"
 #include "foundation/log.h"
 #include "foundation/pack_float.h"
+#include "foundation/profiler.h"
 #include "foundation/string.h"
+#include "foundation/worker_pool.h"
 
 #include "json/json.hpp"
 
+#include <atomic>
 #include <numeric>
 #include <set>
 
@@ -63,6 +66,9 @@ void Scene::Clear() {
 	nodes.clear();
 
 	transforms.clear();
+	transform_order_dirty = true;
+	transform_flags.clear();
+	changed_transform_worlds.clear();
 	cameras.clear();
 	objects.clear();
 	lights.clear();
@@ -281,30 +287,166 @@ void Scene::ReadyWorldMatrices() {
 	transform_worlds.resize(transforms.capacity()); // EJ vector_list can have holes, so size() does not necessarily includes the highest index in use
 	transform_worlds_updated.resize(transforms.capacity());
 	std::fill(std::begin(transform_worlds_updated), std::end(transform_worlds_updated), false);
+	transform_flags.resize(transforms.capacity(), uint8_t(TF_Dirty));
+}
+
+void Scene::UpdateTransformOrder() {
+	static const auto invalid_idx = generational_vector_list<Transform_>::invalid_idx;
+
+	const auto capacity = transforms.capacity();
+
+	// resolve parent transform of each transform and count children per parent
+	std::vector<uint32_t> parent_idx(capacity, invalid_idx), child_offset(capacity + 1, 0);
+
+	for (auto i = transforms.first(); i != invalid_idx; i = transforms.next(i)) {
+		const auto parent_ref = GetNodeComponentRef_<NCI_Transform>(transforms[i].parent);
+		if (transforms.is_valid(parent_ref) && parent_ref.idx != i) {
+			parent_idx[i] = parent_ref.idx;
+			++child_offset[parent_ref.idx + 1];
+		}
+	}
+
+	std::partial_sum(std::begin(child_offset), std::end(child_offset), std::begin(child_offset));
+
+	std::vector<uint32_t> children(child_offset.back()), child_cursor(std::begin(child_offset), std::end(child_offset) - 1);
+	for (auto i = transforms.first(); i != invalid_idx; i = transforms.next(i))
+		if (parent_idx[i] != invalid_idx)
+			children[child_cursor[parent_idx[i]]++] = i;
+
+	// breadth-first traversal from the roots, transforms caught in a parenting cycle are never reached and left out
+	transform_order.clear();
+	transform_order.reserve(transforms.size());
+	transform_order_levels.clear();
+
+	for (auto i = transforms.first(); i != invalid_idx; i = transforms.next(i))
+		if (parent_idx[i] == invalid_idx)
+			transform_order.push_back({i, invalid_idx});
+
+	for (size_t level_start = 0; level_start < transform_order.size();) {
+		transform_order_levels.push_back(uint32_t(level_start));
+
+		const auto level_end = transform_order.size();
+		for (auto j = level_start; j < level_end; ++j) {
+			const auto idx = transform_order[j].idx;
+			for (auto k = child_offset[idx]; k < child_offset[idx + 1]; ++k)
+				transform_order.push_back({children[k], idx});
+		}
+
+		level_start = level_end;
+	}
+
+	transform_order_levels.push_back(uint32_t(transform_order.size()));
+
+	// parenting changed, recompute everything
+	transform_flags.resize(capacity);
+	for (auto &flags : transform_flags)
+		flags |= TF_Dirty;
+
+	transform_order_dirty = false;
 }
 
 void Scene::ComputeWorldMatrices() {
-	for (auto i = transforms.first(); i != generational_vector_list<Transform_>::invalid_idx; i = transforms.next(i))
-		ComputeTransformWorldMatrix(i);
+	static const auto profiler_task = GetProfilerTaskId("Scene::ComputeWorldMatrices");
+	ProfilerCategorySection section(PC_Scene, profiler_task);
+
+	if (transform_order_dirty)
+		UpdateTransformOrder();
+
+	if (transform_world_revisions.size() < transform_flags.size())
+		transform_world_revisions.resize(transform_flags.size(), 0);
+
+	const auto revision = ++world_matrices_revision;
+
+	// only dirty transforms and their descendants are computed, a transform flagged as updated keeps its world matrix for this frame but is marked dirty so
+	// that it is computed from its local transformation on the next frame unless updated again
+	// transform_worlds_updated is only read while matrices are being computed, concurrent writes to a std::vector<bool> are not safe
+	const auto compute = [this, revision](size_t begin, size_t end) {
+		size_t computed = 0;
+
+		for (auto i = begin; i < end; ++i) {
+			const auto &e = transform_order[i];
+			auto &flags = transform_flags[e.idx];
+
+			bool changed = flags & TF_Dirty;
+			if (e.parent_idx != generational_vector_list<Transform_>::invalid_idx && (transform_flags[e.parent_idx] & TF_WorldChanged))
+				changed = true;
+
+			if (transform_worlds_updated[e.idx]) {
+				flags |= TF_Dirty | TF_WorldChanged;
+				transform_world_revisions[e.idx] = revision;
+				continue;
+			}
+
+			if (changed) {
+				const auto &trs = transforms[e.idx];
+				const auto world = TransformationMat4(trs.TRS.pos, trs.TRS.rot, trs.TRS.scl);
+
+				if (e.parent_idx != generational_vector_list<Transform_>::invalid_idx)
+					transform_worlds[e.idx] = transform_worlds[e.parent_idx] * world;
+				else
+					transform_worlds[e.idx] = world;
+
+				flags = (flags & ~TF_Dirty) | TF_WorldChanged;
+				transform_world_revisions[e.idx] = revision;
+				++computed;
+			} else {
+				flags &= ~TF_WorldChanged;
+			}
+		}
+
+		return computed;
+	};
+
+	static const size_t parallel_grain = 1024;
+
+	if (parallel_world_matrices && transform_order.size() > parallel_grain) {
+		std::atomic<size_t> computed{0};
+
+		for (size_t l = 0; l < transform_order_levels.size() - 1; ++l) {
+			const size_t level_start = transform_order_levels[l], level_end = transform_order_levels[l + 1];
+			parallel_for(level_end - level_start, parallel_grain,
+				[&](size_t begin, size_t end) { computed += compute(level_start + begin, level_start + end); }); // a level only depends on the previous ones
+		}
+
+		computed_world_matrix_count = computed;
+	} else {
+		computed_world_matrix_count = compute(0, transform_order.size());
+	}
+
+	// gather changed matrices to update their previous world matrix on the next call to StorePreviousWorldMatrices
+	for (const auto &e : transform_order) {
+		auto &flags = transform_flags[e.idx];
+		if ((flags & (TF_WorldChanged | TF_PreviousPending)) == TF_WorldChanged) {
+			flags |= TF_PreviousPending;
+			changed_transform_worlds.push_back(e.idx);
+		}
+	}
 }
 
 void Scene::StorePreviousWorldMatrices() {
-	std::swap(transform_worlds, previous_transform_worlds);
-	std::swap(transform_worlds_updated, previous_transform_worlds_updated);
+	previous_transform_worlds.resize(transform_worlds.size());
+
+	// only matrices changed since the last call need to be stored, others already hold the same world matrix
+	for (const auto idx : changed_transform_worlds)
+		if (idx < transform_worlds.size()) {
+			previous_transform_worlds[idx] = transform_worlds[idx];
+			transform_flags[idx] &= ~TF_PreviousPending;
+		}
+
+	changed_transform_worlds.clear();
 }
 
 void Scene::FixupPreviousWorldMatrices() {
-	previous_transform_worlds.resize(transform_worlds.size());
-	previous_transform_worlds_updated.resize(transform_worlds_updated.size(), false);
-
-	const size_t count = transform_worlds.size();
-	for (size_t i = 0; i < count; ++i)
-		if (!previous_transform_worlds_updated[i])
-			previous_transform_worlds[i] == transform_worlds[i]; // ensure coherency of previous transform
+	const auto count = previous_transform_worlds.size();
+	if (count < transform_worlds.size())
+		previous_transform_worlds.insert(std::end(previous_transform_worlds), std::begin(transform_worlds) + count, std::end(transform_worlds)); // ensure coherency of previous transform
 }
 
 //
 void Scene::Update(time_ns dt) {
+	static const auto profiler_task = GetProfilerTaskId("Scene::Update");
+	ProfilerCategorySection section(PC_Scene, profiler_task);
+
 	StorePreviousWorldMatrices();
 	ReadyWorldMatrices();
 
@@ -315,94 +457,131 @@ void Scene::Update(time_ns dt) {
 }
 
 //
-void Scene::GetModelDisplayLists(std::vector<ModelDisplayList> &out_opaque, std::vector<ModelDisplayList> &out_transparent,
+void Scene::GetNodeModelDisplayLists_(const Node_ &node, std::vector<ModelDisplayList> &out_opaque, std::vector<ModelDisplayList> &out_transparent,
 	std::vector<SkinnedModelDisplayList> &out_opaque_skinned, std::vector<SkinnedModelDisplayList> &out_transparent_skinned,
 	const PipelineResources &resources) const {
-	out_opaque.clear();
-	out_opaque.reserve(nodes.size());
-
-	out_transparent.clear();
-	out_transparent.reserve(nodes.size());
-
-	out_opaque_skinned.clear();
-	out_transparent_skinned.clear();
-
-	for (const auto &node : nodes) {
-		if (node.flags & (NF_Disabled | NF_InstanceDisabled))
-			continue;
+	if (node.flags & (NF_Disabled | NF_InstanceDisabled))
+		return;
 
-		const ComponentRef trs_ref = node.components[NCI_Transform];
-		if (!transforms.is_valid(trs_ref))
-			continue; // [EJ12102020] FIXME this is not required for a skinned object
+	const ComponentRef trs_ref = node.components[NCI_Transform];
+	if (!transforms.is_valid(trs_ref))
+		return; // [EJ12102020] FIXME this is not required for a skinned object
 
-		const Object_ *obj_ = GetComponent_(objects, node.components[NCI_Object]);
-		if (!obj_)
-			continue;
+	const Object_ *obj_ = GetComponent_(objects, node.components[NCI_Object]);
+	if (!obj_)
+		return;
 
-		const uint16_t mdl_idx = resources.models.GetValidatedRefIndex(obj_->model);
-		const Model &mdl = resources.models.Get_unsafe_(mdl_idx);
+	const uint16_t mdl_idx = resources.models.GetValidatedRefIndex(obj_->model);
+	const Model &mdl = resources.models.Get_unsafe_(mdl_idx);
 
-		const auto total_bone_count = obj_->bones.size();
+	const auto total_bone_count = obj_->bones.size();
 
-		const bool obj_has_valid_skin = total_bone_count > 0 && total_bone_count == mdl.bind_pose.size();
+	const bool obj_has_valid_skin = total_bone_count > 0 && total_bone_count == mdl.bind_pose.size();
 
-		for (size_t i = 0; i < mdl.lists.size(); ++i) {
-			const auto mat_idx = mdl.mats[i];
+	for (size_t i = 0; i < mdl.lists.size(); ++i) {
+		const auto mat_idx = mdl.mats[i];
 
-			if (mat_idx < obj_->materials.size()) { // FIXME fall back to error material
-				const auto mat = &obj_->materials[mat_idx];
-				const auto &bones_table = mdl.lists[i].bones_table;
-				__ASSERT__(bones_table.size() <= max_skinned_model_matrix_count);
+		if (mat_idx < obj_->materials.size()) { // FIXME fall back to error material
+			const auto mat = &obj_->materials[mat_idx];
+			const auto &bones_table = mdl.lists[i].bones_table;
+			__ASSERT__(bones_table.size() <= max_skinned_model_matrix_count);
 
-				const bool is_transparent = GetMaterialBlendMode(*mat) != BM_Opaque;
+			const bool is_transparent = GetMaterialBlendMode(*mat) != BM_Opaque;
 
-				if (!obj_has_valid_skin) {
-					if (is_transparent)
-						out_transparent.push_back({mat, trs_ref.idx, mdl_idx, uint16_t(i)}); // worlds vector entries map 1:1 to the transform_ vector_list
-					else
-						out_opaque.push_back({mat, trs_ref.idx, mdl_idx, uint16_t(i)}); // worlds vector entries map 1:1 to the transform_ vector_list
-				} else {
-					SkinnedModelDisplayList dl;
-					dl.mat = mat;
+			if (!obj_has_valid_skin) {
+				if (is_transparent)
+					out_transparent.push_back({mat, trs_ref.idx, mdl_idx, uint16_t(i)}); // worlds vector entries map 1:1 to the transform_ vector_list
+				else
+					out_opaque.push_back({mat, trs_ref.idx, mdl_idx, uint16_t(i)}); // worlds vector entries map 1:1 to the transform_ vector_list
+			} else {
+				SkinnedModelDisplayList dl;
+				dl.mat = mat;
 
-					for (int j = 0; j < bones_table.size(); ++j) {
-						auto bone_idx = bones_table[j];
-						__ASSERT__(bone_idx < total_bone_count);
+				for (int j = 0; j < bones_table.size(); ++j) {
+					auto bone_idx = bones_table[j];
+					__ASSERT__(bone_idx < total_bone_count);
 
-						uint32_t mtx_idx = trs_ref.idx; // default to the node matrix in case a bone reference is invalid
+					uint32_t mtx_idx = trs_ref.idx; // default to the node matrix in case a bone reference is invalid
 
-						if (bone_idx < total_bone_count) {
-							const NodeRef bone_ref = obj_->bones[bone_idx];
+					if (bone_idx < total_bone_count) {
+						const NodeRef bone_ref = obj_->bones[bone_idx];
 
-							if (nodes.is_valid(bone_ref)) {
-								const auto &bone_node_ = nodes[bone_ref.idx];
+						if (nodes.is_valid(bone_ref)) {
+							const auto &bone_node_ = nodes[bone_ref.idx];
 
-								const ComponentRef bone_trs_ref = bone_node_.components[NCI_Transform];
-								if (transforms.is_valid(bone_trs_ref))
-									mtx_idx = bone_trs_ref.idx; // worlds vector entries map 1:1 to the transform_ vector_list
-							}
-						} else {
-							bone_idx = 0;
+							const ComponentRef bone_trs_ref = bone_node_.components[NCI_Transform];
+							if (transforms.is_valid(bone_trs_ref))
+								mtx_idx = bone_trs_ref.idx; // worlds vector entries map 1:1 to the transform_ vector_list
 						}
-
-						dl.mtx_idxs[j] = mtx_idx;
-						dl.bones_idxs[j] = bone_idx;
+					} else {
+						bone_idx = 0;
 					}
 
-					dl.bone_count = bones_table.size();
-					dl.mdl_idx = mdl_idx;
-					dl.lst_idx = uint16_t(i);
-
-					if (is_transparent)
-						out_transparent_skinned.push_back(dl);
-					else
-						out_opaque_skinned.push_back(dl);
+					dl.mtx_idxs[j] = mtx_idx;
+					dl.bones_idxs[j] = bone_idx;
 				}
+
+				dl.bone_count = bones_table.size();
+				dl.mdl_idx = mdl_idx;
+				dl.lst_idx = uint16_t(i);
+
+				if (is_transparent)
+					out_transparent_skinned.push_back(dl);
+				else
+					out_opaque_skinned.push_back(dl);
 			}
 		}
 	}
 }
 
+template <typename T> static void AppendDisplayLists(std::vector<T> &out, const std::vector<T> &in) { out.insert(std::end(out), std::begin(in), std::end(in)); }
+
+void Scene::GetModelDisplayLists(std::vector<ModelDisplayList> &out_opaque, std::vector<ModelDisplayList> &out_transparent,
+	std::vector<SkinnedModelDisplayList> &out_opaque_skinned, std::vector<SkinnedModelDisplayList> &out_transparent_skinned,
+	const PipelineResources &resources) const {
+	out_opaque.clear();
+	out_opaque.reserve(nodes.size());
+
+	out_transparent.clear();
+	out_transparent.reserve(nodes.size());
+
+	out_opaque_skinned.clear();
+	out_transparent_skinned.clear();
+
+	static const size_t parallel_grain = 256;
+
+	const size_t node_capacity = nodes.capacity();
+
+	if (!parallel_display_lists || node_capacity <= parallel_grain || get_worker_count() == 0) {
+		for (const auto &node : nodes)
+			GetNodeModelDisplayLists_(node, out_opaque, out_transparent, out_opaque_skinned, out_transparent_skinned, resources);
+		return;
+	}
+
+	// each chunk writes to its own outputs, concatenating them in chunk order yields the same result as the serial path
+	display_list_chunks.resize((node_capacity + parallel_grain - 1) / parallel_grain);
+
+	parallel_for(node_capacity, parallel_grain, [&](size_t begin, size_t end) {
+		auto &chunk = display_list_chunks[begin / parallel_grain];
+
+		chunk.opaque.clear();
+		chunk.transparent.clear();
+		chunk.opaque_skinned.clear();
+		chunk.transparent_skinned.clear();
+
+		for (size_t i = begin; i < end; ++i)
+			if (nodes.is_used(uint32_t(i)))
+				GetNodeModelDisplayLists_(nodes[i], chunk.opaque, chunk.transparent, chunk.opaque_skinned, chunk.transparent_skinned, resources);
+	});
+
+	for (const auto &chunk : display_list_chunks) {
+		AppendDisplayLists(out_opaque, chunk.opaque);
+		AppendDisplayLists(out_transparent, chunk.transparent);
+		AppendDisplayLists(out_opaque_skinned, chunk.opaque_skinned);
+		AppendDisplayLists(out_transparent_skinned, chunk.transparent_skinned);
+	}
+}
+
 //
 std::vector<Node> Scene::GetLights() const {
 	std::vector<Node> lights;
@@ -466,7 +645,10 @@ std::vector<NodeRef> NodesChildren::GetChildren(NodeRef node) const {
 
 //
 Node Scene::CreateNode(std::string name) { return {scene_ref, nodes.add_ref({std::move(name)})}; }
-void Scene::DestroyNode(NodeRef ref) { nodes.remove_ref(ref); }
+void Scene::DestroyNode(NodeRef ref) {
+	nodes.remove_ref(ref);
+	transform_order_dirty = true;
+}
 
 //
 void Scene::EnableNode_(NodeRef ref, bool through_instance) {
@@ -740,9 +922,10 @@ void Scene::SetNodeFlags(NodeRef ref, uint32_t flags) {
 ComponentRef Scene::GetNodeTransformRef(NodeRef ref) const { return GetNodeComponentRef_<NCI_Transform>(ref); }
 
 void Scene::SetNodeTransform(NodeRef ref, ComponentRef cref) {
-	if (auto node_ = this->GetNode_(ref))
+	if (auto node_ = this->GetNode_(ref)) {
 		node_->components[NCI_Transform] = cref;
-	else
+		transform_order_dirty = true;
+	} else
 		warn("Invalid node");
 }
 
@@ -773,6 +956,7 @@ void Scene::SetNodeWorldMatrix(NodeRef ref, const Mat4 &world) {
 			if (trs_ref.idx < transform_worlds.size()) {
 				transform_worlds[trs_ref.idx] = world;
 				transform_worlds_updated[trs_ref.idx] = true;
+				MarkTransformWorldWritten_(trs_ref.idx);
 			} else {
 				warn("Invalid node transform index");
 			}
@@ -1332,8 +1516,10 @@ bool Scene::NodeSetupInstance(
 				n.flags |= NF_InstanceDisabled; // flag as disabled through host
 
 			if (auto trs = GetComponent_(transforms, n.components[NCI_Transform]))
-				if (trs->parent == InvalidNodeRef)
+				if (trs->parent == InvalidNodeRef) {
 					trs->parent = ref; // parent node to the instance node
+					transform_order_dirty = true;
+				}
 		}
 
 		for (auto &anim : ctx.view.anims)
@@ -1427,8 +1613,10 @@ void Scene::NodeMoveInstance(NodeRef from, NodeRef to) {
 			// re-parent instantiated nodes to the target node
 			const auto trsf_ref = GetNodeComponentRef_<NCI_Transform>(n);
 			if (trsf_ref != InvalidComponentRef)
-				if (transforms[trsf_ref.idx].parent == from)
+				if (transforms[trsf_ref.idx].parent == from) {
 					transforms[trsf_ref.idx].parent = to;
+					transform_order_dirty = true;
+				}
 
 			// update disable flag
 			tgt_disabled ? DisableNode_(n, true) : EnableNode_(n, true);
@@ -1695,6 +1883,13 @@ Node CreateScript(Scene &scene, const std::string &path) {
 	return node;
 }
 
+//
+size_t EvictResourcesOverBudget(PipelineResources &resources, const Scene &scene) {
+	PipelineResourceReferences references;
+	scene.CollectResourceReferences(references);
+	return EvictResourcesOverBudget(resources, references);
+}
+
 //
 void DumpSceneMemoryFootprint() {
 	log(format("sizeof(Scene): %1").arg(sizeof(Scene)).c_str());
@@ -2040,16 +2235,16 @@ void Scene::EvaluateBoundAnim(const BoundToSceneAnim &bound_anim, time_ns t) {
 		const auto &anim = anims[bound_anim.anim.idx];
 
 		if (bound_anim.float_track[SFAT_FogNear] != -1)
-			Evaluate(anim.float_tracks[bound_anim.float_track[SFAT_FogNear]], t, environment.fog_near);
+			Evaluate(anim.float_tracks[bound_anim.float_track[SFAT_FogNear]], t, environment.fog_near, bound_anim.float_cursor[SFAT_FogNear]);
 
 		if (bound_anim.float_track[SFAT_FogFar] != -1)
-			Evaluate(anim.float_tracks[bound_anim.float_track[SFAT_FogFar]], t, environment.fog_far);
+			Evaluate(anim.float_tracks[bound_anim.float_track[SFAT_FogFar]], t, environment.fog_far, bound_anim.float_cursor[SFAT_FogFar]);
 
 		if (bound_anim.color_track[SCAT_FogColor] != -1)
-			Evaluate(anim.color_tracks[bound_anim.color_track[SCAT_FogColor]], t, environment.fog_color);
+			Evaluate(anim.color_tracks[bound_anim.color_track[SCAT_FogColor]], t, environment.fog_color, bound_anim.color_cursor[SCAT_FogColor]);
 
 		if (bound_anim.color_track[SCAT_AmbientColor] != -1)
-			Evaluate(anim.color_tracks[bound_anim.color_track[SCAT_AmbientColor]], t, environment.ambient);
+			Evaluate(anim.color_tracks[bound_anim.color_track[SCAT_AmbientColor]], t, environment.ambient, bound_anim.color_cursor[SCAT_AmbientColor]);
 	}
 }
 
@@ -2157,43 +2352,46 @@ void Scene::EvaluateBoundAnim(const BoundToNodeAnim &bound_anim, time_ns t) {
 
 		if (bound_anim.bool_track[NBAT_Enable] != -1) {
 			bool enable = IsNodeItselfEnabled(bound_anim.node);
-			if (Evaluate(anim.bool_tracks[bound_anim.bool_track[NBAT_Enable]], t, enable))
+			if (Evaluate(anim.bool_tracks[bound_anim.bool_track[NBAT_Enable]], t, enable, bound_anim.bool_cursor[NBAT_Enable]))
 				enable ? EnableNode(bound_anim.node) : DisableNode(bound_anim.node);
 		}
 
-		if (auto trs = GetComponent_(transforms, GetNodeComponentRef_<NCI_Transform>(bound_anim.node))) {
+		const auto trs_ref = GetNodeComponentRef_<NCI_Transform>(bound_anim.node);
+		if (auto trs = GetComponent_(transforms, trs_ref)) {
+			MarkTransformDirty_(trs_ref.idx);
+
 			if (bound_anim.vec3_track[NV3AT_TransformPosition] != -1)
-				Evaluate(anim.vec3_tracks[bound_anim.vec3_track[NV3AT_TransformPosition]], t, trs->TRS.pos);
+				Evaluate(anim.vec3_tracks[bound_anim.vec3_track[NV3AT_TransformPosition]], t, trs->TRS.pos, bound_anim.vec3_cursor[NV3AT_TransformPosition]);
 
 			if (anim.flags & AF_UseQuaternionForRotation) {
 				if (bound_anim.quat_track[NQAT_TransformRotation] != -1) {
 					Quaternion rot;
-					if (Evaluate(anim.quat_tracks[bound_anim.quat_track[NQAT_TransformRotation]], t, rot))
+					if (Evaluate(anim.quat_tracks[bound_anim.quat_track[NQAT_TransformRotation]], t, rot, bound_anim.quat_cursor[NQAT_TransformRotation]))
 						trs->TRS.rot = ToEuler(Normalize(rot)); // EvaluateLinear doesn't normalize quaternions, so we're doing it here
 				}
 			} else {
 				if (bound_anim.vec3_track[NV3AT_TransformRotation] != -1)
-					Evaluate(anim.vec3_tracks[bound_anim.vec3_track[NV3AT_TransformRotation]], t, trs->TRS.rot);
+					Evaluate(anim.vec3_tracks[bound_anim.vec3_track[NV3AT_TransformRotation]], t, trs->TRS.rot, bound_anim.vec3_cursor[NV3AT_TransformRotation]);
 			}
 
 			if (bound_anim.vec3_track[NV3AT_TransformScale] != -1)
-				Evaluate(anim.vec3_tracks[bound_anim.vec3_track[NV3AT_TransformScale]], t, trs->TRS.scl);
+				Evaluate(anim.vec3_tracks[bound_anim.vec3_track[NV3AT_TransformScale]], t, trs->TRS.scl, bound_anim.vec3_cursor[NV3AT_TransformScale]);
 		}
 
 		if (auto lgt = GetComponent_(lights, GetNodeComponentRef_<NCI_Light>(bound_anim.node))) {
 			if (bound_anim.color_track[NCAT_LightDiffuse] != -1)
-				Evaluate(anim.color_tracks[bound_anim.color_track[NCAT_LightDiffuse]], t, lgt->diffuse);
+				Evaluate(anim.color_tracks[bound_anim.color_track[NCAT_LightDiffuse]], t, lgt->diffuse, bound_anim.color_cursor[NCAT_LightDiffuse]);
 			if (bound_anim.color_track[NCAT_LightSpecular] != -1)
-				Evaluate(anim.color_tracks[bound_anim.color_track[NCAT_LightSpecular]], t, lgt->specular);
+				Evaluate(anim.color_tracks[bound_anim.color_track[NCAT_LightSpecular]], t, lgt->specular, bound_anim.color_cursor[NCAT_LightSpecular]);
 			if (bound_anim.float_track[NFAT_LightDiffuseIntensity] != -1)
-				Evaluate(anim.float_tracks[bound_anim.float_track[NFAT_LightDiffuseIntensity]], t, lgt->diffuse_intensity);
+				Evaluate(anim.float_tracks[bound_anim.float_track[NFAT_LightDiffuseIntensity]], t, lgt->diffuse_intensity, bound_anim.float_cursor[NFAT_LightDiffuseIntensity]);
 			if (bound_anim.float_track[NFAT_LightSpecularIntensity] != -1)
-				Evaluate(anim.float_tracks[bound_anim.float_track[NFAT_LightSpecularIntensity]], t, lgt->specular_intensity);
+				Evaluate(anim.float_tracks[bound_anim.float_track[NFAT_LightSpecularIntensity]], t, lgt->specular_intensity, bound_anim.float_cursor[NFAT_LightSpecularIntensity]);
 		}
 
 		if (auto cam = GetComponent_(cameras, GetNodeComponentRef_<NCI_Camera>(bound_anim.node))) {
 			if (bound_anim.float_track[NFAT_CameraFov] != -1)
-				Evaluate(anim.float_tracks[bound_anim.float_track[NFAT_CameraFov]], t, cam->fov);
+				Evaluate(anim.float_tracks[bound_anim.float_track[NFAT_CameraFov]], t, cam->fov, bound_anim.float_cursor[NFAT_CameraFov]);
 		}
 
 		if (auto obj = GetComponent_(objects, GetNodeComponentRef_<NCI_Object>(bound_anim.node))) {
@@ -2209,7 +2407,7 @@ void Scene::EvaluateBoundAnim(const BoundToNodeAnim &bound_anim, time_ns t) {
 					continue; // invalid material value name
 
 				Vec4 v;
-				if (Evaluate(anim.vec4_tracks[mt.track_idx], t, v))
+				if (Evaluate(anim.vec4_tracks[mt.track_idx], t, v, mt.cursor))
 					i->second.value = {v.x, v.y, v.z, v.w};
 			}
 		}
@@ -2378,6 +2576,9 @@ bool Scene::IsPlaying(ScenePlayAnimRef ref) const { return play_anims.is_valid(r
 void Scene::StopAnim(ScenePlayAnimRef ref) { play_anims.remove_ref(ref); }
 
 void Scene::UpdatePlayingAnims(time_ns dt) {
+	static const auto profiler_task = GetProfilerTaskId("Scene::UpdatePlayingAnims");
+	ProfilerCategorySection section(PC_Scene, profiler_task);
+
 	std::vector<ScenePlayAnimRef> clean_list;
 
 	for (auto i = play_anims.first_ref(); i != InvalidScenePlayAnimRef; i = play_anims.next_ref(i)) {
@@ -2657,6 +2858,21 @@ std::vector<hg::Material *> Scene::GetMaterialsWithName(const std::string &name)
 	return mats;
 }
 
+//
+void Scene::CollectResourceReferences(PipelineResourceReferences &references) const {
+	for (auto ref = objects.first_ref(); objects.is_valid(ref); ref = objects.next_ref(ref)) {
+		const auto &obj = objects[ref.idx];
+
+		references.Add(obj.model);
+		for (const auto &mat : obj.materials)
+			references.Add(mat);
+	}
+
+	references.Add(environment.probe.irradiance_map);
+	references.Add(environment.probe.radiance_map);
+	references.Add(environment.brdf_map);
+}
+
 //
 std::string GetAnimableNodePropertyString(const Scene &scene, NodeRef ref, const std::string &name) {
 	if (const auto node = scene.GetNode(ref)) {
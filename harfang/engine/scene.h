@@ -62,6 +62,8 @@ struct BoundToNodeMaterialAnim {
 	int8_t track_idx; // anim track idx
 	uint8_t slot_idx; // material slot idx
 	std::string value; // material value name
+
+	mutable int cursor{0}; // key cursor
 };
 
 struct SceneBoundAnim;
@@ -85,6 +87,13 @@ struct BoundToNodeAnim {
 	std::vector<BoundToNodeMaterialAnim> vec4_mat_track;
 
 	mutable BoundToNodeInstanceAnim bound_to_node_instance_anim;
+
+	// key cursors, see GetIntervalKeys
+	mutable std::array<int, NBAT_Count> bool_cursor{};
+	mutable std::array<int, NFAT_Count> float_cursor{};
+	mutable std::array<int, NV3AT_Count> vec3_cursor{};
+	mutable std::array<int, NQAT_Count> quat_cursor{};
+	mutable std::array<int, NCAT_Count> color_cursor{};
 };
 
 enum SceneFloatAnimTarget { SFAT_FogNear, SFAT_FogFar, SFAT_Count };
@@ -95,6 +104,10 @@ struct BoundToSceneAnim {
 	std::array<int8_t, SCAT_Count> color_track;
 
 	AnimRef anim; // 8B
+
+	// key cursors, see GetIntervalKeys
+	mutable std::array<int, SFAT_Count> float_cursor{};
+	mutable std::array<int, SCAT_Count> color_cursor{};
 };
 
 //
@@ -202,6 +215,7 @@ public:
 	std::vector<Node> GetNodeChildren(const Node &node) const { return GetNodeChildren(node.ref); }
 
 	NodeRef GetNodeRef(uint32_t idx) const { return nodes.get_ref(idx); }
+	Node GetNodeFromIndex(uint32_t idx) const { return GetNode(GetNodeRef(idx)); }
 
 	size_t GetNodeCount() const;
 	size_t GetAllNodeCount() const;
@@ -261,6 +275,14 @@ public:
 	*/
 	void SetTransformWorldMatrix(ComponentRef ref, const Mat4 &world);
 
+	/// Set the position, rotation and scale of the transform of each node in a list.
+	/// Nodes without a valid transform component are skipped.
+	void SetTransformsTRS(const std::vector<NodeRef> &refs, const std::vector<Vec3> &pos, const std::vector<Vec3> &rot, const std::vector<Vec3> &scl);
+	void SetTransformsTRS(const std::vector<Node> &nodes, const std::vector<Vec3> &pos, const std::vector<Vec3> &rot, const std::vector<Vec3> &scl);
+	/// Get the position, rotation and scale of the transform of each node in a list.
+	void GetTransformsTRS(const std::vector<NodeRef> &refs, std::vector<Vec3> &pos, std::vector<Vec3> &rot, std::vector<Vec3> &scl) const;
+	void GetTransformsTRS(const std::vector<Node> &nodes, std::vector<Vec3> &pos, std::vector<Vec3> &rot, std::vector<Vec3> &scl) const;
+
 	Transform CreateTransform(const Vec3 &pos, const Vec3 &rot = {0, 0, 0}, const Vec3 &scl = {1, 1, 1}, NodeRef parent = {});
 	Transform CreateTransform(const Mat4 &mtx, NodeRef parent = {});
 
@@ -279,6 +301,10 @@ public:
 	/// @note This function INTENTIONALLY does not decompose the provided matrix to the transfrom position/rotation/scale fields.
 	void SetNodeWorldMatrix(NodeRef ref, const Mat4 &world);
 
+	/// Get the world matrix of each node in a list, nodes without a valid transform return the identity matrix.
+	std::vector<Mat4> GetNodesWorldMatrices(const std::vector<NodeRef> &refs) const;
+	std::vector<Mat4> GetNodesWorldMatrices(const std::vector<Node> &nodes) const;
+
 	/// Compute node world matrix from scratch on-the-fly.
 	/// This function is slow but useful when scene matrices are not yet up-to-date.
 	Mat4 ComputeNodeWorldMatrix(NodeRef ref) const;
@@ -286,9 +312,20 @@ public:
 	//
 	void StorePreviousWorldMatrices();
 	void ReadyWorldMatrices();
+	/// Compute the world matrix of all transforms not flagged as updated.
+	/// Transforms are evaluated in hierarchy order, parents always being computed before their children. This order is cached and only rebuilt when the scene parenting changes.
 	void ComputeWorldMatrices();
 	void FixupPreviousWorldMatrices();
 
+	/// Split world matrix computation across the worker pool, see set_worker_count().
+	/// Each hierarchy level is processed in parallel, levels with too few transforms to be worth dispatching are processed by the calling thread.
+	void SetParallelWorldMatrices(bool enable) { parallel_world_matrices = enable; }
+	bool GetParallelWorldMatrices() const { return parallel_world_matrices; }
+
+	/// Return the number of world matrices computed by the last call to ComputeWorldMatrices().
+	/// Only transforms modified since the previous call and their descendants are computed.
+	size_t GetComputedWorldMatrixCount() const { return computed_world_matrix_count; }
+
 	void Update(time_ns dt);
 
 	// camera component
@@ -359,6 +396,9 @@ public:
 
 	std::vector<hg::Material *> GetMaterialsWithName(const std::string &name);
 
+	/// Add the models and textures used by the scene objects, their materials and the scene environment to a reference set. See EvictResourcesOverBudget().
+	void CollectResourceReferences(PipelineResourceReferences &references) const;
+
 	// light component
 	Light CreateLight();
 	void DestroyLight(ComponentRef ref);
@@ -599,6 +639,10 @@ public:
 	ViewState ComputeCameraViewState(NodeRef ref, const Vec2 &aspect_ratio) const;
 
 	const std::vector<Mat4> &GetTransformWorldMatrices() const { return transform_worlds; }
+	/// Return the revision of each world matrix returned by GetTransformWorldMatrices().
+	/// The revision of a world matrix changes each time it is modified by ComputeWorldMatrices() or written using SetNodeWorldMatrix() or SetTransformWorldMatrix(),
+	/// use it to detect modified matrices between frames.
+	const std::vector<uint32_t> &GetTransformWorldRevisions() const { return transform_world_revisions; }
 	void StorePreviousTransformWorldMatrices();
 	const std::vector<Mat4> &GetPreviousTransformWorldMatrices() const { return previous_transform_worlds; }
 
@@ -613,6 +657,11 @@ public:
 		std::vector<SkinnedModelDisplayList> &out_opaque_skinned, std::vector<SkinnedModelDisplayList> &out_transparent_skinned,
 		const PipelineResources &resources) const;
 
+	/// Split display list gathering across the worker pool, see set_worker_count().
+	/// Nodes are processed in fixed size chunks whose outputs are concatenated in node order, display lists are returned in the same order as a serial gathering.
+	void SetParallelDisplayLists(bool enable) { parallel_display_lists = enable; }
+	bool GetParallelDisplayLists() const { return parallel_display_lists; }
+
 	//
 	bool GetMinMax(const PipelineResources &resources, MinMax &minmax) const;
 
@@ -708,6 +757,18 @@ private:
 
 	NodeRef GetNodeEx_(const std::vector<NodeRef> &refs, const std::string &path) const;
 
+	// display lists
+	struct DisplayListChunk_ {
+		std::vector<ModelDisplayList> opaque, transparent;
+		std::vector<SkinnedModelDisplayList> opaque_skinned, transparent_skinned;
+	};
+
+	mutable std::vector<DisplayListChunk_> display_list_chunks; // per chunk outputs of a parallel gathering, kept to reuse their storage
+
+	void GetNodeModelDisplayLists_(const Node_ &node, std::vector<ModelDisplayList> &out_opaque, std::vector<ModelDisplayList> &out_transparent,
+		std::vector<SkinnedModelDisplayList> &out_opaque_skinned, std::vector<SkinnedModelDisplayList> &out_transparent_skinned,
+		const PipelineResources &resources) const;
+
 	void EnableNode_(NodeRef ref, bool through_instance);
 	void DisableNode_(NodeRef ref, bool through_instance);
 
@@ -871,8 +932,51 @@ private:
 
 	void ComputeTransformWorldMatrix(uint32_t idx);
 
+	struct TransformOrderEntry {
+		uint32_t idx, parent_idx; // parent_idx is invalid_idx for root transforms
+	};
+
+	std::vector<TransformOrderEntry> transform_order; // sorted by hierarchy level, a parent always comes before its children
+	std::vector<uint32_t> transform_order_levels; // offset of each hierarchy level in transform_order, terminated by transform_order.size()
+	bool transform_order_dirty{true};
+
+	bool parallel_world_matrices{false};
+	bool parallel_display_lists{false};
+
+	void UpdateTransformOrder();
+
+	static constexpr uint8_t TF_Dirty = 0x1; // local transformation changed since the last world matrix computation
+	static constexpr uint8_t TF_WorldChanged = 0x2; // world matrix changed during the last call to ComputeWorldMatrices
+	static constexpr uint8_t TF_PreviousPending = 0x4; // listed in changed_transform_worlds
+
+	std::vector<uint8_t> transform_flags;
+
+	inline void MarkTransformDirty_(uint32_t idx) {
+		if (idx >= transform_flags.size())
+			transform_flags.resize(idx + 1, uint8_t(TF_Dirty));
+		transform_flags[idx] |= TF_Dirty;
+	}
+
+	// world matrix written outside of ComputeWorldMatrices, it is computed from its local transformation on the next call and stored as previous world matrix
+	inline void MarkTransformWorldWritten_(uint32_t idx) {
+		MarkTransformDirty_(idx);
+		if (!(transform_flags[idx] & TF_PreviousPending)) {
+			transform_flags[idx] |= TF_PreviousPending;
+			changed_transform_worlds.push_back(idx);
+		}
+
+		if (idx >= transform_world_revisions.size())
+			transform_world_revisions.resize(idx + 1, 0);
+		transform_world_revisions[idx] = ++world_matrices_revision;
+	}
+
+	std::vector<uint32_t> changed_transform_worlds; // world matrices changed since the last call to StorePreviousWorldMatrices
+	size_t computed_world_matrix_count{0};
+
+	std::vector<uint32_t> transform_world_revisions; // revision of each world matrix, 0 means never computed
+	uint32_t world_matrices_revision{0}; // incremented by each call to ComputeWorldMatrices and each world matrix written outside of it
+
 	std::vector<Mat4> previous_transform_worlds;
-	std::vector<bool> previous_transform_worlds_updated;
 
 	//
 	generational_vector_list<Anim> anims;
@@ -996,6 +1100,9 @@ Node DuplicateNodeFromAssets(Scene &scene, Node node, PipelineResources &resourc
 std::vector<Node> DuplicateNodeAndChildrenFromFile(Scene &scene, Node node, PipelineResources &resources, const PipelineInfo &pipeline);
 std::vector<Node> DuplicateNodeAndChildrenFromAssets(Scene &scene, Node node, PipelineResources &resources, const PipelineInfo &pipeline);
 
+/// Evict resources over budget, resources used by the scene are never evicted. See EvictResourcesOverBudget().
+size_t EvictResourcesOverBudget(PipelineResources &resources, const Scene &scene);
+
 //
 void DumpSceneMemoryFootprint();
 
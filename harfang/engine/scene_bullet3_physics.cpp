@@ -5,11 +5,14 @@
 #include "engine/render_pipeline.h"
 #include "engine/scene.h"
 
+#include "foundation/cext.h"
 #include "foundation/file_rw_interface.h"
 #include "foundation/format.h"
 #include "foundation/log.h"
+#include "foundation/profiler.h"
 #include "foundation/rw_interface.h"
 #include "foundation/vector3.h"
+#include "foundation/worker_pool.h"
 
 #include <btBulletDynamicsCommon.h>
 
@@ -22,15 +25,27 @@
 
 #include <Serialize/BulletWorldImporter/btBulletWorldImporter.h>
 
+#include <algorithm>
 #include <memory>
+#include <mutex>
+
+// defined by btThreads.cpp but not exposed, flag parallel loops in flight so that Bullet does not nest them
+void btPushThreadsAreRunning();
+void btPopThreadsAreRunning();
 
 namespace hg {
 
+uint32_t SceneBullet3Physics::GetNodeBodyIndex(NodeRef ref) const {
+	if (ref.idx < node_refs.size() && node_refs[ref.idx] == ref)
+		return node_body_idx[ref.idx];
+	return InvalidBodyIndex;
+}
+
 btRigidBody *SceneBullet3Physics::GetNodeBody(NodeRef ref, const char *func) const {
-	const auto i = nodes.find(ref);
+	const auto body_idx = GetNodeBodyIndex(ref);
 
-	if (i != std::end(nodes))
-		return i->second.body;
+	if (body_idx != InvalidBodyIndex)
+		return bodies[body_idx];
 
 	if (func)
 		warn(format("Node physics missing when calling %1 for NodeRef %2:%3").arg(func).arg(ref.gen).arg(ref.idx));
@@ -94,37 +109,124 @@ void Bullet3DebugDraw::clearLines() {
 void Bullet3DebugDraw::flushLines() { DrawLines(context.view_id, *lines, context.program, context.state, context.depth); }
 
 //
-SceneBullet3Physics::SceneBullet3Physics(int threads) {
-#if 1
-	auto collision_cfg = new btDefaultCollisionConfiguration;
+/// Bullet task scheduler running parallel loops on the engine worker pool, the calling thread takes part in the work.
+class Bullet3WorkerPoolTaskScheduler : public btITaskScheduler {
+public:
+	Bullet3WorkerPoolTaskScheduler() : btITaskScheduler("WorkerPool") {}
+
+	/*
+		Bullet sizes some per-thread arrays using getNumThreads when creating a world and indexes them using a thread index
+		handed out once to each thread running Bullet code. Since the worker pool may be restarted with different workers at
+		any time, always report the maximum thread count and restart the thread numbering each time the pool workers are
+		replaced so that indexes stay in [1;worker_count].
+	*/
+	int getMaxNumThreads() const override { return BT_MAX_THREAD_COUNT; }
+	int getNumThreads() const override { return BT_MAX_THREAD_COUNT; }
+	void setNumThreads(int) override {} // see set_worker_count
+
+	void parallelFor(int begin, int end, int grain, const btIParallelForBody &body) override {
+		if (!CanDispatch()) {
+			body.forLoop(begin, end);
+			return;
+		}
 
-	auto dispatcher = new btCollisionDispatcher(collision_cfg);
-	auto broadphase = new btDbvtBroadphase;
+		btPushThreadsAreRunning();
+		parallel_for(end - begin, grain, [&](size_t b, size_t e) { body.forLoop(begin + int(b), begin + int(e)); });
+		btPopThreadsAreRunning();
+	}
+
+	btScalar parallelSum(int begin, int end, int grain, const btIParallelSumBody &body) override {
+		if (!CanDispatch())
+			return body.sumLoop(begin, end);
 
-	auto solver = new btSequentialImpulseConstraintSolver;
+		std::mutex sum_mutex;
+		btScalar sum = 0;
 
-	world.reset(new btDiscreteDynamicsWorld(dispatcher, broadphase, solver, collision_cfg));
-#else
-	btSetTaskScheduler(btCreateDefaultTaskScheduler());
+		btPushThreadsAreRunning();
+		parallel_for(end - begin, grain, [&](size_t b, size_t e) {
+			const auto chunk_sum = body.sumLoop(begin + int(b), begin + int(e));
+			std::lock_guard<std::mutex> lock(sum_mutex);
+			sum += chunk_sum;
+		});
+		btPopThreadsAreRunning();
+
+		return sum;
+	}
 
-	btDefaultCollisionConstructionInfo cci;
-	cci.m_defaultMaxPersistentManifoldPoolSize = 80000;
-	cci.m_defaultMaxCollisionAlgorithmPoolSize = 80000;
-	auto collision_cfg = new btDefaultCollisionConfiguration(cci);
+private:
+	uint32_t thread_index_generation = 0;
 
-	auto dispatcher = new btCollisionDispatcherMt(collision_cfg, 40);
-	auto broadphase = new btDbvtBroadphase;
+	/// Return false if the loop must be run by the calling thread because pool workers could be handed an invalid Bullet thread index.
+	bool CanDispatch() {
+		const auto generation = get_worker_pool_generation();
 
-	btConstraintSolver *solvers[BT_MAX_THREAD_COUNT];
-	for (int i = 0; i < BT_MAX_THREAD_COUNT; ++i)
-		solvers[i] = new btSequentialImpulseConstraintSolver;
+		if (generation != thread_index_generation) {
+			if (!btIsMainThread())
+				return false; // the thread index counter can only be reset from the main thread
 
-	auto solver_pool = new btConstraintSolverPoolMt(solvers, BT_MAX_THREAD_COUNT);
-	auto solver = new btSequentialImpulseConstraintSolverMt;
+			btResetThreadIndexCounter(); // workers of the previous generation have all been joined
+			thread_index_generation = generation;
+		}
+
+		return get_worker_count() < BT_MAX_THREAD_COUNT;
+	}
+};
+
+static bool SetBullet3WorkerPoolTaskScheduler() {
+	static Bullet3WorkerPoolTaskScheduler scheduler;
+
+	if (btGetTaskScheduler() != &scheduler)
+		btSetTaskScheduler(&scheduler); // fails if not called from the thread which first used Bullet
+
+	return btGetTaskScheduler() == &scheduler;
+}
 
-	world.reset(new btDiscreteDynamicsWorldMt(dispatcher, broadphase, solver_pool, solver, collision_cfg));
+SceneBullet3Physics::SceneBullet3Physics(int thread_count) {
+	bool multithreaded = thread_count > 1;
+
+#if !BT_THREADSAFE
+	if (multithreaded) {
+		warn("Bullet3 was built without BT_THREADSAFE, SceneBullet3Physics will use a single thread");
+		multithreaded = false;
+	}
 #endif
 
+	if (multithreaded && !SetBullet3WorkerPoolTaskScheduler()) {
+		warn("Failed to set Bullet3 task scheduler, SceneBullet3Physics must be created from the main thread to use multiple threads");
+		multithreaded = false;
+	}
+
+	if (multithreaded) {
+		btDefaultCollisionConstructionInfo cci;
+		cci.m_defaultMaxPersistentManifoldPoolSize = 80000;
+		cci.m_defaultMaxCollisionAlgorithmPoolSize = 80000;
+		auto collision_cfg = new btDefaultCollisionConfiguration(cci);
+
+		auto dispatcher = new btCollisionDispatcherMt(collision_cfg, 40);
+		auto broadphase = new btDbvtBroadphase;
+
+		// islands are solved in parallel, each using a solver from the pool
+		const auto solver_count = Min(thread_count, int(BT_MAX_THREAD_COUNT));
+
+		btConstraintSolver *solvers[BT_MAX_THREAD_COUNT];
+		for (int i = 0; i < solver_count; ++i)
+			solvers[i] = new btSequentialImpulseConstraintSolver;
+
+		auto solver_pool = new btConstraintSolverPoolMt(solvers, solver_count);
+		auto solver = new btSequentialImpulseConstraintSolverMt; // used for islands too large to be solved by a single thread
+
+		world.reset(new btDiscreteDynamicsWorldMt(dispatcher, broadphase, solver_pool, solver, collision_cfg));
+	} else {
+		auto collision_cfg = new btDefaultCollisionConfiguration;
+
+		auto dispatcher = new btCollisionDispatcher(collision_cfg);
+		auto broadphase = new btDbvtBroadphase;
+
+		auto solver = new btSequentialImpulseConstraintSolver;
+
+		world.reset(new btDiscreteDynamicsWorld(dispatcher, broadphase, solver, collision_cfg));
+	}
+
 	world->setGravity(btVector3(0.f, -9.81f, 0.f));
 
 	auto debug_draw = new Bullet3DebugDraw;
@@ -132,6 +234,9 @@ SceneBullet3Physics::SceneBullet3Physics(int threads) {
 							 btIDebugDraw::DBG_DrawConstraintLimits | btIDebugDraw::DBG_DrawFeaturesText);
 	world->setDebugDrawer(debug_draw);
 
+	world->setInternalTickCallback(OnPreTick, this, true);
+	world->setInternalTickCallback(OnPostTick, this, false);
+
 	pre_tick_callback = nullptr;
 }
 
@@ -231,12 +336,11 @@ void SceneBullet3Physics::NodeCreatePhysics(const Node &node, const Reader &ir,
 	if (!rb)
 		return; // no rigid body component
 
-	auto &_node = nodes[node.ref];
-
-	if (_node.body) {
-		world->removeRigidBody(_node.body);
-		__DeleteRigidBody(_node.body);
-		_node.body = nullptr;
+	if (node.ref.idx < node_refs.size() && node_refs[node.ref.idx] != InvalidNodeRef) { // body of this node or stale body of a destroyed node
+		const auto body_idx = node_body_idx[node.ref.idx];
+		world->removeRigidBody(bodies[body_idx]);
+		__DeleteRigidBody(bodies[body_idx]);
+		RemoveBody(body_idx);
 	}
 
 	if (!node.GetCollisionCount())
@@ -301,24 +405,25 @@ void SceneBullet3Physics::NodeCreatePhysics(const Node &node, const Reader &ir,
 		rb_info.m_linearDamping = rb.GetLinearDamping();
 		rb_info.m_angularDamping = rb.GetAngularDamping();
 
-		_node.body = new btRigidBody(rb_info);
+		auto body = new btRigidBody(rb_info);
 
-		_node.body->setCollisionShape(root_shape);
-		_node.body->setUserIndex(node.ref.idx); // ref back to node
+		body->setCollisionShape(root_shape);
+		body->setUserIndex(node.ref.idx); // ref back to node
 
 		// configure
 		const auto type = rb.GetType();
-		const auto flags = _node.body->getCollisionFlags();
+		const auto flags = body->getCollisionFlags();
 
 		if (type == RBT_Dynamic)
-			_node.body->setCollisionFlags(flags & ~(btRigidBody::CF_KINEMATIC_OBJECT | btCollisionObject::CF_STATIC_OBJECT));
+			body->setCollisionFlags(flags & ~(btRigidBody::CF_KINEMATIC_OBJECT | btCollisionObject::CF_STATIC_OBJECT));
 		else if (type == RBT_Kinematic)
-			_node.body->setCollisionFlags((flags | btRigidBody::CF_KINEMATIC_OBJECT) & ~btCollisionObject::CF_STATIC_OBJECT);
+			body->setCollisionFlags((flags | btRigidBody::CF_KINEMATIC_OBJECT) & ~btCollisionObject::CF_STATIC_OBJECT);
 		else
-			_node.body->setCollisionFlags((flags & ~btRigidBody::CF_KINEMATIC_OBJECT) | btCollisionObject::CF_STATIC_OBJECT);
+			body->setCollisionFlags((flags & ~btRigidBody::CF_KINEMATIC_OBJECT) | btCollisionObject::CF_STATIC_OBJECT);
 
 		// add to world
-		world->addRigidBody(_node.body);
+		world->addRigidBody(body);
+		AddBody(node.ref, body);
 	}
 }
 
@@ -326,25 +431,66 @@ void SceneBullet3Physics::NodeCreatePhysicsFromFile(const Node &node) { NodeCrea
 void SceneBullet3Physics::NodeCreatePhysicsFromAssets(const Node &node) { NodeCreatePhysics(node, g_assets_reader, g_assets_read_provider); }
 
 //
+void SceneBullet3Physics::AddBody(NodeRef ref, btRigidBody *body) {
+	if (ref.idx >= node_refs.size()) {
+		node_refs.resize(ref.idx + 1, InvalidNodeRef);
+		node_body_idx.resize(ref.idx + 1);
+	}
+
+	node_refs[ref.idx] = ref;
+	node_body_idx[ref.idx] = numeric_cast<uint32_t>(bodies.size());
+
+	body_node_refs.push_back(ref);
+	bodies.push_back(body);
+	prv_world_mtx.push_back(Mat4::Identity);
+	prv_world_mtx_valid.push_back(0);
+}
+
+void SceneBullet3Physics::RemoveBody(uint32_t body_idx) {
+	const auto last_idx = bodies.size() - 1;
+
+	node_refs[body_node_refs[body_idx].idx] = InvalidNodeRef;
+
+	if (body_idx != last_idx) {
+		body_node_refs[body_idx] = body_node_refs[last_idx];
+		bodies[body_idx] = bodies[last_idx];
+		prv_world_mtx[body_idx] = prv_world_mtx[last_idx];
+		prv_world_mtx_valid[body_idx] = prv_world_mtx_valid[last_idx];
+
+		node_body_idx[body_node_refs[body_idx].idx] = body_idx;
+	}
+
+	body_node_refs.pop_back();
+	bodies.pop_back();
+	prv_world_mtx.pop_back();
+	prv_world_mtx_valid.pop_back();
+}
+
 void SceneBullet3Physics::NodeDestroyPhysics(const Node &node) {
-	auto i = nodes.find(node.ref);
+	const auto body_idx = GetNodeBodyIndex(node.ref);
 
-	if (i != std::end(nodes)) {
-		world->removeRigidBody(i->second.body);
-		__DeleteRigidBody(i->second.body);
-		nodes.erase(i);
+	if (body_idx != InvalidBodyIndex) {
+		world->removeRigidBody(bodies[body_idx]);
+		__DeleteRigidBody(bodies[body_idx]);
+		RemoveBody(body_idx);
 	}
 }
 
 //
 void SceneBullet3Physics::ClearNodes() {
-	for (auto i : nodes) // EJ maximize code cache hit by first removing all then deleting all
-		world->removeRigidBody(i.second.body);
+	for (auto body : bodies) // EJ maximize code cache hit by first removing all then deleting all
+		world->removeRigidBody(body);
+
+	for (auto body : bodies)
+		__DeleteRigidBody(body);
 
-	for (auto i : nodes)
-		__DeleteRigidBody(i.second.body);
+	node_refs.clear();
+	node_body_idx.clear();
 
-	nodes.clear();
+	body_node_refs.clear();
+	bodies.clear();
+	prv_world_mtx.clear();
+	prv_world_mtx_valid.clear();
 }
 
 void SceneBullet3Physics::Clear() {
@@ -359,15 +505,13 @@ void SceneBullet3Physics::Clear() {
 //
 size_t SceneBullet3Physics::GarbageCollect(const Scene &scene) {
 	size_t erased = 0;
-	for (auto i = std::begin(nodes); i != std::end(nodes);)
-		if (!scene.IsValidNodeRef(i->first)) {
-			world->removeRigidBody(i->second.body);
-			__DeleteRigidBody(i->second.body);
-			i = nodes.erase(i);
+	for (auto i = bodies.size(); i-- > 0;) // backward so that the body moved in place of an erased one has already been tested
+		if (!scene.IsValidNodeRef(body_node_refs[i])) {
+			world->removeRigidBody(bodies[i]);
+			__DeleteRigidBody(bodies[i]);
+			RemoveBody(numeric_cast<uint32_t>(i));
 
 			++erased;
-		} else {
-			++i;
 		}
 	return erased;
 }
@@ -379,18 +523,28 @@ size_t SceneBullet3Physics::GarbageCollectResources() {
 
 //
 void SceneBullet3Physics::StepSimulation(time_ns dt, time_ns step, int max_step) {
+	static const auto profiler_task = GetProfilerTaskId("SceneBullet3Physics::StepSimulation");
+	ProfilerPerfSection section(profiler_task);
+
 	// store current matrices to use as previous matrices should a physics sub-step be taken
-	std::map<NodeRef, Mat4> prv_mtx;
+	const auto body_count = bodies.size();
 
-	for (const auto &i : nodes) {
-		const auto body = i.second.body;
-		if (body->getCollisionFlags() == btRigidBody::CF_DYNAMIC_OBJECT)
-			prv_mtx[i.first] = from_btTransform(body->getWorldTransform());
+	cur_world_mtx.resize(body_count);
+	cur_world_mtx_valid.resize(body_count);
+
+	for (size_t i = 0; i < body_count; ++i) {
+		const auto body = bodies[i];
+		cur_world_mtx_valid[i] = body->getCollisionFlags() == btRigidBody::CF_DYNAMIC_OBJECT ? 1 : 0;
+		if (cur_world_mtx_valid[i])
+			cur_world_mtx[i] = from_btTransform(body->getWorldTransform());
 	}
 
-	// remove previous matrix for teleported nodes ([EJ] two step to avoid n2 queries)
-	for (auto ref : was_teleported)
-		prv_mtx.erase(ref);
+	// remove previous matrix for teleported nodes
+	for (auto ref : was_teleported) {
+		const auto body_idx = GetNodeBodyIndex(ref);
+		if (body_idx != InvalidBodyIndex)
+			cur_world_mtx_valid[body_idx] = 0;
+	}
 
 	was_teleported.clear();
 
@@ -398,8 +552,10 @@ void SceneBullet3Physics::StepSimulation(time_ns dt, time_ns step, int max_step)
 	const auto substep_count = world->stepSimulation(time_to_sec_f(dt), max_step, time_to_sec_f(step));
 
 	// if substep was taken commit to prv_world_mtx
-	if (substep_count > 0)
-		prv_world_mtx = std::move(prv_mtx); // [EJ] would be much better to know beforehand that substep count will be >0 and work on prv_world_mtx directly
+	if (substep_count > 0) {
+		std::swap(prv_world_mtx, cur_world_mtx);
+		std::swap(prv_world_mtx_valid, cur_world_mtx_valid);
+	}
 
 	//
 	physics_motion_clock += dt - substep_count * step;
@@ -408,8 +564,11 @@ void SceneBullet3Physics::StepSimulation(time_ns dt, time_ns step, int max_step)
 
 //
 void SceneBullet3Physics::SyncTransformsFromScene(const Scene &scene) {
-	for (const auto &i : nodes) {
-		const auto body = i.second.body;
+	static const auto profiler_task = GetProfilerTaskId("SceneBullet3Physics::SyncTransformsFromScene");
+	ProfilerCategorySection section(PC_Physics, profiler_task);
+
+	for (size_t i = 0; i < bodies.size(); ++i) {
+		const auto body = bodies[i];
 		const auto flags = body->getCollisionFlags();
 
 		if (flags == btRigidBody::CF_KINEMATIC_OBJECT) {
@@ -420,41 +579,55 @@ void SceneBullet3Physics::SyncTransformsFromScene(const Scene &scene) {
 				We count on the fact that kinematic objects are a minority in the scene graph for
 				this change to not impact performances too much.
 			*/
-			const auto world_no_scale = Normalize(scene.ComputeNodeWorldMatrix(i.first));
+			const auto world_no_scale = Normalize(scene.ComputeNodeWorldMatrix(body_node_refs[i]));
 			body->setWorldTransform(to_btTransform(world_no_scale));
 		}
 	}
 }
 
 void SceneBullet3Physics::SyncTransformsToScene(Scene &scene) {
+	static const auto profiler_task = GetProfilerTaskId("SceneBullet3Physics::SyncTransformsToScene");
+	ProfilerCategorySection section(PC_Physics, profiler_task);
+
 	Mat4 world;
 
-	for (const auto &i : nodes) {
-		const auto body = i.second.body;
+	for (size_t i = 0; i < bodies.size(); ++i) {
+		const auto body = bodies[i];
 		const auto flags = body->getCollisionFlags();
 
 		if (flags == btRigidBody::CF_DYNAMIC_OBJECT) {
-			const auto j = prv_world_mtx.find(i.first);
-
-			if (j != std::end(prv_world_mtx)) {
-				const auto prv_world = j->second;
+			if (prv_world_mtx_valid[i]) {
 				const auto cur_world = from_btTransform(body->getWorldTransform());
-
-				world = LerpAsOrthonormalBase(prv_world, cur_world, physics_motion_k);
+				world = LerpAsOrthonormalBase(prv_world_mtx[i], cur_world, physics_motion_k);
 			} else {
 				world = from_btTransform(body->getWorldTransform());
 			}
 
-			scene.SetNodeWorldMatrix(i.first, world); // EJ20222101 do not use Transform.SetWorld which is much slower
+			scene.SetNodeWorldMatrix(body_node_refs[i], world); // EJ20222101 do not use Transform.SetWorld which is much slower
 		}
 	}
 }
 
 //
-void SceneBullet3Physics::NodeStartTrackingCollisionEvents(NodeRef ref, CollisionEventTrackingMode mode) { node_collision_event_tracking_modes[ref] = mode; }
-void SceneBullet3Physics::NodeStopTrackingCollisionEvents(NodeRef ref) { node_collision_event_tracking_modes.erase(ref); }
+void SceneBullet3Physics::NodeStartTrackingCollisionEvents(NodeRef ref, CollisionEventTrackingMode mode) {
+	if (ref.idx >= node_collision_event_tracking_refs.size()) {
+		node_collision_event_tracking_refs.resize(ref.idx + 1, InvalidNodeRef);
+		node_collision_event_tracking_modes.resize(ref.idx + 1, CETM_EventOnly);
+	}
+
+	node_collision_event_tracking_refs[ref.idx] = ref;
+	node_collision_event_tracking_modes[ref.idx] = mode;
+}
+
+void SceneBullet3Physics::NodeStopTrackingCollisionEvents(NodeRef ref) {
+	if (ref.idx < node_collision_event_tracking_refs.size() && node_collision_event_tracking_refs[ref.idx] == ref)
+		node_collision_event_tracking_refs[ref.idx] = InvalidNodeRef;
+}
 
 void SceneBullet3Physics::CollectCollisionEvents(const Scene &scene, NodePairContacts &node_node_contacts) {
+	static const auto profiler_task = GetProfilerTaskId("SceneBullet3Physics::CollectCollisionEvents");
+	ProfilerCategorySection section(PC_Physics, profiler_task);
+
 	node_node_contacts.clear();
 
 	const int manifold_count = world->getDispatcher()->getNumManifolds();
@@ -478,8 +651,7 @@ void SceneBullet3Physics::CollectCollisionEvents(const Scene &scene, NodePairCon
 			continue;
 
 		{
-			auto i = node_collision_event_tracking_modes.find(node_a_ref);
-			if (i != std::end(node_collision_event_tracking_modes)) {
+			if (IsTrackingCollisionEvents(node_a_ref)) {
 				auto &contacts = node_node_contacts[node_a_ref][node_b_ref];
 				contacts.reserve(manifold_contact_count);
 
@@ -492,6 +664,94 @@ void SceneBullet3Physics::CollectCollisionEvents(const Scene &scene, NodePairCon
 	}
 }
 
+void SceneBullet3Physics::CollectCollisionEvents(const Scene &scene, CollisionEvents &events) {
+	static const auto profiler_task = GetProfilerTaskId("SceneBullet3Physics::CollectCollisionEvents");
+	ProfilerCategorySection section(PC_Physics, profiler_task);
+
+	events.events.clear();
+	events.contacts.clear();
+
+	// gather the manifolds involving a tracked node
+	tracked_manifolds.clear();
+
+	const int manifold_count = world->getDispatcher()->getNumManifolds();
+	const auto manifolds = world->getDispatcher()->getInternalManifoldPointer();
+
+	for (int n = 0; n < manifold_count; ++n) {
+		const auto manifold = manifolds[n];
+		if (!manifold || !manifold->getNumContacts())
+			continue;
+
+		const auto node_a_ref = scene.GetNodeRef(manifold->getBody0()->getUserIndex());
+		const auto node_b_ref = scene.GetNodeRef(manifold->getBody1()->getUserIndex());
+		if (!scene.IsValidNodeRef(node_a_ref) || !scene.IsValidNodeRef(node_b_ref))
+			continue;
+
+		if (IsTrackingCollisionEvents(node_a_ref))
+			tracked_manifolds.push_back({node_a_ref, node_b_ref, n, false});
+		if (IsTrackingCollisionEvents(node_b_ref))
+			tracked_manifolds.push_back({node_b_ref, node_a_ref, n, true});
+	}
+
+	// compound shapes may produce several manifolds for a single pair of nodes, group them by pair
+	std::sort(std::begin(tracked_manifolds), std::end(tracked_manifolds), [](const TrackedManifold &a, const TrackedManifold &b) {
+		if (a.a != b.a)
+			return a.a < b.a;
+		if (a.b != b.b)
+			return a.b < b.b;
+		return a.manifold < b.manifold;
+	});
+
+	// emit one event per pair, pairs missing from the previous collection begin and pairs missing from the current collection end
+	collision_pairs.clear();
+
+	auto prv_pair = std::begin(prv_collision_pairs);
+
+	const auto emit_ended_pairs_before = [&](const std::pair<NodeRef, NodeRef> *pair) {
+		for (; prv_pair != std::end(prv_collision_pairs) && (!pair || *prv_pair < *pair); ++prv_pair)
+			events.events.push_back({int(prv_pair->first.idx), int(prv_pair->second.idx), numeric_cast<uint32_t>(events.contacts.size()), 0, CET_End});
+	};
+
+	for (size_t i = 0; i < tracked_manifolds.size();) {
+		const auto pair = std::make_pair(tracked_manifolds[i].a, tracked_manifolds[i].b);
+
+		emit_ended_pairs_before(&pair);
+
+		CollisionEventType type = CET_Begin;
+		if (prv_pair != std::end(prv_collision_pairs) && *prv_pair == pair) {
+			type = CET_Persist;
+			++prv_pair;
+		}
+
+		const auto contact_first = events.contacts.size();
+		const bool with_contacts = node_collision_event_tracking_modes[pair.first.idx] == CETM_EventAndContacts;
+
+		for (; i < tracked_manifolds.size() && tracked_manifolds[i].a == pair.first && tracked_manifolds[i].b == pair.second; ++i) {
+			if (!with_contacts)
+				continue;
+
+			const auto manifold = manifolds[tracked_manifolds[i].manifold];
+			const auto swapped = tracked_manifolds[i].swapped;
+
+			for (int j = 0; j < manifold->getNumContacts(); ++j) {
+				const auto &contact = manifold->getContactPoint(j);
+				events.contacts.push_back({int(pair.first.idx), int(pair.second.idx),
+					from_btVector3(swapped ? contact.m_positionWorldOnA : contact.m_positionWorldOnB),
+					from_btVector3(swapped ? -contact.m_normalWorldOnB : contact.m_normalWorldOnB), contact.getDistance()});
+			}
+		}
+
+		events.events.push_back({int(pair.first.idx), int(pair.second.idx), numeric_cast<uint32_t>(contact_first),
+			numeric_cast<uint32_t>(events.contacts.size() - contact_first), type});
+
+		collision_pairs.push_back(pair);
+	}
+
+	emit_ended_pairs_before(nullptr);
+
+	std::swap(collision_pairs, prv_collision_pairs);
+}
+
 //
 void SceneBullet3Physics::NodeWake(NodeRef ref) const {
 	if (auto body = GetNodeBody(ref, __func__))
@@ -773,6 +1033,99 @@ std::vector<RaycastOut> SceneBullet3Physics::RaycastAllHits(const Scene &scene,
 	return outs;
 }
 
+//
+struct BatchRayCallback : btBroadphaseRayCallback { // same as btCollisionWorld::rayTest broadphase callback
+	BatchRayCallback(const btVector3 &from, const btVector3 &to, btCollisionWorld::RayResultCallback &result_) : result(result_) {
+		from_trs.setIdentity();
+		from_trs.setOrigin(from);
+		to_trs.setIdentity();
+		to_trs.setOrigin(to);
+
+		const auto dir = (to - from).normalized();
+
+		for (int i = 0; i < 3; ++i) {
+			m_rayDirectionInverse[i] = dir[i] == btScalar(0) ? btScalar(BT_LARGE_FLOAT) : btScalar(1) / dir[i];
+			m_signs[i] = m_rayDirectionInverse[i] < 0.0;
+		}
+
+		m_lambda_max = dir.dot(to - from);
+	}
+
+	bool process(const btBroadphaseProxy *proxy) override {
+		if (result.m_closestHitFraction == btScalar(0))
+			return false;
+
+		auto object = static_cast<btCollisionObject *>(proxy->m_clientObject);
+		if (result.needsCollision(object->getBroadphaseHandle()))
+			btCollisionWorld::rayTestSingle(from_trs, to_trs, object, object->getCollisionShape(), object->getWorldTransform(), result);
+		return true;
+	}
+
+	btTransform from_trs, to_trs;
+	btCollisionWorld::RayResultCallback &result;
+};
+
+struct BatchRayLeafCollide : btDbvt::ICollide {
+	explicit BatchRayLeafCollide(BatchRayCallback &ray_) : ray(ray_) {}
+	void Process(const btDbvtNode *leaf) override { ray.process(static_cast<const btBroadphaseProxy *>(leaf->data)); }
+	BatchRayCallback &ray;
+};
+
+void SceneBullet3Physics::RaycastBatch(const Scene &scene, const Vec3 *world_p0, const Vec3 *world_p1, size_t count, RaycastBatchOut &out) const {
+	out.P.resize(count);
+	out.N.resize(count);
+	out.t.resize(count);
+	out.node_idx.resize(count);
+
+	// btDbvtBroadphase::rayTest allocates a traversal stack for each ray when built with BT_THREADSAFE (and shares a single one otherwise),
+	// traverse its trees with a stack per worker reused across rays instead
+	const auto broadphase = static_cast<const btDbvtBroadphase *>(world->getBroadphase());
+
+	parallel_for(count, 64, [&](size_t begin, size_t end) {
+		btAlignedObjectArray<const btDbvtNode *> stack;
+		const btVector3 aabb_min(0, 0, 0), aabb_max(0, 0, 0);
+
+		for (size_t i = begin; i < end; ++i) {
+			const auto from = to_btVector3(world_p0[i]), to = to_btVector3(world_p1[i]);
+
+			btCollisionWorld::ClosestRayResultCallback trace(from, to);
+			trace.m_collisionFilterGroup = btBroadphaseProxy::AllFilter;
+			trace.m_collisionFilterMask = ~0; // FIXME
+
+			BatchRayCallback ray(from, to, trace);
+			BatchRayLeafCollide collide(ray);
+
+			for (const auto &set : broadphase->m_sets)
+				set.rayTestInternal(set.m_root, from, to, ray.m_rayDirectionInverse, ray.m_signs, ray.m_lambda_max, aabb_min, aabb_max, stack, collide);
+
+			const auto node_ref = trace.hasHit() ? scene.GetNodeRef(trace.m_collisionObject->getUserIndex()) : InvalidNodeRef;
+
+			if (node_ref != InvalidNodeRef) {
+				out.P[i] = from_btVector3(trace.m_hitPointWorld);
+				out.N[i] = from_btVector3(trace.m_hitNormalWorld);
+				out.t[i] = Dot(out.P[i] - world_p0[i], Normalize(world_p1[i] - world_p0[i]));
+				out.node_idx[i] = int(node_ref.idx);
+			} else {
+				out.P[i] = out.N[i] = Vec3::Zero;
+				out.t[i] = std::numeric_limits<float>::max();
+				out.node_idx[i] = -1;
+			}
+		}
+	});
+}
+
+RaycastBatchOut SceneBullet3Physics::RaycastBatch(const Scene &scene, const std::vector<Vec3> &world_p0, const std::vector<Vec3> &world_p1) const {
+	RaycastBatchOut out;
+
+	if (world_p0.size() != world_p1.size()) {
+		warn(format("RaycastBatch called with %1 ray starts and %2 ray ends, no ray cast").arg(world_p0.size()).arg(world_p1.size()));
+		return out;
+	}
+
+	RaycastBatch(scene, world_p0.data(), world_p1.data(), world_p0.size(), out);
+	return out;
+}
+
 //
 struct DeserializeHandle {
 	Reader ir;
@@ -852,16 +1205,18 @@ void SceneBullet3Physics::TriggerPreTickCallback(hg::time_ns dt) {
 	}
 }
 
-void PreTickCallbackImpl(btDynamicsWorld *world, btScalar timeStep) {
-	SceneBullet3Physics *phys = reinterpret_cast<SceneBullet3Physics *>(world->getWorldUserInfo());
-	if (phys) {
-		phys->TriggerPreTickCallback(hg::time_from_sec_f(timeStep));
-	}
+void SceneBullet3Physics::OnPreTick(btDynamicsWorld *world, float dt) {
+	auto phys = reinterpret_cast<SceneBullet3Physics *>(world->getWorldUserInfo());
+	static const auto profiler_task = GetProfilerTaskId("SceneBullet3Physics::Substep");
+	phys->substep_section_index = BeginProfilerSection(profiler_task);
+	phys->TriggerPreTickCallback(hg::time_from_sec_f(dt));
 }
 
-void SceneBullet3Physics::SetPreTickCallback(const std::function<void(SceneBullet3Physics &, hg::time_ns t)> &cbk) { 
-	pre_tick_callback = cbk; 
-	world->setInternalTickCallback(hg::PreTickCallbackImpl, this, true);
+void SceneBullet3Physics::OnPostTick(btDynamicsWorld *world, float dt) {
+	auto phys = reinterpret_cast<SceneBullet3Physics *>(world->getWorldUserInfo());
+	EndProfilerSection(phys->substep_section_index);
 }
 
+void SceneBullet3Physics::SetPreTickCallback(const std::function<void(SceneBullet3Physics &, hg::time_ns t)> &cbk) { pre_tick_callback = cbk; }
+
 } // namespace hg
@@ -4,6 +4,8 @@
 
 #include "engine/physics.h"
 
+#include "foundation/profiler.h"
+
 #include <array>
 #include <limits>
 #include <memory>
@@ -18,16 +20,11 @@ namespace hg {
 
 class Scene;
 
-//
-struct Bullet3Node {
-	btRigidBody *body{nullptr};
-	Vec3 scl{Vec3::One};
-	Mat4 ref_mtx{Mat4::Identity};
-};
-
 //
 class SceneBullet3Physics {
 public:
+	/// Create a physics world, a thread_count greater than 1 selects a multithreaded world solving simulation islands in parallel on the worker pool (see set_worker_count).
+	/// Multithreaded worlds must be created from the main thread.
 	SceneBullet3Physics(int thread_count = 1);
 	~SceneBullet3Physics();
 
@@ -50,13 +47,16 @@ public:
 
 	void NodeDestroyPhysics(const Node &node);
 
-	bool NodeHasBody(NodeRef ref) const { return nodes.find(ref) != std::end(nodes); }
+	bool NodeHasBody(NodeRef ref) const { return GetNodeBodyIndex(ref) != InvalidBodyIndex; }
 	bool NodeHasBody(const Node &node) const { return NodeHasBody(node.ref); }
 
 	/// Step physics world
 	void StepSimulation(time_ns dt, time_ns step = time_from_ms(16), int max_step = 8);
 
 	void CollectCollisionEvents(const Scene &scene, NodePairContacts &contacts);
+	/// Collect the collision events of all tracked nodes to flat buffers, classifying each colliding pair as beginning, persisting or ending since the previous call.
+	/// Contacts are only reported for nodes tracked using CETM_EventAndContacts. Call once per step, classification is relative to the previous call.
+	void CollectCollisionEvents(const Scene &scene, CollisionEvents &events);
 
 	void SyncTransformsFromScene(const Scene &scene);
 	void SyncTransformsToScene(Scene &scene);
@@ -138,6 +138,12 @@ public:
 	RaycastOut RaycastFirstHit(const Scene &scene, const Vec3 &world_p0, const Vec3 &world_p1) const;
 	std::vector<RaycastOut> RaycastAllHits(const Scene &scene, const Vec3 &world_p0, const Vec3 &world_p1) const;
 
+	/// Cast a batch of rays from world_p0[i] to world_p1[i] and report the closest hit of each, rays are dispatched to the worker pool.
+	/// The world must not be modified while the batch is running.
+	void RaycastBatch(const Scene &scene, const Vec3 *world_p0, const Vec3 *world_p1, size_t count, RaycastBatchOut &out) const;
+	/// Both lists must hold the same number of points, no ray is cast otherwise.
+	RaycastBatchOut RaycastBatch(const Scene &scene, const std::vector<Vec3> &world_p0, const std::vector<Vec3> &world_p1) const;
+
 	//
 	void RenderCollision(bgfx::ViewId view_id, const bgfx::VertexLayout &vtx_decl, bgfx::ProgramHandle program, RenderState state, uint32_t depth);
 
@@ -148,20 +154,57 @@ public:
  private:
 	std::unique_ptr<btDiscreteDynamicsWorld> world;
 
-	std::map<NodeRef, Bullet3Node> nodes;
+	static const uint32_t InvalidBodyIndex = 0xffffffff;
+
+	// indexed by NodeRef index, node_refs[idx] is checked against the full reference to reject stale slots
+	std::vector<NodeRef> node_refs;
+	std::vector<uint32_t> node_body_idx; // index of the node body in the dense body arrays
+
+	// dense body arrays, a body is removed by moving the last body in its place
+	std::vector<NodeRef> body_node_refs;
+	std::vector<btRigidBody *> bodies;
+	std::vector<Mat4> prv_world_mtx; // world matrix before the last physics sub-step, used for motion interpolation
+	std::vector<uint8_t> prv_world_mtx_valid;
+
+	std::vector<Mat4> cur_world_mtx; // scratch buffers used by StepSimulation
+	std::vector<uint8_t> cur_world_mtx_valid;
+
 	std::map<std::string, btCollisionShape *> collision_trees;
 
+	uint32_t GetNodeBodyIndex(NodeRef ref) const;
 	btRigidBody *GetNodeBody(NodeRef ref, const char *func) const;
 
-	std::map<NodeRef, CollisionEventTrackingMode> node_collision_event_tracking_modes;
+	void AddBody(NodeRef ref, btRigidBody *body);
+	void RemoveBody(uint32_t body_idx);
+
+	// indexed by NodeRef index, a node is tracked if node_collision_event_tracking_refs[idx] matches its reference
+	std::vector<NodeRef> node_collision_event_tracking_refs;
+	std::vector<CollisionEventTrackingMode> node_collision_event_tracking_modes;
+
+	bool IsTrackingCollisionEvents(NodeRef ref) const {
+		return ref.idx < node_collision_event_tracking_refs.size() && node_collision_event_tracking_refs[ref.idx] == ref;
+	}
+
+	struct TrackedManifold {
+		NodeRef a, b; // tracked node, other node
+		int manifold;
+		bool swapped; // tracked node is the second body of the manifold
+	};
+
+	std::vector<TrackedManifold> tracked_manifolds; // scratch buffer used by CollectCollisionEvents
+	std::vector<std::pair<NodeRef, NodeRef>> collision_pairs, prv_collision_pairs; // sorted node pairs in contact during the current and previous collection
 
 	time_ns physics_motion_clock = 0;
 	float physics_motion_k = 0.f; // motion interpolation coefficient
 
-	std::map<NodeRef, Mat4> prv_world_mtx; // [EJ] this will probably quickly become a bottleneck and just be replaced by a faster structure
 	std::vector<NodeRef> was_teleported;
 
 	std::function<void(SceneBullet3Physics&, hg::time_ns t)> pre_tick_callback;
+
+	ProfilerSectionIndex substep_section_index{0};
+
+	static void OnPreTick(btDynamicsWorld *world, float dt);
+	static void OnPostTick(btDynamicsWorld *world, float dt);
 };
 
 } // namespace hg
@@ -7,7 +7,9 @@
 #include "foundation/file_rw_interface.h"
 #include "foundation/format.h"
 #include "foundation/log.h"
+#include "foundation/profiler.h"
 #include "foundation/projection.h"
+#include "foundation/worker_pool.h"
 
 #include "fabgen.h"
 
@@ -435,67 +437,63 @@ void GetSceneForwardPipelineLights(const Scene &scene, std::vector<ForwardPipeli
 }
 
 //
-std::vector<uint32_t> ComputeModelDisplayListSortKeys(
-	const Scene &scene, const ViewState &view_state, const std::vector<ModelDisplayList> &dls, const PipelineResources &res) {
-	std::vector<uint32_t> sort_keys;
-	sort_keys.reserve(dls.size());
-
-	const auto &mtxs = scene.GetTransformWorldMatrices();
-
-	for (const auto &dl : dls) {
-		const auto &mdl_mtx = mtxs[dl.mtx_idx]; // model matrix
-		const auto &mdl_view_mtx = view_state.view * mdl_mtx; // TODO cache based on dl.mtx_idx
-		const auto &mdl = res.models.Get_unsafe_(dl.mdl_idx);
+static uint32_t ComputeModelDisplayListSortKey(const ModelDisplayList &dl, const Mat4 &view, const std::vector<Mat4> &mtxs, const PipelineResources &res) {
+	const auto &mdl_mtx = mtxs[dl.mtx_idx]; // model matrix
+	const auto &mdl_view_mtx = view * mdl_mtx; // TODO cache based on dl.mtx_idx
+	const auto &mdl = res.models.Get_unsafe_(dl.mdl_idx);
 
 #if 0
-		const auto &dl_center = GetCenter(mdl.bounds[dl.lst_idx]); // display list bounding volume center
-		const auto &dl_center_in_view = dl_center * mdl_view_mtx;
-		sort_keys.push_back(uint32_t(dl_center_in_view.z * 1000.f)); // sort to mm precision
+	const auto &dl_center = GetCenter(mdl.bounds[dl.lst_idx]); // display list bounding volume center
+	const auto &dl_center_in_view = dl_center * mdl_view_mtx;
+	return uint32_t(dl_center_in_view.z * 1000.f); // sort to mm precision
 #else
-		const auto &bound = mdl.bounds[dl.lst_idx];
-
-		const Vec3 vtx[8] = {
-			{bound.mn.x, bound.mn.y, bound.mn.z},
-			{bound.mx.x, bound.mn.y, bound.mn.z},
-			{bound.mx.x, bound.mx.y, bound.mn.z},
-			{bound.mn.x, bound.mx.y, bound.mn.z},
-			{bound.mn.x, bound.mn.y, bound.mx.z},
-			{bound.mx.x, bound.mn.y, bound.mx.z},
-			{bound.mx.x, bound.mx.y, bound.mx.z},
-			{bound.mn.x, bound.mx.y, bound.mx.z},
-		};
-
-		float closest = std::numeric_limits<float>::max();
-
-		for (auto &v : vtx) {
-			const auto &in_view = mdl_view_mtx * v;
-			if (in_view.z < closest)
-				closest = in_view.z;
-		}
+	const auto &bound = mdl.bounds[dl.lst_idx];
 
-		if (closest < 0.f)
-			closest = 0.f;
+	const Vec3 vtx[8] = {
+		{bound.mn.x, bound.mn.y, bound.mn.z},
+		{bound.mx.x, bound.mn.y, bound.mn.z},
+		{bound.mx.x, bound.mx.y, bound.mn.z},
+		{bound.mn.x, bound.mx.y, bound.mn.z},
+		{bound.mn.x, bound.mn.y, bound.mx.z},
+		{bound.mx.x, bound.mn.y, bound.mx.z},
+		{bound.mx.x, bound.mx.y, bound.mx.z},
+		{bound.mn.x, bound.mx.y, bound.mx.z},
+	};
 
-		sort_keys.push_back(ComputeSortKey(closest)); // sort to mm precision
-#endif
+	float closest = std::numeric_limits<float>::max();
+
+	for (auto &v : vtx) {
+		const auto &in_view = mdl_view_mtx * v;
+		if (in_view.z < closest)
+			closest = in_view.z;
 	}
 
-	return sort_keys;
+	if (closest < 0.f)
+		closest = 0.f;
+
+	return ComputeSortKey(closest); // sort to mm precision
+#endif
 }
 
-std::vector<uint32_t> ComputeSkinnedModelDisplayListSortKeys(
-	const Scene &scene, const ViewState &view_state, const std::vector<SkinnedModelDisplayList> &dls, const PipelineResources &res) {
-	std::vector<uint32_t> sort_keys;
-	sort_keys.reserve(dls.size());
+static const size_t sort_key_parallel_grain = 512;
+
+/// Compute the view depth sort key of each display list to sort_keys, the buffer storage is reused across calls.
+static void ComputeModelDisplayListSortKeys(
+	const Scene &scene, const ViewState &view_state, const std::vector<ModelDisplayList> &dls, const PipelineResources &res, std::vector<uint32_t> &sort_keys) {
+	sort_keys.resize(dls.size());
 
 	const auto &mtxs = scene.GetTransformWorldMatrices();
 
-	for (const auto &dl : dls) {
-		// TODO
-		sort_keys.push_back(0);
-	}
+	parallel_for(dls.size(), sort_key_parallel_grain, [&](size_t begin, size_t end) {
+		for (size_t i = begin; i < end; ++i)
+			sort_keys[i] = ComputeModelDisplayListSortKey(dls[i], view_state.view, mtxs, res);
+	});
+}
 
-	return sort_keys;
+static void ComputeSkinnedModelDisplayListSortKeys(const Scene &scene, const ViewState &view_state, const std::vector<SkinnedModelDisplayList> &dls,
+	const PipelineResources &res, std::vector<uint32_t> &sort_keys) {
+	sort_keys.resize(dls.size());
+	std::fill(std::begin(sort_keys), std::end(sort_keys), 0); // TODO
 }
 
 static int ComputeForwardPipelineConfigurationIdx(ForwardPipelineStage pipeline_stage, const ForwardPipelineLights &lights) {
@@ -524,16 +522,24 @@ static int ComputeForwardPipelineConfigurationIdx(ForwardPipelineStage pipeline_
 //
 void PrepareSceneForwardPipelineCommonRenderData(bgfx::ViewId &view_id, const Scene &scene, SceneForwardPipelineRenderData &render_data,
 	const ForwardPipeline &pipeline, const PipelineResources &resources, SceneForwardPipelinePassViewId &views, const char *debug_name) {
+	static const auto profiler_task = GetProfilerTaskId("PrepareSceneForwardPipelineCommonRenderData");
+	ProfilerCategorySection section(PC_Render, profiler_task);
+
 	scene.GetModelDisplayLists(
 		render_data.all_opaque, render_data.all_transparent, render_data.all_opaque_skinned, render_data.all_transparent_skinned, resources);
 
+	UpdateModelDisplayListCulling(
+		render_data.opaque_culling, render_data.all_opaque, scene.GetTransformWorldMatrices(), scene.GetTransformWorldRevisions(), resources);
+	UpdateModelDisplayListCulling(
+		render_data.transparent_culling, render_data.all_transparent, scene.GetTransformWorldMatrices(), scene.GetTransformWorldRevisions(), resources);
+
 	std::vector<ForwardPipelineLight> lights;
 	GetSceneForwardPipelineLights(scene, lights);
 	render_data.pipe_lights = PrepareForwardPipelineLights(lights);
 
 	ForwardPipelineShadowPassViewId sp_views;
 	GenerateSpotShadowMapForForwardPipeline(view_id, render_data.all_opaque, render_data.all_opaque_skinned, scene.GetTransformWorldMatrices(),
-		render_data.pipe_lights, pipeline, resources, sp_views, render_data.shadow_data, debug_name);
+		render_data.pipe_lights, pipeline, resources, sp_views, render_data.shadow_data, debug_name, &render_data.opaque_culling);
 
 	views[FPSP_Slot1Spot] = sp_views[FPSP_Slot1Spot];
 }
@@ -542,28 +548,47 @@ void PrepareSceneForwardPipelineCommonRenderData(bgfx::ViewId &view_id, const Sc
 void PrepareSceneForwardPipelineViewDependentRenderData(bgfx::ViewId &view_id, const ViewState &view_state, const Scene &scene,
 	SceneForwardPipelineRenderData &render_data, const ForwardPipeline &pipeline, const PipelineResources &resources, SceneForwardPipelinePassViewId &views,
 	const char *debug_name) {
+	static const auto profiler_task = GetProfilerTaskId("PrepareSceneForwardPipelineViewDependentRenderData");
+	ProfilerCategorySection section(PC_Render, profiler_task);
 
 	ForwardPipelineShadowPassViewId sp_views;
 	GenerateLinearShadowMapForForwardPipeline(view_id, view_state, render_data.all_opaque, render_data.all_opaque_skinned, scene.GetTransformWorldMatrices(),
-		render_data.pipe_lights, pipeline, resources, sp_views, render_data.shadow_data, debug_name);
+		render_data.pipe_lights, pipeline, resources, sp_views, render_data.shadow_data, debug_name, &render_data.opaque_culling);
 
 	views[SFPP_Slot0LinearSplit0] = sp_views[FPSP_Slot0LinearSplit0];
 	views[SFPP_Slot0LinearSplit1] = sp_views[FPSP_Slot0LinearSplit1];
 	views[SFPP_Slot0LinearSplit2] = sp_views[FPSP_Slot0LinearSplit2];
 	views[SFPP_Slot0LinearSplit3] = sp_views[FPSP_Slot0LinearSplit3];
 
-	render_data.view_opaque = render_data.all_opaque;
-	CullModelDisplayLists(view_state.frustum, render_data.view_opaque, scene.GetTransformWorldMatrices(), resources);
-	render_data.view_transparent = render_data.all_transparent;
-	CullModelDisplayLists(view_state.frustum, render_data.view_transparent, scene.GetTransformWorldMatrices(), resources);
+	CullModelDisplayLists(view_state.frustum, render_data.opaque_culling, render_data.all_opaque, render_data.view_opaque);
+	CullModelDisplayLists(view_state.frustum, render_data.transparent_culling, render_data.all_transparent, render_data.view_transparent);
 
 	// FIXME cull skinned models !!!
 	render_data.view_opaque_skinned = render_data.all_opaque_skinned;
 	render_data.view_transparent_skinned = render_data.all_transparent_skinned;
 
+	ComputeModelDisplayListSortKeys(scene, view_state, render_data.view_transparent, resources, render_data.view_transparent_sort_keys);
+	ComputeSkinnedModelDisplayListSortKeys(scene, view_state, render_data.view_transparent_skinned, resources, render_data.view_transparent_skinned_sort_keys);
+
 	render_data.fog = GetSceneForwardPipelineFog(scene);
 }
 
+//
+ModelDisplayListCullingStats GetSceneForwardPipelineCullingStats(const SceneForwardPipelineRenderData &render_data) {
+	const auto &a = render_data.opaque_culling.stats, &b = render_data.transparent_culling.stats;
+
+	ModelDisplayListCullingStats stats;
+	stats.node_count = a.node_count + b.node_count;
+	stats.item_count = a.item_count + b.item_count;
+	stats.updated_count = a.updated_count + b.updated_count;
+	stats.build_count = a.build_count + b.build_count;
+	stats.query_count = a.query_count + b.query_count;
+	stats.node_tested = a.node_tested + b.node_tested;
+	stats.item_tested = a.item_tested + b.item_tested;
+	stats.visible_count = a.visible_count + b.visible_count;
+	return stats;
+}
+
 //
 ForwardPipelineFog GetSceneForwardPipelineFog(const Scene &scene) {
 	return {scene.environment.fog_near, scene.environment.fog_far, scene.environment.fog_color};
@@ -590,6 +615,10 @@ static void UpdateForwardPipelineProbe(ForwardPipeline &pipeline, const Probe &p
 	auto &irradiance_map = resources.textures.Get(probe.irradiance_map);
 	auto &radiance_map = resources.textures.Get(probe.radiance_map);
 
+	resources.textures.MarkUsed(brdf_map_ref);
+	resources.textures.MarkUsed(probe.irradiance_map);
+	resources.textures.MarkUsed(probe.radiance_map);
+
 	Mat4 world;
 	if (probe.type == PT_Cube)
 		world = TransformationMat4(probe.trs.pos, probe.trs.rot, probe.trs.scl);
@@ -602,6 +631,9 @@ static void UpdateForwardPipelineProbe(ForwardPipeline &pipeline, const Probe &p
 void SubmitSceneToForwardPipeline(bgfx::ViewId &view_id, const Scene &scene, const Rect<int> &rect, const ViewState &view_state, ForwardPipeline &pipeline,
 	const SceneForwardPipelineRenderData &render_data, const PipelineResources &resources, SceneForwardPipelinePassViewId &views, ForwardPipelineAAA &aaa,
 	const ForwardPipelineAAAConfig &aaa_config, int frame, uint16_t rb_width, uint16_t rb_height, bgfx::FrameBufferHandle fb, const char *debug_name) {
+	static const auto profiler_task = GetProfilerTaskId("SubmitSceneToForwardPipeline");
+	ProfilerCategorySection section(PC_Render, profiler_task);
+
 	__ASSERT__(bgfx::getCaps()->supported & BGFX_CAPS_TEXTURE_BLIT);
 
 	hg::iVec2 fb_size(rb_width, rb_width);
@@ -783,13 +815,10 @@ void SubmitSceneToForwardPipeline(bgfx::ViewId &view_id, const Scene &scene, con
 
 		const int pipeline_config_idx = ComputeForwardPipelineConfigurationIdx(FPS_Basic, render_data.pipe_lights);
 
-		const auto view_transparent_sort_keys = ComputeModelDisplayListSortKeys(scene, view_state, render_data.view_transparent, resources);
-		DrawModelDisplayLists(view_id, render_data.view_transparent, view_transparent_sort_keys, pipeline_config_idx, pipeline.uniform_values,
+		DrawModelDisplayLists(view_id, render_data.view_transparent, render_data.view_transparent_sort_keys, pipeline_config_idx, pipeline.uniform_values,
 			pipeline.uniform_textures, scene.GetTransformWorldMatrices(), resources);
 
-		const auto view_transparent_skinned_sort_keys =
-			ComputeSkinnedModelDisplayListSortKeys(scene, view_state, render_data.view_transparent_skinned, resources);
-		DrawSkinnedModelDisplayLists(view_id, render_data.view_transparent_skinned, view_transparent_skinned_sort_keys, pipeline_config_idx,
+		DrawSkinnedModelDisplayLists(view_id, render_data.view_transparent_skinned, render_data.view_transparent_skinned_sort_keys, pipeline_config_idx,
 			pipeline.uniform_values, pipeline.uniform_textures, scene.GetTransformWorldMatrices(), resources);
 
 		views[SFPP_Transparent] = view_id++;
@@ -886,6 +915,9 @@ void SubmitSceneToForwardPipeline(bgfx::ViewId &view_id, const Scene &scene, con
 void SubmitSceneToForwardPipeline(bgfx::ViewId &view_id, const Scene &scene, const Rect<int> &rect, const ViewState &view_state, ForwardPipeline &pipeline,
 	const SceneForwardPipelineRenderData &render_data, const PipelineResources &resources, SceneForwardPipelinePassViewId &views, bgfx::FrameBufferHandle fb,
 	const char *debug_name) {
+	static const auto profiler_task = GetProfilerTaskId("SubmitSceneToForwardPipeline");
+	ProfilerCategorySection section(PC_Render, profiler_task);
+
 	std::fill(std::begin(views), std::end(views), 65535);
 
 	// update pipeline
@@ -933,13 +965,10 @@ void SubmitSceneToForwardPipeline(bgfx::ViewId &view_id, const Scene &scene, con
 		bgfx::setViewMode(view_id, bgfx::ViewMode::DepthDescending);
 		bgfx::setViewTransform(view_id, to_bgfx(view_state.view).data(), to_bgfx(view_state.proj).data());
 
-		const auto view_transparent_sort_keys = ComputeModelDisplayListSortKeys(scene, view_state, render_data.view_transparent, resources);
-		DrawModelDisplayLists(view_id, render_data.view_transparent, view_transparent_sort_keys, pipeline_config_idx, pipeline.uniform_values,
+		DrawModelDisplayLists(view_id, render_data.view_transparent, render_data.view_transparent_sort_keys, pipeline_config_idx, pipeline.uniform_values,
 			pipeline.uniform_textures, scene.GetTransformWorldMatrices(), resources);
 
-		const auto view_transparent_skinned_sort_keys =
-			ComputeSkinnedModelDisplayListSortKeys(scene, view_state, render_data.view_transparent_skinned, resources);
-		DrawSkinnedModelDisplayLists(view_id, render_data.view_transparent_skinned, view_transparent_skinned_sort_keys, pipeline_config_idx,
+		DrawSkinnedModelDisplayLists(view_id, render_data.view_transparent_skinned, render_data.view_transparent_skinned_sort_keys, pipeline_config_idx,
 			pipeline.uniform_values, pipeline.uniform_textures, scene.GetTransformWorldMatrices(), resources);
 
 		views[SFPP_Transparent] = view_id++;
@@ -193,11 +193,18 @@ struct SceneForwardPipelineRenderData {
 	std::vector<SkinnedModelDisplayList> all_opaque_skinned, view_opaque_skinned;
 	std::vector<SkinnedModelDisplayList> all_transparent_skinned, view_transparent_skinned;
 
+	std::vector<uint32_t> view_transparent_sort_keys, view_transparent_skinned_sort_keys; // view depth of the transparent display lists, computed with the view dependent render data
+
+	ModelDisplayListCulling opaque_culling, transparent_culling; // shared by all views, kept across frames when the render data is
+
 	ForwardPipelineLights pipe_lights;
 	ForwardPipelineShadowData shadow_data;
 	ForwardPipelineFog fog;
 };
 
+/// Return the culling statistics of the opaque and transparent display lists of a render data.
+ModelDisplayListCullingStats GetSceneForwardPipelineCullingStats(const SceneForwardPipelineRenderData &render_data);
+
 /// Prepare common scene render data for a submission to the forward pipeline by calling SubmitSceneToForwardPipeline.
 void PrepareSceneForwardPipelineCommonRenderData(bgfx::ViewId &view_id, const Scene &scene, SceneForwardPipelineRenderData &render_data,
 	const ForwardPipeline &pipeline, const PipelineResources &resources, SceneForwardPipelinePassViewId &views, const char *debug_name = "scene");
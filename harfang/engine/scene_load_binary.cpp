@@ -732,6 +732,7 @@ bool Scene::Load_binary(const Reader &ir, const Handle &h, const char *name, con
 					c.parent = i != std::end(ctx.node_refs) ? i->second : InvalidNodeRef;
 				}
 			}
+			transform_order_dirty = true; // parenting changed
 
 			// fix bone references
 			for (const auto ref : object_refs) {
@@ -856,6 +856,7 @@ bool Scene::Load_json(const json &js, const char *name, const Reader &deps_ir, c
 				c.parent = i != std::end(ctx.node_refs) ? i->second : InvalidNodeRef;
 			}
 		}
+		transform_order_dirty = true; // parenting changed
 
 		// fix bone references
 		for (const auto ref : object_refs) {
@@ -5,6 +5,7 @@
 #include "foundation/file_rw_interface.h"
 #include "foundation/format.h"
 #include "foundation/log.h"
+#include "foundation/profiler.h"
 
 #include "engine/assets_rw_interface.h"
 #include "engine/scene_lua_vm.h"
@@ -151,6 +152,9 @@ void SceneSyncToSystemsFromAssets(Scene &scene, SceneBullet3Physics &physics, Sc
 //
 static void SceneUpdateSystemsImpl(Scene &scene, SceneClocks &clocks, time_ns dt, SceneBullet3Physics *bullet3_physics, NodePairContacts *node_node_contacts,
 	time_ns physics_step, int max_physics_step, SceneLuaVM *vm) {
+	static const auto profiler_task = GetProfilerTaskId("SceneUpdateSystems");
+	ProfilerCategorySection section(PC_Scene, profiler_task);
+
 	scene.StorePreviousWorldMatrices();
 	scene.ReadyWorldMatrices();
 
@@ -3,6 +3,8 @@
 #include "foundation/data.h"
 #include "foundation/file.h"
 
+#include <algorithm>
+
 namespace hg {
 
 Data::~Data() { Free(); }
@@ -16,6 +18,7 @@ Data &Data::operator=(const Data &data) {
 	} else {
 		data_ = data.data_;
 		size_ = data.size_;
+		owner_ = data.owner_;
 	}
 
 	has_ownership = data.has_ownership;
@@ -42,6 +45,7 @@ Data &Data::operator=(Data &&data) {
 */
 
 bool Data::Reserve(size_t size) {
+	size = std::max(size, size_); // a view taking ownership copies all of its content
 	const size_t new_capacity = (size / 8192 + 1) * 8192; // grow in 8KB increments
 
 	if (new_capacity > capacity_) {
@@ -55,6 +59,7 @@ bool Data::Reserve(size_t size) {
 		if (has_ownership)
 			delete[] data_;
 		has_ownership = true;
+		owner_.reset(); // view copied
 
 		data_ = tmp;
 		capacity_ = new_capacity;
@@ -115,6 +120,8 @@ void Data::Free() {
 
 	has_ownership = false;
 	cursor = 0;
+
+	owner_.reset();
 }
 
 //
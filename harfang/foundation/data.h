@@ -3,6 +3,7 @@
 #pragma once
 
 #include <cstdint>
+#include <memory>
 #include <string>
 
 namespace hg {
@@ -19,6 +20,8 @@ public:
 
 	Data(const void *data, size_t size) { Write(data, size); }
 	Data(void *data, size_t size) : data_(reinterpret_cast<uint8_t *>(data)), size_(size) {}
+	/// View on memory kept alive by owner until the view is freed or takes ownership of a copy.
+	Data(void *data, size_t size, std::shared_ptr<const void> owner) : data_(reinterpret_cast<uint8_t *>(data)), size_(size), owner_(std::move(owner)) {}
 
 	Data &operator=(const Data &data);
 //	Data &operator=(Data &&data);
@@ -57,6 +60,8 @@ private:
 
 	bool has_ownership{false};
 	mutable size_t cursor{0};
+
+	std::shared_ptr<const void> owner_; // keeps the memory of a view alive
 };
 
 //
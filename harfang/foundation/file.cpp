@@ -4,6 +4,8 @@
 #define WIN32_LEAN_AND_MEAN
 #include <Windows.h>
 #else
+#include <fcntl.h>
+#include <sys/mman.h>
 #include <sys/types.h>
 #include <unistd.h>
 #endif
@@ -302,6 +304,26 @@ bool CopyFile(const char *src, const char *dst) {
 #endif
 }
 
+bool LinkFile(const char *src, const char *dst) {
+#if _WIN32
+	const std::wstring wsrc = utf8_to_wchar(src);
+	const std::wstring wdst = utf8_to_wchar(dst);
+	return ::CreateHardLinkW(wdst.c_str(), wsrc.c_str(), nullptr) ? true : false;
+#else
+	return link(src, dst) == 0;
+#endif
+}
+
+bool RenameFile(const char *src, const char *dst) {
+#if _WIN32
+	const std::wstring wsrc = utf8_to_wchar(src);
+	const std::wstring wdst = utf8_to_wchar(dst);
+	return ::MoveFileW(wsrc.c_str(), wdst.c_str()) ? true : false;
+#else
+	return rename(src, dst) == 0;
+#endif
+}
+
 //
 bool FileToData(const char *path, Data &data, bool silent) {
 	File file = Open(path, silent);
@@ -347,4 +369,60 @@ bool WriteString(File file, const std::string &v) {
 
 bool WriteStringAsText(File file, const std::string &v) { return Write(file, v.data(), v.length()) == v.length(); }
 
+//
+MappedFile MapFile(const char *path, bool silent) {
+	MappedFile map;
+
+#if _WIN32
+	const HANDLE file = CreateFileW(utf8_to_wchar(path).c_str(), GENERIC_READ, FILE_SHARE_READ, nullptr, OPEN_EXISTING, FILE_ATTRIBUTE_NORMAL, nullptr);
+
+	if (file != INVALID_HANDLE_VALUE) {
+		LARGE_INTEGER size;
+		if (GetFileSizeEx(file, &size) && size.QuadPart > 0) {
+			const HANDLE mapping = CreateFileMappingW(file, nullptr, PAGE_READONLY, 0, 0, nullptr);
+
+			if (mapping) {
+				map.data = reinterpret_cast<const uint8_t *>(MapViewOfFile(mapping, FILE_MAP_READ, 0, 0, 0));
+				if (map.data)
+					map.size = size_t(size.QuadPart);
+				CloseHandle(mapping); // the view keeps the mapping alive
+			}
+		}
+		CloseHandle(file);
+	}
+#else
+	const int fd = open(path, O_RDONLY);
+
+	if (fd != -1) {
+		struct stat info;
+		if (fstat(fd, &info) == 0 && info.st_size > 0) {
+			void *data = mmap(nullptr, size_t(info.st_size), PROT_READ, MAP_PRIVATE, fd, 0);
+
+			if (data != MAP_FAILED) {
+				map.data = reinterpret_cast<const uint8_t *>(data);
+				map.size = size_t(info.st_size);
+			}
+		}
+		close(fd); // the mapping keeps the file alive
+	}
+#endif
+
+	if (!silent && !map.data)
+		warn(format("Failed to map file '%1'").arg(path));
+
+	return map;
+}
+
+void Unmap(MappedFile &map) {
+	if (map.data) {
+#if _WIN32
+		UnmapViewOfFile(map.data);
+#else
+		munmap(const_cast<uint8_t *>(map.data), map.size);
+#endif
+	}
+
+	map = {};
+}
+
 } // namespace hg
@@ -71,6 +71,10 @@ template <typename T> bool Write(File file, const T &v) { return Write(file, &v,
 
 /// Copy a file on the local filesystem.
 bool CopyFile(const char *src, const char *dst);
+/// Create a hard link to a file on the local filesystem, both paths must be on the same volume.
+bool LinkFile(const char *src, const char *dst);
+/// Rename a file on the local filesystem, fails if the destination exists on some platforms.
+bool RenameFile(const char *src, const char *dst);
 
 /// Return the content of a file on the local filesystem as a string.
 std::string FileToString(const char *path, bool silent = false);
@@ -79,6 +83,18 @@ bool StringToFile(const char *path, const char *str);
 
 bool FileToData(const char *path, Data &data, bool silent = false);
 
+/// Read-only view of a file on the local filesystem mapped in memory.
+struct MappedFile {
+	const uint8_t *data{nullptr};
+	size_t size{0};
+};
+
+/// Map a file on the local filesystem in memory, the file is left untouched and empty files cannot be mapped.
+MappedFile MapFile(const char *path, bool silent = false);
+void Unmap(MappedFile &map);
+
+inline bool IsValid(const MappedFile &map) { return map.data != nullptr; }
+
 //
 struct ScopedFile {
 	ScopedFile(File file) : f(file) {}
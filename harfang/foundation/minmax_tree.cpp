@@ -0,0 +1,200 @@
+// HARFANG(R) Copyright (C) 2022 NWNC. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
+
+#include "foundation/minmax_tree.h"
+#include "foundation/math.h"
+
+#include <algorithm>
+#include <numeric>
+
+namespace hg {
+
+static float GetSurfaceArea(const MinMax &mm) {
+	const auto s = mm.mx - mm.mn;
+	return 2.f * (s.x * s.y + s.y * s.z + s.z * s.x);
+}
+
+static MinMax ComputeItemsMinMax(const MinMaxTree &tree, const MinMax *bounds, uint32_t first, uint32_t count) {
+	MinMax mm;
+	for (auto i = first; i < first + count; ++i)
+		mm = Union(mm, bounds[tree.item_order[i]]);
+	return mm;
+}
+
+void BuildMinMaxTree(MinMaxTree &tree, const MinMax *bounds, size_t count, size_t leaf_size) {
+	tree.node_bounds.clear();
+	tree.node_child.clear();
+	tree.node_first.clear();
+	tree.node_count.clear();
+
+	tree.item_order.resize(count);
+	std::iota(std::begin(tree.item_order), std::end(tree.item_order), 0);
+	tree.item_leaf.resize(count);
+
+	tree.build_cost = tree.cost = 0.f;
+
+	if (count == 0)
+		return;
+
+	leaf_size = Max<size_t>(leaf_size, 1);
+
+	const auto add_node = [&tree](uint32_t first, uint32_t count) {
+		tree.node_bounds.emplace_back();
+		tree.node_child.push_back(0);
+		tree.node_first.push_back(first);
+		tree.node_count.push_back(count);
+	};
+
+	const auto node_reserve = 2 * (count / leaf_size + 1);
+	tree.node_bounds.reserve(node_reserve);
+	tree.node_child.reserve(node_reserve);
+	tree.node_first.reserve(node_reserve);
+	tree.node_count.reserve(node_reserve);
+
+	add_node(0, uint32_t(count));
+
+	std::vector<uint32_t> stack(1, 0);
+
+	while (!stack.empty()) {
+		const auto node = stack.back();
+		stack.pop_back();
+
+		const auto first = tree.node_first[node], n = tree.node_count[node];
+
+		MinMax mm, centers;
+		for (auto i = first; i < first + n; ++i) {
+			const auto &item_mm = bounds[tree.item_order[i]];
+			mm = Union(mm, item_mm);
+			centers = Union(centers, GetCenter(item_mm));
+		}
+
+		tree.node_bounds[node] = mm;
+		tree.cost += GetSurfaceArea(mm);
+
+		if (n <= leaf_size) {
+			for (auto i = first; i < first + n; ++i)
+				tree.item_leaf[tree.item_order[i]] = node;
+			continue;
+		}
+
+		// median split along the largest axis of the item centers
+		const auto extent = GetSize(centers);
+		const size_t axis = extent.x > extent.y ? (extent.x > extent.z ? 0 : 2) : (extent.y > extent.z ? 1 : 2);
+
+		const auto begin = std::begin(tree.item_order) + first;
+		std::nth_element(begin, begin + n / 2, begin + n,
+			[bounds, axis](uint32_t a, uint32_t b) { return GetCenter(bounds[a])[axis] < GetCenter(bounds[b])[axis]; });
+
+		const auto child = uint32_t(tree.node_bounds.size());
+		tree.node_child[node] = child;
+
+		add_node(first, n / 2);
+		add_node(first + n / 2, n - n / 2);
+
+		stack.push_back(child + 1);
+		stack.push_back(child);
+	}
+
+	tree.build_cost = tree.cost;
+}
+
+void RefitMinMaxTree(MinMaxTree &tree, const MinMax *bounds, const std::vector<uint32_t> &modified_items) {
+	if (modified_items.empty() || tree.node_bounds.empty())
+		return;
+
+	std::vector<uint8_t> dirty(tree.node_bounds.size(), 0);
+	for (const auto item : modified_items)
+		dirty[tree.item_leaf[item]] = 1;
+
+	// children are always stored after their parent, a reverse sweep updates them first
+	tree.cost = 0.f;
+
+	for (auto node = tree.node_bounds.size(); node-- > 0;) {
+		const auto child = tree.node_child[node];
+
+		if (child == 0) {
+			if (dirty[node])
+				tree.node_bounds[node] = ComputeItemsMinMax(tree, bounds, tree.node_first[node], tree.node_count[node]);
+		} else if (dirty[child] || dirty[child + 1]) {
+			tree.node_bounds[node] = Union(tree.node_bounds[child], tree.node_bounds[child + 1]);
+			dirty[node] = 1;
+		}
+
+		tree.cost += GetSurfaceArea(tree.node_bounds[node]);
+	}
+}
+
+// clear the mask bit of each plane the minmax is fully inside of, see TestVisibility(const Frustum &, const MinMax &)
+static Visibility TestVisibility(const Frustum &frustum, const MinMax &minmax, uint8_t &plane_mask) {
+	const auto center_x2 = minmax.mn + minmax.mx;
+	const auto extend_x2 = minmax.mx - minmax.mn;
+
+	for (uint32_t n = 0; n < FP_Count; ++n) {
+		if (!(plane_mask & (1 << n)))
+			continue;
+
+		const auto &plane = frustum[n];
+
+		const float d = Dot({plane.x, plane.y, plane.z}, center_x2);
+		const float r = Dot(Abs(Vec3(plane.x, plane.y, plane.z)), extend_x2);
+
+		const float plane_d_x2 = -plane.w * 2.f;
+
+		if (d - r > plane_d_x2)
+			return V_Outside;
+		if (d + r <= plane_d_x2)
+			plane_mask &= ~(1 << n);
+	}
+
+	return plane_mask ? V_Clipped : V_Inside;
+}
+
+void QueryMinMaxTree(const MinMaxTree &tree, const MinMax *bounds, const Frustum &frustum, std::vector<uint32_t> &out_items, MinMaxTreeQueryStats *stats) {
+	if (tree.node_bounds.empty())
+		return;
+
+	struct Entry {
+		uint32_t node;
+		uint8_t plane_mask;
+	};
+
+	std::vector<Entry> stack;
+	stack.reserve(64);
+	stack.push_back({0, (1 << FP_Count) - 1});
+
+	size_t node_tested = 0, item_tested = 0;
+
+	while (!stack.empty()) {
+		auto e = stack.back();
+		stack.pop_back();
+
+		++node_tested;
+		const auto vis = TestVisibility(frustum, tree.node_bounds[e.node], e.plane_mask);
+
+		if (vis == V_Outside)
+			continue;
+
+		const auto first = tree.node_first[e.node], count = tree.node_count[e.node];
+
+		if (vis == V_Inside) {
+			out_items.insert(std::end(out_items), std::begin(tree.item_order) + first, std::begin(tree.item_order) + first + count);
+		} else if (const auto child = tree.node_child[e.node]) {
+			stack.push_back({child + 1, e.plane_mask});
+			stack.push_back({child, e.plane_mask});
+		} else {
+			for (auto i = first; i < first + count; ++i) {
+				const auto item = tree.item_order[i];
+				auto plane_mask = e.plane_mask;
+				++item_tested;
+				if (TestVisibility(frustum, bounds[item], plane_mask) != V_Outside)
+					out_items.push_back(item);
+			}
+		}
+	}
+
+	if (stats) {
+		stats->node_tested += node_tested;
+		stats->item_tested += item_tested;
+	}
+}
+
+} // namespace hg
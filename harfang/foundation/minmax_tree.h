@@ -0,0 +1,53 @@
+// HARFANG(R) Copyright (C) 2022 NWNC. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
+
+#pragma once
+
+#include "foundation/frustum.h"
+#include "foundation/minmax.h"
+
+#include <cstddef>
+#include <cstdint>
+#include <vector>
+
+namespace hg {
+
+/**
+	@short Bounding volume hierarchy over a set of MinMax.
+
+	The tree does not store the bounds of its items, they are provided by the caller to each function so that they can be updated in place.
+	The two children of a node are stored next to each other, always after their parent.
+	Each node covers a contiguous range of item_order.
+*/
+struct MinMaxTree {
+	std::vector<MinMax> node_bounds;
+	std::vector<uint32_t> node_child; // index of the first child, 0 for leaves
+	std::vector<uint32_t> node_first, node_count; // range of items covered by the node in item_order
+
+	std::vector<uint32_t> item_order; // item indexes sorted by leaf
+	std::vector<uint32_t> item_leaf; // leaf node of each item
+
+	float build_cost{0.f}, cost{0.f}; // sum of all node surface areas after the last build and after the last refit
+};
+
+struct MinMaxTreeQueryStats {
+	size_t node_tested{0}, item_tested{0};
+};
+
+/// Build the tree over count bounds, leaves hold at most leaf_size items.
+void BuildMinMaxTree(MinMaxTree &tree, const MinMax *bounds, size_t count, size_t leaf_size = 4);
+/// Update the bounds of the nodes holding a set of modified items, the tree topology is left untouched.
+/// Refitting degrades the tree quality over time, see NeedsRebuild.
+void RefitMinMaxTree(MinMaxTree &tree, const MinMax *bounds, const std::vector<uint32_t> &modified_items);
+
+/// Return true if refitting degraded the tree quality enough for a rebuild to be worthwhile.
+inline bool NeedsRebuild(const MinMaxTree &tree) { return tree.cost > tree.build_cost * 2.f; }
+
+inline size_t GetItemCount(const MinMaxTree &tree) { return tree.item_order.size(); }
+inline size_t GetNodeCount(const MinMaxTree &tree) { return tree.node_bounds.size(); }
+
+/// Append the index of all items not outside a frustum to out_items, subtrees fully inside or outside the frustum are accepted or rejected as a whole.
+/// Items are appended in tree order.
+void QueryMinMaxTree(const MinMaxTree &tree, const MinMax *bounds, const Frustum &frustum, std::vector<uint32_t> &out_items,
+	MinMaxTreeQueryStats *stats = nullptr);
+
+} // namespace hg
@@ -1,53 +1,167 @@
 // HARFANG(R) Copyright (C) 2021 Emmanuel Julien, NWNC HARFANG. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
 
 #include "foundation/profiler.h"
+#include "foundation/file.h"
 #include "foundation/format.h"
 #include "foundation/log.h"
 #include "foundation/math.h"
 
 #include <algorithm>
+#include <atomic>
+#include <climits>
+#include <deque>
+#include <memory>
 #include <mutex>
+#include <unordered_map>
 
 namespace hg {
 
-static std::mutex lock;
-static std::vector<size_t> task_buckets[256];
+/*
+	Each thread records its sections to a ring buffer it owns. The owning thread is the only writer of new sections while frame
+	captures only read the sections between the ring tail and head, so that beginning a section does not take any lock.
 
-struct Task {
-	std::string name;
-	std::vector<size_t> section_indexes;
-};
+	A section index packs the ring slot in its top bits and the section position in the ring in its low bits.
+*/
+static const size_t ProfilerRingSize = 8192; // sections per thread and per frame, must be a power of 2
+static const size_t ProfilerMaxThreads = 255; // slot 255 is reserved for the invalid section index
 
-static std::vector<Task> tasks;
+static const int ProfilerPositionBits = sizeof(ProfilerSectionIndex) * CHAR_BIT - 8;
+static const ProfilerSectionIndex ProfilerPositionMask = (ProfilerSectionIndex(1) << ProfilerPositionBits) - 1;
+static const ProfilerSectionIndex InvalidProfilerSectionIndex = ~ProfilerSectionIndex(0);
 
-struct Section {
+struct ProfilerRingSection {
+	ProfilerTaskId task;
 	std::thread::id thread_id;
-	time_ns start{0}, end{0};
+	time_ns start;
+	std::atomic<time_ns> end{0};
+	std::atomic<ProfilerSectionIndex> index{InvalidProfilerSectionIndex};
 	std::string details;
 };
 
-static std::vector<Section> sections;
+struct ProfilerRing {
+	std::unique_ptr<ProfilerRingSection[]> sections{new ProfilerRingSection[ProfilerRingSize]};
+	std::atomic<size_t> head{0}, tail{0}; // head is written by the owning thread, tail by EndProfilerFrame
+	std::atomic<bool> in_use{true}; // rings are recycled once their thread exits
+};
+
+static std::atomic<ProfilerRing *> rings[ProfilerMaxThreads]; // never freed so that sections can be ended from any thread at any time
 
-static uint32_t frame{0};
-static ProfilerFrame last_frame_profile;
+static std::mutex ring_lock; // ring registration
+static std::mutex frame_lock; // frame capture
+
+static ProfilerRing *AcquireRing(size_t &slot) {
+	std::lock_guard<std::mutex> guard(ring_lock);
+
+	for (slot = 0; slot < ProfilerMaxThreads; ++slot) {
+		auto ring = rings[slot].load(std::memory_order_acquire);
+
+		if (!ring) {
+			ring = new ProfilerRing;
+			rings[slot].store(ring, std::memory_order_release);
+			return ring;
+		}
+
+		if (!ring->in_use.load(std::memory_order_acquire)) {
+			ring->in_use.store(true, std::memory_order_relaxed); // pending sections keep the id of the thread which recorded them
+			return ring;
+		}
+	}
+
+	return nullptr;
+}
+
+struct ThreadProfilerRing {
+	ThreadProfilerRing() : ring(AcquireRing(slot)) {
+		if (!ring)
+			warn("Too many threads are recording profiler sections, sections from this thread are dropped");
+	}
+
+	~ThreadProfilerRing() {
+		if (ring)
+			ring->in_use.store(false, std::memory_order_release);
+	}
+
+	ProfilerRing *ring;
+	size_t slot;
+};
+
+static ThreadProfilerRing &GetThreadProfilerRing() {
+	static thread_local ThreadProfilerRing thread_ring;
+	return thread_ring;
+}
 
 //
-static size_t GetTaskBucket(const std::string &name) { return std::hash<std::string>{}(name)&255; }
+static std::mutex task_lock;
+static std::deque<std::string> task_names; // indexed by task id, protected by task_lock
+static std::unordered_map<std::string, ProfilerTaskId> task_ids; // protected by task_lock
+
+ProfilerTaskId GetProfilerTaskId(const std::string &name) {
+	static thread_local std::unordered_map<std::string, ProfilerTaskId> thread_task_ids; // lock-free lookup once a thread has seen a name
+
+	const auto i = thread_task_ids.find(name);
+	if (i != std::end(thread_task_ids))
+		return i->second;
+
+	ProfilerTaskId task;
+	{
+		std::lock_guard<std::mutex> guard(task_lock);
+
+		const auto j = task_ids.find(name);
+		if (j != std::end(task_ids)) {
+			task = j->second;
+		} else {
+			task = ProfilerTaskId(task_names.size());
+			task_names.push_back(name);
+			task_ids[name] = task;
+		}
+	}
 
-static size_t GetTaskInBucket(size_t bucket_index, const std::string &name) {
-	auto &bucket = task_buckets[bucket_index];
+	thread_task_ids[name] = task;
+	return task;
+}
+
+//
+ProfilerSectionIndex BeginProfilerSection(ProfilerTaskId task, const std::string &section_details) {
+	const auto &thread_ring = GetThreadProfilerRing();
 
-	// look into the bucket for the period
-	for (auto &i : bucket)
-		if (tasks[i].name == name)
-			return i;
+	auto ring = thread_ring.ring;
+	if (!ring)
+		return InvalidProfilerSectionIndex;
 
-	// create missing event
-	auto event = tasks.emplace(tasks.end());
-	event->name = name;
+	const auto head = ring->head.load(std::memory_order_relaxed);
+	if (head - ring->tail.load(std::memory_order_acquire) >= ProfilerRingSize)
+		return InvalidProfilerSectionIndex; // ring full, drop section
 
-	bucket.push_back(tasks.size() - 1);
-	return tasks.size() - 1;
+	const auto index = (ProfilerSectionIndex(thread_ring.slot) << ProfilerPositionBits) | (head & ProfilerPositionMask);
+
+	auto &section = ring->sections[head & (ProfilerRingSize - 1)];
+	section.task = task;
+	section.thread_id = std::this_thread::get_id();
+	section.details = section_details;
+	section.index.store(index, std::memory_order_relaxed); // before resetting end so that a late EndProfilerSection call on the previous section is ignored
+	section.end.store(0, std::memory_order_relaxed);
+	section.start = time_now();
+
+	ring->head.store(head + 1, std::memory_order_release); // publish section
+	return index;
+}
+
+ProfilerSectionIndex BeginProfilerSection(const std::string &name, const std::string &section_details) {
+	return BeginProfilerSection(GetProfilerTaskId(name), section_details);
+}
+
+void EndProfilerSection(ProfilerSectionIndex section_index) {
+	const auto slot = section_index >> ProfilerPositionBits;
+	if (slot >= ProfilerMaxThreads)
+		return;
+
+	auto ring = rings[slot].load(std::memory_order_acquire);
+	if (!ring)
+		return;
+
+	auto &section = ring->sections[section_index & (ProfilerRingSize - 1)];
+	if (section.index.load(std::memory_order_acquire) == section_index) // skip sections from a previous frame
+		section.end.store(time_now(), std::memory_order_release);
 }
 
 //
@@ -64,61 +178,76 @@ static bool _compare_tree_entry(const ProfilerFrame::Task &a, const ProfilerFram
 	return task_a_name_length < task_b_name_length;
 }
 
-ProfilerFrame CaptureProfilerFrame() {
-	std::lock_guard<std::mutex> guard(lock);
+static uint32_t frame{0};
 
+/// Capture the sections of all rings, ring heads are returned in heads. Must be called with frame_lock held.
+static ProfilerFrame CaptureProfilerFrame(std::vector<size_t> &heads) {
 	ProfilerFrame f;
 	f.frame = frame;
 
 	auto t_now = time_now();
 
-	f.tasks.clear();
-	f.sections.clear();
+	std::vector<std::vector<size_t>> task_section_indexes;
 
-	auto task_count = tasks.size();
+	heads.assign(ProfilerMaxThreads, 0);
 
-	if (!task_count) {
-		f.start = f.end = 0;
-	} else {
-		f.start = f.end = sections[0].start;
+	for (size_t slot = 0; slot < ProfilerMaxThreads; ++slot) {
+		auto ring = rings[slot].load(std::memory_order_acquire);
+		if (!ring)
+			continue;
 
-		f.sections.resize(sections.size());
-		for (uint32_t i = 0; i < sections.size(); ++i) {
-			auto &frame_section = f.sections[i];
-			auto &section = sections[i];
+		const auto head = ring->head.load(std::memory_order_acquire), tail = ring->tail.load(std::memory_order_relaxed);
+		heads[slot] = head;
 
-			auto thread_id = section.thread_id;
+		for (auto i = tail; i < head; ++i) {
+			const auto &section = ring->sections[i & (ProfilerRingSize - 1)];
 
-			frame_section.thread_id = thread_id;
+			ProfilerFrame::Section frame_section;
+			frame_section.thread_id = section.thread_id;
+			frame_section.thread_index = uint32_t(slot);
 			frame_section.start = section.start;
-			if (section.end == 0)
+			frame_section.end = section.end.load(std::memory_order_acquire);
+			if (frame_section.end == 0)
 				frame_section.end = t_now; // fix-up pending section
-			else
-				frame_section.end = section.end;
 			frame_section.details = section.details;
 
-			if (frame_section.start < f.start)
-				f.start = frame_section.start;
-			if (frame_section.end > f.end)
-				f.end = frame_section.end;
+			if (section.task >= task_section_indexes.size())
+				task_section_indexes.resize(section.task + 1);
+			task_section_indexes[section.task].push_back(f.sections.size());
+
+			f.sections.push_back(std::move(frame_section));
+		}
+	}
+
+	if (f.sections.empty()) {
+		f.start = f.end = 0;
+	} else {
+		f.start = f.end = f.sections[0].start;
+
+		for (const auto &section : f.sections) {
+			if (section.start < f.start)
+				f.start = section.start;
+			if (section.end > f.end)
+				f.end = section.end;
 		}
 
-		f.tasks.clear();
-		f.tasks.resize(task_count);
+		std::lock_guard<std::mutex> guard(task_lock);
 
-		for (uint32_t i = 0; i < task_count; ++i) {
-			auto &task = tasks[i];
-			auto &frame_task = f.tasks[i];
+		for (size_t i = 0; i < task_section_indexes.size(); ++i) {
+			if (task_section_indexes[i].empty())
+				continue;
 
-			frame_task.name = task.name;
+			ProfilerFrame::Task frame_task;
+			frame_task.name = task_names[i];
 			frame_task.duration = 0;
 
-			for (auto &section_index : task.section_indexes) {
+			for (auto &section_index : task_section_indexes[i]) {
 				auto &section = f.sections[section_index];
 				frame_task.duration += section.end - section.start;
 			}
 
-			frame_task.section_indexes = task.section_indexes;
+			frame_task.section_indexes = std::move(task_section_indexes[i]);
+			f.tasks.push_back(std::move(frame_task));
 		}
 
 		std::sort(f.tasks.begin(), f.tasks.end(), &_compare_tree_entry);
@@ -127,17 +256,22 @@ ProfilerFrame CaptureProfilerFrame() {
 	return f;
 }
 
+ProfilerFrame CaptureProfilerFrame() {
+	std::lock_guard<std::mutex> guard(frame_lock);
+	std::vector<size_t> heads;
+	return CaptureProfilerFrame(heads);
+}
+
 //
 ProfilerFrame EndProfilerFrame() {
-	ProfilerFrame profiler_frame = CaptureProfilerFrame();
+	std::lock_guard<std::mutex> guard(frame_lock);
 
-	std::lock_guard<std::mutex> guard(lock);
+	std::vector<size_t> heads;
+	ProfilerFrame profiler_frame = CaptureProfilerFrame(heads);
 
-	for (auto &bucket : task_buckets)
-		bucket.clear();
-
-	tasks.clear();
-	sections.clear();
+	for (size_t slot = 0; slot < ProfilerMaxThreads; ++slot)
+		if (auto ring = rings[slot].load(std::memory_order_acquire))
+			ring->tail.store(heads[slot], std::memory_order_release); // release captured sections to their thread
 
 	++frame;
 
@@ -164,7 +298,7 @@ void PrintProfilerFrame(const ProfilerFrame &frame) {
 		time_ns total = 0;
 
 		for (const auto section_id : task.section_indexes) {
-			const auto &section = sections[section_id];
+			const auto &section = frame.sections[section_id];
 			total += section.end - section.start;
 		}
 
@@ -187,35 +321,181 @@ void PrintProfilerFrame(const ProfilerFrame &frame) {
 }
 
 //
-ProfilerSectionIndex BeginProfilerSection(const std::string &name, const std::string &section_details) {
-	std::lock_guard<std::mutex> guard(lock);
+static std::string JsonEscape(const std::string &str) {
+	std::string out;
+	out.reserve(str.size());
+
+	for (auto c : str) {
+		if (c == '"' || c == '\\') {
+			out += '\\';
+			out += c;
+		} else if (uint8_t(c) < 0x20) {
+			char code[8];
+			snprintf(code, sizeof(code), "\\u%04x", c);
+			out += code;
+		} else {
+			out += c;
+		}
+	}
+
+	return out;
+}
+
+bool SaveProfilerFrameToTrace(const ProfilerFrame &frame, const std::string &path) {
+	std::vector<bool> threads; // threads with sections in the frame
+	for (const auto &section : frame.sections) {
+		if (section.thread_index >= threads.size())
+			threads.resize(section.thread_index + 1, false);
+		threads[section.thread_index] = true;
+	}
+
+	std::string json = "{\"displayTimeUnit\":\"ms\",\"traceEvents\":[\n";
+
+	char event[256];
+
+	for (size_t i = 0; i < threads.size(); ++i) {
+		if (!threads[i])
+			continue;
+		snprintf(event, sizeof(event), "{\"name\":\"thread_name\",\"ph\":\"M\",\"pid\":1,\"tid\":%d,\"args\":{\"name\":\"Thread %d\"}},\n", int(i), int(i));
+		json += event;
+	}
 
-	auto bucket_idx = GetTaskBucket(name);
-	auto task_idx = GetTaskInBucket(bucket_idx, name);
-	auto &task = tasks[task_idx];
+	for (const auto &task : frame.tasks) {
+		const auto name = JsonEscape(task.name);
+
+		for (auto section_index : task.section_indexes) {
+			const auto &section = frame.sections[section_index];
+
+			// timestamps are expressed in microseconds relative to the frame start
+			snprintf(event, sizeof(event), "\",\"cat\":\"harfang\",\"ph\":\"X\",\"pid\":1,\"tid\":%d,\"ts\":%.3f,\"dur\":%.3f", int(section.thread_index),
+				double(section.start - frame.start) / 1000.0, double(section.end - section.start) / 1000.0);
+
+			json += "{\"name\":\"";
+			json += name;
+			json += event;
+			if (!section.details.empty()) {
+				json += ",\"args\":{\"details\":\"";
+				json += JsonEscape(section.details);
+				json += "\"}";
+			}
+			json += "},\n";
+		}
+	}
+
+	if (json.back() == '\n' && json[json.size() - 2] == ',')
+		json.erase(json.size() - 2, 1); // trailing comma
 
-	auto section = sections.emplace(sections.end());
-	section->thread_id = std::this_thread::get_id();
-	section->details = section_details;
-	section->start = time_now();
+	json += "]}\n";
 
-	auto section_idx = sections.size() - 1;
-	task.section_indexes.push_back(section_idx);
-	return section_idx;
+	return StringToFile(path.c_str(), json.c_str());
 }
 
-void EndProfilerSection(ProfilerSectionIndex section_index) {
-	std::lock_guard<std::mutex> guard(lock);
-	if (section_index < sections.size() && sections[section_index].start != 0)
-		sections[section_index].end = time_now();
+//
+template <typename Samples> static ProfilerTaskStats ComputeProfilerTaskStats(const std::string &name, const Samples &samples) {
+	ProfilerTaskStats stats;
+	stats.name = name;
+	stats.frame_count = samples.size();
+
+	if (samples.empty())
+		return stats;
+
+	std::vector<time_ns> durations;
+	durations.reserve(samples.size());
+
+	time_ns total = 0;
+	for (const auto &sample : samples) {
+		durations.push_back(sample.duration);
+		total += sample.duration;
+		stats.section_count += sample.section_count;
+	}
+
+	std::sort(std::begin(durations), std::end(durations));
+
+	const auto percentile = [&](int p) { return durations[Max<size_t>((durations.size() * p + 99) / 100, 1) - 1]; }; // nearest rank
+
+	stats.min = durations.front();
+	stats.max = durations.back();
+	stats.avg = total / time_ns(durations.size());
+	stats.p50 = percentile(50);
+	stats.p90 = percentile(90);
+	stats.p99 = percentile(99);
+	return stats;
 }
 
-void LockProfiler() { lock.lock(); }
-void UnlockProfiler() { lock.unlock(); }
+ProfilerFrameHistory::ProfilerFrameHistory(size_t max_frame_count_) : max_frame_count(Max<size_t>(max_frame_count_, 1)) {}
+
+void ProfilerFrameHistory::PushFrame(const ProfilerFrame &frame) {
+	const auto index = pushed_frame_count++;
+
+	frames.push_back({index, frame.end - frame.start, frame.sections.size()});
+
+	for (const auto &task : frame.tasks)
+		tasks[task.name].push_back({index, task.duration, task.section_indexes.size()});
+
+	// drop samples from frames that left the history
+	if (frames.size() > max_frame_count) {
+		const auto oldest = frames[frames.size() - max_frame_count].frame;
+
+		while (frames.front().frame < oldest)
+			frames.pop_front();
+
+		for (auto i = std::begin(tasks); i != std::end(tasks);) {
+			auto &samples = i->second;
+			while (!samples.empty() && samples.front().frame < oldest)
+				samples.pop_front();
+			i = samples.empty() ? tasks.erase(i) : std::next(i);
+		}
+	}
+
+	frame_count = frames.size();
+}
+
+void ProfilerFrameHistory::Clear() {
+	frames.clear();
+	tasks.clear();
+	frame_count = 0;
+}
+
+std::vector<ProfilerTaskStats> ProfilerFrameHistory::GetTaskStats() const {
+	std::vector<ProfilerTaskStats> stats;
+	stats.reserve(tasks.size());
+	for (const auto &i : tasks)
+		stats.push_back(ComputeProfilerTaskStats(i.first, i.second));
+	return stats;
+}
+
+bool ProfilerFrameHistory::GetTaskStats(const std::string &name, ProfilerTaskStats &stats) const {
+	const auto i = tasks.find(name);
+	if (i == std::end(tasks))
+		return false;
+	stats = ComputeProfilerTaskStats(i->first, i->second);
+	return true;
+}
+
+ProfilerTaskStats ProfilerFrameHistory::GetFrameStats() const { return ComputeProfilerTaskStats({}, frames); }
 
 //
 ProfilerPerfSection::ProfilerPerfSection(const std::string &task_name, const std::string &section_details)
 	: section_index(BeginProfilerSection(task_name, section_details)) {}
+ProfilerPerfSection::ProfilerPerfSection(ProfilerTaskId task, const std::string &section_details)
+	: section_index(BeginProfilerSection(task, section_details)) {}
 ProfilerPerfSection::~ProfilerPerfSection() { EndProfilerSection(section_index); }
 
+
+//
+static std::atomic<uint32_t> profiler_categories{PC_None};
+
+void SetProfilerCategories(uint32_t categories) { profiler_categories.store(categories, std::memory_order_relaxed); }
+uint32_t GetProfilerCategories() { return profiler_categories.load(std::memory_order_relaxed); }
+
+bool IsProfilerCategoryEnabled(ProfilerCategory category) { return profiler_categories.load(std::memory_order_relaxed) & category; }
+
+ProfilerCategorySection::ProfilerCategorySection(ProfilerCategory category, ProfilerTaskId task)
+	: section_index(IsProfilerCategoryEnabled(category) ? BeginProfilerSection(task) : InvalidProfilerSectionIndex) {}
+
+ProfilerCategorySection::~ProfilerCategorySection() {
+	if (section_index != InvalidProfilerSectionIndex)
+		EndProfilerSection(section_index);
+}
+
 } // namespace hg
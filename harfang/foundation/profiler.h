@@ -4,6 +4,8 @@
 
 #include "foundation/time.h"
 
+#include <deque>
+#include <map>
 #include <thread>
 #include <vector>
 #include <string>
@@ -16,9 +18,13 @@ struct ProfilerFrame {
 	struct Section {
 		Section() = default;
 		Section(const Section &) = default;
-		Section(Section &&s) : thread_id(s.thread_id), start(s.start), end(s.end), details(std::move(s.details)) {}
+		Section(Section &&) = default;
+
+		Section &operator=(const Section &) = default; // the bindings copy-assign sections
+		Section &operator=(Section &&) = default;
 
 		std::thread::id thread_id;
+		uint32_t thread_index{0}; // index of the profiler buffer of the thread that recorded the section, unique among running threads
 		time_ns start{0}, end{0};
 		std::string details;
 	};
@@ -37,9 +43,24 @@ struct ProfilerFrame {
 
 //
 using ProfilerSectionIndex = size_t;
+using ProfilerTaskId = uint32_t;
+
+/**
+	@short Intern a profiler task name.
+
+	Beginning a section from a task identifier skips the name lookup, cache the identifier of sections on hot paths.
+*/
+ProfilerTaskId GetProfilerTaskId(const std::string &name);
+
+/**
+	@short Begin a named profiler section. Call EndProfilerSection to end the section.
 
-/// Begin a named profiler section. Call EndProfilerSection to end the section.
+	Sections are recorded to a buffer owned by the calling thread without taking any lock. A thread records at most
+	8192 sections per frame, sections beyond this limit are dropped.
+*/
 ProfilerSectionIndex BeginProfilerSection(const std::string &name, const std::string &section_details = {});
+ProfilerSectionIndex BeginProfilerSection(ProfilerTaskId task, const std::string &section_details = {});
+/// End a profiler section, sections can be ended from any thread.
 void EndProfilerSection(ProfilerSectionIndex section_index);
 
 /// capture and end the current profiler frame
@@ -49,13 +70,86 @@ ProfilerFrame CaptureProfilerFrame();
 
 void PrintProfilerFrame(const ProfilerFrame &frame);
 
+/// Save a profiler frame to the Chrome trace event format, the output can be opened in Perfetto or `chrome://tracing`.
+bool SaveProfilerFrameToTrace(const ProfilerFrame &frame, const std::string &path);
+
+/// Statistics of the per-frame duration of a task over the frames of a ProfilerFrameHistory.
+struct ProfilerTaskStats {
+	std::string name;
+	size_t frame_count{0}; // number of frames the task was recorded in
+	size_t section_count{0}; // number of sections over these frames
+	time_ns min{0}, max{0}, avg{0};
+	time_ns p50{0}, p90{0}, p99{0};
+};
+
+/**
+	@short Rolling history of profiler frames.
+
+	Push the frames returned by EndProfilerFrame to the history to aggregate task durations over the last frames. Only
+	the frames a task was recorded in contribute to its statistics.
+*/
+class ProfilerFrameHistory {
+public:
+	explicit ProfilerFrameHistory(size_t max_frame_count = 60);
+
+	void PushFrame(const ProfilerFrame &frame);
+	void Clear();
+
+	size_t GetFrameCount() const { return frame_count; }
+	size_t GetMaxFrameCount() const { return max_frame_count; }
+
+	/// Return the statistics of all tasks in the history sorted by name.
+	std::vector<ProfilerTaskStats> GetTaskStats() const;
+	/// Return the statistics of a task, return false if the task was not recorded in the history.
+	bool GetTaskStats(const std::string &name, ProfilerTaskStats &stats) const;
+
+	/// Return the statistics of the frame durations, the name of the returned statistics is empty.
+	ProfilerTaskStats GetFrameStats() const;
+
+private:
+	struct Sample {
+		size_t frame;
+		time_ns duration;
+		size_t section_count;
+	};
+
+	size_t max_frame_count, frame_count{0}, pushed_frame_count{0};
+
+	std::deque<Sample> frames;
+	std::map<std::string, std::deque<Sample>> tasks;
+};
+
+/// Categories of the engine built-in profiler sections.
+enum ProfilerCategory { PC_None = 0x0, PC_Scene = 0x1, PC_Physics = 0x2, PC_Render = 0x4, PC_All = 0xff };
+
+/**
+	@short Enable engine built-in profiler sections by category.
+
+	Pass a combination of ProfilerCategory flags. All categories are disabled by default, a disabled section only costs
+	a flag test.
+*/
+void SetProfilerCategories(uint32_t categories);
+uint32_t GetProfilerCategories();
+
+bool IsProfilerCategoryEnabled(ProfilerCategory category);
+
 //
 class ProfilerPerfSection {
 public:
 	ProfilerPerfSection(const std::string &task_name, const std::string &section_details = {});
+	ProfilerPerfSection(ProfilerTaskId task, const std::string &section_details = {});
 	~ProfilerPerfSection();
 private:
 	ProfilerSectionIndex section_index;
 };
 
+/// Profiler section only recorded if its category is enabled, see SetProfilerCategories.
+class ProfilerCategorySection {
+public:
+	ProfilerCategorySection(ProfilerCategory category, ProfilerTaskId task);
+	~ProfilerCategorySection();
+private:
+	ProfilerSectionIndex section_index;
+};
+
 } // namespace hg
@@ -0,0 +1,219 @@
+// HARFANG(R) Copyright (C) 2021 Emmanuel Julien, NWNC HARFANG. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
+
+#include "foundation/worker_pool.h"
+#include "foundation/format.h"
+#include "foundation/thread.h"
+
+#include <algorithm>
+#include <atomic>
+#include <condition_variable>
+#include <deque>
+#include <memory>
+#include <mutex>
+#include <thread>
+#include <vector>
+
+namespace hg {
+
+struct parallel_for_job {
+	const std::function<void(size_t, size_t)> *fn;
+	std::function<void(size_t, size_t)> owned_fn; // for jobs nobody waits on
+	size_t count, grain, chunk_count;
+	std::atomic<size_t> next_chunk{0}, done_chunk{0};
+};
+
+static std::mutex worker_mutex;
+static std::condition_variable worker_cv;
+static std::deque<std::shared_ptr<parallel_for_job>> worker_jobs;
+static std::vector<std::thread> workers;
+static bool workers_started = false, workers_running = false;
+static uint32_t worker_generation = 0; // incremented by start_workers
+
+static std::mutex job_done_mutex;
+static std::condition_variable job_done_cv;
+
+// grab chunks until the job is exhausted, fn is never touched once all chunks have been taken
+static void run_job_chunks(parallel_for_job &job) {
+	for (;;) {
+		const auto chunk = job.next_chunk++;
+		if (chunk >= job.chunk_count)
+			break;
+
+		const auto begin = chunk * job.grain;
+		(*job.fn)(begin, std::min(begin + job.grain, job.count));
+
+		if (++job.done_chunk == job.chunk_count) {
+			std::lock_guard<std::mutex> lock(job_done_mutex);
+			job_done_cv.notify_all();
+		}
+	}
+}
+
+static void worker_thread(int index) {
+	set_thread_name(format("Harfang - worker %1").arg(index).str());
+
+	for (;;) {
+		std::shared_ptr<parallel_for_job> job;
+
+		{
+			std::unique_lock<std::mutex> lock(worker_mutex);
+			worker_cv.wait(lock, [] { return !workers_running || !worker_jobs.empty(); });
+
+			if (worker_jobs.empty())
+				break; // stopping, queued jobs are drained before exiting
+
+			job = worker_jobs.front();
+			if (job->next_chunk >= job->chunk_count)
+				worker_jobs.pop_front(); // exhausted, drop from queue
+		}
+
+		run_job_chunks(*job);
+	}
+}
+
+static std::mutex worker_count_mutex; // serializes pool restarts
+
+static void stop_workers() {
+	std::vector<std::thread> stopped_workers;
+
+	{
+		std::lock_guard<std::mutex> lock(worker_mutex);
+		workers_running = false;
+		stopped_workers.swap(workers);
+	}
+	worker_cv.notify_all();
+
+	for (auto &worker : stopped_workers)
+		worker.join(); // workers exit once the queue is empty
+
+	// jobs queued to a pool without worker, run them on the calling thread
+	std::deque<std::shared_ptr<parallel_for_job>> jobs;
+	{
+		std::lock_guard<std::mutex> lock(worker_mutex);
+		jobs.swap(worker_jobs);
+	}
+
+	for (auto &job : jobs)
+		run_job_chunks(*job);
+}
+
+static struct worker_pool_shutdown {
+	~worker_pool_shutdown() {
+		std::lock_guard<std::mutex> lock(worker_count_mutex);
+		stop_workers(); // join workers before their std::thread objects are destroyed
+	}
+} worker_pool_shutdown_on_exit;
+
+// must be called with worker_mutex held
+static void start_workers(int count) {
+	workers_running = true;
+	for (int i = 0; i < count; ++i)
+		workers.emplace_back(worker_thread, i);
+	workers_started = true;
+	++worker_generation;
+}
+
+// must be called with worker_mutex held
+static void ensure_workers() {
+	if (!workers_started)
+		start_workers(std::max(get_system_thread_count() - 1, 0));
+}
+
+/// Queue a job if the pool has running workers, return false if the job must be run by the calling thread. Must be called with worker_mutex held.
+static bool queue_job(const std::shared_ptr<parallel_for_job> &job) {
+	ensure_workers();
+
+	if (!workers_running || workers.empty())
+		return false;
+
+	worker_jobs.push_back(job);
+	return true;
+}
+
+//
+void set_worker_count(int count) {
+	std::lock_guard<std::mutex> count_lock(worker_count_mutex);
+
+	stop_workers();
+
+	std::lock_guard<std::mutex> lock(worker_mutex);
+	start_workers(std::max(count, 0));
+}
+
+int get_worker_count() {
+	std::lock_guard<std::mutex> lock(worker_mutex);
+	ensure_workers();
+	return int(workers.size());
+}
+
+uint32_t get_worker_pool_generation() {
+	std::lock_guard<std::mutex> lock(worker_mutex);
+	ensure_workers();
+	return worker_generation;
+}
+
+//
+void parallel_for(size_t count, size_t grain, const std::function<void(size_t begin, size_t end)> &fn) {
+	if (count == 0)
+		return;
+
+	grain = std::max(grain, size_t(1));
+
+	if (count <= grain) {
+		fn(0, count); // not worth dispatching
+		return;
+	}
+
+	auto job = std::make_shared<parallel_for_job>();
+	job->fn = &fn;
+	job->count = count;
+	job->grain = grain;
+	job->chunk_count = (count + grain - 1) / grain;
+
+	bool queued;
+	{
+		std::lock_guard<std::mutex> lock(worker_mutex);
+		queued = queue_job(job);
+	}
+
+	if (!queued) {
+		fn(0, count); // no worker
+		return;
+	}
+
+	worker_cv.notify_all();
+
+	run_job_chunks(*job); // the calling thread takes part in the work
+
+	{
+		std::unique_lock<std::mutex> lock(job_done_mutex);
+		job_done_cv.wait(lock, [&] { return job->done_chunk == job->chunk_count; });
+	}
+
+	{
+		std::lock_guard<std::mutex> lock(worker_mutex);
+		const auto i = std::find(std::begin(worker_jobs), std::end(worker_jobs), job);
+		if (i != std::end(worker_jobs))
+			worker_jobs.erase(i);
+	}
+}
+
+void run_async(std::function<void()> fn) {
+	auto job = std::make_shared<parallel_for_job>();
+	job->owned_fn = [fn = std::move(fn)](size_t, size_t) { fn(); };
+	job->fn = &job->owned_fn;
+	job->count = job->grain = job->chunk_count = 1;
+
+	bool queued;
+	{
+		std::lock_guard<std::mutex> lock(worker_mutex);
+		queued = queue_job(job);
+	}
+
+	if (queued)
+		worker_cv.notify_one();
+	else
+		run_job_chunks(*job); // no worker
+}
+
+} // namespace hg
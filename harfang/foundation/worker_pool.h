@@ -0,0 +1,37 @@
+// HARFANG(R) Copyright (C) 2021 Emmanuel Julien, NWNC HARFANG. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
+
+#pragma once
+
+#include <cstddef>
+#include <cstdint>
+#include <functional>
+
+namespace hg {
+
+/**
+	@short Set the number of worker threads used by parallel_for.
+
+	The pool is shutdown when count is 0. By default the pool uses one worker per logical thread minus one, the calling thread taking part in the work.
+	Jobs queued when the pool is restarted are completed before this function returns.
+*/
+void set_worker_count(int count);
+/// Return the number of worker threads used by parallel_for, starting the pool if needed.
+int get_worker_count();
+/// Return a counter incremented each time the pool starts a new set of worker threads.
+uint32_t get_worker_pool_generation();
+
+/**
+	@short Split the [0;count[ range in chunks of at most grain elements and run fn on each chunk using the worker pool.
+
+	The calling thread takes part in the work and the function returns once all chunks have been processed. Chunks are processed in no particular order.
+*/
+void parallel_for(size_t count, size_t grain, const std::function<void(size_t begin, size_t end)> &fn);
+
+/**
+	@short Run fn on the worker pool without waiting for it to complete.
+
+	When the pool has no worker fn is called immediately by the calling thread. Queued jobs are always run, a pool restart completes them before returning.
+*/
+void run_async(std::function<void()> fn);
+
+} // namespace hg
@@ -301,6 +301,44 @@ static void test_anim_float_track() {
 	TEST_CHECK((track.keys[0].t == time_from_ms(100)) && (track.keys[0].v == 0.f));
 }
 
+static void test_anim_key_cursor() {
+	AnimTrackHermiteT<Vec3> track;
+	for (int i = 0; i < 64; ++i)
+		SetKey(track, time_from_ms(i * 100), Vec3(float(i), float(i % 7), 0.f));
+
+	AnimTrackT<bool> bool_track;
+	for (int i = 0; i < 64; ++i)
+		SetKey(bool_track, time_from_ms(i * 100), i % 3 == 0);
+
+	// play forward, seek backward and skip far ahead, cursor evaluation must match a full search
+	const int64_t ms[] = {-50, 0, 10, 120, 150, 230, 990, 2000, 2050, 1200, 1300, 6300, 6350, 7000, 50, 3000, 3010};
+
+	int cursor = 0, bool_cursor = 0;
+	bool ok = true;
+
+	for (auto t : ms) {
+		Vec3 v, v_cursor;
+		TEST_CHECK(Evaluate(track, time_from_ms(t), v) == true);
+		TEST_CHECK(Evaluate(track, time_from_ms(t), v_cursor, cursor) == true);
+		ok = ok && v == v_cursor;
+
+		bool b, b_cursor;
+		Evaluate(bool_track, time_from_ms(t), b);
+		Evaluate(bool_track, time_from_ms(t), b_cursor, bool_cursor);
+		ok = ok && b == b_cursor;
+	}
+
+	TEST_CHECK(ok);
+
+	// keys removed behind the cursor's back
+	while (track.keys.size() > 4)
+		track.keys.pop_back();
+
+	Vec3 v;
+	TEST_CHECK(Evaluate(track, time_from_ms(6350), v, cursor) == true);
+	TEST_CHECK(v == track.keys.back().v);
+}
+
 static InstanceAnimKey SetKey(AnimTrackT<InstanceAnimKey> &track, int64_t ms, const std::string &name, AnimLoopMode mode, float scale) {
 	InstanceAnimKey key;
 	key.anim_name = name;
@@ -941,6 +979,7 @@ void test_animation() {
 	test_anim_int_track();
 	test_anim_vec3_track();
 	test_anim_float_track();
+	test_anim_key_cursor();
 	test_anim_instance_track();
 	test_anim_has_keys();
 	test_anim_reverse();
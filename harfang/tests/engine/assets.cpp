@@ -3,11 +3,18 @@
 #define TEST_NO_MAIN
 #include "acutest.h"
 
+#include "../utils.h"
+
+#include "foundation/dir.h"
+#include "foundation/file.h"
+#include "foundation/format.h"
+#include "foundation/path_tools.h"
+
 #include "engine/assets.h"
 
 using namespace hg;
 
-void test_assets() {
+static void test_ZipPackage() {
 	std::string pkg_path = "./data/package0000.zip";
 	AddAssetsPackage(pkg_path.c_str());
 
@@ -19,7 +26,7 @@ void test_assets() {
 		std::string txt = AssetToString("0000.txt");
 		TEST_CHECK(strcmp(txt.c_str(), "_TEST_ 0000") == 0);
 	}
-	
+
 	{
 		std::string txt = AssetToString("dir00/0000.txt");
 		TEST_CHECK(strcmp(txt.c_str(), "test 0000.txt") == 0);
@@ -31,4 +38,64 @@ void test_assets() {
 	}
 
 	RemoveAssetsPackage(pkg_path.c_str());
-}
\ No newline at end of file
+}
+
+static void test_MappedPackage() {
+	const std::string tmp_dir = PathJoin(test::GetTempDirectoryName(), "test_pak");
+	TEST_CHECK(MkTree(PathJoin(tmp_dir, "dir00/dir01").c_str()) == true);
+
+	for (int i = 0; i < 64; ++i)
+		TEST_CHECK(StringToFile(PathJoin(tmp_dir, format("dir00/dir01/%1.txt").arg(i).str()).c_str(), format("test %1").arg(i).str().c_str()) == true);
+	TEST_CHECK(StringToFile(PathJoin(tmp_dir, "lorem.txt").c_str(), test::LoremIpsum.c_str()) == true);
+
+	for (int deflate = 0; deflate < 2; ++deflate) {
+		const std::string pak_path = PathJoin(test::GetTempDirectoryName(), "test_pak.hgpak");
+		TEST_CHECK(PackAssetsFolder(tmp_dir.c_str(), pak_path.c_str(), deflate != 0) == true);
+		TEST_CHECK(AddAssetsPackage(pak_path.c_str()) == true);
+		TEST_CHECK(AddAssetsPackage(pak_path.c_str()) == false);
+
+		TEST_CHECK(IsAssetFile("lorem.txt") == true);
+		TEST_CHECK(IsAssetFile("dir00/dir01/63.txt") == true);
+		TEST_CHECK(IsAssetFile("dir00/dir01/64.txt") == false);
+
+		for (int i = 0; i < 64; ++i)
+			TEST_CHECK(strcmp(AssetToString(format("dir00/dir01/%1.txt").arg(i).str().c_str()).c_str(), format("test %1").arg(i).str().c_str()) == 0);
+
+		{
+			const auto data = AssetToData("lorem.txt");
+			TEST_CHECK(data.GetSize() == test::LoremIpsum.size());
+			TEST_CHECK(memcmp(data.GetData(), test::LoremIpsum.data(), test::LoremIpsum.size()) == 0);
+		}
+
+		{
+			const auto asset = OpenAsset("lorem.txt");
+			TEST_CHECK(IsValid(asset) == true);
+			TEST_CHECK(GetSize(asset) == test::LoremIpsum.size());
+
+			char buffer[12] = {};
+			TEST_CHECK(Seek(asset, 6, SM_Start) == true);
+			TEST_CHECK(Read(asset, buffer, 11) == 11);
+			TEST_CHECK(strcmp(buffer, "ipsum dolor") == 0);
+
+			const auto data = AssetToData("lorem.txt");
+
+			RemoveAssetsPackage(pak_path.c_str()); // open assets keep the package mapped
+			TEST_CHECK(Read(asset, buffer, 4) == 4);
+			TEST_CHECK(IsAssetFile("lorem.txt") == false);
+			Close(asset);
+
+			const auto data_copy = data; // views on the package keep it mapped
+			TEST_CHECK(data_copy.GetSize() == test::LoremIpsum.size());
+			TEST_CHECK(memcmp(data_copy.GetData(), test::LoremIpsum.data(), test::LoremIpsum.size()) == 0);
+		}
+
+		Unlink(pak_path.c_str());
+	}
+
+	RmTree(tmp_dir.c_str());
+}
+
+void test_assets() {
+	test_ZipPackage();
+	test_MappedPackage();
+}
@@ -0,0 +1,143 @@
+// HARFANG(R) Copyright (C) 2022 NWNC. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
+
+#define TEST_NO_MAIN
+#include "acutest.h"
+
+#include "engine/recast_detour.h"
+
+#include <chrono>
+#include <thread>
+
+using namespace hg;
+
+#if HG_ENABLE_RECAST_DETOUR_API
+
+static NavMeshInput MakeGroundInput(float size) {
+	NavMeshInput input;
+	input.vtx = {{0, 0, 0}, {0, 0, size}, {size, 0, 0}, {size, 0, size}};
+	input.idx = {0, 1, 2, 2, 1, 3}; // facing up
+	return input;
+}
+
+static float GetPathLength(const std::vector<Vec3> &path) {
+	float length = 0.f;
+	for (size_t i = 1; i < path.size(); ++i)
+		length += Dist(path[i - 1], path[i]);
+	return length;
+}
+
+static bool WaitNavMeshTileCache(NavMeshTileCache *cache) {
+	for (int i = 0; i < 1000; ++i) {
+		if (UpdateNavMeshTileCache(cache))
+			return true;
+		std::this_thread::sleep_for(std::chrono::milliseconds(1));
+	}
+	return false;
+}
+
+static void test_NavMeshTileCacheCreate() {
+	TEST_CHECK(CreateNavMeshTileCache({}, 0.5f, 2.f, 45.f, 0.5f) == nullptr);
+
+	const auto input = MakeGroundInput(20.f);
+	TEST_CHECK(CreateNavMeshTileCache(input, 0.5f, 2.f, 45.f, 0.5f, 4) == nullptr); // tile size too small
+
+	auto cache = CreateNavMeshTileCache(input, 0.5f, 2.f, 45.f, 0.5f, 16);
+	TEST_ASSERT(cache != nullptr);
+	TEST_CHECK(GetNavMeshTileCacheNavMesh(cache) != nullptr);
+	TEST_CHECK(UpdateNavMeshTileCache(cache) == true);
+
+	DestroyNavMeshTileCache(cache);
+}
+
+static void test_NavMeshTileCacheObstacles() {
+	auto cache = CreateNavMeshTileCache(MakeGroundInput(20.f), 0.5f, 2.f, 45.f, 0.5f, 16);
+	TEST_ASSERT(cache != nullptr);
+
+	auto query = CreateNavMeshQuery(GetNavMeshTileCacheNavMesh(cache));
+	TEST_ASSERT(query != nullptr);
+
+	const Vec3 from(2.f, 0.f, 4.f), to(18.f, 0.f, 4.f);
+
+	const auto direct_path = FindNavigationPathTo(query, from, to);
+	TEST_ASSERT(!direct_path.empty());
+	TEST_CHECK(Dist(direct_path.back(), to) < 0.5f);
+	TEST_CHECK(GetPathLength(direct_path) < 16.5f);
+
+	const auto obstacle = AddNavMeshBoxObstacle(cache, {{9.f, -1.f, -1.f}, {11.f, 3.f, 15.f}}); // wall with a passage at the far end
+	TEST_CHECK(obstacle != 0);
+	TEST_CHECK(WaitNavMeshTileCache(cache));
+
+	const auto detour_path = FindNavigationPathTo(query, from, to);
+	TEST_ASSERT(!detour_path.empty());
+	TEST_CHECK(Dist(detour_path.back(), to) < 0.5f);
+	TEST_CHECK(GetPathLength(detour_path) > 25.f); // around the wall
+	for (const auto &p : detour_path)
+		TEST_CHECK(p.x <= 9.f || p.x >= 11.f || p.z >= 15.f);
+
+	TEST_CHECK(RemoveNavMeshObstacle(cache, obstacle) == true);
+	TEST_CHECK(RemoveNavMeshObstacle(cache, obstacle) == false);
+	TEST_CHECK(WaitNavMeshTileCache(cache));
+	TEST_CHECK(GetPathLength(FindNavigationPathTo(query, from, to)) < 16.5f);
+
+	// more obstacle changes than the tile cache request queue holds are committed over several updates
+	std::vector<uint32_t> obstacles;
+	for (int i = 0; i < 100; ++i)
+		obstacles.push_back(AddNavMeshCylinderObstacle(cache, {1.f + float(i % 10) * 2.f, 0.f, 10.f + float(i / 10) * 0.9f}, 0.2f, 2.f));
+	for (auto o : obstacles)
+		TEST_CHECK(o != 0);
+	TEST_CHECK(WaitNavMeshTileCache(cache));
+
+	for (auto o : obstacles)
+		TEST_CHECK(RemoveNavMeshObstacle(cache, o) == true);
+	TEST_CHECK(WaitNavMeshTileCache(cache));
+
+	// rebuild the tiles under the obstacle from a new geometry on the worker pool
+	RebuildNavMeshTileCacheArea(cache, MakeGroundInput(20.f), {{0.f, -1.f, 0.f}, {20.f, 1.f, 20.f}});
+	TEST_CHECK(WaitNavMeshTileCache(cache));
+	TEST_CHECK(GetPathLength(FindNavigationPathTo(query, from, to)) < 16.5f);
+
+	DestroyNavMeshQuery(query);
+	DestroyNavMeshTileCache(cache);
+}
+
+static void test_NavMeshTileCacheRebuildUnderObstacles() {
+	auto cache = CreateNavMeshTileCache(MakeGroundInput(20.f), 0.5f, 2.f, 45.f, 0.5f, 16, 16);
+	TEST_ASSERT(cache != nullptr);
+
+	auto query = CreateNavMeshQuery(GetNavMeshTileCacheNavMesh(cache));
+	TEST_ASSERT(query != nullptr);
+
+	const Vec3 from(2.f, 0.f, 4.f), to(18.f, 0.f, 4.f);
+
+	// wall with a passage at the far end made of more obstacles than half the obstacle pool
+	std::vector<uint32_t> obstacles;
+	for (int i = 0; i < 12; ++i)
+		obstacles.push_back(AddNavMeshBoxObstacle(cache, {{9.f, -1.f, -1.f + float(i) * 4.f / 3.f}, {11.f, 3.f, -1.f + float(i + 1) * 4.f / 3.f}}));
+	for (auto o : obstacles)
+		TEST_CHECK(o != 0);
+	TEST_CHECK(WaitNavMeshTileCache(cache));
+	TEST_CHECK(GetPathLength(FindNavigationPathTo(query, from, to)) > 25.f);
+
+	// obstacles over the rebuilt tiles are removed then added again while their previous slot is still in use
+	RebuildNavMeshTileCacheArea(cache, MakeGroundInput(20.f), {{0.f, -1.f, 0.f}, {20.f, 1.f, 20.f}});
+	TEST_CHECK(WaitNavMeshTileCache(cache));
+	TEST_CHECK(GetPathLength(FindNavigationPathTo(query, from, to)) > 25.f);
+
+	for (auto o : obstacles)
+		TEST_CHECK(RemoveNavMeshObstacle(cache, o) == true);
+	TEST_CHECK(WaitNavMeshTileCache(cache));
+	TEST_CHECK(GetPathLength(FindNavigationPathTo(query, from, to)) < 16.5f);
+
+	DestroyNavMeshQuery(query);
+	DestroyNavMeshTileCache(cache);
+}
+
+#endif // HG_ENABLE_RECAST_DETOUR_API
+
+void test_recast_detour() {
+#if HG_ENABLE_RECAST_DETOUR_API
+	test_NavMeshTileCacheCreate();
+	test_NavMeshTileCacheObstacles();
+	test_NavMeshTileCacheRebuildUnderObstacles();
+#endif // HG_ENABLE_RECAST_DETOUR_API
+}
@@ -0,0 +1,102 @@
+// HARFANG(R) Copyright (C) 2022 NWNC. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
+
+#define TEST_NO_MAIN
+#include "acutest.h"
+
+#include "engine/resource_cache.h"
+
+using namespace hg;
+
+using TestRef = ResourceRef<int>;
+
+static int destroyed_count = 0;
+
+static void DestroyTestResource(int &) { ++destroyed_count; }
+
+static void test_EvictOverBudgetOrder() {
+	ResourceCache<int, TestRef> cache(DestroyTestResource);
+	cache.SetBudget(250);
+
+	const auto a = cache.Add("a", 0);
+	cache.SetSize(a, 100);
+	cache.EvictOverBudget(); // frame 0 -> 1
+
+	const auto b = cache.Add("b", 1);
+	cache.SetSize(b, 100);
+	cache.EvictOverBudget(); // frame 1 -> 2
+
+	const auto c = cache.Add("c", 2);
+	cache.SetSize(c, 100);
+	TEST_CHECK(cache.GetMemoryUsage() == 300);
+
+	cache.MarkUsed(a);
+	cache.EvictOverBudget(); // frame 2 -> 3, a and c are used during this frame
+	TEST_CHECK(cache.IsValidRef(a));
+	TEST_CHECK(!cache.IsValidRef(b));
+	TEST_CHECK(cache.IsValidRef(c));
+	TEST_CHECK(cache.GetMemoryUsage() == 200);
+
+	cache.SetBudget(50);
+	TEST_CHECK(cache.EvictOverBudget() == 2); // least recently used first, down to budget
+	TEST_CHECK(!cache.IsValidRef(a));
+	TEST_CHECK(!cache.IsValidRef(c));
+	TEST_CHECK(cache.GetMemoryUsage() == 0);
+	TEST_CHECK(cache.Has("a") == TestRef{});
+}
+
+static void test_EvictOverBudgetAccounting() {
+	ResourceCache<int, TestRef> cache(DestroyTestResource);
+
+	const auto a = cache.Add("a", 0);
+	const auto b = cache.Add("b", 1);
+	cache.SetSize(a, 64);
+	cache.SetSize(b, 32);
+	TEST_CHECK(cache.GetMemoryUsage() == 96);
+
+	cache.SetSize(a, 16); // resize
+	TEST_CHECK(cache.GetMemoryUsage() == 48);
+
+	cache.Update(b, 2); // size is unknown after an update
+	TEST_CHECK(cache.GetMemoryUsage() == 16);
+	TEST_CHECK(cache.GetSize(b) == 0);
+
+	cache.EvictOverBudget();
+	TEST_CHECK(cache.EvictOverBudget() == 0); // no budget, nothing is evicted
+
+	cache.SetBudget(1);
+	TEST_CHECK(cache.EvictOverBudget() == 1); // resources of unknown size are never evicted
+	TEST_CHECK(!cache.IsValidRef(a));
+	TEST_CHECK(cache.IsValidRef(b));
+	TEST_CHECK(cache.GetMemoryUsage() == 0);
+
+	cache.Destroy(b);
+	TEST_CHECK(cache.GetMemoryUsage() == 0);
+}
+
+static void test_EvictOverBudgetSkipReferenced() {
+	ResourceCache<int, TestRef> cache(DestroyTestResource);
+	cache.SetBudget(100);
+
+	const auto a = cache.Add("a", 0);
+	const auto b = cache.Add("b", 1);
+	cache.SetSize(a, 100);
+	cache.SetSize(b, 100);
+	cache.EvictOverBudget();
+
+	destroyed_count = 0;
+	TEST_CHECK(cache.EvictOverBudget([&](TestRef ref) { return ref == a; }) == 1);
+	TEST_CHECK(destroyed_count == 1);
+	TEST_CHECK(cache.IsValidRef(a));
+	TEST_CHECK(!cache.IsValidRef(b));
+
+	cache.SetBudget(50);
+	TEST_CHECK(cache.EvictOverBudget([&](TestRef ref) { return ref == a; }) == 0); // over budget but referenced
+	TEST_CHECK(cache.IsValidRef(a));
+	TEST_CHECK(cache.GetMemoryUsage() == 100);
+}
+
+void test_resource_cache() {
+	test_EvictOverBudgetOrder();
+	test_EvictOverBudgetAccounting();
+	test_EvictOverBudgetSkipReferenced();
+}
@@ -17,10 +17,18 @@
 #include "engine/scene_systems.h"
 #if HG_ENABLE_BULLET3_SCENE_PHYSICS
 #include "engine/scene_bullet3_physics.h"
+
+#include <LinearMath/btThreads.h>
+
+#include <algorithm>
+#include <chrono>
+#include <mutex>
+#include <thread>
 #endif
 
 #include "foundation/data.h"
 #include "foundation/data_rw_interface.h"
+#include "foundation/worker_pool.h"
 
 using namespace hg;
 
@@ -80,6 +88,199 @@ static void test_WalkHierarchy() {
 	TEST_CHECK(r == a0);
 }
 
+static void test_BatchedTransforms() {
+	Scene scene;
+
+	const auto a = CreatePointLight(scene, Mat4::Identity, 0.f);
+	const auto b = CreatePointLight(scene, Mat4::Identity, 0.f);
+	b.GetTransform().SetParent(a.ref);
+
+	scene.SetTransformsTRS(std::vector<Node>{a, b}, {{1, 0, 0}, {0, 2, 0}}, {{}, {}}, {{1, 1, 1}, {1, 1, 1}});
+
+	std::vector<Vec3> pos, rot, scl;
+	scene.GetTransformsTRS(std::vector<Node>{b, a}, pos, rot, scl);
+	TEST_CHECK(pos.size() == 2);
+	TEST_CHECK(pos[0] == Vec3(0, 2, 0));
+	TEST_CHECK(pos[1] == Vec3(1, 0, 0));
+
+	scene.Update(0);
+
+	const auto worlds = scene.GetNodesWorldMatrices(std::vector<Node>{a, b, NullNode});
+	TEST_CHECK(worlds.size() == 3);
+	TEST_CHECK(GetT(worlds[0]) == Vec3(1, 0, 0));
+	TEST_CHECK(GetT(worlds[1]) == Vec3(1, 2, 0));
+	TEST_CHECK(worlds[2] == Mat4::Identity);
+}
+
+static void test_ParallelWorldMatrices() {
+	Scene scene;
+
+	// 2048 chains of 4 nodes, each node being parented to the node created after it
+	std::vector<Node> leaves;
+	for (int i = 0; i < 2048; ++i) {
+		auto child = CreatePointLight(scene, TranslationMat4({1, 0, 0}), 0.f);
+		leaves.push_back(child);
+
+		for (int j = 1; j < 4; ++j) {
+			const auto node = CreatePointLight(scene, TranslationMat4({1, 0, 0}), 0.f);
+			child.GetTransform().SetParent(node.ref);
+			child = node;
+		}
+	}
+
+	scene.SetParallelWorldMatrices(true);
+	scene.Update(0);
+
+	bool ok = true;
+	for (const auto &world : scene.GetNodesWorldMatrices(leaves))
+		ok = ok && GetT(world) == Vec3(4, 0, 0);
+	TEST_CHECK(ok);
+
+	// reparenting invalidates the cached order
+	leaves[0].GetTransform().SetParent(leaves[1].ref);
+	scene.Update(0);
+	TEST_CHECK(GetT(leaves[0].GetWorld()) == Vec3(5, 0, 0));
+
+	scene.SetParallelWorldMatrices(false);
+	scene.Update(0);
+	TEST_CHECK(GetT(leaves[0].GetWorld()) == Vec3(5, 0, 0));
+}
+
+static void test_ParallelDisplayLists() {
+	PipelineResources resources;
+
+	Model mdl;
+	for (int i = 0; i < 2; ++i) {
+		mdl.bounds.push_back(MinMax({-1, -1, -1}, {1, 1, 1}));
+		mdl.lists.push_back({BGFX_INVALID_HANDLE, BGFX_INVALID_HANDLE});
+		mdl.mats.push_back(uint16_t(i));
+	}
+	const auto mdl_ref = resources.models.Add("model", std::move(mdl));
+
+	Material transparent;
+	SetMaterialBlendMode(transparent, BM_Alpha);
+
+	Scene scene;
+
+	std::vector<Node> nodes;
+	for (int i = 0; i < 2048; ++i)
+		nodes.push_back(CreateObject(scene, TranslationMat4({float(i), 0, 0}), mdl_ref, {Material{}, i % 3 ? Material{} : transparent}));
+
+	for (int i = 0; i < 2048; i += 5)
+		scene.DestroyNode(nodes[i].ref); // leave holes in the node storage
+	scene.GarbageCollect();
+
+	std::vector<ModelDisplayList> opaque, transparent_dls, parallel_opaque, parallel_transparent;
+	std::vector<SkinnedModelDisplayList> opaque_skinned, transparent_skinned;
+
+	scene.GetModelDisplayLists(opaque, transparent_dls, opaque_skinned, transparent_skinned, resources);
+
+	const auto worker_count = get_worker_count();
+	set_worker_count(3);
+
+	scene.SetParallelDisplayLists(true);
+	scene.GetModelDisplayLists(parallel_opaque, parallel_transparent, opaque_skinned, transparent_skinned, resources);
+
+	set_worker_count(worker_count);
+
+	TEST_CHECK(opaque.size() > 0 && transparent_dls.size() > 0);
+	TEST_CHECK(parallel_opaque.size() == opaque.size());
+	TEST_CHECK(parallel_transparent.size() == transparent_dls.size());
+
+	bool same = true;
+	for (size_t i = 0; same && i < opaque.size(); ++i)
+		same = parallel_opaque[i].mtx_idx == opaque[i].mtx_idx && parallel_opaque[i].lst_idx == opaque[i].lst_idx && parallel_opaque[i].mat == opaque[i].mat;
+	for (size_t i = 0; same && i < transparent_dls.size(); ++i)
+		same = parallel_transparent[i].mtx_idx == transparent_dls[i].mtx_idx && parallel_transparent[i].mat == transparent_dls[i].mat;
+	TEST_CHECK(same);
+}
+
+static void test_IncrementalWorldMatrices() {
+	Scene scene;
+
+	const auto a = CreatePointLight(scene, TranslationMat4({1, 0, 0}), 0.f);
+	const auto b = CreatePointLight(scene, TranslationMat4({1, 0, 0}), 0.f);
+	const auto c = CreatePointLight(scene, TranslationMat4({1, 0, 0}), 0.f);
+	b.GetTransform().SetParent(a.ref);
+
+	scene.Update(0);
+	TEST_CHECK(scene.GetComputedWorldMatrixCount() == 3);
+
+	scene.Update(0);
+	TEST_CHECK(scene.GetComputedWorldMatrixCount() == 0); // nothing changed
+
+	const auto revisions = scene.GetTransformWorldRevisions();
+
+	a.GetTransform().SetPos({2, 0, 0});
+	scene.Update(0);
+	TEST_CHECK(scene.GetComputedWorldMatrixCount() == 2); // a and its child b
+	TEST_CHECK(scene.GetTransformWorldRevisions()[a.GetTransform().ref.idx] != revisions[a.GetTransform().ref.idx]);
+	TEST_CHECK(scene.GetTransformWorldRevisions()[b.GetTransform().ref.idx] != revisions[b.GetTransform().ref.idx]);
+	TEST_CHECK(scene.GetTransformWorldRevisions()[c.GetTransform().ref.idx] == revisions[c.GetTransform().ref.idx]);
+	TEST_CHECK(GetT(b.GetWorld()) == Vec3(3, 0, 0));
+	TEST_CHECK(GetT(scene.GetPreviousTransformWorldMatrix(b.GetTransform().ref.idx)) == Vec3(2, 0, 0));
+
+	scene.Update(0);
+	TEST_CHECK(scene.GetComputedWorldMatrixCount() == 0);
+	TEST_CHECK(GetT(scene.GetPreviousTransformWorldMatrix(b.GetTransform().ref.idx)) == Vec3(3, 0, 0));
+
+	// a world matrix set from outside holds for a single frame
+	scene.ReadyWorldMatrices();
+	scene.SetNodeWorldMatrix(c.ref, TranslationMat4({0, 5, 0}));
+	scene.ComputeWorldMatrices();
+	TEST_CHECK(GetT(c.GetWorld()) == Vec3(0, 5, 0));
+
+	scene.Update(0);
+	TEST_CHECK(scene.GetComputedWorldMatrixCount() == 1);
+	TEST_CHECK(GetT(c.GetWorld()) == Vec3(1, 0, 0));
+
+	// a world matrix written after the update, as when syncing physics to the scene, is stored as previous world matrix and does not stick
+	scene.SetNodeWorldMatrix(a.ref, TranslationMat4({0, 7, 0}));
+	scene.Update(0);
+	TEST_CHECK(scene.GetComputedWorldMatrixCount() == 2); // a and its child b
+	TEST_CHECK(GetT(scene.GetPreviousTransformWorldMatrix(a.GetTransform().ref.idx)) == Vec3(0, 7, 0));
+	TEST_CHECK(GetT(a.GetWorld()) == Vec3(2, 0, 0));
+	TEST_CHECK(GetT(b.GetWorld()) == Vec3(3, 0, 0));
+
+	scene.SetNodeWorldMatrix(a.ref, TranslationMat4({0, 7, 0}));
+	a.GetTransform().SetPos({4, 0, 0});
+	scene.Update(0);
+	TEST_CHECK(GetT(a.GetWorld()) == Vec3(4, 0, 0));
+	TEST_CHECK(GetT(b.GetWorld()) == Vec3(5, 0, 0));
+}
+
+static void test_CullingAfterExternalWorldWrite() {
+	PipelineResources resources;
+
+	Model mdl;
+	mdl.bounds = {{{-1, -1, -1}, {1, 1, 1}}};
+	const auto mdl_ref = resources.models.Add("mdl", mdl);
+
+	Scene scene;
+	const auto node = CreateObject(scene, Mat4::Identity, mdl_ref, {});
+	scene.Update(0);
+
+	const std::vector<ModelDisplayList> display_lists = {{nullptr, node.GetTransform().ref.idx, uint16_t(mdl_ref.ref.idx), 0}};
+
+	ModelDisplayListCulling culling;
+	UpdateModelDisplayListCulling(culling, display_lists, scene.GetTransformWorldMatrices(), scene.GetTransformWorldRevisions(), resources);
+	TEST_CHECK(culling.bounds[0].mn == Vec3(-1, -1, -1));
+
+	UpdateModelDisplayListCulling(culling, display_lists, scene.GetTransformWorldMatrices(), scene.GetTransformWorldRevisions(), resources);
+	TEST_CHECK(culling.stats.updated_count == 0); // nothing changed
+
+	// world matrices written outside of ComputeWorldMatrices, as when syncing physics to the scene
+	scene.SetNodeWorldMatrix(node.ref, TranslationMat4({10, 0, 0}));
+	UpdateModelDisplayListCulling(culling, display_lists, scene.GetTransformWorldMatrices(), scene.GetTransformWorldRevisions(), resources);
+	TEST_CHECK(culling.stats.updated_count == 1);
+	TEST_CHECK(culling.bounds[0].mn == Vec3(9, -1, -1));
+
+	node.GetTransform().SetWorld(TranslationMat4({20, 0, 0}));
+	UpdateModelDisplayListCulling(culling, display_lists, scene.GetTransformWorldMatrices(), scene.GetTransformWorldRevisions(), resources);
+	TEST_CHECK(culling.stats.updated_count == 1);
+	TEST_CHECK(culling.bounds[0].mn == Vec3(19, -1, -1));
+}
+
 static void test_DisableLightNodes() {
 	Scene scene;
 
@@ -153,6 +354,48 @@ static void test_DisableObjectNodes() {
 	TEST_CHECK(opaque.size() == 0);
 }
 
+static void test_EvictResourcesUsedByScene() {
+	PipelineResources resources;
+	resources.SetTextureBudget(1);
+	resources.SetModelBudget(1);
+
+	const auto used_mdl = resources.models.Add("used_mdl", {});
+	const auto unused_mdl = resources.models.Add("unused_mdl", {});
+	resources.models.SetSize(used_mdl, 64);
+	resources.models.SetSize(unused_mdl, 64);
+
+	const auto used_tex = resources.textures.Add("used_tex", {});
+	const auto probe_tex = resources.textures.Add("probe_tex", {});
+	const auto unused_tex = resources.textures.Add("unused_tex", {});
+	resources.textures.SetSize(used_tex, 64);
+	resources.textures.SetSize(probe_tex, 64);
+	resources.textures.SetSize(unused_tex, 64);
+
+	Scene scene;
+
+	Material mat;
+	mat.textures["uBaseOpacityMap"] = {used_tex, 0}; // material stored inline in the scene object, unknown to the resources
+	CreateObject(scene, Mat4::Identity, used_mdl, {mat});
+	scene.environment.brdf_map = probe_tex;
+
+	PipelineResourceReferences references;
+	scene.CollectResourceReferences(references);
+	TEST_CHECK(references.models.count(used_mdl.ref.idx) == 1);
+	TEST_CHECK(references.models.count(unused_mdl.ref.idx) == 0);
+	TEST_CHECK(references.textures.count(used_tex.ref.idx) == 1);
+	TEST_CHECK(references.textures.count(probe_tex.ref.idx) == 1);
+
+	EvictResourcesOverBudget(resources, scene); // resources are used during the frame they are added in
+	TEST_CHECK(EvictResourcesOverBudget(resources, scene) == 2);
+
+	TEST_CHECK(resources.models.IsValidRef(used_mdl));
+	TEST_CHECK(!resources.models.IsValidRef(unused_mdl));
+	TEST_CHECK(resources.textures.IsValidRef(used_tex));
+	TEST_CHECK(resources.textures.IsValidRef(probe_tex));
+	TEST_CHECK(!resources.textures.IsValidRef(unused_tex));
+	TEST_CHECK(resources.GetMemoryUsage() == 64 * 3);
+}
+
 static void test_LoadSaveEmptyScene() {
 	PipelineResources resources;
 
@@ -545,6 +788,64 @@ static void test_PhysicDynamicVsStaticRigidBodyCollisionCallback() {
 	TEST_CHECK(collision_count > 0);
 }
 
+static void test_PhysicCollisionEvents() {
+	Scene scene;
+	auto sphere = CreatePhysicSphere(scene, 0.5, TranslationMat4({0, 2, 0}), {}, {}, 1.f);
+	auto ground = CreatePhysicCube(scene, {10, 1, 10}, TranslationMat4({0, -0.5f, 0}), {}, {}, 0.f);
+
+	SceneBullet3Physics physics;
+	physics.SceneCreatePhysicsFromAssets(scene);
+	physics.NodeStartTrackingCollisionEvents(sphere.ref, CETM_EventAndContacts);
+	physics.NodeStartTrackingCollisionEvents(ground.ref);
+
+	CollisionEvents events;
+	size_t begin_count = 0, persist_count = 0;
+
+	for (int i = 0; i < 256; ++i) {
+		physics.StepSimulation(time_from_ms(10));
+		physics.CollectCollisionEvents(scene, events);
+
+		for (const auto &event : events.events) {
+			TEST_CHECK(event.type != CET_End);
+
+			if (event.type == CET_Begin)
+				++begin_count;
+			else
+				++persist_count;
+
+			if (event.node_a_idx == int(sphere.ref.idx)) {
+				TEST_CHECK(event.node_b_idx == int(ground.ref.idx));
+				TEST_CHECK(event.contact_count > 0);
+
+				for (auto j = event.contact_first; j < event.contact_first + event.contact_count; ++j) {
+					TEST_CHECK(events.contacts[j].node_a_idx == int(sphere.ref.idx));
+					TEST_CHECK(events.contacts[j].N.y > 0.9f); // pointing toward the sphere
+				}
+			} else {
+				TEST_CHECK(event.node_a_idx == int(ground.ref.idx));
+				TEST_CHECK(event.node_b_idx == int(sphere.ref.idx));
+				TEST_CHECK(event.contact_count == 0); // ground tracked using CETM_EventOnly
+			}
+		}
+	}
+
+	TEST_CHECK(begin_count == 2); // one per tracked node
+	TEST_CHECK(persist_count > 0);
+
+	physics.NodeResetWorld(sphere.ref, TranslationMat4({0, 10, 0}));
+	physics.StepSimulation(time_from_ms(10));
+	physics.CollectCollisionEvents(scene, events);
+
+	TEST_CHECK(events.events.size() == 2);
+	for (const auto &event : events.events)
+		TEST_CHECK(event.type == CET_End);
+	TEST_CHECK(events.contacts.empty());
+
+	physics.StepSimulation(time_from_ms(10));
+	physics.CollectCollisionEvents(scene, events);
+	TEST_CHECK(events.events.empty());
+}
+
 static void test_PhysicKinematicRigidBodyCollideWorld() {
 	Scene scene;
 	auto sphere = CreatePhysicSphere(scene, 0.5, TranslationMat4({0, 0, 0}), {}, {}, 1.f);
@@ -623,14 +924,91 @@ static void test_PhysicRaycastAllHitsOutOfReach() {
 	const auto out = physics.RaycastAllHits(scene, {0, 0, -10.f}, {0, 0, -2.f});
 	TEST_CHECK(out.empty() == true);
 }
+
+static void test_PhysicRaycastBatch() {
+	Scene scene;
+	CreatePhysicCube(scene, {1, 1, 1}, Mat4::Identity, InvalidModelRef, {}, 0.f);
+	CreatePhysicCube(scene, {.1f, .1f, .1f}, TranslationMat4({0, 0, -1.f}), InvalidModelRef, {}, 0.f);
+	CreatePhysicCube(scene, {.1f, .1f, .1f}, TranslationMat4({2.f, 0, 1.f}), InvalidModelRef, {}, 0.f);
+
+	SceneBullet3Physics physics;
+	physics.SceneCreatePhysicsFromAssets(scene);
+
+	const std::vector<Vec3> p0 = {{0, 0, -10.f}, {0, 0, 10.f}, {2.f, 0, -10.f}, {0, 0, -10.f}, {5.f, 0, -10.f}, {0, 10.f, 0}};
+	const std::vector<Vec3> p1 = {{0, 0, 10.f}, {0, 0, -10.f}, {2.f, 0, 10.f}, {0, 0, -2.f}, {5.f, 0, 10.f}, {0, -10.f, 0}};
+
+	const auto out = physics.RaycastBatch(scene, p0, p1);
+	TEST_ASSERT(out.node_idx.size() == p0.size());
+
+	int hit_count = 0;
+	for (size_t i = 0; i < p0.size(); ++i) {
+		const auto first_hit = physics.RaycastFirstHit(scene, p0[i], p1[i]);
+
+		if (first_hit.node.IsValid()) {
+			TEST_CHECK(out.node_idx[i] == int(first_hit.node.ref.idx));
+			TEST_CHECK(Dist(out.P[i], first_hit.P) < 0.001f);
+			TEST_CHECK(Dist(out.N[i], first_hit.N) < 0.001f);
+			++hit_count;
+		} else {
+			TEST_CHECK(out.node_idx[i] == -1);
+		}
+	}
+	TEST_CHECK(hit_count == 4); // rays 3 and 4 miss
+
+	TEST_CHECK(physics.RaycastBatch(scene, p0, {p1[0]}).node_idx.empty()); // mismatched lists
+}
+
+static void test_PhysicMultithreadedWorldPoolRestarts() {
+	Scene scene;
+	CreatePhysicCube(scene, {100, 1, 100}, TranslationMat4({0, -0.5f, 0}), {}, {}, 0.f);
+	for (int i = 0; i < 64; ++i)
+		CreatePhysicCube(scene, {1, 1, 1}, TranslationMat4({float(i % 8) * 2.f, 0.5f, float(i / 8) * 2.f}), {}, {}, 1.f);
+	scene.Update(0);
+
+	const auto worker_count = get_worker_count();
+
+	SceneBullet3Physics physics(8);
+	physics.SceneCreatePhysicsFromAssets(scene);
+
+	struct RecordThreadIndexes : btIParallelForBody {
+		void forLoop(int, int) const override {
+			std::this_thread::sleep_for(std::chrono::milliseconds(1)); // give workers a chance to grab a chunk
+			std::lock_guard<std::mutex> lock(mutex);
+			max_index = std::max(max_index, btGetCurrentThreadIndex());
+		}
+
+		mutable std::mutex mutex;
+		mutable unsigned int max_index = 0;
+	};
+
+	// each restart spawns new worker threads, more than BT_MAX_THREAD_COUNT threads are spawned over the test
+	for (int i = 0; i < 10; ++i) {
+		set_worker_count(8);
+
+		for (int j = 0; j < 4; ++j)
+			physics.StepSimulation(time_from_ms(16));
+
+		RecordThreadIndexes body;
+		btParallelFor(0, 32, 1, body);
+		TEST_CHECK(body.max_index <= 8);
+	}
+
+	set_worker_count(worker_count);
+}
 #endif // HG_ENABLE_BULLET3_SCENE_PHYSICS
 
 void test_scene() {
 	test_ComponentGarbageCollection();
 	test_DuplicateNodes();
 	test_WalkHierarchy();
+	test_BatchedTransforms();
+	test_ParallelWorldMatrices();
+	test_ParallelDisplayLists();
+	test_IncrementalWorldMatrices();
+	test_CullingAfterExternalWorldWrite();
 	test_DisableLightNodes();
 	test_DisableObjectNodes();
+	test_EvictResourcesUsedByScene();
 	test_LoadSaveEmptyScene();
 	test_LoadSaveEmptySceneBinary();
 	test_LoadSaveObject();
@@ -650,10 +1028,13 @@ void test_scene() {
 	test_PhysicDynamicRigidBodyFreefall();
 	test_PhysicKinematicRigidBodyNoFreefall();
 	test_PhysicDynamicVsStaticRigidBodyCollisionCallback();
+	test_PhysicCollisionEvents();
 	test_PhysicKinematicRigidBodyCollideWorld();
 	test_PhysicRaycastFirstHit();
 	test_PhysicRaycastFirstHitOutOfReach();
 	test_PhysicRaycastAllHits();
 	test_PhysicRaycastAllHitsOutOfReach();
+	test_PhysicRaycastBatch();
+	test_PhysicMultithreadedWorldPoolRestarts();
 #endif // HG_ENABLE_BULLET3_SCENE_PHYSICS
 }
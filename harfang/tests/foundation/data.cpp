@@ -18,6 +18,8 @@
 
 #include "../utils.h"
 
+#include <vector>
+
 using namespace hg;
 
 static int g_alloc_sentinel = 0;
@@ -257,4 +259,20 @@ void test_data() {
 		TEST_CHECK(Unlink(filename.c_str()) == true);
 #endif
 	}
+
+	{
+		std::vector<uint8_t> buffer(100000, 0x55);
+		Data view(buffer.data(), buffer.size(), nullptr);
+
+		view.Rewind(); // takes ownership of a copy of the view content
+		TEST_CHECK(view.GetSize() == buffer.size());
+		TEST_CHECK(view.GetCapacity() >= buffer.size());
+
+		const uint32_t v = 0xdeadbeef;
+		TEST_CHECK(view.Write(&v, sizeof(v)) == sizeof(v));
+		TEST_CHECK(view.GetSize() == buffer.size());
+		TEST_CHECK(view.GetData() != buffer.data());
+		TEST_CHECK(view.GetData()[4] == 0x55 && view.GetData()[buffer.size() - 1] == 0x55);
+		TEST_CHECK(buffer[0] == 0x55); // the viewed memory is never written to
+	}
 }
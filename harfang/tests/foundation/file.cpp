@@ -192,6 +192,29 @@ void test_file() {
 		Unlink(filename_1.c_str());
 	}
 
+	{
+		std::string filename_0 = hg::test::CreateTempFilepath();
+		std::string filename_1 = hg::test::CreateTempFilepath();
+		std::string filename_2 = hg::test::CreateTempFilepath();
+
+		TEST_CHECK(StringToFile(filename_0.c_str(), g_dummy_data) == true);
+		Unlink(filename_1.c_str()); // temporary files might be created on some platforms
+		Unlink(filename_2.c_str());
+
+		TEST_CHECK(LinkFile(filename_0.c_str(), filename_1.c_str()) == true);
+		TEST_CHECK(LinkFile(filename_0.c_str(), filename_1.c_str()) == false);
+		TEST_CHECK(FileToString(filename_1.c_str()) == g_dummy_data);
+
+		Unlink(filename_0.c_str()); // the link keeps the content alive
+		TEST_CHECK(FileToString(filename_1.c_str()) == g_dummy_data);
+
+		TEST_CHECK(RenameFile(filename_1.c_str(), filename_2.c_str()) == true);
+		TEST_CHECK(IsFile(filename_1.c_str()) == false);
+		TEST_CHECK(FileToString(filename_2.c_str()) == g_dummy_data);
+
+		Unlink(filename_2.c_str());
+	}
+
 	{ 
 		ScopedFile file(Open("invalid.bin"));
 		TEST_CHECK((file ==true) == false);
@@ -0,0 +1,93 @@
+// HARFANG(R) Copyright (C) 2022 NWNC. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
+
+#define TEST_NO_MAIN
+#include "acutest.h"
+
+#include "foundation/minmax_tree.h"
+
+#include "foundation/math.h"
+#include "foundation/matrix44.h"
+#include "foundation/projection.h"
+#include "foundation/rand.h"
+#include "foundation/unit.h"
+
+#include <algorithm>
+
+using namespace hg;
+
+static std::vector<uint32_t> QueryBruteForce(const std::vector<MinMax> &bounds, const Frustum &frustum) {
+	std::vector<uint32_t> items;
+	for (uint32_t i = 0; i < bounds.size(); ++i)
+		if (TestVisibility(frustum, bounds[i]) != V_Outside)
+			items.push_back(i);
+	return items;
+}
+
+static std::vector<uint32_t> QueryTree(const MinMaxTree &tree, const std::vector<MinMax> &bounds, const Frustum &frustum, MinMaxTreeQueryStats *stats = nullptr) {
+	std::vector<uint32_t> items;
+	QueryMinMaxTree(tree, bounds.data(), frustum, items, stats);
+	std::sort(std::begin(items), std::end(items));
+	return items;
+}
+
+void test_minmax_tree() {
+	Seed(0);
+
+	std::vector<MinMax> bounds(4096);
+	for (auto &mm : bounds)
+		mm = MinMaxFromPositionSize({FRRand(-100.f, 100.f), FRRand(-10.f, 10.f), FRRand(-100.f, 100.f)}, {FRand(2.f), FRand(2.f), FRand(2.f)});
+
+	const auto proj = ComputePerspectiveProjectionMatrix(0.1f, 50.f, FovToZoomFactor(Deg(60.f)), {1.f, 1.f});
+	const auto frustum = MakeFrustum(proj, TranslationMat4({0.f, 0.f, -60.f}));
+
+	MinMaxTree tree;
+
+	{
+		BuildMinMaxTree(tree, nullptr, 0);
+		TEST_CHECK(GetNodeCount(tree) == 0);
+		TEST_CHECK(QueryTree(tree, {}, frustum).empty());
+	}
+
+	BuildMinMaxTree(tree, bounds.data(), bounds.size());
+	TEST_CHECK(GetItemCount(tree) == bounds.size());
+	TEST_CHECK(GetNodeCount(tree) > 1);
+
+	for (uint32_t i = 0; i < bounds.size(); ++i) {
+		const auto leaf = tree.item_leaf[i];
+		TEST_CHECK(tree.node_child[leaf] == 0);
+		TEST_CHECK(tree.node_count[leaf] <= 4);
+	}
+
+	{
+		MinMaxTreeQueryStats stats;
+		const auto items = QueryTree(tree, bounds, frustum, &stats);
+		TEST_CHECK(!items.empty());
+		TEST_CHECK(items == QueryBruteForce(bounds, frustum));
+		TEST_CHECK(stats.node_tested + stats.item_tested < bounds.size()); // whole subtrees are accepted or rejected
+	}
+
+	// move some items then refit
+	std::vector<uint32_t> modified;
+	for (uint32_t i = 0; i < bounds.size(); i += 7) {
+		bounds[i] = MinMaxFromPositionSize({FRRand(-50.f, 50.f), 0.f, FRRand(-50.f, 50.f)}, {1.f, 1.f, 1.f});
+		modified.push_back(i);
+	}
+
+	RefitMinMaxTree(tree, bounds.data(), modified);
+	TEST_CHECK(QueryTree(tree, bounds, frustum) == QueryBruteForce(bounds, frustum));
+
+	// scatter items far away, the tree no longer bounds them tightly
+	modified.clear();
+	for (uint32_t i = 0; i < bounds.size(); i += 2) {
+		bounds[i] = MinMaxFromPositionSize({FRRand(-1000.f, 1000.f), FRRand(-1000.f, 1000.f), FRRand(-1000.f, 1000.f)}, {1.f, 1.f, 1.f});
+		modified.push_back(i);
+	}
+
+	RefitMinMaxTree(tree, bounds.data(), modified);
+	TEST_CHECK(QueryTree(tree, bounds, frustum) == QueryBruteForce(bounds, frustum));
+	TEST_CHECK(NeedsRebuild(tree) == true);
+
+	BuildMinMaxTree(tree, bounds.data(), bounds.size());
+	TEST_CHECK(NeedsRebuild(tree) == false);
+	TEST_CHECK(QueryTree(tree, bounds, frustum) == QueryBruteForce(bounds, frustum));
+}
@@ -0,0 +1,201 @@
+// HARFANG(R) Copyright (C) 2022 NWNC. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
+
+#define TEST_NO_MAIN
+#include "acutest.h"
+
+#include "foundation/file.h"
+#include "foundation/profiler.h"
+#include "foundation/worker_pool.h"
+
+#include "../utils.h"
+
+#include <algorithm>
+#include <thread>
+
+using namespace hg;
+
+static const ProfilerFrame::Task *FindTask(const ProfilerFrame &frame, const std::string &name) {
+	const auto i = std::find_if(std::begin(frame.tasks), std::end(frame.tasks), [&](const ProfilerFrame::Task &task) { return task.name == name; });
+	return i != std::end(frame.tasks) ? &*i : nullptr;
+}
+
+static ProfilerFrame MakeProfilerFrame(time_ns start, const std::vector<std::pair<std::string, time_ns>> &tasks) {
+	ProfilerFrame frame;
+	frame.start = frame.end = start;
+
+	for (const auto &i : tasks) {
+		ProfilerFrame::Section section;
+		section.start = frame.end;
+		section.end = frame.end = section.start + i.second;
+
+		ProfilerFrame::Task task;
+		task.name = i.first;
+		task.duration = i.second;
+		task.section_indexes = {frame.sections.size()};
+
+		frame.sections.push_back(section);
+		frame.tasks.push_back(task);
+	}
+
+	return frame;
+}
+
+static void test_profiler_frame_history() {
+	ProfilerFrameHistory history(4);
+	TEST_CHECK(history.GetFrameCount() == 0);
+	TEST_CHECK(history.GetTaskStats().empty());
+
+	for (int i = 1; i <= 6; ++i)
+		history.PushFrame(MakeProfilerFrame(0, {{"a", time_from_ms(i)}, {"b", time_from_ms(10)}}));
+	history.PushFrame(MakeProfilerFrame(0, {{"a", time_from_ms(7)}}));
+
+	TEST_CHECK(history.GetFrameCount() == 4);
+
+	ProfilerTaskStats stats;
+	TEST_CHECK(history.GetTaskStats("a", stats));
+	TEST_CHECK(stats.frame_count == 4); // frames 4 to 7
+	TEST_CHECK(stats.section_count == 4);
+	TEST_CHECK(stats.min == time_from_ms(4));
+	TEST_CHECK(stats.max == time_from_ms(7));
+	TEST_CHECK(stats.avg == time_from_ms(11) / 2);
+	TEST_CHECK(stats.p50 == time_from_ms(5));
+	TEST_CHECK(stats.p90 == time_from_ms(7));
+	TEST_CHECK(stats.p99 == time_from_ms(7));
+
+	TEST_CHECK(history.GetTaskStats("b", stats));
+	TEST_CHECK(stats.frame_count == 3); // b was not recorded in the last frame
+	TEST_CHECK(stats.min == time_from_ms(10) && stats.max == time_from_ms(10));
+
+	TEST_CHECK(!history.GetTaskStats("c", stats));
+
+	const auto all_stats = history.GetTaskStats();
+	TEST_CHECK(all_stats.size() == 2);
+	TEST_CHECK(all_stats[0].name == "a" && all_stats[1].name == "b");
+
+	const auto frame_stats = history.GetFrameStats();
+	TEST_CHECK(frame_stats.frame_count == 4);
+	TEST_CHECK(frame_stats.min == time_from_ms(7));
+	TEST_CHECK(frame_stats.max == time_from_ms(16));
+
+	for (int i = 0; i < 4; ++i)
+		history.PushFrame(MakeProfilerFrame(0, {{"c", time_from_ms(1)}}));
+	TEST_CHECK(!history.GetTaskStats("a", stats)); // tasks leave the history with their last frame
+	TEST_CHECK(history.GetTaskStats().size() == 1);
+
+	history.Clear();
+	TEST_CHECK(history.GetFrameCount() == 0);
+	TEST_CHECK(history.GetTaskStats().empty());
+}
+
+void test_profiler() {
+	EndProfilerFrame(); // drop sections recorded by previous tests
+
+	{
+		TEST_CHECK(GetProfilerTaskId("test_profiler.a") == GetProfilerTaskId("test_profiler.a"));
+		TEST_CHECK(GetProfilerTaskId("test_profiler.a") != GetProfilerTaskId("test_profiler.b"));
+	}
+
+	{
+		const auto task_b = GetProfilerTaskId("test_profiler.b");
+
+		const auto a = BeginProfilerSection("test_profiler.a", "details");
+		{
+			ProfilerPerfSection section(task_b);
+			std::this_thread::sleep_for(std::chrono::milliseconds(1));
+		}
+		EndProfilerSection(a);
+
+		const auto pending = BeginProfilerSection("test_profiler.pending");
+
+		const auto frame = CaptureProfilerFrame();
+		TEST_CHECK(frame.sections.size() == 3);
+
+		const auto task_a = FindTask(frame, "test_profiler.a"), task_b_ = FindTask(frame, "test_profiler.b");
+		TEST_ASSERT(task_a && task_b_);
+		TEST_CHECK(task_a->section_indexes.size() == 1);
+		TEST_CHECK(frame.sections[task_a->section_indexes[0]].details == "details");
+		TEST_CHECK(task_a->duration >= task_b_->duration);
+		TEST_CHECK(task_b_->duration >= time_from_ms(1));
+		TEST_CHECK(FindTask(frame, "test_profiler.pending") != nullptr); // pending sections are ended at capture time
+
+		TEST_CHECK(EndProfilerFrame().sections.size() == 3);
+		TEST_CHECK(EndProfilerFrame().sections.empty());
+
+		EndProfilerSection(pending); // ending a section from a previous frame is ignored
+		TEST_CHECK(CaptureProfilerFrame().sections.empty());
+	}
+
+	{
+		parallel_for(64, 1, [](size_t begin, size_t end) {
+			for (auto i = begin; i < end; ++i)
+				ProfilerPerfSection section("test_profiler.worker");
+		});
+
+		EndProfilerSection(BeginProfilerSection("test_profiler.main"));
+		std::thread thread([] { EndProfilerSection(BeginProfilerSection("test_profiler.thread")); });
+		thread.join();
+
+		const auto frame = EndProfilerFrame();
+
+		const auto worker = FindTask(frame, "test_profiler.worker");
+		TEST_ASSERT(worker != nullptr);
+		TEST_CHECK(worker->section_indexes.size() == 64);
+
+		const auto thread_task = FindTask(frame, "test_profiler.thread");
+		TEST_ASSERT(thread_task != nullptr);
+		TEST_CHECK(frame.sections[thread_task->section_indexes[0]].thread_id != std::this_thread::get_id());
+
+		const auto main_task = FindTask(frame, "test_profiler.main");
+		TEST_ASSERT(main_task != nullptr);
+		TEST_CHECK(frame.sections[main_task->section_indexes[0]].thread_index != frame.sections[thread_task->section_indexes[0]].thread_index);
+	}
+
+	{
+		for (int i = 0; i < 10000; ++i)
+			EndProfilerSection(BeginProfilerSection("test_profiler.overflow"));
+
+		const auto frame = EndProfilerFrame();
+		const auto overflow = FindTask(frame, "test_profiler.overflow");
+		TEST_ASSERT(overflow != nullptr);
+		TEST_CHECK(overflow->section_indexes.size() < 10000); // sections over the per-thread limit are dropped
+
+		EndProfilerSection(BeginProfilerSection("test_profiler.after_overflow"));
+		TEST_CHECK(FindTask(EndProfilerFrame(), "test_profiler.after_overflow") != nullptr);
+	}
+
+	{
+		const auto section = BeginProfilerSection("test_profiler.\"trace\"", "C:\\path");
+		EndProfilerSection(section);
+
+		const auto path = test::CreateTempFilepath();
+		TEST_CHECK(SaveProfilerFrameToTrace(EndProfilerFrame(), path));
+
+		const auto trace = FileToString(path.c_str());
+		TEST_CHECK(trace.find("\"traceEvents\"") != std::string::npos);
+		TEST_CHECK(trace.find("\"name\":\"test_profiler.\\\"trace\\\"\"") != std::string::npos);
+		TEST_CHECK(trace.find("\"details\":\"C:\\\\path\"") != std::string::npos);
+		TEST_CHECK(trace.find(",\n]") == std::string::npos);
+
+		Unlink(path.c_str());
+	}
+
+	{
+		const auto task = GetProfilerTaskId("test_profiler.category");
+
+		TEST_CHECK(GetProfilerCategories() == PC_None);
+		{ ProfilerCategorySection section(PC_Scene, task); }
+		TEST_CHECK(FindTask(EndProfilerFrame(), "test_profiler.category") == nullptr);
+
+		SetProfilerCategories(PC_Scene | PC_Render);
+		TEST_CHECK(IsProfilerCategoryEnabled(PC_Scene));
+		TEST_CHECK(!IsProfilerCategoryEnabled(PC_Physics));
+		{ ProfilerCategorySection section(PC_Physics, task); }
+		TEST_CHECK(FindTask(CaptureProfilerFrame(), "test_profiler.category") == nullptr);
+		{ ProfilerCategorySection section(PC_Render, task); }
+		TEST_CHECK(FindTask(EndProfilerFrame(), "test_profiler.category") != nullptr);
+
+		SetProfilerCategories(PC_None);
+	}
+
+	test_profiler_frame_history();
+}
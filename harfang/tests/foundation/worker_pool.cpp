@@ -0,0 +1,85 @@
+// HARFANG(R) Copyright (C) 2022 NWNC. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
+
+#define TEST_NO_MAIN
+#include "acutest.h"
+
+#include "foundation/worker_pool.h"
+
+#include <atomic>
+#include <chrono>
+#include <thread>
+#include <vector>
+
+using namespace hg;
+
+void test_worker_pool() {
+	{
+		std::vector<int> v(10000, 0);
+		parallel_for(v.size(), 64, [&](size_t begin, size_t end) {
+			for (auto i = begin; i < end; ++i)
+				v[i] += int(i);
+		});
+
+		bool ok = true;
+		for (size_t i = 0; i < v.size(); ++i)
+			ok = ok && v[i] == int(i);
+		TEST_CHECK(ok);
+	}
+
+	{
+		std::atomic<size_t> count{0};
+		parallel_for(0, 16, [&](size_t begin, size_t end) { count += end - begin; });
+		TEST_CHECK(count == 0);
+	}
+
+	{
+		std::atomic<size_t> count{0};
+		parallel_for(64, 4, [&](size_t begin, size_t end) {
+			for (auto i = begin; i < end; ++i)
+				parallel_for(64, 4, [&](size_t begin, size_t end) { count += end - begin; }); // nested calls must not deadlock
+		});
+		TEST_CHECK(count == 64 * 64);
+	}
+
+	{
+		set_worker_count(0);
+		TEST_CHECK(get_worker_count() == 0);
+
+		std::atomic<size_t> count{0};
+		parallel_for(100, 10, [&](size_t begin, size_t end) { count += end - begin; });
+		TEST_CHECK(count == 100);
+
+		set_worker_count(2);
+		TEST_CHECK(get_worker_count() == 2);
+	}
+
+	{
+		std::atomic<int> count{0};
+		for (int i = 0; i < 8; ++i)
+			run_async([&] { ++count; });
+
+		for (int i = 0; i < 1000 && count < 8; ++i)
+			std::this_thread::sleep_for(std::chrono::milliseconds(1));
+		TEST_CHECK(count == 8);
+	}
+
+	{
+		std::atomic<int> count{0};
+		for (int i = 0; i < 64; ++i)
+			run_async([&] {
+				std::this_thread::sleep_for(std::chrono::milliseconds(1));
+				++count;
+			});
+
+		set_worker_count(3); // pending jobs must not be dropped by a restart
+		TEST_CHECK(count == 64);
+
+		for (int i = 0; i < 16; ++i)
+			run_async([&] { ++count; });
+
+		set_worker_count(0);
+		TEST_CHECK(count == 80);
+
+		set_worker_count(2);
+	}
+}
@@ -18,6 +18,7 @@ extern void test_mat4();
 extern void test_mat44();
 extern void test_color();
 extern void test_minmax();
+extern void test_minmax_tree();
 extern void test_plane();
 extern void test_projection();
 extern void test_obb();
@@ -41,6 +42,8 @@ extern void test_time();
 extern void test_version();
 extern void test_rect();
 extern void test_timer();
+extern void test_worker_pool();
+extern void test_profiler();
 extern void test_signal();
 
 // platform tests
@@ -54,6 +57,8 @@ extern void test_meta();
 extern void test_picture();
 extern void test_video_stream();
 extern void test_scene();
+extern void test_resource_cache();
+extern void test_recast_detour();
 
 // script tests
 extern void test_lua_vm();
@@ -76,6 +81,7 @@ TEST_LIST = {
 	{"foundation.mat44", test_mat44},
 	{"foundation.color", test_color},
 	{"foundation.minMax", test_minmax},
+	{"foundation.minMaxTree", test_minmax_tree},
 	{"foundation.plane", test_plane},
 	{"foundation.projection", test_projection},
 	{"foundation.obb", test_obb},
@@ -99,6 +105,8 @@ TEST_LIST = {
 	{"foundation.version", test_version},
 	{"foundation.rect", test_rect},
 	{"foundation.timer", test_timer},
+	{"foundation.worker_pool", test_worker_pool},
+	{"foundation.profiler", test_profiler},
 	{"foundation.signal", test_signal},
 
 	// platform
@@ -112,6 +120,8 @@ TEST_LIST = {
 	{"engine.picture", test_picture},
 	{"engine.video_stream", test_video_stream},
 	{"engine.scene", test_scene},
+	{"engine.resource_cache", test_resource_cache},
+	{"engine.recast_detour", test_recast_detour},
 
 	// script
 	{"script.lua_vm", test_lua_vm},
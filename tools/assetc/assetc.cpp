@@ -1,15 +1,19 @@
 // HARFANG(R) Copyright (C) 2021 Emmanuel Julien, NWNC HARFANG. Released under GPL/LGPL/Commercial Licence, see licence.txt for details.
 
 #include <algorithm>
+#include <condition_variable>
+#include <ctime>
 #include <deque>
 #include <future>
 #include <iostream>
 #include <map>
 #include <mutex>
+#include <queue>
 #include <regex>
 #include <set>
 #include <string>
 #include <thread>
+#include <unordered_map>
 
 #include <json/json.hpp>
 #include <process.hpp>
@@ -20,14 +24,17 @@
 #include <foundation/dir.h>
 #include <foundation/file.h>
 #include <foundation/format.h>
+#include <foundation/guid.h>
 #include <foundation/log.h>
 #include <foundation/path_tools.h>
 #include <foundation/profiler.h>
 #include <foundation/string.h>
 #include <foundation/time.h>
 #include <foundation/time_chrono.h>
+#include <foundation/worker_pool.h>
 #include <foundation/xxhash.h>
 
+#include <engine/assets.h>
 #include <engine/forward_pipeline.h>
 #include <engine/geometry.h>
 #include <engine/meta.h>
@@ -223,18 +230,138 @@ void ComputeHash(const void *data, size_t len, Hash &out) {
 #endif
 }
 
+static bool ComputeFileHash(const std::string &path, Hash &out) {
+	auto map = MapFile(path.c_str(), true);
+
+	if (IsValid(map)) {
+		ComputeHash(map.data, map.size, out);
+		Unmap(map);
+		return true;
+	}
+
+	Data data; // empty files cannot be mapped
+	if (!LoadDataFromFile(path.c_str(), data))
+		return false;
+
+	ComputeHash(data.GetData(), data.GetSize(), out);
+	return true;
+}
+
 //
+struct SourceStat {
+	uint64_t size;
+	time_ns modified;
+};
+
+static bool operator==(const SourceStat &a, const SourceStat &b) { return a.size == b.size && a.modified == b.modified; }
+
+static SourceStat GetSourceStat(const std::string &path) {
+	const auto info = GetFileInfo(path.c_str());
+	return {info.size, info.modified};
+}
+
 struct CompilationDB {
 	std::map<std::string, std::set<std::string>> output_to_inputs;
 	std::map<std::string, Hash> source_hashes;
+	std::map<std::string, SourceStat> source_stats; // source size and modification time when its hash was stored
 	std::map<std::string, Hash> output_build_params;
 };
 
 static CompilationDB compilation_db;
 
+struct HashedSource {
+	SourceStat stat;
+	Hash hash;
+	time_ns hashed_at; // wall clock time when the source was read, in seconds like the modification time
+};
+
+static time_ns GetHashTime() { return time_ns(std::time(nullptr)); }
+
+/*
+	Modification times have a one second resolution, a source modified during the second it was read may have been modified again after being read
+	without its stat changing. The stat of such a source is not stored so that it is hashed again by the next compilation.
+*/
+static bool IsRacyHashedSource(const HashedSource &source) { return source.stat.modified >= source.hashed_at; }
+
+static std::map<std::string, HashedSource> hashed_sources; // sources hashed during the current compilation
+
 static size_t processed_count = 0;
 static bool fast_check = false;
 
+/// Return true if the hash stored in the compilation DB for a source can be trusted without reading the source.
+static bool IsSourceHashUpToDate(const std::string &name, const SourceStat &stat) {
+	const auto i = compilation_db.source_stats.find(name);
+	return i != std::end(compilation_db.source_stats) && i->second == stat && compilation_db.source_hashes.find(name) != std::end(compilation_db.source_hashes);
+}
+
+static bool GetSourceHash(const std::string &name, const std::string &path, Hash &hash) {
+	const auto stat = GetSourceStat(path);
+
+	if (fast_check) {
+		if (stat.size == 0)
+			error(format("Failed to stat input '%1'").arg(path));
+
+		Data data;
+		Write(data, size_t(stat.size));
+		Write(data, stat.modified);
+		ComputeHash(data.GetData(), data.GetSize(), hash);
+		return true;
+	}
+
+	if (IsSourceHashUpToDate(name, stat)) {
+		hash = compilation_db.source_hashes[name];
+		return true;
+	}
+
+	const auto i = hashed_sources.find(name);
+	if (i != std::end(hashed_sources) && i->second.stat == stat) {
+		hash = i->second.hash;
+		return true;
+	}
+
+	const auto hashed_at = GetHashTime();
+	if (!ComputeFileHash(path, hash))
+		return false;
+
+	hashed_sources[name] = {stat, hash, hashed_at};
+	return true;
+}
+
+/// Hash all sources modified since the last compilation across the worker pool, TestInputs then picks up the hashes computed here.
+static void HashModifiedSources(const std::vector<std::string> &names) {
+	ProfilerPerfSection perf("Manage/HashModifiedSources");
+
+	struct Result {
+		SourceStat stat;
+		Hash hash;
+		time_ns hashed_at;
+		bool hashed;
+	};
+
+	std::vector<Result> results(names.size());
+
+	parallel_for(names.size(), 16, [&](size_t begin, size_t end) {
+		for (size_t i = begin; i < end; ++i) {
+			const auto path = FullInputPath(names[i]);
+			auto &result = results[i];
+
+			result.stat = GetSourceStat(path);
+			result.hashed_at = GetHashTime();
+			result.hashed = !IsSourceHashUpToDate(names[i], result.stat) && ComputeFileHash(path, result.hash);
+		}
+	});
+
+	size_t hashed_count = 0;
+
+	for (size_t i = 0; i < names.size(); ++i)
+		if (results[i].hashed) {
+			hashed_sources[names[i]] = {results[i].stat, results[i].hash, results[i].hashed_at};
+			++hashed_count;
+		}
+
+	debug(format("  Hashed %1 modified sources out of %2").arg(hashed_count).arg(names.size()));
+}
+
 static bool TestInputs(std::map<std::string, Hash> &hashes, const std::set<std::string> &inputs) {
 	bool need_refresh = false;
 
@@ -244,21 +371,9 @@ static bool TestInputs(std::map<std::string, Hash> &hashes, const std::set<std::
 		if (!IsFile(input_path.c_str()))
 			continue;
 
-		Data data;
-		if (fast_check) {
-			const auto info = GetFileInfo(input_path.c_str());
-			if (info.size == 0)
-				error(format("Failed to stat input '%1'").arg(input_path));
-
-			Write(data, info.size);
-			Write(data, info.modified);
-		} else {
-			if (!LoadDataFromFile(input_path.c_str(), data))
-				error(format("Failed to load '%1' data").arg(input_path));
-		}
-
-		Hash hash;
-		ComputeHash(data.GetData(), data.GetSize(), hash);
+		Hash hash{};
+		if (!GetSourceHash(i, input_path, hash))
+			error(format("Failed to load '%1' data").arg(input_path));
 
 		const auto &j = compilation_db.source_hashes.find(i);
 
@@ -278,12 +393,9 @@ static bool TestInputs(std::map<std::string, Hash> &hashes, const std::set<std::
 	return need_refresh;
 }
 
-static bool TestOutputs(const std::set<std::string> &outputs, const Data &build_context) {
+static bool TestOutputs(const std::set<std::string> &outputs, const Hash &build_params_hash) {
 	bool need_refresh = false;
 
-	Hash build_params_hash{};
-	ComputeHash(build_context.GetData(), build_context.GetSize(), build_params_hash);
-
 	for (const auto &output : outputs) {
 		if (!IsFile(FullOutputPath(output).c_str())) {
 			debug(format("    [!] Output file '%1' missing, triggering refresh").arg(output));
@@ -307,27 +419,191 @@ static bool TestOutputs(const std::set<std::string> &outputs, const Data &build_
 	return need_refresh;
 }
 
-static bool NeedsCompilation(
-	std::map<std::string, Hash> &hashes, const std::set<std::string> &inputs, const std::set<std::string> &outputs, const Data &build_context) {
+//
+static std::string cache_dir; // shared build cache, disabled if empty
+
+static std::map<std::string, Hash> cache_pending_outputs; // outputs to store to the cache once compiled and their cache key
+static std::set<std::string> failed_outputs; // outputs of the jobs which failed during the current compilation
+static size_t cache_restored_count = 0, cache_stored_count = 0;
+
+static std::string HashToString(const Hash &hash) {
+	static const char *hex_digits = "0123456789abcdef";
+
+	const auto bytes = reinterpret_cast<const uint8_t *>(&hash);
+
+	std::string str(sizeof(Hash) * 2, '0');
+	for (size_t i = 0; i < sizeof(Hash); ++i) {
+		str[i * 2 + 0] = hex_digits[bytes[i] >> 4];
+		str[i * 2 + 1] = hex_digits[bytes[i] & 15];
+	}
+	return str;
+}
+
+/// Hash the toolchain binaries, a missing tool hashes to zero.
+static Hash ComputeToolchainHash() {
+	Data data;
+	for (const auto &path : {toolchain.shaderc, toolchain.texturec, toolchain.luac, toolchain.cmft, toolchain.recastc, toolchain.texconv, toolchain.bulletc}) {
+		Hash hash{};
+		if (!path.empty())
+			ComputeFileHash(path, hash);
+		Write(data, hash);
+	}
+
+	Hash hash;
+	ComputeHash(data.GetData(), data.GetSize(), hash);
+	return hash;
+}
+
+/// Return the content hash of each input. Source hashes computed with -fast_check only cover size and modification time and cannot address the cache.
+static std::map<std::string, Hash> GetInputContentHashes(const std::map<std::string, Hash> &hashes, const std::set<std::string> &inputs) {
+	if (!fast_check)
+		return hashes;
+
+	std::map<std::string, Hash> content_hashes;
+	for (const auto &input : inputs) {
+		Hash hash;
+		if (ComputeFileHash(FullInputPath(input), hash))
+			content_hashes[input] = hash;
+	}
+	return content_hashes;
+}
+
+/// The cache key of an output covers everything its content depends on: toolchain version and binaries, target platform and API, build parameters and
+/// input contents.
+static Hash ComputeCacheKey(
+	const std::string &output, const Hash &build_params_hash, const std::map<std::string, Hash> &content_hashes, const std::set<std::string> &inputs) {
+	static const auto toolchain_hash = ComputeToolchainHash();
+
+	Data key_data;
+	Write(key_data, std::string(get_version_string()));
+	Write(key_data, std::string(get_build_sha()));
+	Write(key_data, toolchain_hash);
+	Write(key_data, platform);
+	Write(key_data, api);
+	Write(key_data, output);
+	Write(key_data, build_params_hash);
+
+	for (const auto &input : inputs) {
+		const auto i = content_hashes.find(input);
+		Write(key_data, input);
+		Write(key_data, i != std::end(content_hashes) ? i->second : Hash{}); // missing input
+	}
+
+	Hash key;
+	ComputeHash(key_data.GetData(), key_data.GetSize(), key);
+	return key;
+}
+
+static std::string CachePath(const Hash &key) {
+	const auto key_str = HashToString(key);
+	return PathJoin({cache_dir, left(key_str, 2), key_str});
+}
+
+/// Restore outputs from the cache using hard links whenever possible, nothing is restored if any output is missing from the cache.
+static bool RestoreOutputsFromCache(const std::map<std::string, Hash> &output_keys) {
+	ProfilerPerfSection perf("Manage/RestoreOutputsFromCache");
+
+	for (const auto &i : output_keys)
+		if (!IsFile(CachePath(i.second).c_str()))
+			return false;
+
+	for (const auto &i : output_keys) {
+		const auto src = CachePath(i.second), dst = FullOutputPath(i.first);
+
+		MkOutputTree(i.first);
+		Unlink(dst.c_str());
+
+		if (!LinkFile(src.c_str(), dst.c_str()) && !CopyFile(src.c_str(), dst.c_str())) {
+			debug(format("    [!] Failed to restore '%1' from cache").arg(i.first));
+			for (const auto &j : output_keys)
+				Unlink(FullOutputPath(j.first).c_str());
+			return false;
+		}
+	}
+
+	return true;
+}
+
+/// Store the outputs compiled during the current compilation to the cache.
+static void StoreOutputsToCache() {
+	ProfilerPerfSection perf("Manage/StoreOutputsToCache");
+
+	for (const auto &i : cache_pending_outputs) {
+		const auto src = FullOutputPath(i.first);
+
+		if (failed_outputs.find(i.first) != std::end(failed_outputs) || !IsFile(src.c_str()))
+			continue; // failed compilation
+
+		const auto dst = CachePath(i.second);
+		if (IsFile(dst.c_str()))
+			continue; // stored by another compilation sharing this cache
+
+		if (!MkTree(CutFileName(dst).c_str())) {
+			const json json_err = {{"type", "FailedToMkCacheTree"}, {"path", dst}};
+			log_error(json_err);
+			continue;
+		}
+
+		if (LinkFile(src.c_str(), dst.c_str())) {
+			++cache_stored_count;
+			continue;
+		}
+
+		// cache on another volume, copy then rename so that a partially written file is never visible in the cache
+		const auto tmp = dst + "." + ToString(MakeGuid(), false) + ".tmp";
+
+		if (CopyFile(src.c_str(), tmp.c_str()) && RenameFile(tmp.c_str(), dst.c_str()))
+			++cache_stored_count;
+		else
+			Unlink(tmp.c_str());
+	}
+
+	cache_pending_outputs.clear();
+	failed_outputs.clear();
+}
+
+static bool NeedsCompilation(std::map<std::string, Hash> &hashes, const std::set<std::string> &inputs, const std::set<std::string> &outputs,
+	const Data &build_context, bool use_cache = true) {
 	ProfilerPerfSection perf("Manage/NeedsCompilation");
 
 	bool need_refresh = false;
 
-	if (TestOutputs(outputs, build_context))
+	Hash build_params_hash{};
+	ComputeHash(build_context.GetData(), build_context.GetSize(), build_params_hash);
+
+	if (TestOutputs(outputs, build_params_hash))
 		need_refresh = true;
 
 	if (TestInputs(hashes, inputs))
 		need_refresh = true;
 
-	if (need_refresh)
-		processed_count += outputs.size();
-
 	for (const auto &output : outputs)
 		compilation_db.output_to_inputs[output] = inputs;
 
+	if (need_refresh && use_cache && !cache_dir.empty()) {
+		const auto content_hashes = GetInputContentHashes(hashes, inputs);
+
+		std::map<std::string, Hash> output_keys;
+		for (const auto &output : outputs)
+			output_keys[output] = ComputeCacheKey(output, build_params_hash, content_hashes, inputs);
+
+		if (RestoreOutputsFromCache(output_keys)) {
+			debug("    [C] Restored from cache");
+			cache_restored_count += outputs.size();
+			return false;
+		}
+
+		for (const auto &i : output_keys)
+			cache_pending_outputs[i.first] = i.second;
+	}
+
+	if (need_refresh)
+		processed_count += outputs.size();
+
 	return need_refresh;
 }
 
+/// Remove outputs before compiling them again. Outputs restored from the cache are hard links to it and must never be written in place.
 static void CleanOutputs(const std::set<std::string> &outputs) {
 	ProfilerPerfSection perf("Manage/CleanOutputs");
 
@@ -338,6 +614,7 @@ static void CleanOutputs(const std::set<std::string> &outputs) {
 //
 void Reset() {
 	compilation_db.source_hashes.clear();
+	compilation_db.source_stats.clear();
 	compilation_db.output_to_inputs.clear();
 	compilation_db.output_build_params.clear();
 }
@@ -366,7 +643,7 @@ static std::mutex default_log_mutex;
 static std::map<std::string, std::string> default_log_output;
 static std::map<std::string, std::string> default_error_log_output;
 
-static void RunProcess(const std::string &name, const std::string &cmd, const std::string &cwd) {
+static bool RunProcess(const std::string &name, const std::string &cmd, const std::string &cwd) {
 	//
 	const auto cmd_elms = split(cmd, " ");
 	ProfilerPerfSection perf(format("Command/RunProcess/%1").arg(cmd_elms[0]));
@@ -389,6 +666,7 @@ static void RunProcess(const std::string &name, const std::string &cmd, const st
 		ReportFailedInput(name);
 		const json json_err = {{"type", "FailedToSpawnCompileProcess"}, {"name", name}};
 		log_error(json_err);
+		return false;
 	} else {
 		const auto res = process.get_exit_status();
 
@@ -415,93 +693,269 @@ static void RunProcess(const std::string &name, const std::string &cmd, const st
 			ReportFailedInput(name);
 			const json json_err = {{"type", "CompileProcessReturnedNonZero"}, {"res", res}, {"cmd", cmd}, {"cwd", cwd}, {"out", out}, {"err", err}};
 			log_error(json_err);
+			return false;
 		}
 	}
+
+	return true;
 }
 
-//
-struct task {
+/*
+	Compile processes are run as a job graph by a fixed number of workers.
+
+	A job is started once all jobs writing its dependencies are complete. Among ready jobs the highest priority one is started first, then the one
+	with the largest input, so that long running jobs do not start last and stretch the end of the compilation.
+
+	Jobs depending on a failed job are never started, they are reported as failed along with their own dependents.
+*/
+enum JobPriority { JP_Low, JP_Normal, JP_High, JP_Highest };
+
+struct Job {
 	std::string name;
-	std::function<std::future<void>()> func;
+	std::function<bool()> run; // return false on failure
+
+	JobPriority priority;
+	uint64_t cost; // expected relative duration among jobs of the same priority, usually the input size
+
+	std::vector<std::string> outputs; // outputs written by the job
+	std::vector<std::string> dependencies; // outputs of other jobs the job reads
+
+	std::vector<size_t> dependents;
+	size_t pending_dependency_count;
+
+	int worker;
+	time_ns t_start, t_end;
+	bool done, failed;
 };
 
-static std::deque<task> task_queue;
+static std::vector<Job> jobs;
+
+static uint64_t GetJobCost(const std::string &path) { return GetFileInfo(path.c_str()).size; }
+
+static void PushAsyncTask(const std::string &name, std::function<bool()> run, JobPriority priority = JP_Normal, uint64_t cost = 0,
+	std::vector<std::string> outputs = {}, std::vector<std::string> dependencies = {}) {
+	Job job;
+	job.name = name;
+	job.run = std::move(run);
+	job.priority = priority;
+	job.cost = cost;
+	job.outputs = std::move(outputs);
+	job.dependencies = std::move(dependencies);
+	job.pending_dependency_count = 0;
+	job.worker = -1;
+	job.t_start = job.t_end = 0;
+	job.done = job.failed = false;
+	jobs.push_back(std::move(job));
+}
 
-static void PushAsyncProcessTask(const std::string &name, const std::string &cmd, const std::string &cwd) {
-	task_queue.emplace_back(task{name, [=]() { return std::async(std::launch::async, RunProcess, name, cmd, cwd); }});
+static void PushAsyncProcessTask(const std::string &name, const std::string &cmd, const std::string &cwd, JobPriority priority = JP_Normal, uint64_t cost = 0,
+	std::vector<std::string> outputs = {}, std::vector<std::string> dependencies = {}) {
+	PushAsyncTask(
+		name, [=]() { return RunProcess(name, cmd, cwd); }, priority, cost, std::move(outputs), std::move(dependencies));
 }
 
 static int max_async_jobs = 0;
+static std::string job_report_path;
+
+/// Link each job to the jobs depending on it, return the number of jobs which can run. Jobs part of a dependency cycle are reported as failed.
+static size_t LinkJobs() {
+	std::map<std::string, size_t> output_to_job;
+	for (size_t i = 0; i < jobs.size(); ++i)
+		for (const auto &output : jobs[i].outputs)
+			output_to_job[output] = i;
+
+	for (size_t i = 0; i < jobs.size(); ++i)
+		for (const auto &dependency : jobs[i].dependencies) {
+			const auto j = output_to_job.find(dependency);
+			if (j != std::end(output_to_job) && j->second != i) { // dependencies not written by a job are already available
+				jobs[j->second].dependents.push_back(i);
+				++jobs[i].pending_dependency_count;
+			}
+		}
+
+	// walk the graph to detect cycles
+	std::vector<size_t> pending(jobs.size()), ready;
+	for (size_t i = 0; i < jobs.size(); ++i)
+		if ((pending[i] = jobs[i].pending_dependency_count) == 0)
+			ready.push_back(i);
+
+	size_t runnable_count = 0;
+	while (!ready.empty()) {
+		const auto i = ready.back();
+		ready.pop_back();
+		++runnable_count;
+
+		for (const auto j : jobs[i].dependents)
+			if (--pending[j] == 0)
+				ready.push_back(j);
+	}
+
+	for (size_t i = 0; i < jobs.size(); ++i)
+		if (pending[i] != 0) {
+			jobs[i].failed = true;
+			ReportFailedInput(jobs[i].name);
+			const json json_err = {{"type", "CyclicJobDependency"}, {"name", jobs[i].name}};
+			log_error(json_err);
+		}
+
+	return runnable_count;
+}
+
+static void SaveJobReport(const std::string &path, int worker_count, time_ns duration) {
+	json js;
+	js["worker_count"] = worker_count;
+	js["job_count"] = jobs.size();
+	js["duration_ms"] = time_to_ms_f(duration);
+
+	static const char *priority_names[] = {"low", "normal", "high", "highest"};
+
+	auto &js_jobs = js["jobs"] = json::array();
+	for (const auto &job : jobs)
+		js_jobs.push_back({
+			{"name", job.name},
+			{"priority", priority_names[job.priority]},
+			{"cost", job.cost},
+			{"worker", job.worker},
+			{"start_ms", time_to_ms_f(job.t_start)},
+			{"duration_ms", time_to_ms_f(job.t_end - job.t_start)},
+			{"failed", job.failed},
+			{"dependencies", job.dependencies},
+		});
+
+	if (!SaveJsonToFile(js, path.c_str())) {
+		const json json_err = {{"type", "FailedToSaveJobReport"}, {"path", path}};
+		log_error(json_err);
+	}
+}
 
 static void RunTaskQueue() {
-	const auto task_count = task_queue.size();
+	ProfilerPerfSection perf("Manage/RunTaskQueue");
+
+	const auto job_count = jobs.size();
+	const auto runnable_count = LinkJobs();
+
+	const auto compare_jobs = [](size_t a, size_t b) {
+		const auto &job_a = jobs[a], &job_b = jobs[b];
+		return job_a.priority != job_b.priority ? job_a.priority < job_b.priority : job_a.cost < job_b.cost;
+	};
 
-	std::deque<std::future<void>> task_running;
+	std::priority_queue<size_t, std::vector<size_t>, decltype(compare_jobs)> ready(compare_jobs);
+
+	for (size_t i = 0; i < job_count; ++i)
+		if (!jobs[i].failed && jobs[i].pending_dependency_count == 0)
+			ready.push(i);
+
+	std::mutex mutex;
+	std::condition_variable cv;
+	size_t done_count = 0, running_count = 0;
 	std::string current_task_name;
 
-	while (!task_queue.empty() || !task_running.empty()) {
-		while (!task_queue.empty() && task_running.size() < max_async_jobs) {
-			current_task_name = task_queue.front().name;
-			task_running.emplace_back(task_queue.front().func()); // start task
-			task_queue.pop_front();
+	const auto t_ref = time_now();
+
+	// jobs depending on a failed job are skipped and reported as failed, must be called with mutex held
+	const auto skip_dependents = [&](const Job &failed_job) {
+		std::vector<size_t> to_skip = failed_job.dependents;
+
+		while (!to_skip.empty()) {
+			auto &job = jobs[to_skip.back()];
+			to_skip.pop_back();
+
+			if (job.done || job.failed)
+				continue; // already skipped through another dependency or part of a dependency cycle, not counted as runnable
+
+			job.done = job.failed = true;
+			failed_outputs.insert(std::begin(job.outputs), std::end(job.outputs));
+			ReportFailedInput(job.name);
+			++done_count;
+
+			const json json_err = {{"type", "SkippedJob"}, {"name", job.name}, {"failed_dependency", failed_job.name}};
+			log_error(json_err);
+
+			to_skip.insert(std::end(to_skip), std::begin(job.dependents), std::end(job.dependents));
 		}
+	};
 
-		const auto task_done = task_count - (task_queue.size() + task_running.size());
-		if (progress)
-			std::cout << "-> Progress: " << task_done * run_queue_progress_weight / task_count + classify_progress_weight + compile_progress_weight << "% ("
-					  << current_task_name << ")" << std::endl;
+	const auto work = [&](int worker) {
+		std::unique_lock<std::mutex> lock(mutex);
 
-		time_ns t_ref = time_now();
+		while (true) {
+			cv.wait(lock, [&]() { return !ready.empty() || done_count >= runnable_count; });
+			if (ready.empty())
+				break; // all jobs done
 
-		while (!task_running.empty()) {
-			bool break_ = false;
+			auto &job = jobs[ready.top()];
+			ready.pop();
 
-			for (auto &t : task_running)
-				if (t.wait_for(time_to_chrono(time_from_ms(1))) == std::future_status::ready) {
-					break_ = true;
-					break; // break asap to start a new task
-				}
+			job.worker = worker;
+			job.t_start = time_now() - t_ref;
+			current_task_name = job.name;
+			++running_count;
 
-			if (break_)
-				break;
+			lock.unlock();
+			const bool success = job.run();
+			lock.lock();
 
-			const auto t_now = time_now();
+			job.t_end = time_now() - t_ref;
+			job.done = true;
+			job.failed = !success;
+			--running_count;
+			++done_count;
 
-			if (t_now - t_ref >= time_from_sec(5)) {
-				log(format("  %1 tasks running, %2 queued...").arg(task_running.size()).arg(task_queue.size()));
-				t_ref = t_now;
+			if (success) {
+				for (const auto i : job.dependents)
+					if (--jobs[i].pending_dependency_count == 0)
+						ready.push(i);
+			} else {
+				failed_outputs.insert(std::begin(job.outputs), std::end(job.outputs));
+				skip_dependents(job);
 			}
+
+			cv.notify_all();
 		}
+	};
 
-		task_running.erase(std::remove_if(std::begin(task_running), std::end(task_running),
-							   [](const std::future<void> &f) { return f.wait_for(time_to_chrono(0)) == std::future_status::ready; }),
-			std::end(task_running));
-	}
-}
+	const auto worker_count = int(Min<size_t>(size_t(Max(max_async_jobs, 1)), Max<size_t>(runnable_count, 1)));
 
-//
-static const uint16_t CAB1 = 0xCAB1;
+	std::vector<std::thread> workers;
+	for (int i = 0; i < worker_count; ++i)
+		workers.emplace_back(work, i);
 
-bool LoadCompilationDB(const char *filename) {
-	ProfilerPerfSection perf("Manage/LoadCompilationDB");
+	{
+		std::unique_lock<std::mutex> lock(mutex);
 
-	Reset();
+		size_t reported_done_count = size_t(-1);
+		time_ns t_log = time_now();
 
-	if (!Exists(filename))
-		return false;
+		while (done_count < runnable_count) {
+			cv.wait_for(lock, time_to_chrono(time_from_ms(progress ? 100 : 1000)));
 
-	ScopedFile file(Open(filename));
-	if (!file)
-		return false;
+			if (progress && reported_done_count != done_count) {
+				std::cout << "-> Progress: " << done_count * run_queue_progress_weight / runnable_count + classify_progress_weight + compile_progress_weight
+						  << "% (" << current_task_name << ")" << std::endl;
+				reported_done_count = done_count;
+			}
 
-	//
-	if (Read<uint16_t>(file) != CAB1)
-		return false;
+			const auto t_now = time_now();
+			if (t_now - t_log >= time_from_sec(5)) {
+				log(format("  %1 tasks running, %2 queued...").arg(running_count).arg(runnable_count - done_count - running_count));
+				t_log = t_now;
+			}
+		}
+	}
 
-	const auto version = Read<uint16_t>(file);
-	if (version > 2)
-		return false;
+	for (auto &worker : workers)
+		worker.join();
+
+	if (!job_report_path.empty())
+		SaveJobReport(job_report_path, worker_count, time_now() - t_ref);
+
+	jobs.clear();
+}
+
+//
+static const uint16_t CAB1 = 0xCAB1;
 
+static bool LoadLegacyCompilationDB(File file, uint16_t version) {
 	//
 	if (version >= 2) {
 		(void)ReadString(file); // build_sha
@@ -544,14 +998,170 @@ bool LoadCompilationDB(const char *filename) {
 	return true;
 }
 
+template <typename T> static bool ReadCAB(const uint8_t *&p, const uint8_t *end, T &v) {
+	if (size_t(end - p) < sizeof(T))
+		return false;
+	memcpy(&v, p, sizeof(T));
+	p += sizeof(T);
+	return true;
+}
+
+static bool ReadCABString(const uint8_t *&p, const uint8_t *end, std::string &v) {
+	uint32_t size;
+	if (!ReadCAB(p, end, size) || size_t(end - p) < size)
+		return false;
+	v.assign(reinterpret_cast<const char *>(p), size);
+	p += size;
+	return true;
+}
+
+/*
+	Version 3 stores each path once in a string table referenced by index from the records, the whole file is mapped and parsed in place.
+	Records are stored in key order so that they can be appended to the DB maps without searching.
+*/
+static bool LoadCompilationDBFromMemory(const uint8_t *p, const uint8_t *end) {
+	uint16_t magic, version;
+	std::string build_sha, version_string;
+
+	if (!ReadCAB(p, end, magic) || !ReadCAB(p, end, version) || !ReadCABString(p, end, build_sha) || !ReadCABString(p, end, version_string))
+		return false;
+
+	// string table
+	uint32_t string_count;
+	if (!ReadCAB(p, end, string_count) || size_t(end - p) / sizeof(uint32_t) <= string_count)
+		return false;
+
+	const auto string_offsets = p;
+	p += (size_t(string_count) + 1) * sizeof(uint32_t);
+
+	uint32_t string_data_size;
+	memcpy(&string_data_size, string_offsets + size_t(string_count) * sizeof(uint32_t), sizeof(uint32_t));
+	if (size_t(end - p) < string_data_size)
+		return false;
+
+	const auto string_data = reinterpret_cast<const char *>(p);
+	p += string_data_size;
+
+	std::vector<std::string> strings(string_count);
+
+	for (uint32_t i = 0; i < string_count; ++i) {
+		uint32_t range[2];
+		memcpy(range, string_offsets + size_t(i) * sizeof(uint32_t), sizeof(range));
+		if (range[0] > range[1] || range[1] > string_data_size)
+			return false;
+		strings[i].assign(string_data + range[0], range[1] - range[0]);
+	}
+
+	const auto read_string_idx = [&](uint32_t &idx) { return ReadCAB(p, end, idx) && idx < string_count; };
+
+	// sources
+	uint32_t source_count;
+	if (!ReadCAB(p, end, source_count))
+		return false;
+
+	for (uint32_t i = 0; i < source_count; ++i) {
+		uint32_t path;
+		Hash hash;
+		SourceStat stat;
+
+		if (!read_string_idx(path) || !ReadCAB(p, end, hash) || !ReadCAB(p, end, stat.size) || !ReadCAB(p, end, stat.modified))
+			return false;
+
+		compilation_db.source_hashes.emplace_hint(std::end(compilation_db.source_hashes), strings[path], hash);
+		compilation_db.source_stats.emplace_hint(std::end(compilation_db.source_stats), strings[path], stat);
+	}
+
+	// outputs
+	uint32_t output_count;
+	if (!ReadCAB(p, end, output_count))
+		return false;
+
+	for (uint32_t i = 0; i < output_count; ++i) {
+		uint32_t name, input_count;
+		if (!read_string_idx(name) || !ReadCAB(p, end, input_count))
+			return false;
+
+		auto &inputs = compilation_db.output_to_inputs.emplace_hint(std::end(compilation_db.output_to_inputs), strings[name], std::set<std::string>{})->second;
+
+		for (uint32_t j = 0; j < input_count; ++j) {
+			uint32_t input;
+			if (!read_string_idx(input))
+				return false;
+			inputs.emplace_hint(std::end(inputs), strings[input]);
+		}
+	}
+
+	// output build parameters
+	uint32_t build_params_count;
+	if (!ReadCAB(p, end, build_params_count))
+		return false;
+
+	for (uint32_t i = 0; i < build_params_count; ++i) {
+		uint32_t name;
+		Hash hash;
+		if (!read_string_idx(name) || !ReadCAB(p, end, hash))
+			return false;
+		compilation_db.output_build_params.emplace_hint(std::end(compilation_db.output_build_params), strings[name], hash);
+	}
+
+	return true;
+}
+
+bool LoadCompilationDB(const char *filename) {
+	ProfilerPerfSection perf("Manage/LoadCompilationDB");
+
+	Reset();
+
+	if (!Exists(filename))
+		return false;
+
+	{
+		ScopedFile file(Open(filename));
+		if (!file)
+			return false;
+
+		//
+		if (Read<uint16_t>(file) != CAB1)
+			return false;
+
+		const auto version = Read<uint16_t>(file);
+		if (version > 3)
+			return false;
+
+		if (version < 3)
+			return LoadLegacyCompilationDB(file, version);
+	}
+
+	auto map = MapFile(filename);
+	if (!IsValid(map))
+		return false;
+
+	const bool res = LoadCompilationDBFromMemory(map.data, map.data + map.size);
+	Unmap(map);
+
+	if (!res) {
+		warn(format("Corrupted compilation DB '%1', all inputs will be compiled").arg(filename));
+		Reset();
+	}
+
+	return res;
+}
+
 bool LoadCompilationDB() { return LoadCompilationDB(FullOutputPath("assetc.cab").c_str()); }
 
+static void WriteCABString(Data &data, const std::string &v) {
+	Write(data, uint32_t(v.size()));
+	data.Write(v.data(), v.size());
+}
+
 bool SaveCompilationDB(const char *path) {
 	ProfilerPerfSection perf("Manage/SaveCompilationDB");
 
 	std::cout << format("    %1 input files").arg(compilation_db.source_hashes.size()) << std::endl;
 	std::cout << format("    %1 output files").arg(compilation_db.output_to_inputs.size()) << std::endl;
 	std::cout << format("    %1 processed").arg(processed_count) << std::endl;
+	if (!cache_dir.empty())
+		std::cout << format("    %1 restored from cache, %2 stored to cache").arg(cache_restored_count).arg(cache_stored_count) << std::endl;
 	std::cout << format("    %1 failed").arg(error_count.load()) << std::endl;
 
 	for (const auto &i : failed_inputs)
@@ -561,6 +1171,7 @@ bool SaveCompilationDB(const char *path) {
 	std::cout << std::endl;
 
 	processed_count = 0;
+	cache_restored_count = cache_stored_count = 0;
 	error_count = 0;
 
 	std::cout << format("  Saving compilation DB '%1'").arg(path) << std::endl;
@@ -570,53 +1181,93 @@ bool SaveCompilationDB(const char *path) {
 		return false; // nothing to save
 	}
 
-	//
-	ScopedFile file(OpenWrite(path));
-
-	if (!file) {
-		const json json_err = {{"type", "FailedToSaveCompilationDB"}, {"path", path}};
-		log_error(json_err);
-		return false;
-	}
-
 	/*
 		version 0: initial version
 		version 1: switch to murmurv3 hash
 		version 2: add build sha and version string
+		version 3: add source size and modification time, string table
 	*/
-	Write(file, CAB1);
-	Write(file, uint16_t(2)); // version
+	std::unordered_map<std::string, uint32_t> string_idxs;
+	std::vector<const std::string *> strings;
+
+	const auto get_string_idx = [&](const std::string &v) {
+		const auto i = string_idxs.emplace(v, uint32_t(strings.size()));
+		if (i.second)
+			strings.push_back(&i.first->first);
+		return i.first->second;
+	};
+
+	for (const auto &i : compilation_db.source_hashes)
+		get_string_idx(i.first);
+	for (const auto &i : compilation_db.output_to_inputs) {
+		get_string_idx(i.first);
+		for (auto &s : i.second)
+			get_string_idx(s);
+	}
+	for (const auto &i : compilation_db.output_build_params)
+		get_string_idx(i.first);
+
+	Data data;
+
+	Write(data, CAB1);
+	Write(data, uint16_t(3)); // version
 
-	WriteString(file, get_build_sha());
-	WriteString(file, get_version_string());
+	WriteCABString(data, get_build_sha());
+	WriteCABString(data, get_version_string());
+
+	// string table
+	Write(data, uint32_t(strings.size()));
+
+	uint32_t string_offset = 0;
+	for (const auto s : strings) {
+		Write(data, string_offset);
+		string_offset += uint32_t(s->size());
+	}
+	Write(data, string_offset);
+
+	for (const auto s : strings)
+		data.Write(s->data(), s->size());
 
 	//
-	Write(file, uint32_t(compilation_db.source_hashes.size()));
+	Write(data, uint32_t(compilation_db.source_hashes.size()));
 
 	for (const auto &i : compilation_db.source_hashes) {
-		WriteString(file, i.first);
-		Write(file, i.second);
+		Write(data, string_idxs[i.first]);
+		Write(data, i.second);
+
+		const auto j = compilation_db.source_stats.find(i.first);
+		const auto stat = j != std::end(compilation_db.source_stats) ? j->second : SourceStat{0, 0}; // no stat, always hash the source
+
+		Write(data, stat.size);
+		Write(data, stat.modified);
 	}
 
 	//
-	Write(file, uint32_t(compilation_db.output_to_inputs.size()));
+	Write(data, uint32_t(compilation_db.output_to_inputs.size()));
 
 	for (const auto &i : compilation_db.output_to_inputs) {
-		const auto &name = i.first;
-		WriteString(file, name);
+		Write(data, string_idxs[i.first]);
 
 		const auto &sources = i.second;
-		Write(file, uint32_t(sources.size()));
+		Write(data, uint32_t(sources.size()));
 		for (auto &s : sources)
-			WriteString(file, s);
+			Write(data, string_idxs[s]);
 	}
 
 	//
-	Write(file, uint32_t(compilation_db.output_build_params.size()));
+	Write(data, uint32_t(compilation_db.output_build_params.size()));
 
 	for (const auto &i : compilation_db.output_build_params) {
-		WriteString(file, i.first);
-		Write(file, i.second);
+		Write(data, string_idxs[i.first]);
+		Write(data, i.second);
+	}
+
+	ScopedFile file(OpenWrite(path));
+
+	if (!file || Write(file, data.GetData(), data.GetSize()) != data.GetSize()) {
+		const json json_err = {{"type", "FailedToSaveCompilationDB"}, {"path", path}};
+		log_error(json_err);
+		return false;
 	}
 
 	return true;
@@ -637,7 +1288,7 @@ static void Copy(std::map<std::string, Hash> &hashes, const std::string &path) {
 
 	log(format("  Copy '%1'").arg(path));
 
-	if (NeedsCompilation(hashes, {path}, {path}, {})) {
+	if (NeedsCompilation(hashes, {path}, {path}, {}, false)) { // restoring from the cache is no cheaper than copying the input
 		const auto src = FullInputPath(path), dst = FullOutputPath(path);
 
 		MkOutputTree(path);
@@ -657,7 +1308,7 @@ static void Copy(std::map<std::string, Hash> &hashes, const std::string &path) {
 static std::string profile = "default";
 
 //
-static void ProcessScene(const std::string &src, const std::string &dst) {
+static bool ProcessScene(const std::string &src, const std::string &dst) {
 	Scene scene;
 	PipelineResources res;
 	LoadSceneContext ctx;
@@ -671,12 +1322,16 @@ static void ProcessScene(const std::string &src, const std::string &dst) {
 		ReportFailedInput(src);
 		const json json_err = {{"type", "FailedToLoadScene"}, {"src", src}};
 		log_error(json_err);
-	} else {
-		if (!SaveSceneBinaryToFile(dst.c_str(), scene, res)) {
-			const json json_err = {{"type", "FailedToSaveScene"}, {"dst", dst}};
-			log_error(json_err);
-		}
+		return false;
+	}
+
+	if (!SaveSceneBinaryToFile(dst.c_str(), scene, res)) {
+		const json json_err = {{"type", "FailedToSaveScene"}, {"dst", dst}};
+		log_error(json_err);
+		return false;
 	}
+
+	return true;
 }
 
 void Scene(std::map<std::string, Hash> &hashes, const std::string &path) {
@@ -694,7 +1349,8 @@ void Scene(std::map<std::string, Hash> &hashes, const std::string &path) {
 		MkOutputTree(path);
 		CleanOutputs({path});
 
-		task_queue.emplace_back(task{path, [=]() { return std::async(std::launch::async, ProcessScene, src, dst); }});
+		PushAsyncTask(
+			path, [=]() { return ProcessScene(src, dst); }, JP_Normal, GetJobCost(src), {path});
 	} else {
 		debug("    [O] Scene up to date");
 	}
@@ -1013,7 +1669,7 @@ void Texture(std::map<std::string, Hash> &hashes, std::string path) {
 							cmd += " -m";
 					}
 
-					PushAsyncProcessTask(path + " (Texture)", cmd, cwd);
+					PushAsyncProcessTask(path + " (Texture)", cmd, cwd, compression == "BC6H" || compression == "BC7" ? JP_High : JP_Normal, GetJobCost(src), {path});
 				} else {
 					debug("    [O] Texture up to date");
 				}
@@ -1045,7 +1701,7 @@ void Texture(std::map<std::string, Hash> &hashes, std::string path) {
 										 .arg(radiance_edge_fixup ? "warp" : "none")
 										 .str();
 
-					PushAsyncProcessTask(path + " (Radiance Probe)", cmd, cwd);
+					PushAsyncProcessTask(path + " (Radiance Probe)", cmd, cwd, JP_Highest, GetJobCost(src), {path + ".radiance"});
 				} else {
 					debug("    [O] Texture radiance up to date");
 				}
@@ -1073,7 +1729,7 @@ void Texture(std::map<std::string, Hash> &hashes, std::string path) {
 							.arg(max_probe_size)
 							.str();
 
-					PushAsyncProcessTask(path + " (Irradiance Probe)", cmd, cwd);
+					PushAsyncProcessTask(path + " (Irradiance Probe)", cmd, cwd, JP_High, GetJobCost(src), {path + ".irradiance"});
 				} else {
 					debug("    [O] Texture irradiance up to date");
 				}
@@ -1087,18 +1743,22 @@ void Texture(std::map<std::string, Hash> &hashes, std::string path) {
 }
 
 //
-static void ProcessGeometry(const std::string &src, const std::string &dst, ModelOptimisationLevel optimisation_level) {
+static bool ProcessGeometry(const std::string &src, const std::string &dst, ModelOptimisationLevel optimisation_level) {
 	const auto geo = LoadGeometryFromFile(src.c_str());
 
 	if (!Validate(geo)) {
 		const json json_err = {{"type", "InvalidGeometry"}, {"dst", dst}};
 		log_error(json_err);
-	} else {
-		if (!SaveGeometryModelToFile(dst.c_str(), geo, optimisation_level)) {
-			const json json_err = {{"type", "FailedToSaveModel"}, {"dst", dst}};
-			log_error(json_err);
-		}
+		return false;
 	}
+
+	if (!SaveGeometryModelToFile(dst.c_str(), geo, optimisation_level)) {
+		const json json_err = {{"type", "FailedToSaveModel"}, {"dst", dst}};
+		log_error(json_err);
+		return false;
+	}
+
+	return true;
 }
 
 void Geometry(std::map<std::string, Hash> &hashes, const std::string &path) {
@@ -1125,7 +1785,8 @@ void Geometry(std::map<std::string, Hash> &hashes, const std::string &path) {
 		MkOutputTree(path);
 		CleanOutputs({path});
 
-		task_queue.emplace_back(task{path, [=]() { return std::async(std::launch::async, ProcessGeometry, src, dst, optimisation_level); }});
+		PushAsyncTask(
+			path, [=]() { return ProcessGeometry(src, dst, optimisation_level); }, JP_Normal, GetJobCost(src), {path});
 	} else {
 		debug("    [O] Geometry up to date");
 	}
@@ -1208,7 +1869,7 @@ static void BuildComputeShader(std::map<std::string, Hash> &hashes, const std::s
 									.arg(optim_flags)
 									.arg(vs_defines);
 
-			PushAsyncProcessTask(cs_path + " (Compute Shader)", cs_cmd, cwd);
+			PushAsyncProcessTask(cs_path + " (Compute Shader)", cs_cmd, cwd, JP_Low, 0, {cs_path});
 		} else {
 			debug("    [O] Compute shader up to date");
 		}
@@ -1280,7 +1941,7 @@ static void BuildShader(std::map<std::string, Hash> &hashes, const std::string &
 									.arg(optim_flags)
 									.arg(vs_defines);
 
-			PushAsyncProcessTask(name + " (Vertex Shader)", vs_cmd, cwd);
+			PushAsyncProcessTask(name + " (Vertex Shader)", vs_cmd, cwd, JP_Low, 0, {vs_name});
 		} else {
 			debug("    [O] Vertex shader up to date");
 		}
@@ -1321,7 +1982,7 @@ static void BuildShader(std::map<std::string, Hash> &hashes, const std::string &
 									.arg(optim_flags)
 									.arg(fs_defines);
 
-			PushAsyncProcessTask(name + " (Fragment Shader)", fs_cmd, cwd);
+			PushAsyncProcessTask(name + " (Fragment Shader)", fs_cmd, cwd, JP_Low, 0, {fs_name});
 		} else {
 			debug("    [O] Pixel shader up to date");
 		}
@@ -1458,7 +2119,7 @@ static void LuaScript(std::map<std::string, Hash> &hashes, const std::string &pa
 			CleanOutputs({path});
 
 			const auto cmd = format("%1 -o \"%3\" -s \"%2\"").arg(toolchain.luac).arg(src).arg(dst);
-			PushAsyncProcessTask(path, cmd, cwd);
+			PushAsyncProcessTask(path, cmd, cwd, JP_Low, 0, {path});
 		} else {
 			debug("  [O] Lua script up to date");
 		}
@@ -1474,18 +2135,23 @@ static void Physics(std::map<std::string, Hash> &hashes, const std::string &path
 	if (toolchain.bulletc.empty()) {
 		debug("    Skipping, no compiler found for physics bullet resource");
 	} else {
-		if (NeedsCompilation(hashes, {path}, {path}, {})) {
+		const auto bullet_path = path + "_bullet";
+
+		if (NeedsCompilation(hashes, {path}, {path, bullet_path}, {})) {
 			const auto cwd = GetCurrentWorkingDirectory();
 			const auto src = FullInputPath(path), dst = FullOutputPath(path);
 
+			MkOutputTree(path);
+			CleanOutputs({path, bullet_path});
+
 			if (!CopyFile(src.c_str(), dst.c_str())) {
 				ReportFailedInput(src);
 				const json json_err = {{"type", "FailedToCopyInput"}, {"src", src}, {"dst", dst}};
 				log_error(json_err);
 			}
 
-			const auto cmd = format("\"%1\" \"%2\" \"%3_bullet\" -root \"%4\"").arg(toolchain.bulletc).arg(src).arg(dst).arg(input_dir);
-			PushAsyncProcessTask(path, cmd, cwd);
+			const auto cmd = format("\"%1\" \"%2\" \"%3\" -root \"%4\"").arg(toolchain.bulletc).arg(src).arg(FullOutputPath(bullet_path)).arg(input_dir);
+			PushAsyncProcessTask(path, cmd, cwd, JP_Normal, GetJobCost(src), {path, bullet_path});
 		} else {
 			debug("  [O] Physics resource up to date");
 		}
@@ -1508,7 +2174,7 @@ static void PathFinding(std::map<std::string, Hash> &hashes, const std::string &
 			CleanOutputs({path});
 
 			const auto cmd = format("%1 \"%2\" \"%3\" -root \"%4\"").arg(toolchain.recastc).arg(src).arg(dst).arg(input_dir);
-			PushAsyncProcessTask(path, cmd, GetCurrentWorkingDirectory());
+			PushAsyncProcessTask(path, cmd, GetCurrentWorkingDirectory(), JP_High, GetJobCost(src), {path}); // navmesh generation is slow
 		} else {
 			debug("  [O] Pathfinding resource up to date");
 		}
@@ -1700,6 +2366,13 @@ static bool CompileClassifiedInputs(const std::map<std::vector<std::string>, Ass
 
 	std::map<std::string, Hash> updated_hashes;
 
+	if (!fast_check) {
+		std::vector<std::string> names;
+		for (const auto &i : inputs)
+			names.insert(std::end(names), std::begin(i.first), std::end(i.first));
+		HashModifiedSources(names);
+	}
+
 	const auto input_count = inputs.size();
 	size_t j = 0;
 
@@ -1743,10 +2416,25 @@ static bool CompileClassifiedInputs(const std::map<std::vector<std::string>, Ass
 		}
 	}
 
-	for (const auto &h : updated_hashes)
+	for (const auto &h : updated_hashes) {
 		compilation_db.source_hashes[h.first] = h.second; // commit updated hashes
 
+		const auto i = hashed_sources.find(h.first);
+		if (i != std::end(hashed_sources)) {
+			if (IsRacyHashedSource(i->second))
+				compilation_db.source_stats.erase(h.first);
+			else
+				compilation_db.source_stats[h.first] = i->second.stat;
+		}
+	}
+
+	hashed_sources.clear();
+
 	assetc::RunTaskQueue();
+
+	if (!assetc::cache_dir.empty())
+		assetc::StoreOutputsToCache();
+
 	assetc::SaveCompilationDB();
 
 	std::cout << "Compilation done, took " << time_to_ms(time_now() - t_start) << "ms" << std::endl;
@@ -1777,6 +2465,25 @@ static void CleanOutputsForRemovedInputs() {
 	std::cout << "Removed " << removed << " outputs due to missing input" << std::endl;
 }
 
+//
+static void PackOutputs(const std::string &path, bool deflate) {
+	ProfilerPerfSection perf("Manage/PackOutputs");
+
+	std::vector<std::string> outputs;
+	outputs.reserve(compilation_db.output_to_inputs.size());
+	for (const auto &i : compilation_db.output_to_inputs)
+		if (IsFile(FullOutputPath(i.first).c_str()))
+			outputs.push_back(i.first);
+
+	if (!PackAssets(output_dir.c_str(), outputs, path.c_str(), deflate)) {
+		const json json_err = {{"type", "FailedToPackOutputs"}, {"path", path}};
+		log_error(json_err);
+		return;
+	}
+
+	std::cout << "Packed " << outputs.size() << " outputs to " << path << std::endl;
+}
+
 //
 static void DaemonMode() {
 	log("Entering daemon mode, press Ctrl+C to close\n");
@@ -1879,6 +2586,7 @@ int main(int narg, const char **args) {
 			{"-verbose", "Output additional information about the compilation process"},
 			{"-fast_check", "Perform modification detection using input file timestamp"},
 			{"-no_clean_removed_inputs", "Do not remove outputs for removed input files"},
+			{"-pack_deflate", "Deflate packed assets which compress well"},
 		},
 		{
 			{"-job", "Maximum number of parallel job (0 - automatic)", true},
@@ -1887,6 +2595,9 @@ int main(int narg, const char **args) {
 			{"-api", "Select the platform graphic API to compile for", true},
 			{"-defines", "Semicolon separated defines to pass to shaderc (eg. FLAG;VALUE=2)", true},
 			{"-poll_pid", "Poll the provided process and exit assetc if down", true},
+			{"-pack", "Pack compiled assets to a memory-mapped package", true},
+			{"-job_report", "Write the duration of each compilation job to a JSON file", true},
+			{"-cache", "Shared build cache folder", true},
 		},
 		{
 			{"input", "Input folder to compile sources from"},
@@ -1935,7 +2646,15 @@ int main(int narg, const char **args) {
 
 	assetc::max_async_jobs = GetCmdLineSingleValue(cmd_content, "-job", 0);
 	if (assetc::max_async_jobs < 1)
-		assetc::max_async_jobs = std::thread::hardware_concurrency();
+		assetc::max_async_jobs = Max(int(std::thread::hardware_concurrency()), 1);
+
+	set_worker_count(assetc::max_async_jobs - 1); // in-process work (eg. source hashing) uses the calling thread plus the worker pool
+
+	assetc::job_report_path = GetCmdLineSingleValue(cmd_content, "-job_report", "");
+
+	assetc::cache_dir = GetCmdLineSingleValue(cmd_content, "-cache", "");
+	if (!assetc::cache_dir.empty())
+		assetc::cache_dir = CleanPath(assetc::cache_dir);
 
 	assetc::progress = GetCmdLineFlagValue(cmd_content, "-progress");
 	assetc::log_errors_to_stderr = GetCmdLineFlagValue(cmd_content, "-log_errors_to_stderr");
@@ -1990,6 +2709,8 @@ int main(int narg, const char **args) {
 	log(format("> Target pipeline: %1").arg(assetc::pipeline.name));
 	log("");
 	log(format("> Using %1 parallel job").arg(assetc::max_async_jobs));
+	if (!assetc::cache_dir.empty())
+		log(format("> Using shared build cache %1").arg(assetc::cache_dir));
 	log(format("> Toolchain compilers (%1):").arg(toolchain_path));
 	log(format("  - Shader      %1").arg(exe_path_or_nothing(assetc::toolchain.shaderc)));
 	log(format("  - Texture     %1").arg(exe_path_or_nothing(assetc::toolchain.texturec)));
@@ -2008,6 +2729,10 @@ int main(int narg, const char **args) {
 			assetc::CleanOutputsForRemovedInputs();
 
 		if (assetc::CompileClassifiedInputs(assetc::ClassifyInputDir())) {
+			const auto pack_path = GetCmdLineSingleValue(cmd_content, "-pack", std::string());
+			if (!pack_path.empty())
+				assetc::PackOutputs(pack_path, GetCmdLineFlagValue(cmd_content, "-pack_deflate"));
+
 			// enter daemon mode, process input dir files as they change
 			if (GetCmdLineFlagValue(cmd_content, "-daemon"))
 				assetc::DaemonMode();